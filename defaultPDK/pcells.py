@@ -62,7 +62,8 @@ class nmos(lshp.layoutPcell):
 
     def __call__(self, width:float, length:float, nf:int):
         '''
-        When pcell instance is called, it removes all the shapes and recreates them and adds them as child items to pcell.
+        When pcell instance is called, it sets the parameters and paints the
+        geometry evaluated for them, shared with other pcells with the same parameters.
         '''
         self._deviceWidth = float(width) # total gate width
         self._drawnWidth = int(self._deviceWidth * fabproc.dbu) # drawn gate width in grid points
@@ -70,7 +71,7 @@ class nmos(lshp.layoutPcell):
         self._drawnLength = int(self._deviceLength * fabproc.dbu) # drawn gate length in grid points
         self._nf = int(float(nf)) # number of fingers
         self._widthPerFinger = self._drawnWidth / self._nf
-        self.shapes = self.createGeometry()
+        self.evaluate()
 
     def createGeometry(self) -> list[lshp.layoutShape]:
         activeRect = lshp.layoutRect(
@@ -31,10 +31,45 @@ dbu = 100  # grid points per micron
 # Some predefined rules
 # via defintions
 con = ddef.viaDefTuple(
-    "con", laylyr.contactLayer_drw, "", "0.1", "10", "0.1", "10", "0.1", "10"
+    "con", laylyr.contactLayer_drw, "", "0.1", "10", "0.1", "10", "0.1", "10",
+    (laylyr.odLayer_drw, laylyr.poLayer_drw, laylyr.m1Layer_drw),
 )
 v1 = ddef.viaDefTuple(
-    "v1", laylyr.via1Layer_drw, "", "0.2", "10", "0.2", "10", "0.1", "10"
+    "v1", laylyr.via1Layer_drw, "", "0.2", "10", "0.2", "10", "0.1", "10",
+    (laylyr.m1Layer_drw, laylyr.m2Layer_drw),
 )
 processVias = [con, v1]
 processViaNames = [item.name for item in processVias]
+
+# design rules, distances in microns. Enclosure rules are on the enclosing layer.
+drcRules = [
+    ddef.drcRuleTuple("OD.W.1", "width", laylyr.odLayer_drw, 0.15),
+    ddef.drcRuleTuple("OD.S.1", "spacing", laylyr.odLayer_drw, 0.27),
+    ddef.drcRuleTuple("PO.W.1", "width", laylyr.poLayer_drw, 0.13),
+    ddef.drcRuleTuple("PO.S.1", "spacing", laylyr.poLayer_drw, 0.21),
+    ddef.drcRuleTuple(
+        "PO.S.2", "spacing", laylyr.poLayer_drw, 0.055, laylyr.contactLayer_drw
+    ),
+    ddef.drcRuleTuple("CO.W.1", "width", con.layer, float(con.minWidth)),
+    ddef.drcRuleTuple("CO.S.1", "spacing", con.layer, float(con.minSpacing)),
+    ddef.drcRuleTuple(
+        "OD.EN.1", "enclosure", laylyr.odLayer_drw, 0.06, laylyr.contactLayer_drw
+    ),
+    ddef.drcRuleTuple("M1.W.1", "width", laylyr.m1Layer_drw, 0.14),
+    ddef.drcRuleTuple("M1.S.1", "spacing", laylyr.m1Layer_drw, 0.14),
+    ddef.drcRuleTuple(
+        "M1.EN.1", "enclosure", laylyr.m1Layer_drw, 0.06, laylyr.contactLayer_drw
+    ),
+    ddef.drcRuleTuple(
+        "M1.EN.2", "enclosure", laylyr.m1Layer_drw, 0.05, laylyr.via1Layer_drw
+    ),
+    ddef.drcRuleTuple("M1.DN.1", "maxDensity", laylyr.m1Layer_drw, 0.85, window=50),
+    ddef.drcRuleTuple("V1.W.1", "width", v1.layer, float(v1.minWidth)),
+    ddef.drcRuleTuple("V1.S.1", "spacing", v1.layer, float(v1.minSpacing)),
+    ddef.drcRuleTuple("M2.W.1", "width", laylyr.m2Layer_drw, 0.14),
+    ddef.drcRuleTuple("M2.S.1", "spacing", laylyr.m2Layer_drw, 0.14),
+    ddef.drcRuleTuple(
+        "M2.EN.1", "enclosure", laylyr.m2Layer_drw, 0.05, laylyr.via1Layer_drw
+    ),
+    ddef.drcRuleTuple("M2.DN.1", "maxDensity", laylyr.m2Layer_drw, 0.85, window=50),
+]
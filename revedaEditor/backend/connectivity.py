@@ -0,0 +1,528 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+# Connectivity helpers shared by the schematic scene and the schematic model. Net
+# end points are hashed on integer coordinates so that finding the nets touching a
+# net is a dictionary lookup instead of a comparison with every other net. Nets
+# are also hashed on a grid of cells so that the nets through a pin are found
+# among the nets of the cells the pin covers. Net ends and pin locations are kept
+# in a point grid to find the points to snap a wire to around the cursor.
+
+from typing import Callable, Dict, Hashable, Iterable, List, Set, Tuple
+
+Point = Tuple[int, int]
+
+# end points within a manhattan distance of 1 are considered connected.
+CONNECT_OFFSETS = ((0, 0), (1, 0), (-1, 0), (0, 1), (0, -1))
+# half sizes of the pin connection areas, taken from symbolPin and schematicPin.
+SYMBOL_PIN_HALF = 5
+SCHEMATIC_PIN_HALF = 10
+SEGMENT_CELL_SIZE = 64  # side of the cells of the net segment hash
+
+
+class disjointSet:
+    """
+    Union-find structure with path compression and union by size.
+    """
+
+    def __init__(self, items: Iterable[Hashable] = ()):
+        self._parent: Dict[Hashable, Hashable] = dict()
+        self._size: Dict[Hashable, int] = dict()
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._parent
+
+    def add(self, item: Hashable) -> None:
+        if item not in self._parent:
+            self._parent[item] = item
+            self._size[item] = 1
+
+    def find(self, item: Hashable) -> Hashable:
+        root = item
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[item] != root:
+            self._parent[item], item = root, self._parent[item]
+        return root
+
+    def union(self, item: Hashable, otherItem: Hashable) -> Hashable:
+        root = self.find(item)
+        otherRoot = self.find(otherItem)
+        if root == otherRoot:
+            return root
+        if self._size[root] < self._size[otherRoot]:
+            root, otherRoot = otherRoot, root
+        self._parent[otherRoot] = root
+        self._size[root] += self._size[otherRoot]
+        return root
+
+    def connected(self, item: Hashable, otherItem: Hashable) -> bool:
+        return self.find(item) == self.find(otherItem)
+
+    def groups(self) -> Dict[Hashable, Set[Hashable]]:
+        """
+        Return the members of each group keyed by the group root.
+        """
+        groupsDict: Dict[Hashable, Set[Hashable]] = dict()
+        for item in self._parent:
+            groupsDict.setdefault(self.find(item), set()).add(item)
+        return groupsDict
+
+
+class pointHash:
+    """
+    Spatial hash of items keyed by integer points.
+    """
+
+    def __init__(self):
+        self._points: Dict[Point, List[Hashable]] = dict()
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def add(self, point: Point, item: Hashable) -> None:
+        items = self._points.setdefault(point, [])
+        if item not in items:
+            items.append(item)
+
+    def remove(self, point: Point, item: Hashable) -> None:
+        items = self._points.get(point)
+        if items and item in items:
+            items.remove(item)
+            if not items:
+                del self._points[point]
+
+    def itemsAt(self, point: Point) -> List[Hashable]:
+        return self._points.get(point, [])
+
+    def itemsNear(self, point: Point) -> List[Hashable]:
+        """
+        Items within a manhattan distance of 1 to point.
+        """
+        found = []
+        x, y = point
+        for dx, dy in CONNECT_OFFSETS:
+            for item in self._points.get((x + dx, y + dy), ()):
+                if item not in found:
+                    found.append(item)
+        return found
+
+
+def segmentTouchesRect(
+    start: Tuple[int, int], end: Tuple[int, int], centre: Tuple[int, int], half: float
+) -> bool:
+    """
+    Check if a line segment intersects a square of half size `half` around centre.
+    """
+    left, right = centre[0] - half, centre[0] + half
+    top, bottom = centre[1] - half, centre[1] + half
+    x1, y1 = start
+    x2, y2 = end
+    # Liang-Barsky clipping of the segment against the square.
+    t0, t1 = 0.0, 1.0
+    dx, dy = x2 - x1, y2 - y1
+    for p, q in ((-dx, x1 - left), (dx, right - x1), (-dy, y1 - top), (dy, bottom - y1)):
+        if p == 0:
+            if q < 0:
+                return False
+        else:
+            t = q / p
+            if p < 0:
+                if t > t1:
+                    return False
+                t0 = max(t0, t)
+            else:
+                if t < t0:
+                    return False
+                t1 = min(t1, t)
+    return True
+
+
+def segmentKey(start: Point, end: Point) -> Tuple[Point, Point]:
+    """
+    Sort key of a segment by its end points, the same whichever way it was drawn.
+    """
+    return (start, end) if start <= end else (end, start)
+
+
+class segmentHash:
+    """
+    Spatial hash of net segments on a grid of square cells. A segment is kept in
+    the cells its bounding box covers. Items are returned ordered by their end
+    points, so the order does not depend on the order the segments were added in.
+    """
+
+    def __init__(self, cellSize: int = SEGMENT_CELL_SIZE):
+        self._cellSize = cellSize
+        self._cells: Dict[Point, Dict[Hashable, None]] = dict()
+        # item -> (start, end, order of adding)
+        self._segments: Dict[Hashable, Tuple[Point, Point, int]] = dict()
+        self._addCount = 0
+
+    def __len__(self) -> int:
+        return len(self._segments)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._segments
+
+    def _cellKeys(self, left: float, top: float, right: float,
+                  bottom: float) -> Iterable[Point]:
+        cellSize = self._cellSize
+        for cellX in range(int(left // cellSize), int(right // cellSize) + 1):
+            for cellY in range(int(top // cellSize), int(bottom // cellSize) + 1):
+                yield cellX, cellY
+
+    def add(self, item: Hashable, start: Point, end: Point) -> None:
+        if item in self._segments:
+            self.remove(item)
+        self._segments[item] = (start, end, self._addCount)
+        self._addCount += 1
+        for key in self._cellKeys(min(start[0], end[0]), min(start[1], end[1]),
+                                  max(start[0], end[0]), max(start[1], end[1])):
+            self._cells.setdefault(key, dict())[item] = None
+
+    def remove(self, item: Hashable) -> None:
+        segment = self._segments.pop(item, None)
+        if segment is None:
+            return
+        start, end, _ = segment
+        for key in self._cellKeys(min(start[0], end[0]), min(start[1], end[1]),
+                                  max(start[0], end[0]), max(start[1], end[1])):
+            cellItems = self._cells.get(key)
+            if cellItems is not None:
+                cellItems.pop(item, None)
+                if not cellItems:
+                    del self._cells[key]
+
+    def itemsTouching(self, centre: Point, half: float) -> List[Hashable]:
+        """
+        Segments crossing a square of half size `half` around centre.
+        """
+        found = dict()
+        for key in self._cellKeys(centre[0] - half, centre[1] - half,
+                                  centre[0] + half, centre[1] + half):
+            found.update(self._cells.get(key, ()))
+        touching = []
+        for item in found:
+            start, end, order = self._segments[item]
+            if segmentTouchesRect(start, end, centre, half):
+                touching.append((segmentKey(start, end), order, item))
+        touching.sort(key=lambda keyItem: keyItem[:2])
+        return [item for _, _, item in touching]
+
+
+class pointGrid:
+    """
+    Spatial hash of connection points on a grid of square cells. Each item has
+    one or more points and a reach, the half width and half height of the area
+    around its points where it can be connected. Points are returned in the order
+    they were added.
+    """
+
+    def __init__(self, cellSize: int = SEGMENT_CELL_SIZE):
+        self._cellSize = cellSize
+        self._cells: Dict[Point, Dict[Hashable, None]] = dict()
+        # item -> (points, reach, order of adding)
+        self._items: Dict[
+            Hashable, Tuple[Tuple[Point, ...], Tuple[float, float], int]
+        ] = dict()
+        self._addCount = 0
+        self._maxReach = 0.0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._items
+
+    def _cellKeys(self, left: float, top: float, right: float,
+                  bottom: float) -> Iterable[Point]:
+        cellSize = self._cellSize
+        for cellX in range(int(left // cellSize), int(right // cellSize) + 1):
+            for cellY in range(int(top // cellSize), int(bottom // cellSize) + 1):
+                yield cellX, cellY
+
+    def add(self, item: Hashable, points: Iterable[Point],
+            reach: Tuple[float, float] = (0, 0)) -> None:
+        if item in self._items:
+            self.remove(item)
+        points = tuple(points)
+        self._items[item] = (points, reach, self._addCount)
+        self._addCount += 1
+        self._maxReach = max(self._maxReach, *reach)
+        cellSize = self._cellSize
+        for x, y in points:
+            self._cells.setdefault((x // cellSize, y // cellSize), dict())[item] = None
+
+    def remove(self, item: Hashable) -> None:
+        entry = self._items.pop(item, None)
+        if entry is None:
+            return
+        cellSize = self._cellSize
+        for x, y in entry[0]:
+            key = (x // cellSize, y // cellSize)
+            cellItems = self._cells.get(key)
+            if cellItems is not None:
+                cellItems.pop(item, None)
+                if not cellItems:
+                    del self._cells[key]
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._items.clear()
+        self._maxReach = 0.0
+
+    def pointsIn(self, left: int, top: int, right: int,
+                 bottom: int) -> List[Tuple[Hashable, Point]]:
+        """
+        Points of the items reaching into the rectangle, edges included.
+        """
+        margin = self._maxReach
+        found = dict()
+        for key in self._cellKeys(left - margin, top - margin, right + margin,
+                                  bottom + margin):
+            found.update(self._cells.get(key, ()))
+        entries = sorted((self._items[item][2], item) for item in found)
+        pointsFound = []
+        for _, item in entries:
+            points, (reachX, reachY), _ = self._items[item]
+            for x, y in points:
+                if (left - reachX <= x <= right + reachX
+                        and top - reachY <= y <= bottom + reachY):
+                    pointsFound.append((item, (x, y)))
+        return pointsFound
+
+
+def netNeighbours(
+    netItems: Iterable[Hashable], endPoints: Callable[[Hashable], Iterable[Point]]
+) -> Dict[Hashable, List[Hashable]]:
+    """
+    For each net, find the nets whose end points touch its end points. endPoints
+    returns the integer end points of a net.
+    """
+    netItems = list(netItems)
+    endPointHash = pointHash()
+    netEnds = {netItem: tuple(endPoints(netItem)) for netItem in netItems}
+    for netItem, ends in netEnds.items():
+        for point in ends:
+            endPointHash.add(point, netItem)
+    neighbours: Dict[Hashable, List[Hashable]] = dict()
+    for netItem, ends in netEnds.items():
+        neighbourList = []
+        for point in ends:
+            for otherNet in endPointHash.itemsNear(point):
+                if otherNet is not netItem and otherNet not in neighbourList:
+                    neighbourList.append(otherNet)
+        neighbours[netItem] = neighbourList
+    return neighbours
+
+
+def connectedGroups(
+    netItems: Iterable[Hashable], endPoints: Callable[[Hashable], Iterable[Point]]
+) -> disjointSet:
+    """
+    Group nets connected through their end points.
+    """
+    netItems = list(netItems)
+    netGroups = disjointSet(netItems)
+    for netItem, neighbourList in netNeighbours(netItems, endPoints).items():
+        for otherNet in neighbourList:
+            netGroups.union(netItem, otherNet)
+    return netGroups
+
+
+class netGraph:
+    """
+    Live connectivity graph of nets. Nets are added, removed and updated as they
+    change and the nets whose connections changed are remembered, so that net names
+    are only worked out again for the affected connected groups.
+    """
+
+    def __init__(
+        self,
+        endPoints: Callable[[Hashable], Iterable[Point]],
+        pinPoints: Callable[
+            [Hashable], Iterable[Tuple[Hashable, Point, Tuple[float, float]]]
+        ] = (lambda item: ()),
+    ):
+        # pinPoints returns the pins of an item with their locations and reaches,
+        # nothing if the item is no longer in the scene.
+        self._endPoints = endPoints
+        self._pinPoints = pinPoints
+        self._netEnds: Dict[Hashable, Tuple[Point, ...]] = dict()
+        self._pointHash = pointHash()
+        self._segmentHash = segmentHash()
+        self._pointGrid = pointGrid()
+        self._itemPins: Dict[Hashable, List[Hashable]] = dict()
+        self._movedItems: Set[Hashable] = set()
+        self._neighbours: Dict[Hashable, List[Hashable]] = dict()
+        self._dirtyNets: Set[Hashable] = set()
+        self._removedNets: Set[Hashable] = set()
+        self._dirtyItems: Set[Hashable] = set()
+
+    def __contains__(self, netItem: Hashable) -> bool:
+        return netItem in self._netEnds
+
+    def __len__(self) -> int:
+        return len(self._netEnds)
+
+    @property
+    def nets(self) -> Set[Hashable]:
+        return set(self._netEnds)
+
+    @property
+    def neighbours(self) -> Dict[Hashable, List[Hashable]]:
+        return self._neighbours
+
+    @property
+    def isDirty(self) -> bool:
+        return bool(self._dirtyNets or self._removedNets or self._dirtyItems)
+
+    def addNet(self, netItem: Hashable) -> None:
+        if netItem in self._netEnds:
+            self.removeNet(netItem)
+        ends = tuple(self._endPoints(netItem))
+        neighbourList = []
+        for point in ends:
+            for otherNet in self._pointHash.itemsNear(point):
+                if otherNet is not netItem and otherNet not in neighbourList:
+                    neighbourList.append(otherNet)
+                    if netItem not in self._neighbours[otherNet]:
+                        self._neighbours[otherNet].append(netItem)
+        for point in ends:
+            self._pointHash.add(point, netItem)
+        if len(ends) == 2:
+            self._segmentHash.add(netItem, *ends)
+        self._pointGrid.add(netItem, ends)
+        self._netEnds[netItem] = ends
+        self._neighbours[netItem] = neighbourList
+        self._removedNets.discard(netItem)
+        self._dirtyNets.add(netItem)
+
+    def removeNet(self, netItem: Hashable) -> None:
+        ends = self._netEnds.pop(netItem, None)
+        if ends is None:
+            return
+        for point in ends:
+            self._pointHash.remove(point, netItem)
+        self._segmentHash.remove(netItem)
+        self._pointGrid.remove(netItem)
+        for otherNet in self._neighbours.pop(netItem, []):
+            self._neighbours[otherNet].remove(netItem)
+            self._dirtyNets.add(otherNet)
+        self._dirtyNets.discard(netItem)
+        self._removedNets.add(netItem)
+
+    def updateNet(self, netItem: Hashable) -> None:
+        """
+        Rehash a net if its end points have moved.
+        """
+        if netItem in self._netEnds and (
+            tuple(self._endPoints(netItem)) != self._netEnds[netItem]
+        ):
+            self.removeNet(netItem)
+            self.addNet(netItem)
+
+    def markDirty(self, netItem: Hashable) -> None:
+        if netItem in self._netEnds:
+            self._dirtyNets.add(netItem)
+
+    def markItemDirty(self, item: Hashable) -> None:
+        """
+        Remember an item other than a net, e.g. a pin, which changed connections.
+        """
+        self._dirtyItems.add(item)
+        self._movedItems.add(item)
+
+    def clear(self) -> None:
+        """
+        Forget all the nets and items, e.g. when the scene is cleared.
+        """
+        self._netEnds.clear()
+        self._pointHash = pointHash()
+        self._segmentHash = segmentHash()
+        self._pointGrid.clear()
+        self._itemPins.clear()
+        self._movedItems.clear()
+        self._neighbours.clear()
+        self._dirtyNets.clear()
+        self._removedNets.clear()
+        self._dirtyItems.clear()
+
+    def _updatePins(self) -> None:
+        """
+        Rehash the pins of the items which changed since the last query.
+        """
+        for item in self._movedItems:
+            for pinItem in self._itemPins.pop(item, ()):
+                self._pointGrid.remove(pinItem)
+            pinItems = []
+            for pinItem, point, reach in self._pinPoints(item):
+                self._pointGrid.add(pinItem, (point,), reach)
+                pinItems.append(pinItem)
+            if pinItems:
+                self._itemPins[item] = pinItems
+        self._movedItems.clear()
+
+    def connectPointsIn(self, left: int, top: int, right: int,
+                        bottom: int) -> List[Tuple[Hashable, Point]]:
+        """
+        Net end points inside the rectangle and the locations of the pins reaching
+        into it, with the net or pin they belong to.
+        """
+        if self._movedItems:
+            self._updatePins()
+        return self._pointGrid.pointsIn(left, top, right, bottom)
+
+    def netsNear(self, point: Point) -> List[Hashable]:
+        return self._pointHash.itemsNear(point)
+
+    def netsTouching(self, centre: Point, half: float) -> List[Hashable]:
+        """
+        Nets crossing the connection area of a pin, ordered by their end points so
+        that the first net does not depend on the order of editing.
+        """
+        return self._segmentHash.itemsTouching(centre, half)
+
+    def component(self, netItem: Hashable) -> Set[Hashable]:
+        """
+        All the nets connected to netItem through their end points.
+        """
+        if netItem not in self._netEnds:
+            return set()
+        connectedSet = {netItem}
+        frontier = [netItem]
+        while frontier:
+            for otherNet in self._neighbours[frontier.pop()]:
+                if otherNet not in connectedSet:
+                    connectedSet.add(otherNet)
+                    frontier.append(otherNet)
+        return connectedSet
+
+    def takeDirty(self) -> Tuple[Set[Hashable], Set[Hashable], Set[Hashable]]:
+        """
+        Return and forget the changed nets, removed nets and changed other items.
+        """
+        dirty = (self._dirtyNets, self._removedNets, self._dirtyItems)
+        self._dirtyNets, self._removedNets, self._dirtyItems = set(), set(), set()
+        return dirty
@@ -108,6 +108,7 @@ class layoutModes(editModes):
     drawCircle: bool
     drawRuler: bool
     addInstance: bool
+    highlightNet: bool
 
 
 @dataclass
@@ -137,6 +138,30 @@ class layoutSelectModes(selectModes):
     selectPin: bool
 
 
+@dataclass
+class levelOfDetail:
+    enabled: bool = True
+    minShapeSize: float = 1.0  # shapes smaller than this in pixels are drawn as dots
+    cullSmallShapes: bool = False  # skip small shapes instead of drawing dots
+    minInstanceSize: float = 8.0  # smaller instances in pixels are drawn as boxes
+    fillScale: float = 0.1  # fill patterns are not drawn below this view scale
+
+
+@dataclass
+class itemCacheSettings:
+    enabled: bool = True
+    budget: int = 64  # pixmap cache budget in MB
+    cacheInstances: bool = True  # cache instances drawn from a master
+    minPolygonPoints: int = 64  # polygons with at least this many points are cached
+
+
+class itemCacheUsage(NamedTuple):
+    cachedItems: int
+    evictedItems: int
+    usedBytes: int
+    budgetBytes: int
+
+
 # library editor related named tuples
 class viewTuple(NamedTuple):
     libraryName: str
@@ -203,6 +228,8 @@ class viaDefTuple(NamedTuple):
     maxHeight: float
     minSpacing: float
     maxSpacing: float
+    # layers joined by the via, for net extraction.
+    connects: tuple = ()
 
 
 class singleViaTuple(NamedTuple):
@@ -219,6 +246,15 @@ class arrayViaTuple(NamedTuple):
     ynum: int
 
 
+class drcRuleTuple(NamedTuple):
+    name: str
+    type: str  # width, spacing, enclosure, minDensity or maxDensity
+    layer: layLayer
+    value: float  # distance in microns, or density as a fraction of the window
+    otherLayer: layLayer = None  # enclosed layer, or the other layer of a spacing
+    window: float = 0.0  # side of the density window in microns
+
+
 # rectangle coordinates tuple
 
 
@@ -0,0 +1,535 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+# Persistent index of the design hierarchy of all the libraries. For each cellview
+# it records the cellviews it instantiates, so that config views, "where used"
+# lists and the cellviews affected by an edit are found without opening any
+# schematic. The index is saved to a file and brought up to date by comparing the
+# modification times and sizes of the cellview files; only changed files are read
+# again, in a process pool if there are many of them.
+
+import json
+import logging
+import multiprocessing
+import os
+import pathlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import revedaEditor.backend.dataDefinitions as ddef
+import revedaEditor.fileio.compactCellview as cv
+
+INDEX_FILE_NAME = ".revedaHierarchy.json"
+# change when the recorded references of the same files change.
+INDEX_FORMAT_VERSION = 1
+# minimum number of changed cellview files to read them in a process pool.
+PARALLEL_SCAN_COUNT = 64
+# view types are found from view names in the order of this tuple.
+VIEW_TYPES = ("schematic", "symbol", "veriloga", "config", "xyce", "spice", "myhdl",
+              "layout", "pcell", "revbench")
+# view types whose files can instantiate other cellviews.
+HIERARCHY_VIEW_TYPES = frozenset(("schematic", "layout", "config"))
+INSTANCE_TYPES = frozenset(("sys", "Inst", "Pcell"))
+
+Stamp = Tuple[int, int]  # modification time in ns and file size.
+
+
+def viewTypeOf(viewName: str) -> Optional[str]:
+    """
+    Find the type of a view from its name, e.g. schematic_tb is a schematic.
+    """
+    for viewType in VIEW_TYPES:
+        if viewType in viewName:
+            return viewType
+    return None
+
+
+def fileStamp(filePathObj: pathlib.Path) -> Stamp:
+    stat = filePathObj.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def readReferences(
+    viewTuple: ddef.viewTuple, filePathObj: pathlib.Path
+) -> Tuple[ddef.viewTuple, ...]:
+    """
+    Read the cellviews instantiated by a cellview in the order they are first
+    found. A config view refers to its schematic and to the views chosen for the
+    cells. Rectangles of compact layouts are not read.
+
+    Raises:
+        OSError: If the file cannot be read.
+        ValueError: If the file is not a valid cellview.
+    """
+    references: Dict[ddef.viewTuple, None] = dict()
+    match viewTypeOf(viewTuple.viewName):
+        case "config":
+            with filePathObj.open(mode="r") as f:
+                items = json.load(f)
+            if len(items) > 1 and items[1].get("reference"):
+                references[
+                    ddef.viewTuple(
+                        viewTuple.libraryName, viewTuple.cellName, items[1]["reference"]
+                    )
+                ] = None
+            if len(items) > 2:
+                for cellName, cellLine in items[2].items():
+                    references[ddef.viewTuple(cellLine[0], cellName, cellLine[1])] = None
+        case "schematic" | "layout":
+            with cv.cellviewReader(filePathObj) as reader:
+                for item in reader.items(rects=False):
+                    if item.get("type") in INSTANCE_TYPES:
+                        references[
+                            ddef.viewTuple(item["lib"], item["cell"], item["view"])
+                        ] = None
+    return tuple(references)
+
+
+def _readReferencesTask(task: tuple) -> Tuple[ddef.viewTuple, Optional[tuple], str]:
+    viewTuple, filePathObj = task
+    try:
+        return viewTuple, readReferences(viewTuple, filePathObj), ""
+    except (OSError, ValueError, KeyError, AttributeError, TypeError) as e:
+        return viewTuple, None, str(e)
+
+
+@dataclass
+class cellviewEntry:
+    """
+    A cellview file and the cellviews it instantiates.
+    """
+
+    viewTuple: ddef.viewTuple
+    fileName: str
+    stamp: Stamp
+    references: Tuple[ddef.viewTuple, ...]
+
+
+class hierarchyIndex:
+    """
+    Cellviews instantiated by each cellview of the libraries and the cellviews
+    using each cell. Call refresh() to bring the index up to date with the files
+    before asking questions about the hierarchy.
+    """
+
+    def __init__(
+        self,
+        libraryDict: Dict[str, pathlib.Path],
+        indexPathObj: Optional[pathlib.Path] = None,
+        logger: Optional[logging.Logger] = None,
+        maxWorkers: Optional[int] = None,
+    ):
+        self.libraryDict = libraryDict
+        self.indexPathObj = indexPathObj  # not saved if None.
+        self.logger = logger or logging.getLogger("reveda")
+        self.maxWorkers = maxWorkers
+        self._entries: Dict[ddef.viewTuple, cellviewEntry] = dict()
+        self._cellViews: Dict[ddef.cellTuple, Dict[str, None]] = dict()
+        self._usedBy: Dict[ddef.cellTuple, Dict[ddef.viewTuple, None]] = dict()
+        self._loaded = False
+        self._changed = False  # not saved since the last change.
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, viewTuple: ddef.viewTuple) -> bool:
+        return viewTuple in self._entries
+
+    # cells are keyed by the (library, cell) part of view tuples, which is equal to
+    # the cell tuple of the cell.
+    def _addEntry(self, entry: cellviewEntry) -> None:
+        viewTuple = entry.viewTuple
+        self._entries[viewTuple] = entry
+        self._cellViews.setdefault(viewTuple[:2], dict())[viewTuple.viewName] = None
+        usedBy = self._usedBy
+        for reference in entry.references:
+            users = usedBy.get(reference[:2])
+            if users is None:
+                users = usedBy[reference[:2]] = dict()
+            users[viewTuple] = None
+
+    def _removeEntry(self, viewTuple: ddef.viewTuple) -> None:
+        entry = self._entries.pop(viewTuple, None)
+        if entry is None:
+            return
+        cellTuple = viewTuple[:2]
+        viewNames = self._cellViews.get(cellTuple)
+        if viewNames is not None:
+            viewNames.pop(viewTuple.viewName, None)
+            if not viewNames:
+                del self._cellViews[cellTuple]
+        for reference in entry.references:
+            referenceCell = reference[:2]
+            users = self._usedBy.get(referenceCell)
+            if users is not None:
+                users.pop(viewTuple, None)
+                if not users:
+                    del self._usedBy[referenceCell]
+
+    def load(self) -> None:
+        """
+        Read the saved index. An unreadable or outdated index file is ignored and
+        the index is built again from the cellview files.
+        """
+        self._loaded = True
+        if self.indexPathObj is None or not self.indexPathObj.exists():
+            return
+        try:
+            with self.indexPathObj.open(mode="r") as f:
+                data = json.load(f)
+            if data.get("version") != INDEX_FORMAT_VERSION:
+                return
+            views = [ddef.viewTuple(*viewList) for viewList in data["views"]]
+            entries = [
+                cellviewEntry(
+                    views[viewIndex],
+                    fileName,
+                    (mtimeNs, size),
+                    tuple([views[index] for index in references]),
+                )
+                for viewIndex, fileName, mtimeNs, size, references in data["cellviews"]
+            ]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.logger.warning(f"Hierarchy index {self.indexPathObj} is ignored: {e}")
+            return
+        for entry in entries:
+            self._addEntry(entry)
+
+    def save(self) -> None:
+        """
+        Write the index to its file if it changed since it was last saved.
+        Cellviews are stored once in a table and referred to by their positions
+        in it.
+        """
+        if self.indexPathObj is None or not self._changed:
+            return
+        viewIndices: Dict[ddef.viewTuple, int] = dict()
+        cellviews = []
+        for viewTuple in sorted(self._entries):
+            entry = self._entries[viewTuple]
+            references = []
+            for reference in (viewTuple, *entry.references):
+                index = viewIndices.get(reference)
+                if index is None:
+                    index = viewIndices[reference] = len(viewIndices)
+                references.append(index)
+            cellviews.append(
+                [references[0], entry.fileName, *entry.stamp, references[1:]]
+            )
+        data = {
+            "version": INDEX_FORMAT_VERSION,
+            "views": [list(viewTuple) for viewTuple in viewIndices],
+            "cellviews": cellviews,
+        }
+        tempPathObj = self.indexPathObj.with_name(f"{self.indexPathObj.name}.tmp")
+        try:
+            with tempPathObj.open(mode="w") as f:
+                f.write(json.dumps(data, separators=(",", ":")))
+            os.replace(tempPathObj, self.indexPathObj)
+            self._changed = False
+        except OSError as e:
+            self.logger.warning(f"Cannot save hierarchy index {self.indexPathObj}: {e}")
+
+    def cellviewFiles(self) -> Dict[ddef.viewTuple, pathlib.Path]:
+        """
+        Find the cellview files of the libraries. A compact file is taken if a
+        cellview has files in both formats.
+        """
+        viewFiles: Dict[ddef.viewTuple, pathlib.Path] = dict()
+        for libraryName, libraryPathObj in self.libraryDict.items():
+            libraryPathObj = pathlib.Path(libraryPathObj)
+            if not libraryPathObj.joinpath("reveda.lib").exists():
+                continue
+            for cellPathObj in libraryPathObj.iterdir():
+                if not cellPathObj.is_dir():
+                    continue
+                for viewPathObj in cellPathObj.iterdir():
+                    if not cv.isCellviewPath(viewPathObj):
+                        continue
+                    viewTuple = ddef.viewTuple(
+                        libraryName, cellPathObj.name, viewPathObj.stem
+                    )
+                    if viewTuple not in viewFiles or cv.isCompactPath(viewPathObj):
+                        viewFiles[viewTuple] = viewPathObj
+        return viewFiles
+
+    def refresh(self) -> Set[ddef.viewTuple]:
+        """
+        Read the cellview files added or changed since the last refresh and forget
+        the removed ones. Return the cellviews which changed.
+        """
+        if not self._loaded:
+            self.load()
+        viewFiles = self.cellviewFiles()
+        changedViews = set(self._entries) - set(viewFiles)
+        for viewTuple in changedViews:
+            self._removeEntry(viewTuple)
+            self._changed = True
+        stamps: Dict[ddef.viewTuple, Stamp] = dict()
+        for viewTuple, filePathObj in viewFiles.items():
+            try:
+                stamp = fileStamp(filePathObj)
+            except OSError:
+                continue
+            entry = self._entries.get(viewTuple)
+            if (
+                entry is None
+                or entry.stamp != stamp
+                or entry.fileName != filePathObj.name
+            ):
+                stamps[viewTuple] = stamp
+        if stamps:
+            self._readEntries(
+                [(viewTuple, viewFiles[viewTuple]) for viewTuple in stamps], stamps
+            )
+            changedViews.update(stamps)
+        self.save()
+        return changedViews
+
+    def _readEntries(
+        self,
+        tasks: List[Tuple[ddef.viewTuple, pathlib.Path]],
+        stamps: Dict[ddef.viewTuple, Stamp],
+    ) -> Set[ddef.viewTuple]:
+        """
+        Read the references of the cellview files and return the cellviews which
+        are new or whose references or file names changed.
+        """
+        readTasks = [
+            task for task in tasks if viewTypeOf(task[0].viewName) in HIERARCHY_VIEW_TYPES
+        ]
+        if (
+            len(readTasks) >= PARALLEL_SCAN_COUNT
+            and self.maxWorkers != 1
+            and (os.cpu_count() or 1) > 1
+        ):
+            # processes are spawned so that they do not inherit the state of the GUI.
+            with ProcessPoolExecutor(
+                max_workers=self.maxWorkers,
+                mp_context=multiprocessing.get_context("spawn"),
+            ) as executor:
+                results = list(executor.map(_readReferencesTask, readTasks,
+                                            chunksize=16))
+        else:
+            results = [_readReferencesTask(task) for task in readTasks]
+        referencesDict = dict()
+        for viewTuple, references, message in results:
+            if references is None:
+                self.logger.error(f"Cannot read {viewTuple}: {message}")
+                references = ()
+            referencesDict[viewTuple] = references
+        changedViews = set()
+        for viewTuple, filePathObj in tasks:
+            entry = cellviewEntry(
+                viewTuple,
+                filePathObj.name,
+                stamps[viewTuple],
+                referencesDict.get(viewTuple, ()),
+            )
+            oldEntry = self._entries.get(viewTuple)
+            if oldEntry == entry:
+                continue
+            self._changed = True
+            if oldEntry is None or (oldEntry.references, oldEntry.fileName) != (
+                entry.references,
+                entry.fileName,
+            ):
+                changedViews.add(viewTuple)
+            self._removeEntry(viewTuple)
+            self._addEntry(entry)
+        return changedViews
+
+    def updateCellview(
+        self, libraryName: str, cellName: str, viewName: str
+    ) -> Set[ddef.viewTuple]:
+        """
+        Read a cellview again after it is saved and return the cellviews using
+        it directly or through other cellviews. The index file is only written if
+        the cellview was added, removed or its references changed, a new file
+        stamp alone is saved with the next such change or refresh.
+        """
+        if not self._loaded:
+            self.load()
+        viewTuple = ddef.viewTuple(libraryName, cellName, viewName)
+        libraryPathObj = self.libraryDict.get(libraryName)
+        if libraryPathObj is not None:
+            filePathObj = cv.cellviewPath(
+                pathlib.Path(libraryPathObj).joinpath(cellName), viewName
+            )
+            try:
+                stamp = fileStamp(filePathObj)
+            except OSError:
+                if viewTuple in self._entries:
+                    self._removeEntry(viewTuple)
+                    self._changed = True
+                    self.save()
+            else:
+                if self._readEntries([(viewTuple, filePathObj)], {viewTuple: stamp}):
+                    self.save()
+        return self.impactedViews(libraryName, cellName)
+
+    def references(self, viewTuple: ddef.viewTuple) -> Tuple[ddef.viewTuple, ...]:
+        """
+        Cellviews instantiated by a cellview.
+        """
+        entry = self._entries.get(viewTuple)
+        return entry.references if entry is not None else ()
+
+    def viewNames(self, libraryName: str, cellName: str) -> List[str]:
+        return list(self._cellViews.get(ddef.cellTuple(libraryName, cellName), ()))
+
+    def viewStamp(self, viewTuple: ddef.viewTuple) -> Optional[Stamp]:
+        entry = self._entries.get(viewTuple)
+        return entry.stamp if entry is not None else None
+
+    def whereUsed(
+        self, libraryName: str, cellName: str, viewName: Optional[str] = None
+    ) -> List[ddef.viewTuple]:
+        """
+        Cellviews instantiating a cell, or only a view of it if viewName is given.
+        """
+        users = self._usedBy.get(ddef.cellTuple(libraryName, cellName), ())
+        if viewName is not None:
+            viewTuple = ddef.viewTuple(libraryName, cellName, viewName)
+            users = [
+                userView
+                for userView in users
+                if viewTuple in self._entries[userView].references
+            ]
+        return sorted(users)
+
+    def impactedViews(self, libraryName: str, cellName: str) -> Set[ddef.viewTuple]:
+        """
+        Cellviews using any view of a cell directly or through other cells, i.e.
+        the cellviews whose netlists or layouts may change if the cell is edited.
+        """
+        impacted: Set[ddef.viewTuple] = set()
+        visitedCells = {(libraryName, cellName)}
+        frontier = list(visitedCells)
+        while frontier:
+            for userView in self._usedBy.get(frontier.pop(), ()):
+                if userView in impacted:
+                    continue
+                impacted.add(userView)
+                userCell = userView[:2]
+                if userCell not in visitedCells:
+                    visitedCells.add(userCell)
+                    frontier.append(userCell)
+        return impacted
+
+    def configDict(
+        self,
+        topViewTuple: ddef.viewTuple,
+        switchViewList: List[str],
+        configDict: Optional[dict] = None,
+        processedCells: Optional[Set[ddef.cellTuple]] = None,
+        liveReferences: Optional[Dict[ddef.viewTuple, Tuple[ddef.viewTuple, ...]]] = None,
+    ) -> dict:
+        """
+        Choose the view of each cell below a schematic in the same way as a config
+        view: the first view in switchViewList unless configDict chooses another
+        one. Schematic views are followed down the hierarchy. liveReferences
+        replaces the saved references of cellviews being edited.
+        """
+        configDict = configDict or dict()
+        processedCells = set() if processedCells is None else processedCells
+        liveReferences = liveReferences or dict()
+        newConfigDict = dict()
+
+        def visit(viewTuple: ddef.viewTuple):
+            references = liveReferences.get(viewTuple)
+            if references is None:
+                references = self.references(viewTuple)
+            for reference in references:
+                if reference[:2] in processedCells:
+                    continue
+                cellTuple = ddef.cellTuple(reference.libraryName, reference.cellName)
+                viewNames = self.viewNames(*cellTuple)
+                netlistableViews = [
+                    viewName for viewName in switchViewList if viewName in viewNames
+                ]
+                itemSwitchViewList = list(netlistableViews)
+                if cellLine := configDict.get(reference.cellName):
+                    netlistableViews = [cellLine[1]]
+                for viewName in netlistableViews:
+                    newConfigDict[reference.cellName] = [
+                        reference.libraryName,
+                        viewName,
+                        itemSwitchViewList,
+                    ]
+                    if viewTypeOf(viewName) == "schematic":
+                        visit(ddef.viewTuple(*cellTuple, viewName))
+                    break
+                processedCells.add(cellTuple)
+
+        visit(topViewTuple)
+        return newConfigDict
+
+    def netlistDependencies(
+        self,
+        topViewTuple: ddef.viewTuple,
+        switchViewList: List[str],
+        stopViewList: List[str],
+        configDict: Optional[dict] = None,
+    ) -> Set[ddef.viewTuple]:
+        """
+        Cellviews the netlist of a schematic is made from: the schematics in its
+        hierarchy, the symbols they instantiate and the views netlisted for them.
+        """
+        dependencies = {topViewTuple}
+        visitedCells = set()
+        frontier = [topViewTuple]
+        while frontier:
+            for symbolView in self.references(frontier.pop()):
+                dependencies.add(symbolView)
+                # the netlisted view only depends on the cell.
+                if symbolView[:2] in visitedCells:
+                    continue
+                visitedCells.add(symbolView[:2])
+                if configDict is not None and symbolView.cellName in configDict:
+                    netlistView = configDict[symbolView.cellName][1]
+                else:
+                    viewNames = self._cellViews.get(symbolView[:2], ())
+                    netlistView = next(
+                        (viewName for viewName in switchViewList
+                         if viewName in viewNames),
+                        "symbol",
+                    )
+                netlistViewTuple = ddef.viewTuple(
+                    symbolView.libraryName, symbolView.cellName, netlistView
+                )
+                if netlistViewTuple in dependencies:
+                    continue
+                dependencies.add(netlistViewTuple)
+                if "schematic" in netlistView and netlistView not in stopViewList:
+                    frontier.append(netlistViewTuple)
+        return dependencies
+
+    def changedSince(self, viewTuples: Iterable[ddef.viewTuple], mtimeNs: int) -> bool:
+        """
+        Check if any of the cellviews is missing or was modified after mtimeNs.
+        """
+        for viewTuple in viewTuples:
+            stamp = self.viewStamp(viewTuple)
+            if stamp is None or stamp[0] > mtimeNs:
+                return True
+        return False
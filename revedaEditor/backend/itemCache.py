@@ -0,0 +1,185 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+# Pixmap cache policy of the layout scene. Most layout shapes are cheap to paint,
+# caching them costs a pixmap per item that is rebuilt on every zoom. Only items
+# that are expensive to paint are cached and their pixmaps are kept within a
+# memory budget, the least recently drawn pixmaps are released first.
+
+from collections import OrderedDict
+
+from PySide6.QtCore import QTimer
+from PySide6.QtGui import QPainter, QPixmap, QPixmapCache
+from PySide6.QtWidgets import QGraphicsItem
+
+import revedaEditor.backend.dataDefinitions as ddef
+import revedaEditor.common.layoutShapes as lshp
+
+BYTES_PER_PIXEL = 4
+
+
+class itemCachePolicy:
+    """
+    Decides the cache mode of the items added to a layout scene. Instances drawn
+    from a master and polygons with many points use a device coordinate cache,
+    other shapes are painted directly. The pixmap sizes are measured when the
+    cached items are painted. When they exceed the budget the least recently
+    drawn items lose their cache, they are cached again once they fit.
+    """
+
+    def __init__(self, settings: ddef.itemCacheSettings = None):
+        self.settings = settings or ddef.itemCacheSettings()
+        # cached items and their pixmap sizes, least recently drawn first.
+        self._cachedItems = OrderedDict()
+        # items over the budget and their estimated pixmap sizes.
+        self._evictedItems = OrderedDict()
+        self._usedBytes = 0
+        self._maintenancePending = False
+        self._updatePixmapCacheLimit()
+
+    @property
+    def budgetBytes(self) -> int:
+        return self.settings.budget * 1024 * 1024
+
+    @property
+    def usedBytes(self) -> int:
+        return self._usedBytes
+
+    def _updatePixmapCacheLimit(self):
+        # item pixmaps are stored in the global pixmap cache, which should not
+        # release them before the budget is reached.
+        budgetKB = self.settings.budget * 1024
+        if QPixmapCache.cacheLimit() < budgetKB:
+            QPixmapCache.setCacheLimit(budgetKB)
+
+    def wantsCache(self, item: QGraphicsItem) -> bool:
+        if not self.settings.enabled:
+            return False
+        if isinstance(item, lshp.layoutInstance):
+            return self.settings.cacheInstances and not item.isExpanded
+        if isinstance(item, lshp.layoutPolygon):
+            return len(item.points) >= self.settings.minPolygonPoints
+        return False
+
+    def addItem(self, item: QGraphicsItem) -> None:
+        if self.wantsCache(item):
+            item.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
+            self._cachedItems[item] = 0
+        elif item.cacheMode() != QGraphicsItem.NoCache:
+            item.setCacheMode(QGraphicsItem.NoCache)
+
+    def removeItem(self, item: QGraphicsItem) -> None:
+        if item in self._cachedItems:
+            self._usedBytes -= self._cachedItems.pop(item)
+            # release the pixmap of the item.
+            item.setCacheMode(QGraphicsItem.NoCache)
+            if self._evictedItems:
+                self._scheduleMaintenance()
+        self._evictedItems.pop(item, None)
+
+    def updateItem(self, item: QGraphicsItem) -> None:
+        """
+        Decide the cache mode again after the item is changed, e.g. an instance
+        is expanded.
+        """
+        self.removeItem(item)
+        self.addItem(item)
+
+    def itemPainted(self, item: QGraphicsItem, painter: QPainter) -> None:
+        """
+        Called by the items that may be cached when they are painted. Cached items
+        are only painted when their pixmap is drawn again.
+        """
+        device = painter.device()
+        if isinstance(device, QPixmap):
+            oldBytes = self._cachedItems.get(item)
+            if oldBytes is None:
+                return
+            newBytes = device.width() * device.height() * BYTES_PER_PIXEL
+            self._usedBytes += newBytes - oldBytes
+            self._cachedItems[item] = newBytes
+            self._cachedItems.move_to_end(item)
+            if self._usedBytes > self.budgetBytes:
+                self._scheduleMaintenance()
+        elif item in self._evictedItems:
+            deviceRect = painter.worldTransform().mapRect(item.boundingRect())
+            estimate = int(deviceRect.width() * deviceRect.height()) * BYTES_PER_PIXEL
+            self._evictedItems[item] = estimate
+            self._evictedItems.move_to_end(item)
+            if self._usedBytes + estimate <= self.budgetBytes:
+                self._scheduleMaintenance()
+
+    def _scheduleMaintenance(self):
+        # cache modes are not changed while the scene is painted.
+        if not self._maintenancePending:
+            self._maintenancePending = True
+            QTimer.singleShot(0, self.maintain)
+
+    def maintain(self) -> None:
+        """
+        Release the least recently drawn pixmaps over the budget and cache the
+        recently drawn evicted items that fit in the budget again.
+        """
+        self._maintenancePending = False
+        budgetBytes = self.budgetBytes
+        while self._usedBytes > budgetBytes and self._cachedItems:
+            item, itemBytes = self._cachedItems.popitem(last=False)
+            self._usedBytes -= itemBytes
+            item.setCacheMode(QGraphicsItem.NoCache)
+            self._evictedItems[item] = itemBytes
+        for item, estimate in reversed(list(self._evictedItems.items())):
+            if self._usedBytes + estimate > budgetBytes:
+                break
+            del self._evictedItems[item]
+            item.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
+            self._cachedItems[item] = estimate
+            self._usedBytes += estimate
+
+    def applySettings(self, items) -> None:
+        """
+        Decide the cache mode of all the items after the settings are changed.
+        """
+        self._updatePixmapCacheLimit()
+        self.clear()
+        for item in items:
+            self.addItem(item)
+        self.maintain()
+
+    def clear(self) -> None:
+        for item in self._cachedItems:
+            item.setCacheMode(QGraphicsItem.NoCache)
+        self._cachedItems.clear()
+        self._evictedItems.clear()
+        self._usedBytes = 0
+
+    def usage(self) -> ddef.itemCacheUsage:
+        return ddef.itemCacheUsage(
+            len(self._cachedItems), len(self._evictedItems), self._usedBytes,
+            self.budgetBytes,
+        )
+
+    def report(self) -> str:
+        usage = self.usage()
+        return (
+            f"Item cache: {usage.usedBytes / 1048576:.1f} MB of "
+            f"{usage.budgetBytes / 1048576:.0f} MB in use, {usage.cachedItems} items "
+            f"cached, {usage.evictedItems} items over the budget."
+        )
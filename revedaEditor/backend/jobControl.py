@@ -0,0 +1,72 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+# Progress reporting and cancellation for long running jobs such as netlisting and
+# GDS export. It does not depend on Qt so that the same jobs can run headless.
+
+import threading
+from typing import Callable, Optional
+
+
+class jobCancelled(Exception):
+    """
+    Raised inside a job when it is cancelled.
+    """
+
+
+class jobControl:
+    """
+    Passed to a job to report its progress and to check if it is cancelled.
+    """
+
+    def __init__(self, progressCallback: Optional[Callable[[int, int, str], None]] = None):
+        self._progressCallback = progressCallback
+        self._cancelEvent = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancelEvent.set()
+
+    @property
+    def isCancelled(self) -> bool:
+        return self._cancelEvent.is_set()
+
+    def checkCancelled(self) -> None:
+        if self._cancelEvent.is_set():
+            raise jobCancelled()
+
+    def report(self, done: int, total: int, message: str = "") -> None:
+        """
+        Report progress as done steps out of total steps and raise jobCancelled if
+        the job is cancelled.
+        """
+        if self._progressCallback is not None:
+            self._progressCallback(done, total, message)
+        self.checkCancelled()
+
+
+def reportProgress(
+    control: Optional[jobControl], done: int, total: int, message: str = ""
+) -> None:
+    """
+    Report progress if the job has a control object.
+    """
+    if control is not None:
+        control.report(done, total, message)
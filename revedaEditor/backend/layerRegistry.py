@@ -0,0 +1,93 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+# Per-layer registry of the shapes in a layout scene. Layer selection window
+# operations look up the shapes of a layer here instead of scanning all the items
+# of the scene. Layers are dataclasses and not hashable, they are keyed by id.
+
+from typing import Dict, Iterable, Set
+
+
+class layerShapeRegistry:
+    """
+    Keeps the layout shapes of a scene grouped by their layer. Instances that are
+    painted from a shared master are kept separately as their shapes are not scene
+    items.
+    """
+
+    def __init__(self):
+        self._layerShapes: Dict[int, Set] = dict()
+        self._shapeLayers: Dict[object, int] = dict()
+        self._masterInstances: Set = set()
+
+    def __len__(self):
+        return len(self._shapeLayers)
+
+    def addShape(self, shape) -> None:
+        """
+        Register a shape under its current layer. A shape already registered under
+        another layer is moved.
+        """
+        layer = getattr(shape, "_layer", None)
+        if layer is not None:
+            layerId = id(layer)
+            oldLayerId = self._shapeLayers.get(shape)
+            if oldLayerId != layerId:
+                if oldLayerId is not None:
+                    self._discard(shape, oldLayerId)
+                self._layerShapes.setdefault(layerId, set()).add(shape)
+                self._shapeLayers[shape] = layerId
+        if getattr(shape, "master", None) is not None:
+            self._masterInstances.add(shape)
+
+    def removeShape(self, shape) -> None:
+        layerId = self._shapeLayers.pop(shape, None)
+        if layerId is not None:
+            self._discard(shape, layerId)
+        self._masterInstances.discard(shape)
+
+    def _discard(self, shape, layerId: int) -> None:
+        layerShapes = self._layerShapes.get(layerId)
+        if layerShapes is not None:
+            layerShapes.discard(shape)
+            if not layerShapes:
+                del self._layerShapes[layerId]
+
+    def layerShapes(self, layer) -> Set:
+        """
+        Shapes on the layer, returned as a copy so that the caller can change them.
+        """
+        return set(self._layerShapes.get(id(layer), ()))
+
+    def layerInstances(self, layer) -> Iterable:
+        """
+        Unexpanded instances whose master paints shapes on the layer.
+        """
+        return [
+            instance
+            for instance in self._masterInstances
+            if not instance.isExpanded and instance.master.usesLayer(layer)
+        ]
+
+    def clear(self) -> None:
+        self._layerShapes.clear()
+        self._shapeLayers.clear()
+        self._masterInstances.clear()
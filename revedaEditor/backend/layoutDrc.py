@@ -0,0 +1,599 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+
+# Design rule checks of a layout scene. The shapes around a region are flattened
+# to polygons per layer with the GDS exporter and the rules are checked with gdstk
+# boolean and offset operations on the merged layers: width checks open a layer,
+# spacing checks close it, enclosure checks shrink the enclosing layer and density
+# is measured on a grid of windows. Only the polygons that can take part in a
+# violation are passed to gdstk: they are found by a grid join of the bounding
+# boxes and isolated rectangles are checked with numpy. After an edit only the
+# region around the changed shapes is checked again and the markers of that
+# region are replaced.
+
+import math
+import pathlib
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import gdstk
+import numpy as np
+from PySide6.QtCore import QPointF, QRectF, Qt, QTimer
+from PySide6.QtGui import QBrush, QColor, QPen, QPolygonF
+from PySide6.QtWidgets import QGraphicsItem, QGraphicsPolygonItem
+
+import revedaEditor.backend.dataDefinitions as ddef
+import revedaEditor.common.layoutShapes as lshp
+import revedaEditor.fileio.gdsExport as gdse
+from revedaEditor.backend.pdkPaths import importPDKModule
+
+fabproc = importPDKModule("process")
+
+# offsets stop this many grid points short of the rule distance, so that shapes
+# exactly at the rule distance pass.
+RULE_TOLERANCE = 0.25
+# violations smaller than this area in square grid points are offset artefacts.
+MIN_VIOLATION_AREA = 0.01
+# boxes covering more grid cells than this are compared with all the others.
+MAX_CELLS_PER_BOX = 64
+LIVE_CHECK_DELAY = 300  # ms after the last edit before the live check runs
+MARKER_Z = 10000
+GEOMETRY_RULES = ("width", "spacing", "enclosure")
+DENSITY_RULES = ("minDensity", "maxDensity")
+
+
+def pdkRules() -> List[ddef.drcRuleTuple]:
+    """
+    Design rules of the process. A process without a rule deck gets the width
+    and spacing rules of its via definitions.
+    """
+    rules = getattr(fabproc, "drcRules", None)
+    if rules is not None:
+        return list(rules)
+    rules = []
+    for viaDef in getattr(fabproc, "processVias", []):
+        rules.append(ddef.drcRuleTuple(
+            f"{viaDef.name}.width", "width", viaDef.layer, float(viaDef.minWidth)))
+        rules.append(ddef.drcRuleTuple(
+            f"{viaDef.name}.spacing", "spacing", viaDef.layer,
+            float(viaDef.minSpacing)))
+    return rules
+
+
+def ruleDescription(rule: ddef.drcRuleTuple) -> str:
+    match rule.type:
+        case "width":
+            return f"{rule.layer.name} width < {rule.value} um"
+        case "spacing" if rule.otherLayer is not None:
+            return (f"{rule.layer.name} to {rule.otherLayer.name} spacing < "
+                    f"{rule.value} um")
+        case "spacing":
+            return f"{rule.layer.name} spacing < {rule.value} um"
+        case "enclosure":
+            return (f"{rule.layer.name} enclosure of {rule.otherLayer.name} < "
+                    f"{rule.value} um")
+        case "minDensity":
+            return f"{rule.layer.name} density < {rule.value:.0%}"
+        case "maxDensity":
+            return f"{rule.layer.name} density > {rule.value:.0%}"
+    return rule.type
+
+
+def polygonBounds(polygons: List[gdstk.Polygon]) -> np.ndarray:
+    """
+    Bounding boxes of the polygons as rows of left, top, right, bottom.
+    """
+    if not polygons:
+        return np.empty((0, 4))
+    return np.array(
+        [(*lower, *upper) for lower, upper in
+         (polygon.bounding_box() for polygon in polygons)],
+        dtype=np.float64,
+    )
+
+
+def rectBounds(rect: QRectF) -> np.ndarray:
+    return np.array(rect.getCoords(), dtype=np.float64)
+
+
+def boundsIntersect(bounds: np.ndarray, rect: QRectF) -> np.ndarray:
+    left, top, right, bottom = rect.getCoords()
+    return ((bounds[:, 0] <= right) & (bounds[:, 2] >= left)
+            & (bounds[:, 1] <= bottom) & (bounds[:, 3] >= top))
+
+
+def repeatedRanges(counts: np.ndarray) -> np.ndarray:
+    """
+    Position of each element within its group, for groups of the given sizes.
+    """
+    return np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+
+def gridEntries(bounds: np.ndarray, cellSize: float) -> Tuple[np.ndarray, ...]:
+    """
+    Grid cells covered by the boxes as cell keys and box indices. Boxes covering
+    too many cells are returned separately.
+    """
+    x0, y0, x1, y1 = np.floor(bounds / cellSize).astype(np.int64).T
+    columns = x1 - x0 + 1
+    cellCounts = columns * (y1 - y0 + 1)
+    big = cellCounts > MAX_CELLS_PER_BOX
+    indices = np.repeat(np.flatnonzero(~big), cellCounts[~big])
+    offsets = repeatedRanges(cellCounts[~big])
+    cellXs = x0[indices] + offsets % columns[indices]
+    cellYs = y0[indices] + offsets // columns[indices]
+    return (cellXs << 32) + (cellYs & 0xFFFFFFFF), indices, np.flatnonzero(big)
+
+
+def nearPairs(bounds: np.ndarray, distance: float,
+              otherBounds: Optional[np.ndarray] = None) -> Tuple[np.ndarray, ...]:
+    """
+    Index pairs of the boxes whose gap is less than the distance. The gap is the
+    larger of the horizontal and vertical gaps, overlapping boxes have negative
+    gaps. Without other boxes the pairs within the boxes are returned once.
+    """
+    sameBoxes = otherBounds is None
+    if sameBoxes:
+        otherBounds = bounds
+    if not len(bounds) or not len(otherBounds):
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    # boxes grown by half the distance overlap when their gap is less than it.
+    grow = np.array([-1, -1, 1, 1]) * distance / 2
+    boxes = bounds + grow
+    otherBoxes = otherBounds + grow
+    cellSize = max(float(np.median(np.concatenate(
+        [boxes[:, 2:] - boxes[:, :2], otherBoxes[:, 2:] - otherBoxes[:, :2]]))), 1.0)
+    keys, indices, bigIndices = gridEntries(boxes, cellSize)
+    otherKeys, otherIndices, otherBigIndices = gridEntries(otherBoxes, cellSize)
+    order = np.argsort(otherKeys, kind="stable")
+    otherKeys = otherKeys[order]
+    otherIndices = otherIndices[order]
+    low = np.searchsorted(otherKeys, keys, "left")
+    counts = np.searchsorted(otherKeys, keys, "right") - low
+    firsts = [np.repeat(indices, counts)]
+    seconds = [otherIndices[np.repeat(low, counts) + repeatedRanges(counts)]]
+    allOthers = np.arange(len(otherBoxes))
+    for index in bigIndices:
+        firsts.append(np.full(len(otherBoxes), index))
+        seconds.append(allOthers)
+    for index in otherBigIndices:
+        firsts.append(np.arange(len(boxes)))
+        seconds.append(np.full(len(boxes), index))
+    firsts = np.concatenate(firsts)
+    seconds = np.concatenate(seconds)
+    first = boxes[firsts]
+    second = otherBoxes[seconds]
+    near = ((first[:, 0] < second[:, 2]) & (second[:, 0] < first[:, 2])
+            & (first[:, 1] < second[:, 3]) & (second[:, 1] < first[:, 3]))
+    if sameBoxes:
+        near &= firsts < seconds
+    pairCodes = np.unique(firsts[near] * len(otherBoxes) + seconds[near])
+    return pairCodes // len(otherBoxes), pairCodes % len(otherBoxes)
+
+
+class layerGeometry:
+    """
+    Flattened polygons of a layer with their bounding boxes.
+    """
+
+    def __init__(self, polygons: List[gdstk.Polygon]):
+        self.polygons = polygons
+        self.bounds = polygonBounds(polygons)
+        self._rectMask = None
+
+    def __len__(self):
+        return len(self.polygons)
+
+    @property
+    def rectMask(self) -> np.ndarray:
+        """
+        True for the polygons that are rectangles along the axes.
+        """
+        if self._rectMask is None:
+            boxAreas = ((self.bounds[:, 2] - self.bounds[:, 0])
+                        * (self.bounds[:, 3] - self.bounds[:, 1]))
+            pointCounts = np.array([len(polygon.points) for polygon in self.polygons])
+            areas = np.array([polygon.area() for polygon in self.polygons])
+            self._rectMask = (pointCounts == 4) & np.isclose(areas, boxAreas)
+        return self._rectMask
+
+    def merged(self, indices: np.ndarray) -> List[gdstk.Polygon]:
+        """
+        Union of the polygons with the indices.
+        """
+        if not len(indices):
+            return []
+        return gdstk.boolean([self.polygons[index] for index in indices], [], "or")
+
+
+class drcGeometryCollector(gdse.gdsExporter):
+    """
+    Flattens layout items to polygons per layer. Layers are told apart by their
+    names as the drawing and pin purposes of a layer are the same material.
+    Labels have no geometry and are left out.
+    """
+
+    def __init__(self, items: list, layerIndices: Dict[str, int]):
+        super().__init__("drc", items, pathlib.Path())
+        self._layerIndices = layerIndices
+
+    def layerKey(self, layer) -> tuple:
+        layerIndex = self._layerIndices.get(layer.name)
+        if layerIndex is None:
+            layerIndex = self._layerIndices[layer.name] = len(self._layerIndices)
+        return layerIndex, 0
+
+    def gatherLabel(self, item: lshp.layoutLabel, geometry: gdse.gdsCellGeometry,
+                    transform):
+        pass
+
+    def layerGeometries(self) -> Dict[int, layerGeometry]:
+        library = gdstk.Library()
+        cell = self.createLayoutCell(library)
+        layerPolygons = dict()
+        for polygon in cell.get_polygons():
+            layerPolygons.setdefault(polygon.layer, []).append(polygon)
+        return {
+            layerIndex: layerGeometry(polygons)
+            for layerIndex, polygons in layerPolygons.items()
+        }
+
+
+class drcMarker(QGraphicsPolygonItem):
+    """
+    Marks a design rule violation in the scene. Markers are not layout shapes, they
+    are not saved or exported and do not take mouse clicks.
+    """
+
+    pen = QPen(QColor(255, 255, 0), 2)
+    pen.setCosmetic(True)
+    brush = QBrush(QColor(255, 255, 0, 160), Qt.DiagCrossPattern)
+
+    def __init__(self, rule: ddef.drcRuleTuple, points: np.ndarray):
+        super().__init__(QPolygonF([QPointF(x, y) for x, y in points.tolist()]))
+        self.rule = rule
+        self.setPen(drcMarker.pen)
+        self.setBrush(drcMarker.brush)
+        self.setZValue(MARKER_Z)
+        self.setAcceptedMouseButtons(Qt.NoButton)
+        self.setFlag(QGraphicsItem.ItemIsSelectable, False)
+        self.setToolTip(f"{rule.name}: {ruleDescription(rule)}")
+
+    def __repr__(self):
+        return f"drcMarker({self.rule.name}, {self.polygon().boundingRect()})"
+
+
+class layoutDrcEngine:
+    """
+    Checks the design rules of a layout scene. A full check replaces all the
+    markers. With live checking enabled, the shapes report their changes and the
+    region around them is checked again shortly after the last edit.
+    """
+
+    def __init__(self, scene, rules: Optional[List[ddef.drcRuleTuple]] = None):
+        self.scene = scene
+        self._rules = []
+        self._halo = 1.0
+        self.rules = pdkRules() if rules is None else rules
+        self.markers: List[drcMarker] = []
+        self.timings: Dict[str, float] = dict()
+        self._live = False
+        self._layerIndices: Dict[str, int] = dict()
+        self._dirtyRect = QRectF()
+        self._dirtyItems = set()
+        self._checkPending = False
+
+    @property
+    def rules(self) -> List[ddef.drcRuleTuple]:
+        return self._rules
+
+    @rules.setter
+    def rules(self, value: List[ddef.drcRuleTuple]):
+        self._rules = list(value)
+        # shapes further than the largest rule distance from a region cannot
+        # cause violations in it.
+        distances = [rule.value for rule in self._rules if rule.type in GEOMETRY_RULES]
+        self._halo = max(distances, default=0) * fabproc.dbu + 1
+
+    @property
+    def live(self) -> bool:
+        return self._live
+
+    @live.setter
+    def live(self, value: bool):
+        self._live = value
+        self._dirtyRect = QRectF()
+        self._dirtyItems.clear()
+        if value:
+            self.checkAll()
+
+    def checkAll(self) -> List[drcMarker]:
+        """
+        Check the whole cell and replace all the markers.
+        """
+        self.clearMarkers()
+        items = self.layoutItems(self.scene.spatialIndex.query())
+        self._check(items, None)
+        return self.markers
+
+    def checkRegion(self, rect: QRectF) -> List[drcMarker]:
+        """
+        Check the region of an edit again. Violations within the largest rule
+        distance of the region are replaced, density is checked again in the
+        windows touching the region.
+        """
+        if rect.isNull():
+            return []
+        checkRect = rect.adjusted(-self._halo, -self._halo, self._halo, self._halo)
+        gatherRect = checkRect.adjusted(-self._halo, -self._halo, self._halo,
+                                        self._halo)
+        for rule in self._rules:
+            if rule.type in DENSITY_RULES:
+                gatherRect = gatherRect.united(self.windowCover(rule, rect))
+        items = self.layoutItems(self.scene.spatialIndex.query(gatherRect))
+        return self._check(items, rect)
+
+    def _check(self, items: list, rect: Optional[QRectF]) -> List[drcMarker]:
+        start = time.perf_counter()
+        geometries = drcGeometryCollector(items, self._layerIndices).layerGeometries()
+        gatherEnd = time.perf_counter()
+        bounds = None
+        newMarkers = []
+        for rule in self._rules:
+            layer = self.layerGeometry(rule.layer, geometries)
+            other = self.layerGeometry(rule.otherLayer, geometries)
+            if rule.type in DENSITY_RULES:
+                if bounds is None:
+                    bounds = self.layoutBounds()
+                area = bounds if rect is None else self.windowCover(rule, rect)
+                violations = self.densityViolations(rule, layer, area, bounds)
+            else:
+                area = None if rect is None else rect.adjusted(
+                    -self._halo, -self._halo, self._halo, self._halo)
+                violations = self.geometryViolations(rule, layer, other)
+            if area is not None:
+                self.removeMarkers(rule, area)
+                if violations:
+                    violations = [
+                        violation for violation, inside in zip(
+                            violations,
+                            boundsIntersect(polygonBounds(violations), area))
+                        if inside
+                    ]
+            for violation in violations:
+                marker = drcMarker(rule, violation.points)
+                self.scene.addItem(marker)
+                newMarkers.append(marker)
+        self.markers.extend(newMarkers)
+        self.timings = {
+            "collect": gatherEnd - start,
+            "check": time.perf_counter() - gatherEnd,
+        }
+        return newMarkers
+
+    def layerGeometry(self, layer: Optional[ddef.layLayer],
+                      geometries: Dict[int, layerGeometry]) -> layerGeometry:
+        if layer is None:
+            return layerGeometry([])
+        layerIndex = self._layerIndices.get(layer.name)
+        geometry = geometries.get(layerIndex)
+        if geometry is None:
+            geometry = geometries[layerIndex] = layerGeometry([])
+        return geometry
+
+    def geometryViolations(self, rule: ddef.drcRuleTuple, layer: layerGeometry,
+                           other: layerGeometry) -> List[gdstk.Polygon]:
+        """
+        Violations of a width, spacing or enclosure rule. Offsets go a tolerance
+        past the shapes they are compared with, as gdstk booleans of polygons with
+        coincident edges are slow.
+        """
+        distance = rule.value * fabproc.dbu
+        match rule.type:
+            case "width":
+                violations = self.widthViolations(layer, distance)
+            case "spacing" if rule.otherLayer is not None:
+                # parts of the other layer within the distance but outside of the
+                # layer.
+                first, second = nearPairs(layer.bounds, distance - RULE_TOLERANCE,
+                                          other.bounds)
+                merged = layer.merged(np.unique(first))
+                grown = gdstk.offset(merged, distance - RULE_TOLERANCE, join="miter",
+                                     use_union=True)
+                violations = gdstk.boolean(
+                    gdstk.boolean(grown, other.merged(np.unique(second)), "and"),
+                    merged, "not")
+            case "spacing":
+                # gaps that are closed by growing and shrinking back by half the
+                # spacing are too narrow. Rectangles without near neighbours have
+                # no gaps.
+                first, second = nearPairs(layer.bounds, distance - RULE_TOLERANCE)
+                candidates = np.union1d(np.concatenate([first, second]),
+                                        np.flatnonzero(~layer.rectMask))
+                merged = layer.merged(candidates)
+                offset = distance / 2 - RULE_TOLERANCE
+                closed = gdstk.offset(
+                    gdstk.offset(merged, offset, join="miter", use_union=True),
+                    -(offset + RULE_TOLERANCE), join="miter")
+                violations = gdstk.boolean(closed, merged, "not")
+            case "enclosure":
+                # parts of the enclosed layer over the layer that are too close
+                # to its edges.
+                first, second = nearPairs(layer.bounds, distance, other.bounds)
+                merged = layer.merged(np.unique(first))
+                shrunk = gdstk.offset(merged, -(distance - RULE_TOLERANCE),
+                                      join="miter")
+                violations = gdstk.boolean(
+                    gdstk.boolean(other.merged(np.unique(second)), merged, "and"),
+                    shrunk, "not")
+            case _:
+                violations = []
+        return [
+            violation for violation in violations
+            if violation.area() > MIN_VIOLATION_AREA
+        ]
+
+    @staticmethod
+    def widthViolations(layer: layerGeometry, width: float) -> List[gdstk.Polygon]:
+        """
+        Narrow rectangles that touch no other polygon are found from their
+        bounding boxes. The parts of the other polygons that do not survive
+        shrinking and growing back by half the width are too narrow.
+        """
+        if not len(layer):
+            return []
+        first, second = nearPairs(layer.bounds, RULE_TOLERANCE)
+        touching = np.zeros(len(layer), dtype=bool)
+        touching[first] = touching[second] = True
+        isolated = layer.rectMask & ~touching
+        sizes = layer.bounds[:, 2:] - layer.bounds[:, :2]
+        narrow = isolated & (sizes.min(axis=1) < width - RULE_TOLERANCE)
+        violations = [layer.polygons[index] for index in np.flatnonzero(narrow)]
+        merged = layer.merged(np.flatnonzero(~isolated))
+        if merged:
+            offset = width / 2 - RULE_TOLERANCE
+            opened = gdstk.offset(
+                gdstk.offset(merged, -offset, join="miter"),
+                offset + RULE_TOLERANCE, join="miter", use_union=True)
+            violations.extend(gdstk.boolean(merged, opened, "not"))
+        return violations
+
+    def densityViolations(self, rule: ddef.drcRuleTuple, layer: layerGeometry,
+                          area: QRectF, bounds: QRectF) -> List[gdstk.Polygon]:
+        """
+        Windows in the area whose layer density breaks the rule. Windows are
+        clipped to the bounds of the layout.
+        """
+        violations = []
+        for window in self.windows(rule, area):
+            window = window.intersected(bounds)
+            windowArea = window.width() * window.height()
+            if windowArea <= 0:
+                continue
+            candidates = [
+                layer.polygons[index] for index in
+                np.flatnonzero(boundsIntersect(layer.bounds, window))
+            ]
+            windowPolygon = gdstk.rectangle(window.topLeft().toTuple(),
+                                            window.bottomRight().toTuple())
+            covered = sum(
+                polygon.area() for polygon in
+                gdstk.boolean(candidates, windowPolygon, "and")
+            ) if candidates else 0.0
+            density = covered / windowArea
+            if ((rule.type == "minDensity" and density < rule.value)
+                    or (rule.type == "maxDensity" and density > rule.value)):
+                violations.append(windowPolygon)
+        return violations
+
+    @staticmethod
+    def windows(rule: ddef.drcRuleTuple, area: QRectF) -> Iterable[QRectF]:
+        """
+        Density windows touching the area. Windows are on a grid anchored at
+        the origin.
+        """
+        size = rule.window * fabproc.dbu
+        if size <= 0 or area.isNull():
+            return []
+        left, top, right, bottom = area.getCoords()
+        return [
+            QRectF(column * size, row * size, size, size)
+            for row in range(math.floor(top / size), math.ceil(bottom / size))
+            for column in range(math.floor(left / size), math.ceil(right / size))
+        ]
+
+    def windowCover(self, rule: ddef.drcRuleTuple, rect: QRectF) -> QRectF:
+        cover = QRectF()
+        for window in self.windows(rule, rect):
+            cover = cover.united(window)
+        return cover
+
+    def layoutBounds(self) -> QRectF:
+        # markers are within the layout, they do not change its bounds.
+        return self.scene.itemsBoundingRect()
+
+    @staticmethod
+    def layoutItems(items: Iterable[lshp.layoutShape]) -> list:
+        """
+        Top level shapes with geometry, labels have none.
+        """
+        return [item for item in items if not isinstance(item, lshp.layoutLabel)]
+
+    def removeMarkers(self, rule: ddef.drcRuleTuple, area: QRectF) -> None:
+        oldMarkers = {
+            marker for marker in self.markers
+            if marker.rule is rule and marker.sceneBoundingRect().intersects(area)
+        }
+        if oldMarkers:
+            for marker in oldMarkers:
+                self.scene.removeItem(marker)
+            self.markers = [
+                marker for marker in self.markers if marker not in oldMarkers
+            ]
+
+    def clearMarkers(self) -> None:
+        for marker in self.markers:
+            if marker.scene() is self.scene:
+                self.scene.removeItem(marker)
+        self.markers.clear()
+
+    def shapeChanged(self, item: QGraphicsItem) -> None:
+        """
+        Called by the shapes before and after they are moved, added or removed.
+        The region they cover is checked again after the edits stop.
+        """
+        if not self._live:
+            return
+        self._dirtyRect = self._dirtyRect.united(item.sceneBoundingRect())
+        self._dirtyItems.add(item)
+        if not self._checkPending:
+            self._checkPending = True
+            QTimer.singleShot(LIVE_CHECK_DELAY, self.checkPending)
+
+    def checkPending(self) -> None:
+        """
+        Check the region of the edits since the last check. Shapes still being
+        drawn are checked again once they are finished.
+        """
+        self._checkPending = False
+        if not self._live:
+            return
+        inProgress = self.scene.shapesInProgress
+        rect = self._dirtyRect
+        for item in self._dirtyItems:
+            if item.scene() is self.scene:
+                rect = rect.united(item.sceneBoundingRect())
+        self._dirtyItems = {item for item in self._dirtyItems if item in inProgress}
+        self._dirtyRect = QRectF()
+        self.checkRegion(rect)
+
+    def report(self) -> str:
+        counts = Counter(marker.rule.name for marker in self.markers)
+        if not counts:
+            return "DRC: no violations."
+        return f"DRC: {len(self.markers)} violations, " + ", ".join(
+            f"{name}: {count}" for name, count in sorted(counts.items()))
+
+    def timingReport(self) -> str:
+        return "DRC " + ", ".join(
+            f"{key} {value:.3f} s" for key, value in self.timings.items())
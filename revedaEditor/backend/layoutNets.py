@@ -0,0 +1,484 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+
+
+# Net extraction of a layout scene. The top level shapes are flattened to
+# polygons with the GDS exporter and kept per shape until the shape changes.
+# Polygons of a layer touching each other are joined, as are the cuts of the
+# process vias and the polygons of the layers the vias connect. Candidate pairs
+# are found by a grid join of the bounding boxes and only pairs of polygons that
+# are not both rectangles are tested with gdstk. The groups of a union-find over
+# the polygons are the nets, they are named after the pins and labels on them.
+
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import gdstk
+import numpy as np
+from PySide6.QtCore import QPoint, QPointF, QRectF, Qt
+from PySide6.QtGui import QBrush, QColor, QPainterPath, QPen, QPolygonF
+from PySide6.QtWidgets import QGraphicsItem, QGraphicsPathItem
+
+import revedaEditor.backend.connectivity as con
+import revedaEditor.backend.layoutDrc as ldrc
+import revedaEditor.common.layoutShapes as lshp
+import revedaEditor.fileio.gdsExport as gdse
+from revedaEditor.backend.pdkPaths import importPDKModule
+
+fabproc = importPDKModule("process")
+
+# polygons closer than this many grid points are touching.
+CONNECT_TOLERANCE = 0.25
+# overlaps of a via cut and a layer smaller than this area are not connections.
+MIN_CONNECT_AREA = 0.01
+HIGHLIGHT_Z = ldrc.MARKER_Z + 1
+
+
+def processConnections() -> List[Tuple[str, Tuple[str, ...]]]:
+    """
+    Names of the cut layers of the process vias and of the layers each connects.
+    """
+    return [
+        (viaDef.layer.name, tuple(layer.name for layer in viaDef.connects))
+        for viaDef in getattr(fabproc, "processVias", [])
+        if viaDef.connects
+    ]
+
+
+class netTerminal(NamedTuple):
+    """
+    A pin or label on a net. Pins of instances have the instance name.
+    """
+
+    name: str
+    instance: str
+    layer: str
+    point: Tuple[float, float]
+
+
+class itemGeometry(NamedTuple):
+    polygons: List[gdstk.Polygon]
+    terminals: List[netTerminal]
+
+
+class layoutNet:
+    """
+    An extracted net: its polygons, the top level shapes they come from and the
+    pins and labels on it.
+    """
+
+    def __init__(self, name: str, polygons: List[gdstk.Polygon], items: list,
+                 terminals: List[netTerminal]):
+        self.name = name
+        self.polygons = polygons
+        self.items = items
+        self.terminals = terminals
+
+    def __repr__(self):
+        return f"layoutNet({self.name}, {len(self.polygons)} polygons)"
+
+    def __len__(self):
+        return len(self.polygons)
+
+    @property
+    def names(self) -> List[str]:
+        """
+        Names of the pins and labels of the top cell on the net. More than one
+        name is a short.
+        """
+        return sorted({terminal.name for terminal in self.terminals if
+                       not terminal.instance})
+
+    @property
+    def connections(self) -> List[Tuple[str, str]]:
+        """
+        Instance and pin names of the instance pins on the net.
+        """
+        return sorted({(terminal.instance, terminal.name) for terminal in
+                       self.terminals if terminal.instance})
+
+    @property
+    def bounds(self) -> QRectF:
+        boxes = ldrc.polygonBounds(self.polygons)
+        left, top = boxes[:, :2].min(axis=0).tolist()
+        right, bottom = boxes[:, 2:].max(axis=0).tolist()
+        return QRectF(left, top, right - left, bottom - top)
+
+
+class netGeometryCollector(ldrc.drcGeometryCollector):
+    """
+    Flattens one top level shape at a time to polygons whose layers are the
+    indices of the layer names. Masters of instances and pcells are flattened
+    once.
+    """
+
+    def __init__(self, layerIndices: Dict[str, int]):
+        super().__init__([], layerIndices)
+        self._library = gdstk.Library()
+
+    def itemPolygons(self, item: lshp.layoutShape) -> List[gdstk.Polygon]:
+        geometry = gdse.gdsCellGeometry("net")
+        self.gatherItem(item, geometry, item.sceneTransform())
+        geometry.finalise()
+        polygons = []
+        for (layer, datatype), rects in geometry.rects.items():
+            polygons.extend(
+                gdstk.rectangle((left, top), (right, bottom), layer, datatype)
+                for left, top, right, bottom in rects.tolist()
+            )
+        for (layer, datatype), pointsList in geometry.polygons.items():
+            polygons.extend(
+                gdstk.Polygon(points, layer, datatype) for points in pointsList
+            )
+        for points, width, ends, (layer, datatype) in geometry.paths:
+            polygons.extend(
+                gdstk.FlexPath(points, width, ends=ends, simple_path=True,
+                               layer=layer, datatype=datatype).to_polygons()
+            )
+        for child, *_ in geometry.references:
+            self.createCell(self._library, child)
+        for reference in self.references(geometry.references):
+            polygons.extend(reference.get_polygons())
+        return polygons
+
+    @staticmethod
+    def itemTerminals(item: lshp.layoutShape) -> List[netTerminal]:
+        """
+        Pins and labels of a top level shape. The pins of instances are named
+        after the instance.
+        """
+        if isinstance(item, lshp.layoutPin):
+            center = item.sceneTransform().map(QRectF(item.rect).center())
+            return [netTerminal(item.pinName, "", item.layer.name, center.toTuple())]
+        if isinstance(item, lshp.layoutLabel):
+            start = item.sceneTransform().map(QPointF(item.start))
+            return [netTerminal(item.labelText, "", item.layer.name, start.toTuple())]
+        if isinstance(item, lshp.layoutInstance):
+            shapes = item.shapes if item.isExpanded else item.master.shapes
+            transform = item.sceneTransform()
+            return [
+                netTerminal(
+                    shape.pinName, item.instanceName, shape.layer.name,
+                    (gdse.localTransform(shape) * transform).map(
+                        QRectF(shape.rect).center()).toTuple(),
+                )
+                for shape in shapes if isinstance(shape, lshp.layoutPin)
+            ]
+        return []
+
+
+class netHighlight(QGraphicsPathItem):
+    """
+    Outline of the polygons of a highlighted net. Highlights are not layout
+    shapes, they are not saved or exported and do not take mouse clicks.
+    """
+
+    pen = QPen(QColor(255, 255, 255), 3)
+    pen.setCosmetic(True)
+    brush = QBrush(QColor(255, 255, 255, 96))
+
+    def __init__(self, net: layoutNet):
+        path = QPainterPath()
+        path.setFillRule(Qt.WindingFill)
+        for polygon in net.polygons:
+            path.addPolygon(
+                QPolygonF([QPointF(x, y) for x, y in polygon.points.tolist()]))
+            path.closeSubpath()
+        super().__init__(path)
+        self.net = net
+        self.setPen(netHighlight.pen)
+        self.setBrush(netHighlight.brush)
+        self.setZValue(HIGHLIGHT_Z)
+        self.setAcceptedMouseButtons(Qt.NoButton)
+        self.setFlag(QGraphicsItem.ItemIsSelectable, False)
+        self.setToolTip(net.name)
+
+    def __repr__(self):
+        return f"netHighlight({self.net.name})"
+
+
+class layoutNetExtractor:
+    """
+    Extracts the nets of a layout scene for highlighting and for comparing with
+    the schematic. The nets are extracted again on the first request after a
+    shape changes, only the changed shapes are flattened again. From the Python
+    console:
+
+        nets = scene.netExtractor.extract()
+        nets["vdd"].connections
+    """
+
+    def __init__(self, scene):
+        self.scene = scene
+        self.connections = processConnections()
+        self.highlights: List[netHighlight] = []
+        self.timings: Dict[str, float] = dict()
+        self._layerIndices: Dict[str, int] = dict()
+        self._itemGeometries: Dict[lshp.layoutShape, itemGeometry] = dict()
+        self._nets: Optional[Dict[str, layoutNet]] = None
+        # layer index -> polygons, their nets and their top level shapes.
+        self._layerGeometries: Dict[int, ldrc.layerGeometry] = dict()
+        self._polygonNets: Dict[int, List[layoutNet]] = dict()
+        self._polygonItems: Dict[int, list] = dict()
+        self._itemNets: Dict[lshp.layoutShape, List[layoutNet]] = dict()
+
+    @property
+    def nets(self) -> Dict[str, layoutNet]:
+        return self.extract()
+
+    def shapeChanged(self, item: QGraphicsItem) -> None:
+        """
+        Called by the shapes before and after they are moved, added or removed.
+        """
+        self._itemGeometries.pop(item.topLevelItem(), None)
+        self._nets = None
+
+    def clear(self) -> None:
+        self.clearHighlights()
+        self._itemGeometries.clear()
+        self._nets = None
+
+    def extract(self) -> Dict[str, layoutNet]:
+        """
+        Nets of the scene by name. Nets without pins or labels are named after
+        their position, the top left one is net0.
+        """
+        if self._nets is not None:
+            return self._nets
+        start = time.perf_counter()
+        items = [item for item in self.scene.spatialIndex.query() if
+                 not isinstance(item, lshp.layoutRuler)]
+        itemSet = set(items)
+        for item in set(self._itemGeometries) - itemSet:
+            del self._itemGeometries[item]
+        collector = None
+        for item in items:
+            if item not in self._itemGeometries:
+                collector = collector or netGeometryCollector(self._layerIndices)
+                self._itemGeometries[item] = itemGeometry(
+                    collector.itemPolygons(item), collector.itemTerminals(item))
+        layerPolygons: Dict[int, list] = dict()
+        layerItems: Dict[int, list] = dict()
+        for item in items:
+            for polygon in self._itemGeometries[item].polygons:
+                layerPolygons.setdefault(polygon.layer, []).append(polygon)
+                layerItems.setdefault(polygon.layer, []).append(item)
+        self._layerGeometries = {
+            layerIndex: ldrc.layerGeometry(polygons)
+            for layerIndex, polygons in layerPolygons.items()
+        }
+        self._polygonItems = layerItems
+        flattenEnd = time.perf_counter()
+        # polygons are numbered through the layers in the order of the layers.
+        offsets = dict()
+        polygonCount = 0
+        for layerIndex, geometry in self._layerGeometries.items():
+            offsets[layerIndex] = polygonCount
+            polygonCount += len(geometry)
+        groups = con.disjointSet(range(polygonCount))
+        for layerIndex, geometry in self._layerGeometries.items():
+            for first, second in self.touchingPairs(geometry):
+                groups.union(offsets[layerIndex] + first, offsets[layerIndex] + second)
+        for cutName, layerNames in self.connections:
+            cutIndex = self._layerIndices.get(cutName)
+            if cutIndex not in self._layerGeometries:
+                continue
+            for layerName in layerNames:
+                layerIndex = self._layerIndices.get(layerName)
+                if layerIndex not in self._layerGeometries:
+                    continue
+                for cut, other in self.overlappingPairs(
+                        self._layerGeometries[cutIndex],
+                        self._layerGeometries[layerIndex]):
+                    groups.union(offsets[cutIndex] + cut, offsets[layerIndex] + other)
+        connectEnd = time.perf_counter()
+        self._nets = self.createNets(groups, offsets, items)
+        self.timings = {
+            "flatten": flattenEnd - start,
+            "connect": connectEnd - flattenEnd,
+            "name": time.perf_counter() - connectEnd,
+        }
+        return self._nets
+
+    @staticmethod
+    def touchingPairs(geometry: ldrc.layerGeometry) -> Iterable[Tuple[int, int]]:
+        firsts, seconds = ldrc.nearPairs(geometry.bounds, CONNECT_TOLERANCE)
+        rectMask = geometry.rectMask
+        bothRects = rectMask[firsts] & rectMask[seconds]
+        yield from zip(firsts[bothRects].tolist(), seconds[bothRects].tolist())
+        polygons = geometry.polygons
+        for first, second in zip(firsts[~bothRects].tolist(),
+                                 seconds[~bothRects].tolist()):
+            if len(gdstk.boolean(polygons[first], polygons[second], "or")) == 1:
+                yield first, second
+
+    @staticmethod
+    def overlappingPairs(cuts: ldrc.layerGeometry,
+                         geometry: ldrc.layerGeometry) -> Iterable[Tuple[int, int]]:
+        cutIndices, indices = ldrc.nearPairs(cuts.bounds, 0.0, geometry.bounds)
+        bothRects = cuts.rectMask[cutIndices] & geometry.rectMask[indices]
+        yield from zip(cutIndices[bothRects].tolist(), indices[bothRects].tolist())
+        for cut, index in zip(cutIndices[~bothRects].tolist(),
+                              indices[~bothRects].tolist()):
+            overlap = gdstk.boolean(cuts.polygons[cut], geometry.polygons[index],
+                                    "and")
+            if sum(polygon.area() for polygon in overlap) > MIN_CONNECT_AREA:
+                yield cut, index
+
+    def createNets(self, groups: con.disjointSet, offsets: Dict[int, int],
+                   items: list) -> Dict[str, layoutNet]:
+        geometries = list(self._layerGeometries.values())
+        if not geometries:
+            self._polygonNets = dict()
+            self._itemNets = dict()
+            return dict()
+        polygons = [polygon for geometry in geometries for polygon in
+                    geometry.polygons]
+        polygonItems = [item for layerIndex in self._layerGeometries for item in
+                        self._polygonItems[layerIndex]]
+        bounds = np.concatenate([geometry.bounds for geometry in geometries])
+        roots = np.array([groups.find(index) for index in range(len(polygons))],
+                         dtype=np.intp)
+        groupRoots, groupIndices = np.unique(roots, return_inverse=True)
+        groupIndices = groupIndices.reshape(-1)
+        # groups are numbered from the top left for the names of unnamed nets.
+        tops = np.full(len(groupRoots), np.inf)
+        lefts = np.full(len(groupRoots), np.inf)
+        np.minimum.at(tops, groupIndices, bounds[:, 1])
+        np.minimum.at(lefts, groupIndices, bounds[:, 0])
+        groupOrder = np.lexsort((lefts, tops))
+        rank = np.empty_like(groupOrder)
+        rank[groupOrder] = np.arange(len(groupOrder))
+        groupIndices = rank[groupIndices]
+        groupTerminals: Dict[int, List[netTerminal]] = dict()
+        for item in items:
+            for terminal in self._itemGeometries[item].terminals:
+                index = self.polygonAt(terminal.point, terminal.layer)
+                if index is not None:
+                    groupIndex = groupIndices[offsets[index[0]] + index[1]].item()
+                    groupTerminals.setdefault(groupIndex, []).append(terminal)
+        order = np.argsort(groupIndices, kind="stable")
+        starts = np.searchsorted(groupIndices[order], np.arange(len(groupRoots) + 1))
+        groupNets = []
+        nets = dict()
+        unnamedCount = 0
+        for groupIndex, (start, end) in enumerate(
+                zip(starts[:-1].tolist(), starts[1:].tolist())):
+            members = order[start:end].tolist()
+            # dictionaries keep the shapes in order without repeating them.
+            net = layoutNet(
+                "", [polygons[member] for member in members],
+                list(dict.fromkeys(polygonItems[member] for member in members)),
+                groupTerminals.get(groupIndex, []),
+            )
+            names = net.names
+            if names:
+                net.name = names[0]
+                if net.name in nets:
+                    # the same name on separate nets, they are opens.
+                    net.name = f"{net.name}_{groupIndex}"
+            else:
+                net.name = f"net{unnamedCount}"
+                unnamedCount += 1
+            nets[net.name] = net
+            groupNets.append(net)
+        netArray = np.empty(len(groupNets), dtype=object)
+        netArray[:] = groupNets
+        self._polygonNets = {
+            layerIndex: netArray[groupIndices[offsets[layerIndex]:offsets[layerIndex]
+                                              + len(geometry)]].tolist()
+            for layerIndex, geometry in self._layerGeometries.items()
+        }
+        self._itemNets = dict()
+        for net in groupNets:
+            for item in net.items:
+                self._itemNets.setdefault(item, []).append(net)
+        return nets
+
+    def polygonAt(self, point: Tuple[float, float],
+                  layerName: str) -> Optional[Tuple[int, int]]:
+        """
+        Layer index and index of a polygon of the layer under a point.
+        """
+        layerIndex = self._layerIndices.get(layerName)
+        geometry = self._layerGeometries.get(layerIndex)
+        if geometry is None:
+            return None
+        x, y = point
+        bounds = geometry.bounds
+        candidates = np.flatnonzero(
+            (bounds[:, 0] <= x) & (bounds[:, 2] >= x) & (bounds[:, 1] <= y)
+            & (bounds[:, 3] >= y))
+        rectMask = geometry.rectMask
+        for index in candidates.tolist():
+            if rectMask[index] or gdstk.inside([point], geometry.polygons[index])[0]:
+                return layerIndex, index
+        return None
+
+    def netsAt(self, point, layerName: Optional[str] = None) -> List[layoutNet]:
+        """
+        Nets under a point, of one layer or of all the layers with the net of the
+        highest shape first.
+        """
+        self.extract()
+        if isinstance(point, (QPoint, QPointF)):
+            point = point.toTuple()
+        layerNames = [layerName] if layerName is not None else list(
+            self._layerIndices)
+        found = []
+        for name in layerNames:
+            index = self.polygonAt(point, name)
+            if index is not None:
+                layerIndex, polygonIndex = index
+                found.append((self._polygonItems[layerIndex][polygonIndex].zValue(),
+                              self._polygonNets[layerIndex][polygonIndex]))
+        found.sort(key=lambda zNet: -zNet[0])
+        return list(dict.fromkeys(net for _, net in found))
+
+    def netsOfItem(self, item: QGraphicsItem) -> List[layoutNet]:
+        self.extract()
+        return self._itemNets.get(item.topLevelItem(), [])
+
+    def highlight(self, net: layoutNet) -> netHighlight:
+        highlight = netHighlight(net)
+        self.scene.addItem(highlight)
+        self.highlights.append(highlight)
+        return highlight
+
+    def clearHighlights(self) -> None:
+        for highlight in self.highlights:
+            if highlight.scene() is self.scene:
+                self.scene.removeItem(highlight)
+        self.highlights.clear()
+
+    def report(self) -> str:
+        nets = self.extract()
+        shorts = [net.name for net in nets.values() if len(net.names) > 1]
+        report = (f"Net extraction: {len(nets)} nets, "
+                  f"{sum(len(net) for net in nets.values())} polygons")
+        if shorts:
+            report += f", shorts on {', '.join(shorts)}"
+        return report + "."
+
+    def timingReport(self) -> str:
+        return "Net extraction " + ", ".join(
+            f"{key} {value:.3f} s" for key, value in self.timings.items())
@@ -31,10 +31,40 @@ from PySide6.QtGui import (QStandardItem, )
 from PySide6.QtWidgets import QMessageBox, QWidget
 from typing import Union
 
+import revedaEditor.backend.hierarchyIndex as hidx
 import revedaEditor.backend.libraryMethods as libm
+import revedaEditor.fileio.compactCellview as cv
 
 
-class libraryItem(QStandardItem):
+class lazyItemMixin:
+    """
+    Library and cell items list their children when they are first asked for
+    them. The model of the item, e.g. designLibrariesModel, fills in the children
+    in populateItem.
+    """
+
+    populated = False
+
+    def populate(self):
+        if not self.populated:
+            model = self.model()
+            if hasattr(model, "populateItem"):
+                model.populateItem(self)
+
+    def rowCount(self) -> int:
+        self.populate()
+        return super().rowCount()
+
+    def child(self, row: int, column: int = 0):
+        self.populate()
+        return super().child(row, column)
+
+    def hasChildren(self) -> bool:
+        self.populate()
+        return super().hasChildren()
+
+
+class libraryItem(lazyItemMixin, QStandardItem):
     def __init__(self, libraryPath: pathlib.Path):  # path is a pathlib.Path object
         self._libraryPath = libraryPath
         self._libraryName = libraryPath.name
@@ -67,7 +97,7 @@ class libraryItem(QStandardItem):
         return self._libraryName
 
 
-class cellItem(QStandardItem):
+class cellItem(lazyItemMixin, QStandardItem):
     def __init__(self, cellPath: pathlib.Path) -> None:
         self.cellPath = cellPath
         self._cellName = cellPath.stem
@@ -118,28 +148,7 @@ class viewItem(QStandardItem):
 
     @property
     def viewType(self):
-        if "schematic" in self.viewPath.stem:
-            return "schematic"
-        elif "symbol" in self.viewPath.stem:
-            return "symbol"
-        elif "veriloga" in self.viewPath.stem:
-            return "veriloga"
-        elif "config" in self.viewPath.stem:
-            return "config"
-        elif "xyce" in self.viewPath.stem:
-            return "xyce"
-        elif "spice" in self.viewPath.stem:
-            return "spice"
-        elif "myhdl" in self.viewPath.stem:
-            return "myhdl"
-        elif "layout" in self.viewPath.stem:
-            return "layout"
-        elif "pcell" in self.viewPath.stem:
-            return "pcell"
-        elif "revbench" in self.viewPath.stem:
-            return "revbench"
-        else:
-            return None
+        return hidx.viewTypeOf(self.viewPath.stem)
 
     @property
     def viewName(self):
@@ -271,7 +280,7 @@ def copyCell(parent, model, origCellItem: cellItem, copyName, selectedLibPath) -
         newCellItem.setData(copyPath, Qt.UserRole + 2)
         # go through view list and add to cell item
         addedViewList = [viewItem(viewPath) for viewPath in copyPath.iterdir() if
-            viewPath.suffix == ".json"]
+            cv.isCellviewPath(viewPath)]
         [addedView.setEditable(False) for addedView in addedViewList]
 
         newCellItem.appendRows(addedViewList)
@@ -24,13 +24,23 @@
 #
 
 
+import hashlib
+import json
+import os
+import pathlib
 import shutil
+import threading
 
 from PySide6.QtCore import (
+    QFileSystemWatcher,
+    QModelIndex,
+    QStandardPaths,
+    QThreadPool,
     Qt,
 )
 from PySide6.QtGui import (
     QAction,
+    QStandardItem,
     QStandardItemModel,
 )
 from PySide6.QtWidgets import (
@@ -42,11 +52,14 @@ from PySide6.QtWidgets import (
 )
 
 
+import revedaEditor.backend.dataDefinitions as ddef
 import revedaEditor.backend.libraryMethods as libm
 import revedaEditor.backend.libBackEnd as libb
+import revedaEditor.fileio.compactCellview as cv
 import revedaEditor.gui.fileDialogues as fd
+from revedaEditor.gui.startThread import startThread
 
-from typing import List
+from typing import Dict, List, Tuple, Union
 
 
 class designLibrariesView(QTreeView):
@@ -188,7 +201,7 @@ class designLibrariesView(QTreeView):
                     )
                 else:
                     newViewPath = cellItem.data(Qt.UserRole + 2).joinpath(
-                        f"{newViewName}.json"
+                        f"{newViewName}{viewPath.suffix}"
                     )
                     shutil.copy(viewPath, newViewPath)
                     cellItem.appendRow(libb.viewItem(newViewPath))
@@ -201,7 +214,7 @@ class designLibrariesView(QTreeView):
             try:
                 viewPathObj = self.selectedItem.data(Qt.UserRole + 2)
                 newPathObj = self.selectedItem.data(Qt.UserRole + 2).rename(
-                    viewPathObj.parent.joinpath(f"{newName}.json")
+                    viewPathObj.parent.joinpath(f"{newName}{viewPathObj.suffix}")
                 )
                 self.selectedItem.parent().appendRow(libb.viewItem(newPathObj))
                 self.selectedItem.parent().removeRow(self.selectedItem.row())
@@ -217,13 +230,65 @@ class designLibrariesView(QTreeView):
         except OSError as e:
             self.logger.warning(f"Error:{e.strerror}")
 
+    def convertView(self):
+        """
+        Convert a layout or schematic cellview between the JSON and the compact
+        file formats.
+        """
+        viewItem = self.selectedItem
+        cellItem = viewItem.parent()
+        libItem = cellItem.parent()
+        viewTuple = ddef.viewTuple(
+            libItem.libraryName, cellItem.cellName, viewItem.viewName
+        )
+        if viewTuple in self.openViews:
+            self.logger.warning("Close the cellview before converting it.")
+            return
+        viewPathObj = viewItem.data(Qt.UserRole + 2)
+        if cv.isCompactPath(viewPathObj):
+            newPathObj = viewPathObj.with_suffix(cv.JSON_SUFFIX)
+        else:
+            newPathObj = viewPathObj.with_suffix(cv.COMPACT_SUFFIX)
+        try:
+            cv.convertCellview(viewPathObj, newPathObj)
+            viewPathObj.unlink()
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Cannot convert {viewPathObj}: {e}")
+            return
+        cellItem.appendRow(libb.viewItem(newPathObj))
+        cellItem.removeRow(viewItem.row())
+        self.logger.info(f"Converted {viewPathObj.name} to {newPathObj.name}")
+
+    def whereUsed(self):
+        """
+        List the cellviews instantiating the selected cell or view.
+        """
+        if self.selectedItem.data(Qt.UserRole + 1) == "view":
+            cellItem = self.selectedItem.parent()
+            viewName = self.selectedItem.viewName
+        else:
+            cellItem = self.selectedItem
+            viewName = None
+        libraryName = cellItem.parent().libraryName
+        users = self.appMainW.designHierarchy().whereUsed(
+            libraryName, cellItem.cellName, viewName
+        )
+        usedName = "/".join(
+            name for name in (libraryName, cellItem.cellName, viewName) if name
+        )
+        if users:
+            message = "\n".join("/".join(viewTuple) for viewTuple in users)
+        else:
+            message = "Not used by any cellview."
+        self.logger.info(f"{usedName} is used by {len(users)} cellviews.")
+        QMessageBox.information(self, f"Where Used: {usedName}", message)
+
     def reworkDesignLibrariesView(self, libraryDict: dict):
         """
-        Recreate library model from libraryDict.
+        Update the library model to libraryDict and the files on the disk.
         """
-        self.libraryModel = designLibrariesModel(libraryDict)
-        self.setModel(self.libraryModel)
-        self.libBrowsW.libraryModel = self.libraryModel
+        self.libraryDict = libraryDict
+        self.libraryModel.updateLibraries(libraryDict)
 
     # context menu
     def contextMenuEvent(self, event):
@@ -245,44 +310,344 @@ class designLibrariesView(QTreeView):
                 menu.addAction(QAction("Copy Cell...", self, triggered=self.copyCell))
                 menu.addAction(QAction("Rename Cell...", self, triggered=self.renameCell))
                 menu.addAction(QAction("Delete Cell...", self, triggered=self.deleteCell))
+                menu.addAction(QAction("Where Used...", self, triggered=self.whereUsed))
             elif self.selectedItem.data(Qt.UserRole + 1) == "view":
                 menu.addAction(QAction("Open View", self, triggered=self.openView))
                 menu.addAction(QAction("Copy View...", self, triggered=self.copyView))
                 menu.addAction(QAction("Rename View...", self, triggered=self.renameView))
                 menu.addAction(QAction("Delete View...", self, triggered=self.deleteView))
+                menu.addAction(QAction("Where Used...", self, triggered=self.whereUsed))
+                if self.selectedItem.viewType in ("layout", "schematic"):
+                    if cv.isCompactPath(self.selectedItem.data(Qt.UserRole + 2)):
+                        convertText = "Convert to JSON View"
+                    else:
+                        convertText = "Convert to Compact View"
+                    menu.addAction(QAction(convertText, self, triggered=self.convertView))
             menu.exec(event.globalPos())
         except UnboundLocalError:
             pass
 
 
+VIEW_INDEX_VERSION = 1
+
+
+def viewIndexPath(libraryPath: pathlib.Path) -> pathlib.Path:
+    """
+    Path of the view index file of a library in the user cache directory. The
+    library directories are watched for changes and can be read-only, so the
+    index is not kept in them.
+    """
+    cachePath = pathlib.Path(
+        QStandardPaths.writableLocation(QStandardPaths.GenericCacheLocation)
+    )
+    libraryKey = hashlib.sha1(str(libraryPath.resolve()).encode()).hexdigest()
+    return cachePath.joinpath("reveda", "libraryViews", f"{libraryKey}.json")
+
+
+class libraryViewIndex:
+    """
+    Cellview files of the cells of a library, saved in a small file in the user
+    cache directory. The files of a cell are listed again only if the
+    modification time of the cell directory changed. It is used from the GUI
+    thread and from the background scan.
+    """
+
+    def __init__(self, libraryPath: pathlib.Path, indexPath: pathlib.Path = None):
+        self.libraryPath = libraryPath
+        self.indexPath = indexPath or viewIndexPath(libraryPath)
+        # cell name -> (modification time of the cell directory in ns, view files)
+        self._cells: Dict[str, Tuple[int, List[str]]] = dict()
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._changed = False
+        self.scanned = False
+
+    def _load(self):
+        self._loaded = True
+        try:
+            with self.indexPath.open(mode="r") as f:
+                data = json.load(f)
+            if data.get("version") == VIEW_INDEX_VERSION and data.get(
+                "library"
+            ) == str(self.libraryPath.resolve()):
+                self._cells = {
+                    cellName: (mtimeNs, viewFiles)
+                    for cellName, (mtimeNs, viewFiles) in data["cells"].items()
+                }
+        except (OSError, ValueError, KeyError, TypeError):
+            self._cells = dict()
+
+    def save(self):
+        with self._lock:
+            if not self._changed:
+                return
+            data = {
+                "version": VIEW_INDEX_VERSION,
+                "library": str(self.libraryPath.resolve()),
+                "cells": {
+                    cellName: [mtimeNs, viewFiles]
+                    for cellName, (mtimeNs, viewFiles) in sorted(self._cells.items())
+                },
+            }
+            self._changed = False
+        try:
+            self.indexPath.parent.mkdir(parents=True, exist_ok=True)
+            with self.indexPath.open(mode="w") as f:
+                f.write(json.dumps(data))
+        except OSError:
+            pass  # the index is only a cache.
+
+    def cellNames(self) -> List[str]:
+        try:
+            with os.scandir(self.libraryPath) as entries:
+                return [entry.name for entry in entries if entry.is_dir()]
+        except OSError:
+            return []
+
+    def viewFiles(self, cellName: str, rescan: bool = False) -> List[str]:
+        """
+        Cellview file names of a cell. If rescan is True, the cell directory is
+        listed even if its modification time did not change.
+        """
+        cellPath = self.libraryPath.joinpath(cellName)
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            cached = self._cells.get(cellName)
+            try:
+                mtimeNs = cellPath.stat().st_mtime_ns
+                if not rescan and cached is not None and cached[0] == mtimeNs:
+                    return list(cached[1])
+                with os.scandir(cellPath) as entries:
+                    viewFiles = sorted(
+                        entry.name
+                        for entry in entries
+                        if os.path.splitext(entry.name)[1] in cv.CELLVIEW_SUFFIXES
+                    )
+            except OSError:
+                if self._cells.pop(cellName, None) is not None:
+                    self._changed = True
+                return []
+            if cached != (mtimeNs, viewFiles):
+                self._cells[cellName] = (mtimeNs, viewFiles)
+                self._changed = True
+            return list(viewFiles)
+
+    def scan(self) -> "libraryViewIndex":
+        """
+        Bring the index up to date with all the cells of the library and save it.
+        """
+        cellNames = self.cellNames()
+        for cellName in cellNames:
+            self.viewFiles(cellName)
+        with self._lock:
+            for cellName in set(self._cells) - set(cellNames):
+                del self._cells[cellName]
+                self._changed = True
+        self.save()
+        self.scanned = True
+        return self
+
+
+# view indices shared by all the library models in the process.
+libraryViewIndices: Dict[pathlib.Path, libraryViewIndex] = dict()
+
+
+def viewIndexOf(libraryPath: pathlib.Path) -> libraryViewIndex:
+    viewIndex = libraryViewIndices.get(libraryPath)
+    if viewIndex is None:
+        viewIndex = libraryViewIndices[libraryPath] = libraryViewIndex(libraryPath)
+    return viewIndex
+
+
+def scanViewIndices(viewIndices: List[libraryViewIndex]) -> None:
+    for viewIndex in viewIndices:
+        viewIndex.scan()
+
+
 class designLibrariesModel(QStandardItemModel):
+    """
+    Libraries, their cells and the views of the cells. Cells are listed when a
+    library is expanded or its cells are first asked for, and views in the same
+    way for cells. The view indices of the libraries are brought up to date in a
+    background thread and the listed libraries and cells are kept up to date with
+    a file system watcher.
+    """
+
     def __init__(self, libraryDict):
         self.libraryDict = libraryDict
         super().__init__()
         self.rootItem = self.invisibleRootItem()
         self.setHorizontalHeaderLabels(["Libraries"])
+        self._sortOrder = None  # order of the last sort by the view.
+        self._scanRunner = None
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.directoryChanged)
         self.initModel()
 
     def initModel(self):
         for designPath in self.libraryDict.values():
             self.populateLibrary(designPath)
+        self.scanLibraries()
 
     def populateLibrary(self, designPath):  # designPath: Path
         """
-        Populate library view.
+        Add a library to the model. Its cells are listed when they are needed.
         """
         if designPath.joinpath("reveda.lib").exists():
-            libraryItem = self.addLibraryToModel(designPath)
-            cellList = [cell.name for cell in designPath.iterdir() if cell.is_dir()]
-            for cell in cellList:  # type: str
-                cellItem = self.addCellToModel(designPath.joinpath(cell), libraryItem)
-                viewList = [
-                    view.name
-                    for view in designPath.joinpath(cell).iterdir()
-                    if view.suffix == ".json"
+            self.addLibraryToModel(designPath)
+            self.watcher.addPath(str(designPath))
+
+    def scanLibraries(self):
+        """
+        Update the view indices of the libraries in a background thread so that
+        expanding a cell does not wait for its directory to be listed.
+        """
+        viewIndices = [
+            viewIndexOf(self.item(row).libraryPath)
+            for row in range(self.rowCount())
+            if not viewIndexOf(self.item(row).libraryPath).scanned
+        ]
+        if viewIndices:
+            self._scanRunner = startThread(scanViewIndices, viewIndices)
+            self._scanRunner.setAutoDelete(False)
+            QThreadPool.globalInstance().start(self._scanRunner)
+
+    def acceptsView(self, viewFileName: str) -> bool:
+        """
+        Check if a cellview file is shown in the model.
+        """
+        return True
+
+    def populateItem(self, item: Union[libb.libraryItem, libb.cellItem]):
+        """
+        List the cells of a library item or the views of a cell item.
+        """
+        item.populated = True
+        if isinstance(item, libb.libraryItem):
+            self.syncLibrary(item)
+        elif isinstance(item, libb.cellItem):
+            self.syncCell(item)
+            self.watcher.addPath(str(item.cellPath))
+
+    def syncLibrary(self, libraryItem: libb.libraryItem):
+        """
+        Add and remove the cell items of a library to match its directory.
+        """
+        cellNames = set(viewIndexOf(libraryItem.libraryPath).cellNames())
+        for row in reversed(range(libraryItem.rowCount())):
+            if libraryItem.child(row).cellName not in cellNames:
+                libraryItem.removeRow(row)
+        listedNames = {
+            libraryItem.child(row).cellName for row in range(libraryItem.rowCount())
+        }
+        newNames = sorted(cellNames - listedNames)
+        for cellName in newNames:
+            self.addCellToModel(libraryItem.libraryPath.joinpath(cellName), libraryItem)
+        if newNames:
+            self.sortItem(libraryItem)
+
+    def syncCell(self, cellItem: libb.cellItem, rescan: bool = False):
+        """
+        Add and remove the view items of a cell to match its directory.
+        """
+        viewFiles = {
+            viewFileName
+            for viewFileName in viewIndexOf(cellItem.cellPath.parent).viewFiles(
+                cellItem.cellName, rescan
+            )
+            if self.acceptsView(viewFileName)
+        }
+        for row in reversed(range(cellItem.rowCount())):
+            if cellItem.child(row).viewPath.name not in viewFiles:
+                cellItem.removeRow(row)
+        listedFiles = {
+            cellItem.child(row).viewPath.name for row in range(cellItem.rowCount())
+        }
+        newFiles = sorted(viewFiles - listedFiles)
+        for viewFileName in newFiles:
+            self.addViewToModel(cellItem.cellPath.joinpath(viewFileName), cellItem)
+        if newFiles:
+            self.sortItem(cellItem)
+
+    def sortItem(self, item: QStandardItem):
+        if self._sortOrder is not None:
+            item.sortChildren(0, self._sortOrder)
+
+    def sort(self, column: int, order: Qt.SortOrder = Qt.AscendingOrder):
+        self._sortOrder = order
+        super().sort(column, order)
+
+    def hasChildren(self, parent: QModelIndex = QModelIndex()) -> bool:
+        if parent.isValid():
+            item = self.itemFromIndex(parent)
+            if isinstance(item, libb.lazyItemMixin) and not item.populated:
+                return True
+        return super().hasChildren(parent)
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        if parent.isValid():
+            item = self.itemFromIndex(parent)
+            return isinstance(item, libb.lazyItemMixin) and not item.populated
+        return False
+
+    def fetchMore(self, parent: QModelIndex):
+        if parent.isValid():
+            self.itemFromIndex(parent).populate()
+
+    def directoryChanged(self, path: str):
+        """
+        Update the listed library or cell whose directory changed.
+        """
+        pathObj = pathlib.Path(path)
+        for row in range(self.rowCount()):
+            libraryItem = self.item(row)
+            if not libraryItem.populated:
+                continue
+            if libraryItem.libraryPath == pathObj:
+                self.syncLibrary(libraryItem)
+            elif libraryItem.libraryPath == pathObj.parent:
+                cellItem = libm.getCellItem(libraryItem, pathObj.name)
+                if cellItem is not None and cellItem.populated:
+                    self.syncCell(cellItem, rescan=True)
+
+    def updateLibraries(self, libraryDict: dict):
+        """
+        Add and remove libraries to match libraryDict and list the cells and views
+        of the listed libraries and cells again.
+        """
+        self.libraryDict = libraryDict
+        libraryPaths = [
+            pathlib.Path(designPath)
+            for designPath in libraryDict.values()
+            if pathlib.Path(designPath).joinpath("reveda.lib").exists()
+        ]
+        for row in reversed(range(self.rowCount())):
+            libraryPath = self.item(row).libraryPath
+            if libraryPath not in libraryPaths:
+                watchedPaths = [
+                    watchedPath
+                    for watchedPath in self.watcher.directories()
+                    if libraryPath in (pathlib.Path(watchedPath),
+                                       pathlib.Path(watchedPath).parent)
                 ]
-                for view in viewList:
-                    self.addViewToModel(designPath.joinpath(cell, view), cellItem)
+                if watchedPaths:
+                    self.watcher.removePaths(watchedPaths)
+                self.removeRow(row)
+        listedPaths = {self.item(row).libraryPath for row in range(self.rowCount())}
+        for libraryPath in libraryPaths:
+            if libraryPath not in listedPaths:
+                self.populateLibrary(libraryPath)
+        for row in range(self.rowCount()):
+            libraryItem = self.item(row)
+            if not libraryItem.populated:
+                continue
+            self.syncLibrary(libraryItem)
+            for cellRow in range(libraryItem.rowCount()):
+                cellItem = libraryItem.child(cellRow)
+                if cellItem.populated:
+                    self.syncCell(cellItem, rescan=True)
+        self.scanLibraries()
 
     def addLibraryToModel(self, designPath):
         libraryEntry = libb.libraryItem(designPath)
@@ -345,23 +710,8 @@ class symbolViewsModel(designLibrariesModel):
         self.symbolViews = symbolViews
         super().__init__(libraryDict)
 
-    def populateLibrary(self, designPath):  # designPath: Path
-        """
-        Populate library view.
-        """
-        if designPath.joinpath("reveda.lib").exists():
-            libraryItem = self.addLibraryToModel(designPath)
-            cellList = [cell.name for cell in designPath.iterdir() if cell.is_dir()]
-            for cell in cellList:  # type: str
-                cellItem = self.addCellToModel(designPath.joinpath(cell), libraryItem)
-                viewList = [
-                    view.name
-                    for view in designPath.joinpath(cell).iterdir()
-                    if view.suffix == ".json"
-                    and any(x in view.name for x in self.symbolViews)
-                ]
-                for view in viewList:
-                    self.addViewToModel(designPath.joinpath(cell, view), cellItem)
+    def acceptsView(self, viewFileName: str) -> bool:
+        return any(x in viewFileName for x in self.symbolViews)
 
 
 class layoutViewsModel(designLibrariesModel):
@@ -369,20 +719,5 @@ class layoutViewsModel(designLibrariesModel):
         self.layoutViews = layoutViews
         super().__init__(libraryDict)
 
-    def populateLibrary(self, designPath):  # designPath: Path
-        """
-        Populate library view.
-        """
-        if designPath.joinpath("reveda.lib").exists():
-            libraryItem = self.addLibraryToModel(designPath)
-            cellList = [cell.name for cell in designPath.iterdir() if cell.is_dir()]
-            for cell in cellList:  # type: str
-                cellItem = self.addCellToModel(designPath.joinpath(cell), libraryItem)
-                viewList = [
-                    view.name
-                    for view in designPath.joinpath(cell).iterdir()
-                    if view.suffix == ".json"
-                    and any(x in view.name for x in self.layoutViews)
-                ]
-                for view in viewList:
-                    self.addViewToModel(designPath.joinpath(cell, view), cellItem)
+    def acceptsView(self, viewFileName: str) -> bool:
+        return any(x in viewFileName for x in self.layoutViews)
@@ -0,0 +1,799 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+# Headless netlisting engine. It works on the schematic and symbol JSON files
+# directly so that it can be used from the command line or from scripts as well as
+# from the schematic editor.
+
+import argparse
+import datetime
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import pathlib
+import re
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, TextIO, Tuple
+
+import revedaEditor.backend.dataDefinitions as ddef
+import revedaEditor.backend.hierarchyIndex as hidx
+import revedaEditor.backend.schematicModel as scm
+import revedaEditor.backend.symbolCache as symc
+import revedaEditor.fileio.compactCellview as cv
+from revedaEditor.backend.jobControl import jobControl, reportProgress
+
+
+def readLibraryDefinitions(libDefFilePathObj: pathlib.Path) -> Dict[str, pathlib.Path]:
+    """
+    Read a library.json file and return the library name to path dictionary. It
+    follows included library definition files in the same way as the main window.
+    """
+    libraryDict = dict()
+    with libDefFilePathObj.open(mode="r") as f:
+        data = json.load(f)
+    for key, value in data.get("libdefs", {}).items():
+        libPathObj = pathlib.Path(value)
+        if not libPathObj.is_absolute():
+            libPathObj = libDefFilePathObj.parent.joinpath(libPathObj)
+        libraryDict[key] = libPathObj.resolve()
+    for includePath in data.get("include", []):
+        includePathObj = pathlib.Path(includePath)
+        if not includePathObj.is_absolute():
+            includePathObj = libDefFilePathObj.parent.joinpath(includePathObj)
+        libraryDict.update(readLibraryDefinitions(includePathObj))
+    return libraryDict
+
+
+# change when the netlist lines created for the same schematic change.
+NETLIST_FORMAT_VERSION = "2"
+# minimum number of cellviews to be netlisted to use the process pool.
+PARALLEL_CELL_COUNT = 4
+PIN_LIST = "@pinList"
+
+
+class netlistLineTemplate:
+    """
+    Netlist line format of a symbol compiled to a format string. Label names and
+    @pinList become fields filled in for each instance in one pass. Symbol
+    attributes are the same for all the instances of a symbol and are filled in
+    when the line is compiled. Longer names are matched first, so that @w does
+    not replace the start of @width.
+    """
+
+    def __init__(self, formatLine: str, labelNames: Iterable[str],
+                 attributes: Dict[str, str]):
+        attributeValues = {f"%{name}": value for name, value in attributes.items()}
+        labelNames = [name for name in labelNames if name]
+        tokens = sorted({*labelNames, *attributeValues, PIN_LIST}, key=len,
+                        reverse=True)
+        pattern = re.compile("|".join(re.escape(token) for token in tokens))
+        formatLine = formatLine.strip()
+        parts = []
+        # label names or None for the pin list, in the order of the fields.
+        self.fields: List[Optional[str]] = []
+        position = 0
+        for match in pattern.finditer(formatLine):
+            parts.append(self.escape(formatLine[position:match.start()]))
+            token = match.group()
+            if token in attributeValues and token not in labelNames:
+                parts.append(self.escape(attributeValues[token]))
+            else:
+                parts.append(f"{{{len(self.fields)}}}")
+                self.fields.append(token if token in labelNames else None)
+            position = match.end()
+        parts.append(self.escape(formatLine[position:]))
+        self._format = "".join(parts) + "\n"
+
+    @staticmethod
+    def escape(text: str) -> str:
+        return text.replace("{", "{{").replace("}", "}}")
+
+    def format(self, labels: Dict[str, "scm.netlistLabel"], pinList: str) -> str:
+        return self._format.format(
+            *[pinList if field is None else labels[field].labelValue for field in
+              self.fields]
+        )
+
+
+@dataclass
+class cellNode:
+    """
+    A schematic cellview in the netlisted hierarchy.
+    """
+
+    viewTuple: ddef.viewTuple
+    pinList: str
+    digest: str
+    items: list
+    subcircuits: List[Tuple[ddef.viewTuple, str]]
+    # nets of the symbol pins if they are known, e.g. from the schematic editor.
+    symbolPinNets: Optional[List[Dict[str, str]]] = None
+
+
+@dataclass
+class cellNetlist:
+    """
+    Netlist body of a single schematic cellview and the lines it needs at the end
+    of the netlist.
+    """
+
+    lines: str
+    includeLines: Tuple[str, ...]
+    vamodelLines: Tuple[str, ...]
+    vahdlLines: Tuple[str, ...]
+    messages: Tuple[Tuple[int, str], ...] = ()
+
+
+class cellNetlistCache:
+    """
+    Netlist bodies keyed by the hash of the cellview and its dependencies.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._bodies: OrderedDict[str, cellNetlist] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._bodies)
+
+    def get(self, digest: str) -> Optional[cellNetlist]:
+        with self._lock:
+            body = self._bodies.get(digest)
+            if body is not None:
+                self._bodies.move_to_end(digest)
+            return body
+
+    def put(self, digest: str, body: cellNetlist) -> None:
+        with self._lock:
+            self._bodies[digest] = body
+            self._bodies.move_to_end(digest)
+            while len(self._bodies) > self.maxsize:
+                self._bodies.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._bodies.clear()
+
+
+subcircuitCache = cellNetlistCache()
+
+_processPool: Optional[ProcessPoolExecutor] = None
+_processPoolLock = threading.Lock()
+
+
+def processPool(maxWorkers: Optional[int] = None) -> ProcessPoolExecutor:
+    """
+    Process pool shared by netlisting runs. Processes are spawned so that they do
+    not inherit the state of the GUI.
+    """
+    global _processPool
+    with _processPoolLock:
+        if _processPool is None:
+            _processPool = ProcessPoolExecutor(
+                max_workers=maxWorkers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _processPool
+
+
+class _recordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages: List[Tuple[int, str]] = list()
+
+    def emit(self, record: logging.LogRecord):
+        self.messages.append((record.levelno, record.getMessage()))
+
+
+def netlistCellTask(task: tuple) -> cellNetlist:
+    """
+    Netlist a single schematic cellview in a pool process. Log messages are
+    returned with the result to be logged by the calling process.
+    """
+    (libraryDict, switchViewList, stopViewList, configDict, viewTuple, items,
+     symbolPinNets) = task
+    logger = logging.getLogger(f"reveda.netlist.{viewTuple.cellName}")
+    logger.propagate = False
+    handler = _recordingHandler()
+    logger.addHandler(handler)
+    try:
+        engine = xyceNetlistEngine(
+            libraryDict,
+            *viewTuple,
+            switchViewList,
+            stopViewList,
+            configDict,
+            logger,
+            maxWorkers=1,
+        )
+        result = engine.netlistCell(items, symbolPinNets)
+    finally:
+        logger.removeHandler(handler)
+    result.messages = tuple(handler.messages)
+    return result
+
+
+class xyceNetlistEngine:
+    """
+    Create a Xyce netlist of a schematic cellview without any editor windows.
+    """
+
+    def __init__(
+        self,
+        libraryDict: Dict[str, pathlib.Path],
+        libraryName: str,
+        cellName: str,
+        viewName: str,
+        switchViewList: List[str],
+        stopViewList: List[str],
+        configDict: Optional[dict] = None,
+        logger: Optional[logging.Logger] = None,
+        maxWorkers: Optional[int] = None,
+    ):
+        self.libraryDict = libraryDict
+        self.libraryName = libraryName
+        self.cellName = cellName
+        self.viewName = viewName
+        self.switchViewList = switchViewList
+        self.stopViewList = stopViewList
+        self.configDict = configDict
+        self.logger = logger or logging.getLogger("reveda")
+        self.maxWorkers = maxWorkers  # 1 netlists in this process only.
+        self.netlistedViewsSet = set()  # keeps track of netlisted views.
+        self.includeLines = set()  # keeps track of include lines.
+        self.vamodelLines = set()  # keeps track of vamodel lines.
+        self.vahdlLines = set()  # keeps track of *.HDL lines.
+        self._symbolDefs: Dict[ddef.viewTuple, scm.symbolDefinition] = dict()
+
+    def __repr__(self):
+        return (
+            f"xyceNetlistEngine({self.libraryName}, {self.cellName}, {self.viewName})"
+        )
+
+    def viewPathObj(self, libraryName: str, cellName: str, viewName: str) -> pathlib.Path:
+        return cv.cellviewPath(self.libraryDict[libraryName].joinpath(cellName), viewName)
+
+    def cellViewNames(self, libraryName: str, cellName: str) -> List[str]:
+        cellPathObj = self.libraryDict[libraryName].joinpath(cellName)
+        if not cellPathObj.is_dir():
+            return []
+        return [
+            viewPathObj.stem
+            for viewPathObj in cellPathObj.iterdir()
+            if cv.isCellviewPath(viewPathObj)
+        ]
+
+    def symbolDefinition(
+        self, libraryName: str, cellName: str, viewName: str
+    ) -> scm.symbolDefinition:
+        """
+        Get a symbol definition from the process-wide symbol cache. Missing symbols
+        are returned as empty draft definitions.
+        """
+        viewTuple = ddef.viewTuple(libraryName, cellName, viewName)
+        if viewTuple not in self._symbolDefs:
+            try:
+                template = symc.symbolDefinitions.get(
+                    libraryName,
+                    cellName,
+                    viewName,
+                    self.viewPathObj(libraryName, cellName, viewName),
+                )
+                symbolDef = template.derived.get("netlist")
+                if symbolDef is None:
+                    symbolDef = scm.symbolDefinition.fromTemplate(template)
+                    template.derived["netlist"] = symbolDef
+            except (OSError, KeyError, ValueError) as e:
+                self.logger.error(f"Cannot read {libraryName}/{cellName}/{viewName}: {e}")
+                symbolDef = scm.symbolDefinition(libraryName, cellName, viewName)
+                symbolDef.draft = True
+            self._symbolDefs[viewTuple] = symbolDef
+        return self._symbolDefs[viewTuple]
+
+    def readSchematicItems(self, libraryName: str, cellName: str, viewName: str) -> list:
+        return cv.readCellview(self.viewPathObj(libraryName, cellName, viewName))
+
+    def loadSchematicModel(
+        self, libraryName: str, cellName: str, viewName: str
+    ) -> scm.schematicModel:
+        return self.schematicModelFromItems(
+            self.readSchematicItems(libraryName, cellName, viewName)
+        )
+
+    def schematicModelFromItems(self, items: list) -> scm.schematicModel:
+        return scm.schematicModel.fromItems(items, self.symbolDefinition, self.logger)
+
+    def writeNetlist(
+        self,
+        filePathObj: pathlib.Path,
+        topItems: Optional[list] = None,
+        control: Optional[jobControl] = None,
+        topPinNets: Optional[List[Dict[str, str]]] = None,
+    ):
+        """
+        Write the netlist to filePathObj. If topItems is given, it is used instead of
+        the saved top level schematic, e.g. for unsaved changes in the editor. The
+        optional control object receives progress reports and can cancel the job, in
+        which case no netlist is written. topPinNets gives the nets of the symbol
+        pins of topItems, in the order of the symbols, if the editor already knows
+        them. The nets of the top schematic are then not grouped again.
+
+        Every schematic cellview in the hierarchy is netlisted once on its own.
+        Cellviews whose contents did not change since an earlier run are taken
+        from the subcircuit cache, the rest are netlisted in a process pool.
+        """
+        topViewTuple = ddef.viewTuple(self.libraryName, self.cellName, self.viewName)
+        if topItems is None:
+            topItems = self.readSchematicItems(*topViewTuple)
+        reportProgress(control, 0, 0, "Reading the design hierarchy...")
+        cellNodes = self.collectHierarchy(topViewTuple, topItems, topPinNets)
+        cellNetlists = self.netlistCells(cellNodes, control)
+        reportProgress(control, len(cellNodes), len(cellNodes), "Writing netlist...")
+
+        with filePathObj.open(mode="w") as cirFile:
+            cirFile.write(
+                "*".join(
+                    [
+                        "\n",
+                        80 * "*",
+                        "\n",
+                        "* Revolution EDA CDL Netlist\n",
+                        f"* Library: {self.libraryName}\n",
+                        f"* Top Cell Name: {self.cellName}\n",
+                        f"* View Name: {self.viewName}\n",
+                        f"* Date: {datetime.datetime.now()}\n",
+                        80 * "*",
+                        "\n",
+                        ".GLOBAL gnd!\n\n",
+                    ]
+                )
+            )
+            # subcircuits are written after the subcircuits they use.
+            for cellNode in cellNodes[:-1]:
+                cirFile.write(
+                    f".SUBCKT {cellNode.viewTuple.cellName} {cellNode.pinList}\n"
+                )
+                cirFile.write(cellNetlists[cellNode.digest].lines)
+                cirFile.write(".ENDS\n")
+            cirFile.write(cellNetlists[cellNodes[-1].digest].lines)
+
+            cirFile.write(".END\n")
+            for cellNode in cellNodes:
+                self.includeLines.update(cellNetlists[cellNode.digest].includeLines)
+                self.vamodelLines.update(cellNetlists[cellNode.digest].vamodelLines)
+                self.vahdlLines.update(cellNetlists[cellNode.digest].vahdlLines)
+            for line in self.includeLines:
+                cirFile.write(f"{line}\n")
+            for line in self.vamodelLines:
+                cirFile.write(f"{line}\n")
+            for line in self.vahdlLines:
+                cirFile.write(f"{line}\n")
+
+    def collectHierarchy(
+        self,
+        topViewTuple: ddef.viewTuple,
+        topItems: list,
+        topPinNets: Optional[List[Dict[str, str]]] = None,
+    ) -> List["cellNode"]:
+        """
+        Find all schematic cellviews to be netlisted as subcircuits. The list is in
+        dependency order, i.e. a cellview comes after the cellviews it instantiates,
+        and the top cellview is the last one.
+        """
+        cellNodes: List[cellNode] = list()
+        inProgress = set()
+        self.netlistedViewsSet = set()
+
+        def visit(viewTuple: ddef.viewTuple, items: list, pinList: str,
+                  symbolPinNets: Optional[List[Dict[str, str]]] = None):
+            inProgress.add(viewTuple)
+            node = self.createCellNode(viewTuple, items, pinList, symbolPinNets)
+            for subViewTuple, subPinList in node.subcircuits:
+                if subViewTuple in inProgress:
+                    self.logger.error(f"{subViewTuple} instantiates itself.")
+                elif subViewTuple not in self.netlistedViewsSet:
+                    self.netlistedViewsSet.add(subViewTuple)
+                    try:
+                        subItems = self.readSchematicItems(*subViewTuple)
+                    except (OSError, ValueError) as e:
+                        self.logger.error(f"Cannot read {subViewTuple}: {e}")
+                        continue
+                    visit(subViewTuple, subItems, subPinList)
+            inProgress.discard(viewTuple)
+            cellNodes.append(node)
+
+        visit(topViewTuple, topItems, "", topPinNets)
+        return cellNodes
+
+    def createCellNode(
+        self,
+        viewTuple: ddef.viewTuple,
+        items: list,
+        pinList: str,
+        symbolPinNets: Optional[List[Dict[str, str]]] = None,
+    ) -> "cellNode":
+        """
+        Find the subcircuits used by a schematic and the hash of everything its
+        netlist depends on: the schematic itself, the symbols it instantiates, the
+        views chosen for them, the netlisting options and the given symbol pin nets.
+        """
+        digest = hashlib.sha256()
+        digest.update(NETLIST_FORMAT_VERSION.encode())
+        digest.update(
+            json.dumps(
+                [self.switchViewList, self.stopViewList, self.configDict],
+                sort_keys=True,
+            ).encode()
+        )
+        digest.update(json.dumps(items, sort_keys=True).encode())
+        if symbolPinNets is not None:
+            digest.update(json.dumps(symbolPinNets, sort_keys=True).encode())
+        subcircuits = list()
+        for item in items:
+            if item.get("type") != "sys":
+                continue
+            symbolDef = self.symbolDefinition(item["lib"], item["cell"], item["view"])
+            netlistView = self.determineNetlistView(symbolDef)
+            digest.update(
+                f"{item['lib']}/{item['cell']}/{item['view']}:"
+                f"{symbolDef.digest}:{netlistView}".encode()
+            )
+            if (
+                "schematic" in netlistView
+                and netlistView not in self.stopViewList
+                and symbolDef.attributes.get("XyceNetlistPass") != "1"
+                and not item.get("ign", 0)
+            ):
+                subcircuits.append(
+                    (
+                        ddef.viewTuple(item["lib"], item["cell"], netlistView),
+                        symbolDef.attributes.get("pinOrder", ", ").replace(",", " "),
+                    )
+                )
+        return cellNode(
+            viewTuple, pinList, digest.hexdigest(), items, subcircuits, symbolPinNets
+        )
+
+    def netlistCells(
+        self, cellNodes: List["cellNode"], control: Optional[jobControl] = None
+    ) -> Dict[str, "cellNetlist"]:
+        """
+        Return the netlist bodies of cellviews keyed by their hash. Only cellviews
+        not found in the subcircuit cache are netlisted.
+        """
+        cellNetlists = dict()
+        todoNodes = list()
+        for node in cellNodes:
+            cached = subcircuitCache.get(node.digest)
+            if cached is None:
+                if node.digest not in {todo.digest for todo in todoNodes}:
+                    todoNodes.append(node)
+            else:
+                cellNetlists[node.digest] = cached
+        self.logger.info(
+            f"Netlisting {len(todoNodes)} of {len(cellNodes)} cellviews, "
+            f"{len(cellNodes) - len(todoNodes)} from cache."
+        )
+        tasks = [
+            (
+                self.libraryDict,
+                self.switchViewList,
+                self.stopViewList,
+                self.configDict,
+                node.viewTuple,
+                node.items,
+                node.symbolPinNets,
+            )
+            for node in todoNodes
+        ]
+        cachedCount = len(cellNodes) - len(todoNodes)
+        reportProgress(control, cachedCount, len(cellNodes), "Netlisting...")
+        if self.maxWorkers != 1 and len(tasks) >= PARALLEL_CELL_COUNT:
+            futures = {
+                processPool(self.maxWorkers).submit(netlistCellTask, task): node
+                for task, node in zip(tasks, todoNodes)
+            }
+            try:
+                for doneCount, future in enumerate(as_completed(futures), 1):
+                    self._storeCellNetlist(futures[future], future.result(), cellNetlists)
+                    reportProgress(
+                        control,
+                        cachedCount + doneCount,
+                        len(cellNodes),
+                        f"Netlisted {futures[future].viewTuple.cellName}",
+                    )
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+        else:
+            for doneCount, node in enumerate(todoNodes, 1):
+                self._storeCellNetlist(
+                    node, self.netlistCell(node.items, node.symbolPinNets), cellNetlists
+                )
+                reportProgress(
+                    control,
+                    cachedCount + doneCount,
+                    len(cellNodes),
+                    f"Netlisted {node.viewTuple.cellName}",
+                )
+        return cellNetlists
+
+    def _storeCellNetlist(
+        self, node: "cellNode", result: "cellNetlist", cellNetlists: dict
+    ) -> None:
+        for levelNo, message in result.messages:
+            self.logger.log(levelNo, f"{node.viewTuple.cellName}: {message}")
+        subcircuitCache.put(node.digest, result)
+        cellNetlists[node.digest] = result
+
+    def netlistCell(
+        self, items: list, symbolPinNets: Optional[List[Dict[str, str]]] = None
+    ) -> "cellNetlist":
+        """
+        Netlist the instances of a single schematic. Subcircuit definitions are not
+        included. If symbolPinNets is given, the nets are not grouped again.
+        """
+        self.includeLines = set()
+        self.vamodelLines = set()
+        self.vahdlLines = set()
+        cirFile = io.StringIO()
+        try:
+            schematicModel = self.schematicModelFromItems(items)
+            if symbolPinNets is not None and len(symbolPinNets) != len(
+                schematicModel.symbols
+            ):
+                self.logger.warning("Symbol pin nets do not match, grouping nets.")
+                symbolPinNets = None
+            if symbolPinNets is None:
+                schematicModel.groupAllNets()  # name all nets in the schematic
+            schematicModel.generatePinNetMap(symbolPinNets)
+            for elementSymbol in schematicModel.symbols:
+                self.processElementSymbol(elementSymbol, cirFile)
+        except Exception as e:
+            self.logger.error(f"Netlisting error: {e}")
+        return cellNetlist(
+            cirFile.getvalue(),
+            tuple(sorted(self.includeLines)),
+            tuple(sorted(self.vamodelLines)),
+            tuple(sorted(self.vahdlLines)),
+        )
+
+    def processElementSymbol(self, elementSymbol: scm.symbolInstance, cirFile: TextIO):
+        if elementSymbol.symattrs.get("XyceNetlistPass") != "1" and (
+            not elementSymbol.netlistIgnore
+        ):
+            netlistView = self.determineNetlistView(elementSymbol)
+            # Create the netlist line for the item.
+            self.createItemLine(cirFile, elementSymbol, netlistView)
+        elif elementSymbol.netlistIgnore:
+            cirFile.write(f"*{elementSymbol.instanceName} is marked to be ignored\n")
+        elif not elementSymbol.symattrs.get("XyceNetlistPass", False):
+            cirFile.write(
+                f"*{elementSymbol.instanceName} has no XyceNetlistLine attribute\n"
+            )
+
+    def determineNetlistView(self, elementSymbol) -> str:
+        """
+        Find the view to netlist for a symbol instance or a symbol definition.
+        """
+        if self.configDict is not None:
+            return self.configDict.get(elementSymbol.cellName)[1]
+        viewNames = self.cellViewNames(elementSymbol.libraryName, elementSymbol.cellName)
+        for viewName in self.switchViewList:
+            if viewName in viewNames:
+                return viewName
+        return "symbol"
+
+    def createItemLine(
+        self, cirFile: TextIO, elementSymbol: scm.symbolInstance, netlistView: str
+    ):
+        # subcircuit definitions of schematic views are written separately.
+        if "schematic" in netlistView or "symbol" in netlistView:
+            cirFile.write(self.createXyceSymbolLine(elementSymbol))
+        elif "spice" in netlistView:
+            cirFile.write(self.createSpiceLine(elementSymbol))
+        elif "veriloga" in netlistView:
+            cirFile.write(self.createVerilogaLine(elementSymbol))
+
+    @staticmethod
+    def lineTemplate(
+        elementSymbol: scm.symbolInstance, attributeName: str
+    ) -> netlistLineTemplate:
+        """
+        Netlist line of the symbol of an instance, compiled once for the symbol.
+        """
+        templates = elementSymbol.symbolDef.netlistTemplates
+        template = templates.get(attributeName)
+        if template is None:
+            template = templates[attributeName] = netlistLineTemplate(
+                elementSymbol.symattrs[attributeName],
+                elementSymbol.labels,
+                elementSymbol.symattrs,
+            )
+        return template
+
+    def createXyceSymbolLine(self, elementSymbol: scm.symbolInstance) -> str:
+        """
+        Create a netlist line from a nlp device format line.
+        """
+        try:
+            return self.lineTemplate(elementSymbol, "XyceSymbolNetlistLine").format(
+                elementSymbol.labels, " ".join(elementSymbol.pinNetMap.values())
+            )
+        except Exception as e:
+            self.logger.error(
+                f"Error creating netlist line for {elementSymbol.instanceName}: {e}"
+            )
+            return (
+                f"*Netlist line is not defined for symbol of {elementSymbol.instanceName}\n"
+            )
+
+    def createSpiceLine(self, elementSymbol: scm.symbolInstance) -> str:
+        """
+        Create a netlist line from a nlp device format line.
+        """
+        try:
+            spiceNetlistLine = self.lineTemplate(
+                elementSymbol, "XyceSpiceNetlistLine"
+            ).format(
+                elementSymbol.labels,
+                elementSymbol.symattrs.get("pinOrder", ", ").replace(",", " "),
+            )
+            self.includeLines.add(
+                elementSymbol.symattrs.get(
+                    "incLine",
+                    f"* no include line is found for {elementSymbol.cellName}",
+                ).strip()
+            )
+            return spiceNetlistLine
+        except Exception as e:
+            self.logger.error(f"Spice subckt netlist error: {e}")
+            self.logger.error(
+                f"Netlist line is not defined for {elementSymbol.instanceName}"
+            )
+            # if there is no NLPDeviceFormat line, create a warning line
+            return (
+                f"*Netlist line is not defined for symbol of {elementSymbol.instanceName}\n"
+            )
+
+    def createVerilogaLine(self, elementSymbol: scm.symbolInstance) -> str:
+        """
+        Create a netlist line from a nlp device format line.
+        """
+        try:
+            verilogaNetlistLine = self.lineTemplate(
+                elementSymbol, "XyceVerilogaNetlistLine"
+            ).format(elementSymbol.labels, " ".join(elementSymbol.pinNetMap.values()))
+            self.vamodelLines.add(
+                elementSymbol.symattrs.get(
+                    "vaModelLine",
+                    f"* no model line is found for {elementSymbol.cellName}",
+                ).strip()
+            )
+            self.vahdlLines.add(
+                elementSymbol.symattrs.get(
+                    "vaHDLLine", f"* no hdl line is found for {elementSymbol.cellName}"
+                ).strip()
+            )
+            return verilogaNetlistLine
+        except Exception as e:
+            self.logger.error(e)
+            self.logger.error(
+                f"Netlist line is not defined for {elementSymbol.instanceName}"
+            )
+            # if there is no NLPDeviceFormat line, create a warning line
+            return (
+                f"*Netlist line is not defined for symbol of {elementSymbol.instanceName}\n"
+            )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="reveda-netlist",
+        description="Create a Xyce netlist of a Revolution EDA schematic.",
+    )
+    parser.add_argument("libraryName")
+    parser.add_argument("cellName")
+    parser.add_argument("viewName", nargs="?", default="schematic")
+    parser.add_argument(
+        "-l", "--libdefs", default="library.json", help="library definitions file"
+    )
+    parser.add_argument("-o", "--output", help="netlist file path")
+    parser.add_argument(
+        "--switch",
+        default="schematic,veriloga,spice,symbol",
+        help="comma separated switch view list",
+    )
+    parser.add_argument("--stop", default="symbol", help="comma separated stop view list")
+    parser.add_argument("-c", "--config", help="config view json file")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None, help="number of netlisting processes"
+    )
+    parser.add_argument(
+        "-u",
+        "--update",
+        action="store_true",
+        help="only write the netlist if a cellview it is made from changed",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    logger = logging.getLogger("reveda")
+    libDefFilePathObj = pathlib.Path(args.libdefs).resolve()
+    libraryDict = readLibraryDefinitions(libDefFilePathObj)
+    if args.libraryName not in libraryDict:
+        logger.error(f"Library {args.libraryName} is not defined.")
+        return 1
+    configDict = None
+    if args.config:
+        with open(args.config, "r") as f:
+            configDict = json.load(f)[2]
+    switchViewList = [view.strip() for view in args.switch.split(",")]
+    stopViewList = [view.strip() for view in args.stop.split(",")]
+    outputPathObj = (
+        pathlib.Path(args.output)
+        if args.output
+        else pathlib.Path.cwd().joinpath(f"{args.cellName}_{args.viewName}.cir")
+    )
+    if args.update and outputPathObj.exists():
+        hierarchy = hidx.hierarchyIndex(
+            libraryDict, libDefFilePathObj.parent.joinpath(hidx.INDEX_FILE_NAME), logger
+        )
+        hierarchy.refresh()
+        dependencies = hierarchy.netlistDependencies(
+            ddef.viewTuple(args.libraryName, args.cellName, args.viewName),
+            switchViewList,
+            stopViewList,
+            configDict,
+        )
+        netlistTime = outputPathObj.stat().st_mtime_ns
+        configChanged = bool(args.config) and (
+            pathlib.Path(args.config).stat().st_mtime_ns > netlistTime
+        )
+        if not configChanged and not hierarchy.changedSince(dependencies, netlistTime):
+            logger.info(f"Netlist {outputPathObj} is up to date.")
+            return 0
+    engine = xyceNetlistEngine(
+        libraryDict,
+        args.libraryName,
+        args.cellName,
+        args.viewName,
+        switchViewList,
+        stopViewList,
+        configDict,
+        logger,
+        args.jobs,
+    )
+    engine.writeNetlist(outputPathObj)
+    logger.info(f"Netlist is written to {outputPathObj}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
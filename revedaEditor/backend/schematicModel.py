@@ -0,0 +1,490 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+# GUI-free connectivity model of a schematic cellview. It is read directly from
+# the schematic and symbol JSON files and is used by the netlisting engine so that
+# no editor windows or graphics scenes need to be built.
+
+import json
+import logging
+import math
+import pathlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from quantiphy import Quantity
+
+import revedaEditor.backend.connectivity as con
+import revedaEditor.backend.symbolCache as symc
+from revedaEditor.backend.pdkPaths import importPDKModule
+
+cb = importPDKModule("callbacks")
+
+predefinedLabels = [
+    "[@libName]",
+    "[@cellName]",
+    "[@viewName]",
+    "[@instName]",
+    "[@modelName]",
+    "[@elementNum]",
+]
+
+
+def mapPoint(
+    point: Tuple[float, float],
+    pos: Tuple[float, float],
+    angle: float,
+    flipTuple: Tuple[int, int],
+) -> Tuple[float, float]:
+    """
+    Map a point from item coordinates to parent coordinates the way a loaded
+    QGraphicsItem does it: flip, rotate around the item origin and translate.
+    """
+    x = point[0] * flipTuple[0]
+    y = point[1] * flipTuple[1]
+    if angle % 360:
+        radians = math.radians(angle)
+        cosA = math.cos(radians)
+        sinA = math.sin(radians)
+        x, y = x * cosA - y * sinA, x * sinA + y * cosA
+    return x + pos[0], y + pos[1]
+
+
+class netlistLabel:
+    """
+    Light weight version of symbolLabel, only keeping what netlisting needs.
+    """
+
+    def __init__(self, labelDefinition: str, labelType: str, labelName: str = ""):
+        self.labelDefinition = labelDefinition
+        self.labelType = labelType
+        self.labelName = labelName
+        self.labelValue = ""
+
+    def __repr__(self):
+        return f"netlistLabel({self.labelName}, {self.labelValue})"
+
+    def labelDefs(self, parent: Optional["symbolInstance"] = None):
+        """
+        Work out label name and value from its definition. It mirrors
+        symbolLabel.labelDefs for a label with or without a parent instance.
+        """
+        match self.labelType:
+            case "Normal":
+                self.labelName = f"@{self.labelDefinition}"
+                self.labelValue = self.labelDefinition
+            case "NLPLabel":
+                self._nlpLabelDefs(parent)
+            case "PyLabel":
+                self._pyLabelDefs(parent)
+
+    def _nlpLabelDefs(self, parent: Optional["symbolInstance"]):
+        definition = self.labelDefinition.strip()
+        if not definition.startswith("[@"):
+            return
+        expression = definition[1 : definition.find("]")]
+        parts = expression.split(":")
+        self.labelName = parts[0].strip()
+        if parent is None:
+            self.labelValue = ""
+        elif definition in predefinedLabels:
+            match definition:
+                case "[@cellName]":
+                    self.labelValue = parent.cellName
+                case "[@instName]":
+                    self.labelValue = self.labelValue or parent.instanceName
+                case "[@libName]":
+                    self.labelValue = parent.libraryName
+                case "[@viewName]":
+                    self.labelValue = parent.viewName
+                case "[@modelName]":
+                    self.labelValue = parent.symattrs.get("modelName", "")
+                case "[@elementNum]":
+                    self.labelValue = f"{parent.counter}"
+        else:
+            formatString = parts[1] if len(parts) > 1 else ""
+            defaultValue = parts[2] if len(parts) > 2 else ""
+            if formatString and not self.labelValue:
+                prefix = formatString.split("%")[0]
+                if defaultValue:
+                    self.labelValue = defaultValue.replace(prefix, "")
+                else:
+                    self.labelValue = "?"
+
+    def _pyLabelDefs(self, parent: Optional["symbolInstance"]):
+        labelName, labelFunction = map(str.strip, self.labelDefinition.split("="))
+        self.labelName = f"@{labelName}"
+        if parent is not None and hasattr(cb, parent.cellName):
+            callbackClassObj = getattr(cb, parent.cellName)(parent.labels)
+            labelMethod = getattr(callbackClassObj, labelFunction, None)
+            if labelMethod:
+                self.labelValue = Quantity(labelMethod()).render(prec=3)
+            else:
+                self.labelValue = "?"
+
+
+@dataclass
+class symbolPinDef:
+    pinName: str
+    pinDir: str
+    pinType: str
+    location: Tuple[float, float]  # connection point in symbol coordinates
+
+
+@dataclass
+class symbolDefinition:
+    """
+    Parsed contents of a symbol cellview that matter for connectivity and
+    netlisting.
+    """
+
+    libraryName: str
+    cellName: str
+    viewName: str
+    pins: Dict[str, symbolPinDef] = field(default_factory=dict)
+    labels: List[Tuple[str, str, str, str]] = field(default_factory=list)
+    attributes: Dict[str, str] = field(default_factory=dict)
+    draft: bool = False
+    digest: str = ""  # hash of the symbol file contents.
+    # netlist line attribute name -> line compiled for the instances of the symbol.
+    netlistTemplates: Dict[str, object] = field(
+        default_factory=dict, repr=False, compare=False
+    )
+
+    @classmethod
+    def fromItems(
+        cls, libraryName: str, cellName: str, viewName: str, items: list
+    ) -> "symbolDefinition":
+        symbolDef = cls(libraryName, cellName, viewName)
+        for item in items[2:]:
+            match item.get("type"):
+                case "pin":
+                    pinLocal = mapPoint(
+                        item["st"],
+                        item["loc"],
+                        item.get("ang", 0),
+                        item.get("fl", (1, 1)),
+                    )
+                    symbolDef.pins[item["nam"]] = symbolPinDef(
+                        item["nam"], item["pd"], item["pt"], pinLocal
+                    )
+                case "label":
+                    symbolDef.labels.append(
+                        (item["def"], item["lt"], item["nam"], item["val"])
+                    )
+                case "attr":
+                    symbolDef.attributes[item["nam"]] = item["def"]
+        return symbolDef
+
+    @classmethod
+    def fromTemplate(cls, template: "symc.symbolTemplate") -> "symbolDefinition":
+        symbolDef = cls.fromItems(*template.viewTuple, [{}, {}, *template.shapeItems])
+        symbolDef.attributes = dict(template.attributes)
+        symbolDef.digest = template.digest
+        return symbolDef
+
+    @classmethod
+    def fromFile(
+        cls, libraryName: str, cellName: str, viewName: str, filePathObj: pathlib.Path
+    ) -> "symbolDefinition":
+        with filePathObj.open(mode="r", encoding="utf-8") as temp:
+            items = json.load(temp)
+        if items[0].get("cellView") != "symbol":
+            raise ValueError(f"{filePathObj} is not a symbol cellview")
+        return cls.fromItems(libraryName, cellName, viewName, items)
+
+
+class symbolInstance:
+    """
+    A placed symbol. Pins are kept in scene coordinates.
+    """
+
+    def __init__(self, item: dict, symbolDef: symbolDefinition):
+        self.libraryName = item["lib"]
+        self.cellName = item["cell"]
+        self.viewName = item["view"]
+        self.instanceName = item["nam"]
+        self.counter = item.get("ic", 0)
+        self.netlistIgnore = bool(item.get("ign", 0))
+        self.draft = symbolDef.draft
+        self.symbolDef = symbolDef
+        self.symattrs = dict(symbolDef.attributes)
+        self.pinNetMap: Dict[str, str] = dict()
+        pos = item.get("loc", (0, 0))
+        angle = item.get("ang", 0)
+        flipTuple = item.get("fl", (1, 1))
+        self.pinLocations: Dict[str, Tuple[int, int]] = {
+            pinName: tuple(
+                round(coord) for coord in mapPoint(pinDef.location, pos, angle, flipTuple)
+            )
+            for pinName, pinDef in symbolDef.pins.items()
+        }
+        self.labels: Dict[str, netlistLabel] = dict()
+        for labelDefinition, labelType, labelName, labelValue in symbolDef.labels:
+            label = netlistLabel(labelDefinition, labelType, labelName)
+            label.labelValue = labelValue
+            label.labelDefs()
+            self.labels[label.labelName] = label
+        labelDict = item.get("ld", {})
+        for labelName, label in self.labels.items():
+            if labelName in labelDict:
+                label.labelValue = labelDict[labelName][0]
+            label.labelDefs(self)
+
+    def __repr__(self):
+        return f"symbolInstance({self.instanceName})"
+
+    @property
+    def pins(self) -> Dict[str, Tuple[int, int]]:
+        """
+        Pin locations ordered by pinOrder attribute if it exists.
+        """
+        if pinOrder := self.symattrs.get("pinOrder"):
+            return {
+                pinName.strip(): self.pinLocations[pinName.strip()]
+                for pinName in pinOrder.split(",")
+                if pinName.strip() in self.pinLocations
+            }
+        return self.pinLocations
+
+
+class netSegment:
+    """
+    A schematic net read from the schematic file.
+    """
+
+    __slots__ = ("start", "end", "name", "nameStrength", "nameConflict")
+
+    def __init__(self, start: Tuple[int, int], end: Tuple[int, int], name: str,
+                 nameStrength: int):
+        self.start = start
+        self.end = end
+        self.name = name
+        self.nameStrength = nameStrength
+        self.nameConflict = False
+
+    def __repr__(self):
+        return f"netSegment({self.start}, {self.end}, {self.name})"
+
+    @property
+    def endPoints(self) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        return self.start, self.end
+
+    def inherit(self, otherNet: "netSegment"):
+        """
+        Inherit the name of the other net if self name strength is less than SET.
+        """
+        if self.nameStrength == 3:
+            if otherNet.nameStrength == 3 and self.name != otherNet.name:
+                self.nameConflict = True
+                otherNet.nameConflict = True
+        else:
+            self.name = otherNet.name
+            self.nameStrength = max(otherNet.nameStrength - 1, 0)
+
+
+@dataclass
+class schematicPinModel:
+    pinName: str
+    pinDir: str
+    pinType: str
+    location: Tuple[int, int]
+
+
+class schematicModel:
+    """
+    Connectivity model of a schematic. It groups the nets and maps symbol pins to
+    net names in the same way as schematicScene.
+    """
+
+    def __init__(self, logger: Optional[logging.Logger] = None):
+        self.logger = logger or logging.getLogger("reveda")
+        self.symbols: List[symbolInstance] = list()
+        self.nets: List[netSegment] = list()
+        self.pins: List[schematicPinModel] = list()
+        self.schematicNets: Dict[str, Set[netSegment]] = dict()
+        self.netCounter = 0
+        self._netHash: Optional[con.segmentHash] = None
+
+    @classmethod
+    def fromItems(cls, items: list, symbolLoader, logger=None) -> "schematicModel":
+        """
+        Create the model from a decoded schematic file. symbolLoader is a callable
+        returning a symbolDefinition for library, cell and view names.
+        """
+        model = cls(logger)
+        for item in items:
+            match item.get("type"):
+                case "sys":
+                    symbolDef = symbolLoader(item["lib"], item["cell"], item["view"])
+                    model.symbols.append(symbolInstance(item, symbolDef))
+                case "scn":
+                    model.nets.append(
+                        netSegment(
+                            tuple(round(coord) for coord in item["st"]),
+                            tuple(round(coord) for coord in item["end"]),
+                            item.get("nam", ""),
+                            item.get("ns", 0),
+                        )
+                    )
+                case "scp":
+                    location = mapPoint(item["st"], (0, 0), item.get("ang", 0), (1, 1))
+                    model.pins.append(
+                        schematicPinModel(
+                            item["pn"],
+                            item["pd"],
+                            item["pt"],
+                            tuple(round(coord) for coord in location),
+                        )
+                    )
+        return model
+
+    @property
+    def netHash(self) -> con.segmentHash:
+        """
+        Nets hashed by location, built on first use after the model is loaded.
+        """
+        if self._netHash is None:
+            self._netHash = con.segmentHash()
+            for netItem in self.nets:
+                self._netHash.add(netItem, netItem.start, netItem.end)
+        return self._netHash
+
+    def pinNets(self, location: Tuple[int, int], half: float) -> List[netSegment]:
+        """
+        Nets passing through the connection area of a pin, ordered by their end
+        points as in the schematic scene.
+        """
+        return self.netHash.itemsTouching(location, half)
+
+    def traverseNets(
+        self, startNet: netSegment, otherNetsSet: Set[netSegment], neighbours
+    ) -> Set[netSegment]:
+        connectedSet = {startNet}
+        frontier = [startNet]
+        while frontier:
+            netItem = frontier.pop()
+            for otherNet in neighbours[netItem]:
+                if otherNet in otherNetsSet and otherNet not in connectedSet:
+                    otherNet.inherit(netItem)
+                    if not otherNet.nameConflict:
+                        connectedSet.add(otherNet)
+                        frontier.append(otherNet)
+        otherNetsSet -= connectedSet
+        return connectedSet
+
+    def _nameNetsFromPin(self, pinName: str, location, half: float,
+                         namedNets: List[netSegment]):
+        for netItem in self.pinNets(location, half):
+            if netItem.nameStrength == 3:
+                if netItem.name != pinName:
+                    netItem.nameConflict = True
+                    self.logger.error(f"Net name conflict at {pinName}.")
+                    continue
+            else:
+                netItem.name = pinName
+                netItem.nameStrength = 3
+            if netItem not in namedNets:
+                namedNets.append(netItem)
+
+    def _groupNamedNets(self, seedNets: List[netSegment], otherNetsSet, neighbours):
+        for netItem in seedNets:
+            self.schematicNets.setdefault(netItem.name, set())
+            self.schematicNets[netItem.name] |= self.traverseNets(
+                netItem, otherNetsSet, neighbours
+            )
+
+    def groupAllNets(self) -> None:
+        """
+        Name all the nets starting from global pins, schematic pins, named nets and
+        finally giving default names to the rest.
+        """
+        self.schematicNets = dict()
+        for netItem in self.nets:
+            netItem.nameConflict = False
+            if netItem.nameStrength < 3:
+                netItem.nameStrength = 0
+        neighbours = con.netNeighbours(self.nets, netSegment.endPoints.fget)
+        remainingNets = set(self.nets)
+        globalNets: List[netSegment] = list()
+        for symbolItem in self.symbols:
+            for pinName, location in symbolItem.pinLocations.items():
+                if pinName.endswith("!"):
+                    self._nameNetsFromPin(
+                        pinName, location, con.SYMBOL_PIN_HALF, globalNets
+                    )
+        remainingNets -= set(globalNets)
+        self._groupNamedNets(globalNets, remainingNets, neighbours)
+        schemPinNets: List[netSegment] = list()
+        for pinItem in self.pins:
+            self._nameNetsFromPin(
+                pinItem.pinName, pinItem.location, con.SCHEMATIC_PIN_HALF, schemPinNets
+            )
+        remainingNets -= set(schemPinNets)
+        self._groupNamedNets(schemPinNets, remainingNets, neighbours)
+        namedNets = [
+            netItem
+            for netItem in self.nets
+            if netItem in remainingNets and netItem.nameStrength > 1
+        ]
+        remainingNets -= set(namedNets)
+        self._groupNamedNets(namedNets, remainingNets, neighbours)
+        nameCounter = self.netCounter
+        for netItem in self.nets:
+            if netItem in remainingNets:
+                netItem.name = f"net{nameCounter}"
+                self.schematicNets[netItem.name] = self.traverseNets(
+                    netItem, remainingNets, neighbours
+                )
+                nameCounter += 1
+
+    def generatePinNetMap(
+        self, symbolPinNets: Optional[List[Dict[str, str]]] = None
+    ) -> None:
+        """
+        For each symbol, find which pin is connected to which net. symbolPinNets
+        gives the net names of the connected pins of each symbol in order, e.g. from
+        the live connectivity graph of the schematic editor, instead of looking them
+        up in the grouped nets. Unconnected pins are assigned a default net name
+        starting with d prefix.
+        """
+        netCounter = 0
+        for index, symbolItem in enumerate(self.symbols):
+            symbolItem.pinNetMap = dict()
+            for pinName, location in symbolItem.pinLocations.items():
+                if symbolPinNets is None:
+                    pinConnectedNets = self.pinNets(location, con.SYMBOL_PIN_HALF)
+                    netName = pinConnectedNets[0].name if pinConnectedNets else ""
+                else:
+                    netName = symbolPinNets[index].get(pinName, "")
+                if netName:
+                    symbolItem.pinNetMap[pinName] = netName
+                else:
+                    symbolItem.pinNetMap[pinName] = f"dnet{netCounter}"
+                    self.logger.warning(
+                        f"left unconnected:{symbolItem.pinNetMap[pinName]}"
+                    )
+                    netCounter += 1
+            if pinOrder := symbolItem.symattrs.get("pinOrder"):
+                symbolItem.pinNetMap = {
+                    pinName.strip(): symbolItem.pinNetMap.get(pinName.strip(), "")
+                    for pinName in pinOrder.split(",")
+                }
@@ -0,0 +1,308 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+
+# Spatial index of the top level shapes of a layout scene. Shapes are kept per
+# layer in packed R-trees over their scene bounding boxes, instances are kept in
+# their own tree by the bounding box of their transformed master. Trees are bulk
+# loaded with numpy and queried level by level. Shapes changed since a tree was
+# built are kept aside and tested with their current bounds until the tree is
+# built again, so edits do not rebuild the trees.
+
+from typing import Dict, List, Set, Union
+
+import numpy as np
+from PySide6.QtCore import QPoint, QPointF, QRect, QRectF
+
+import revedaEditor.common.layoutShapes as lshp
+
+INSTANCE_KEY = "instances"
+# trees are built again when more than this share of their shapes changed.
+REBUILD_RATIO = 0.125
+MIN_REBUILD_COUNT = 64
+
+
+def boxTuple(rect: Union[QRectF, QRect, QPointF, QPoint, tuple]) -> tuple:
+    """
+    Left, top, right and bottom of a rectangle, a point or a tuple of either.
+    """
+    if isinstance(rect, (QPoint, QPointF)):
+        return rect.x(), rect.y(), rect.x(), rect.y()
+    if isinstance(rect, (QRect, QRectF)):
+        return QRectF(rect).getCoords()
+    if len(rect) == 2:
+        return rect[0], rect[1], rect[0], rect[1]
+    return tuple(rect)
+
+
+class packedRTree:
+    """
+    Static R-tree of boxes given as rows of left, top, right and bottom. The
+    boxes are sorted into nodes of equal size by their centres, in vertical
+    slices sorted by x and within a slice by y.
+    """
+
+    nodeSize = 16
+
+    def __init__(self, bounds: np.ndarray):
+        self.count = len(bounds)
+        self.levels: List[np.ndarray] = []
+        self.order = np.empty(0, dtype=np.intp)
+        if not self.count:
+            return
+        centreXs = bounds[:, 0] + bounds[:, 2]
+        centreYs = bounds[:, 1] + bounds[:, 3]
+        nodeCount = -(-self.count // self.nodeSize)
+        sliceSize = int(np.ceil(np.sqrt(nodeCount))) * self.nodeSize
+        slices = np.empty(self.count, dtype=np.intp)
+        slices[np.argsort(centreXs, kind="stable")] = (
+            np.arange(self.count) // sliceSize
+        )
+        self.order = np.lexsort((centreYs, slices))
+        level = bounds[self.order]
+        levels = [level]
+        while len(level) > self.nodeSize:
+            starts = np.arange(0, len(level), self.nodeSize)
+            level = np.column_stack(
+                (
+                    np.minimum.reduceat(level[:, 0], starts),
+                    np.minimum.reduceat(level[:, 1], starts),
+                    np.maximum.reduceat(level[:, 2], starts),
+                    np.maximum.reduceat(level[:, 3], starts),
+                )
+            )
+            levels.append(level)
+        # the root level is first.
+        self.levels = levels[::-1]
+
+    def __len__(self):
+        return self.count
+
+    def query(self, left: float, top: float, right: float,
+              bottom: float) -> np.ndarray:
+        """
+        Indices of the boxes that intersect or touch the box.
+        """
+        if not self.count:
+            return self.order
+        children = np.arange(self.nodeSize)
+        candidates = np.arange(len(self.levels[0]))
+        for depth, level in enumerate(self.levels):
+            if depth:
+                candidates = (candidates[:, None] * self.nodeSize + children).ravel()
+                candidates = candidates[candidates < len(level)]
+            boxes = level[candidates]
+            candidates = candidates[
+                (boxes[:, 0] <= right) & (boxes[:, 2] >= left)
+                & (boxes[:, 1] <= bottom) & (boxes[:, 3] >= top)
+            ]
+            if not len(candidates):
+                break
+        return self.order[candidates]
+
+
+class layoutSpatialIndex:
+    """
+    Region queries over the top level shapes of a layout scene. Shapes are
+    grouped by their layer, via arrays by the layer of their vias and instances
+    and pcells are kept together. Rulers and other shapes without a layer are
+    not indexed.
+
+    Queries accept rectangles, points or (left, top, right, bottom) tuples in
+    scene coordinates, e.g. from the Python console:
+
+        scene.spatialIndex.query((0, 0, 1000, 1000), laylyr.m1Layer_drw)
+    """
+
+    def __init__(self):
+        self._layers: Dict[object, object] = dict()  # key -> layer
+        self._trees: Dict[object, packedRTree] = dict()
+        self._treeShapes: Dict[object, list] = dict()
+        # shapes and their keys, and the shapes of each key. Changed shapes are
+        # also kept per key until the tree of their key is built again.
+        self._shapeKeys: Dict[lshp.layoutShape, object] = dict()
+        self._keyShapes: Dict[object, Dict[lshp.layoutShape, None]] = dict()
+        self._changedShapes: Dict[object, Set[lshp.layoutShape]] = dict()
+        # shapes whose tree entries are out of date, per key.
+        self._staleShapes: Dict[object, Set[lshp.layoutShape]] = dict()
+
+    def __len__(self):
+        return len(self._shapeKeys)
+
+    def shapeKey(self, shape: lshp.layoutShape):
+        if isinstance(shape, lshp.layoutInstance):
+            return INSTANCE_KEY
+        if isinstance(shape, lshp.layoutViaArray):
+            layer = shape.via.layer
+        else:
+            layer = getattr(shape, "_layer", None)
+        if layer is None:
+            return None
+        self._layers[id(layer)] = layer
+        return id(layer)
+
+    def addShape(self, shape: lshp.layoutShape) -> None:
+        if shape.parentItem() is not None:
+            return
+        key = self.shapeKey(shape)
+        if key is None:
+            return
+        self._shapeKeys[shape] = key
+        self._keyShapes.setdefault(key, dict())[shape] = None
+        self._changedShapes.setdefault(key, set()).add(shape)
+
+    def removeShape(self, shape: lshp.layoutShape) -> None:
+        key = self._shapeKeys.pop(shape, None)
+        if key is None:
+            return
+        self._keyShapes[key].pop(shape, None)
+        changedShapes = self._changedShapes.get(key)
+        if changedShapes is not None:
+            changedShapes.discard(shape)
+        self._markStale(shape, key)
+
+    def shapeChanged(self, shape: lshp.layoutShape) -> None:
+        """
+        The shape is moved or its geometry or layer is changed. It is tested with
+        its current bounds until its tree is built again. Changes of the child
+        shapes of instances are changes of the instances.
+        """
+        shape = shape.topLevelItem()
+        oldKey = self._shapeKeys.get(shape)
+        if oldKey is None:
+            return
+        self._markStale(shape, oldKey)
+        key = self.shapeKey(shape)
+        if key != oldKey:
+            self._changedShapes.get(oldKey, set()).discard(shape)
+            self._keyShapes[oldKey].pop(shape, None)
+            self._keyShapes.setdefault(key, dict())[shape] = None
+            self._shapeKeys[shape] = key
+        self._changedShapes.setdefault(key, set()).add(shape)
+
+    def _markStale(self, shape: lshp.layoutShape, key) -> None:
+        if key in self._trees:
+            self._staleShapes.setdefault(key, set()).add(shape)
+
+    def clear(self) -> None:
+        self._trees.clear()
+        self._treeShapes.clear()
+        self._shapeKeys.clear()
+        self._keyShapes.clear()
+        self._changedShapes.clear()
+        self._staleShapes.clear()
+
+    def build(self, key) -> None:
+        """
+        Build the tree of a key from the current bounds of its shapes.
+        """
+        shapes = list(self._keyShapes.get(key, ()))
+        self._staleShapes.pop(key, None)
+        self._changedShapes.pop(key, None)
+        bounds = np.array(
+            [shape.sceneBoundingRect().getCoords() for shape in shapes],
+            dtype=np.float64,
+        ).reshape(-1, 4)
+        self._trees[key] = packedRTree(bounds)
+        self._treeShapes[key] = shapes
+
+    def _maintain(self, key) -> None:
+        changedCount = (len(self._changedShapes.get(key, ()))
+                        + len(self._staleShapes.get(key, ())))
+        if changedCount > max(MIN_REBUILD_COUNT,
+                              REBUILD_RATIO * len(self._treeShapes.get(key, ()))):
+            self.build(key)
+
+    def _queryKey(self, key, box: tuple) -> List[lshp.layoutShape]:
+        self._maintain(key)
+        left, top, right, bottom = box
+        result = []
+        tree = self._trees.get(key)
+        if tree is not None:
+            treeShapes = self._treeShapes[key]
+            staleShapes = self._staleShapes.get(key, ())
+            result = [
+                shape for shape in
+                (treeShapes[index] for index in tree.query(left, top, right, bottom))
+                if shape not in staleShapes
+            ]
+        for shape in self._changedShapes.get(key, ()):
+            sceneLeft, sceneTop, sceneRight, sceneBottom = (
+                shape.sceneBoundingRect().getCoords())
+            if (sceneLeft <= right and sceneRight >= left and sceneTop <= bottom
+                    and sceneBottom >= top):
+                result.append(shape)
+        return result
+
+    def keys(self, layer=None) -> list:
+        if layer is None:
+            return list(self._trees.keys() | self._changedShapes.keys())
+        return [id(layer), INSTANCE_KEY]
+
+    def query(self, rect=None, layer=None) -> List[lshp.layoutShape]:
+        """
+        Top level shapes whose bounding boxes intersect the rectangle, all shapes
+        without a rectangle. With a layer, the shapes on the layer and the
+        instances with shapes on it are returned.
+        """
+        box = (-np.inf, -np.inf, np.inf, np.inf) if rect is None else boxTuple(rect)
+        result = []
+        for key in self.keys(layer):
+            shapes = self._queryKey(key, box)
+            if key == INSTANCE_KEY and layer is not None:
+                shapes = [shape for shape in shapes if
+                          self.instanceUsesLayer(shape, layer)]
+            result.extend(shapes)
+        return result
+
+    def shapesAt(self, point, layer=None) -> List[lshp.layoutShape]:
+        """
+        Top level shapes whose bounding boxes contain the point.
+        """
+        return self.query(boxTuple(point), layer)
+
+    def overlapping(self, shape: lshp.layoutShape,
+                    layer=None) -> List[lshp.layoutShape]:
+        """
+        Other top level shapes whose bounding boxes overlap the bounding box of
+        the shape, on the layer if one is given.
+        """
+        return [
+            other for other in self.query(shape.sceneBoundingRect(), layer)
+            if other is not shape
+        ]
+
+    def layers(self) -> list:
+        """
+        Layers with indexed shapes.
+        """
+        return [self._layers[key] for key in self.keys() if key in self._layers]
+
+    @classmethod
+    def instanceUsesLayer(cls, instance: lshp.layoutInstance, layer) -> bool:
+        if not instance.isExpanded:
+            return instance.master.hasLayer(layer)
+        return any(
+            cls.instanceUsesLayer(shape, layer)
+            if isinstance(shape, lshp.layoutInstance)
+            else getattr(shape, "_layer", None) is layer
+            for shape in instance.shapes
+        )
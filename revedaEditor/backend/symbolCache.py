@@ -0,0 +1,157 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+# Process-wide cache of parsed symbol cellviews. Symbol files are read once and
+# every instance is stamped from the cached template until the file changes on
+# disk.
+
+import hashlib
+import json
+import pathlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import revedaEditor.backend.dataDefinitions as ddef
+
+
+@dataclass
+class symbolTemplate:
+    """
+    Parsed symbol cellview. Items should be treated as read-only as they are
+    shared by all instances of the symbol.
+    """
+
+    viewTuple: ddef.viewTuple
+    filePathObj: pathlib.Path
+    stamp: Tuple[int, int]  # modification time in ns and file size.
+    digest: str  # hash of the file contents.
+    snapGrid: List[int]
+    attributes: Dict[str, str]
+    shapeItems: Tuple[dict, ...]
+    # other representations built from this template, e.g. for netlisting.
+    derived: Dict[str, Any] = field(default_factory=dict)
+
+
+class symbolDefinitionCache:
+    """
+    Symbol templates keyed by (library, cell, view). A template is read again if
+    the modification time or the size of its file changes.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._templates: OrderedDict[ddef.viewTuple, symbolTemplate] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    @staticmethod
+    def fileStamp(filePathObj: pathlib.Path) -> Tuple[int, int]:
+        stat = filePathObj.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(
+        self,
+        libraryName: str,
+        cellName: str,
+        viewName: str,
+        filePathObj: pathlib.Path,
+    ) -> symbolTemplate:
+        """
+        Return the template of a symbol cellview, reading the file if it is not
+        cached or changed since it was read.
+
+        Raises:
+            OSError: If the file cannot be read.
+            ValueError: If the file is not a valid symbol cellview.
+        """
+        viewTuple = ddef.viewTuple(libraryName, cellName, viewName)
+        stamp = self.fileStamp(filePathObj)
+        with self._lock:
+            template = self._templates.get(viewTuple)
+            if (
+                template is not None
+                and template.stamp == stamp
+                and template.filePathObj == filePathObj
+            ):
+                self._templates.move_to_end(viewTuple)
+                self.hits += 1
+                return template
+        template = self._readTemplate(viewTuple, filePathObj, stamp)
+        with self._lock:
+            self.misses += 1
+            self._templates[viewTuple] = template
+            self._templates.move_to_end(viewTuple)
+            while len(self._templates) > self.maxsize:
+                self._templates.popitem(last=False)
+        return template
+
+    @staticmethod
+    def _readTemplate(
+        viewTuple: ddef.viewTuple, filePathObj: pathlib.Path, stamp: Tuple[int, int]
+    ) -> symbolTemplate:
+        contents = filePathObj.read_bytes()
+        try:
+            items = json.loads(contents)
+        except (json.decoder.JSONDecodeError, UnicodeDecodeError) as e:
+            raise ValueError(f"Invalid symbol file {filePathObj}: {e}") from e
+        if not items or items[0].get("cellView") != "symbol":
+            raise ValueError(f"{filePathObj} is not a symbol cellview")
+        attributes = {
+            item["nam"]: item["def"] for item in items[2:] if item.get("type") == "attr"
+        }
+        shapeItems = tuple(item for item in items[2:] if item.get("type") != "attr")
+        return symbolTemplate(
+            viewTuple,
+            filePathObj,
+            stamp,
+            hashlib.sha256(contents).hexdigest(),
+            items[1].get("snapGrid", [10, 5]),
+            attributes,
+            shapeItems,
+        )
+
+    def invalidate(
+        self,
+        libraryName: Optional[str] = None,
+        cellName: Optional[str] = None,
+        viewName: Optional[str] = None,
+    ) -> None:
+        """
+        Forget cached templates. Names which are not given match everything.
+        """
+        with self._lock:
+            for viewTuple in list(self._templates.keys()):
+                if (
+                    (libraryName is None or viewTuple.libraryName == libraryName)
+                    and (cellName is None or viewTuple.cellName == cellName)
+                    and (viewName is None or viewTuple.viewName == viewName)
+                ):
+                    del self._templates[viewTuple]
+
+
+# cache shared by all editors and netlisters in the process.
+symbolDefinitions = symbolDefinitionCache()
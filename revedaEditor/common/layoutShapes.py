@@ -26,6 +26,8 @@
 
 # shape class definition for symbol editor.
 # base class for all shapes: rectangle, circle, line
+import functools
+import inspect
 import itertools
 import math
 from pathlib import Path
@@ -38,6 +40,8 @@ from PySide6.QtCore import (
     Qt,
     QPointF,
     QLineF,
+    QObject,
+    Signal,
 )
 from PySide6.QtGui import (
     QPen,
@@ -58,6 +62,7 @@ from PySide6.QtWidgets import (
     QGraphicsItem,
     QGraphicsSceneMouseEvent,
     QGraphicsSceneHoverEvent,
+    QStyleOptionGraphicsItem,
 )
 import os
 from revedaEditor.backend.pdkPaths import importPDKModule
@@ -71,6 +76,13 @@ fabproc = importPDKModule('process')
 #     import defaultPDK.process as fabproc
 import revedaEditor.backend.dataDefinitions as ddef
 
+# level of detail settings shared by all layout views.
+detailLevel = ddef.levelOfDetail()
+# how much of a shape is painted, see layoutShape.levelOfDetail.
+LOD_HIDDEN = 0
+LOD_OUTLINE = 1
+LOD_FULL = 2
+
 
 class textureCache:
     _file_content_cache = {}
@@ -119,6 +131,94 @@ class textureCache:
         cls._file_content_cache.clear()
         cls._bitmap_cache.clear()
 
+    @classmethod
+    def clearTexture(cls, texturePath):
+        """
+        Forget a texture file after it is edited.
+        """
+        cls._file_content_cache.pop(str(texturePath), None)
+        for cacheKey in [key for key in cls._bitmap_cache if key[0] == str(texturePath)]:
+            del cls._bitmap_cache[cacheKey]
+
+
+class layerStyleNotifier(QObject):
+    styleChanged = Signal(object)
+
+
+class layerStyle:
+    """
+    Pens and brushes of a layer shared by all the shapes on the layer. When the
+    layer colours, pen or stipple change, the pens and brushes are changed in
+    place and the shapes only need to be repainted.
+    """
+
+    # layer id -> (layer, style), the layer is kept so that its id stays unique.
+    _styles = {}
+    notifier = layerStyleNotifier()
+
+    def __init__(self, layer: ddef.layLayer):
+        self.pen = QPen()
+        self.brush = QBrush()
+        self.selectedPen = QPen()
+        self.selectedBrush = QBrush()
+        self.lodPen = QPen()
+        self.stretchPen = QPen()
+        self.stretchBrush = QBrush()
+        self.update(layer)
+
+    def update(self, layer: ddef.layLayer):
+        texturePath = layerStyle.texturePath(layer)
+        bitmap = textureCache.getCachedBitmap(texturePath, layer.bcolor)
+        self.pen.swap(QPen(layer.pcolor, layer.pwidth, layer.pstyle))
+        self.brush.swap(QBrush(layer.bcolor, bitmap))
+        self.selectedPen.swap(QPen(QColor("yellow"), layer.pwidth, Qt.DashLine))
+        self.selectedBrush.swap(QBrush(QColor("yellow"), bitmap))
+        self.lodPen.swap(QPen(layer.pcolor, 0))
+        self.stretchPen.swap(QPen(QColor("red"), layer.pwidth, Qt.SolidLine))
+        self.stretchBrush.swap(QBrush(QColor("red"), bitmap))
+
+    @staticmethod
+    def texturePath(layer: ddef.layLayer) -> Path:
+        return Path(laylyr.__file__).parent.joinpath(layer.btexture)
+
+    @classmethod
+    def forLayer(cls, layer: ddef.layLayer) -> "layerStyle":
+        styleTuple = cls._styles.get(id(layer))
+        if styleTuple is None:
+            styleTuple = cls._styles[id(layer)] = (layer, cls(layer))
+        return styleTuple[1]
+
+    @classmethod
+    def layerChanged(cls, layer: ddef.layLayer):
+        """
+        Update the shared pens and brushes after the layer is edited and notify
+        the layout scenes to repaint the shapes on the layer.
+        """
+        styleTuple = cls._styles.get(id(layer))
+        if styleTuple is not None:
+            styleTuple[1].update(layer)
+        cls.notifier.styleChanged.emit(layer)
+
+    @classmethod
+    def textureChanged(cls, texturePath):
+        """
+        Update the layers using a stipple file after it is saved.
+        """
+        texturePath = Path(texturePath).resolve()
+        textureCache.clearTexture(texturePath)
+        for layer, _ in list(cls._styles.values()):
+            layerTexturePath = cls.texturePath(layer).resolve()
+            if layerTexturePath == texturePath:
+                textureCache.clearTexture(cls.texturePath(layer))
+                cls.layerChanged(layer)
+
+
+# pens shared by the shapes that are not on a layer.
+defaultLodPen = QPen(QColor("gray"), 0)
+instanceSelectedPen = QPen(QColor("yellow"), 1, Qt.DashLine)
+instanceSelectedPen.setCosmetic(True)
+instanceBoxPen = QPen(QColor("lightgray"), 0)
+
 
 class layoutShape(QGraphicsItem):
     def __init__(self) -> None:
@@ -132,14 +232,44 @@ class layoutShape(QGraphicsItem):
         self._brush = None
         self._angle = 0  # rotation angle
         self._stretch: bool = False
-        self.setCacheMode(QGraphicsItem.DeviceCoordinateCache)
+        # the cache mode is decided by the cache policy of the scene.
         self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption)
         self._offset = QPoint(0, 0)
         self._flipTuple = (1, 1)
+        self._lodPen = defaultLodPen
 
     def __repr__(self):
         return "layoutShape()"
 
+    def detailRect(self) -> QRectF:
+        """
+        Geometry of the shape used for the level of detail decisions.
+        """
+        return self.boundingRect()
+
+    def levelOfDetail(self, painter: QPainter, option, rect: QRectF) -> int:
+        """
+        Decide how much of the shape is painted at the current zoom. Shapes
+        smaller than detailLevel.minShapeSize pixels are drawn as a dot and fill
+        patterns are dropped below detailLevel.fillScale. The painter is set up
+        for the returned level.
+        """
+        if not detailLevel.enabled or self.isSelected():
+            return LOD_FULL
+        scale = QStyleOptionGraphicsItem.levelOfDetailFromTransform(
+            painter.worldTransform()
+        )
+        if max(rect.width(), rect.height()) * scale < detailLevel.minShapeSize:
+            if not detailLevel.cullSmallShapes:
+                painter.setPen(self._lodPen)
+                painter.drawPoint(rect.center())
+            return LOD_HIDDEN
+        if scale < detailLevel.fillScale:
+            painter.setPen(self._lodPen)
+            painter.setBrush(Qt.NoBrush)
+            return LOD_OUTLINE
+        return LOD_FULL
+
     def itemChange(self, change, value):
         if self.scene():
             match change:
@@ -148,18 +278,54 @@ class layoutShape(QGraphicsItem):
                         self.setZValue(self.zValue() + 10)
                     else:
                         self.setZValue(self.zValue() - 10)
+                case QGraphicsItem.ItemSceneChange:
+                    # shape is leaving the scene.
+                    if hasattr(self.scene(), "shapeRemoved"):
+                        self.scene().shapeRemoved(self)
+                case QGraphicsItem.ItemSceneHasChanged:
+                    if hasattr(self.scene(), "shapeAdded"):
+                        self.scene().shapeAdded(self)
+                case (
+                    QGraphicsItem.ItemPositionChange
+                    | QGraphicsItem.ItemPositionHasChanged
+                    | QGraphicsItem.ItemRotationChange
+                    | QGraphicsItem.ItemRotationHasChanged
+                    | QGraphicsItem.ItemTransformChange
+                    | QGraphicsItem.ItemTransformHasChanged
+                ):
+                    self.notifyGeometryChange()
         return super().itemChange(change, value)
 
+    def prepareGeometryChange(self):
+        self.notifyGeometryChange()
+        super().prepareGeometryChange()
+
+    def notifyGeometryChange(self, contentsChanged: bool = False):
+        """
+        Let the scene know that the shape moves or changes. The scene is told
+        before and after the change, so the regions before and after the change
+        are checked again.
+        """
+        if hasattr(self.scene(), "shapeChanged"):
+            self.scene().shapeChanged(self, contentsChanged)
+
+    def notifyCachePolicy(self, painter: QPainter):
+        """
+        Let the cache policy of the scene measure the pixmap of a cached shape.
+        """
+        if hasattr(self.scene(), "cachePolicy"):
+            self.scene().cachePolicy.itemPainted(self, painter)
+
     def _definePensBrushes(self, layer):
-        # Assuming 'layer' is your layer object:
-        self._pen = QPen(layer.pcolor, layer.pwidth, layer.pstyle)
-        texturePath = Path(laylyr.__file__).parent.joinpath(layer.btexture)
-        _bitmap = textureCache.getCachedBitmap(texturePath, layer.bcolor)
-        self._brush = QBrush(layer.bcolor, _bitmap)
-        self._selectedPen = QPen(QColor("yellow"), layer.pwidth, Qt.DashLine)
-        self._selectedBrush = QBrush(QColor("yellow"), _bitmap)
-        self._stretchPen = QPen(QColor("red"), layer.pwidth, Qt.SolidLine)
-        self._stretchBrush = QBrush(QColor("red"), _bitmap)
+        # pens and brushes are shared by all the shapes on the layer.
+        style = layerStyle.forLayer(layer)
+        self._pen = style.pen
+        self._brush = style.brush
+        self._selectedPen = style.selectedPen
+        self._selectedBrush = style.selectedBrush
+        self._lodPen = style.lodPen
+        self._stretchPen = style.stretchPen
+        self._stretchBrush = style.stretchBrush
 
     @property
     def pen(self):
@@ -278,6 +444,7 @@ class layoutShape(QGraphicsItem):
         self.prepareGeometryChange()
         self._layer = value
         self._definePensBrushes(self._layer)
+        self.notifyGeometryChange()
 
 
 class layoutRect(layoutShape):
@@ -302,7 +469,6 @@ class layoutRect(layoutShape):
             self.setFlag(QGraphicsItem.ItemIsFocusable, False)
         self._stretch = False
         self._stretchSide = None
-        self._stretchPen = QPen(QColor("red"), self._layer.pwidth, Qt.SolidLine)
         self._definePensBrushes(self._layer)
         self.setZValue(self._layer.z)
 
@@ -311,6 +477,12 @@ class layoutRect(layoutShape):
 
     def paint(self, painter, option, widget):
         painter.setRenderHint(QPainter.NonCosmeticBrushPatterns)
+        detail = self.levelOfDetail(painter, option, self._rect)
+        if detail == LOD_HIDDEN:
+            return
+        elif detail == LOD_OUTLINE:
+            painter.drawRect(self._rect)
+            return
         if self.isSelected():
             painter.setPen(self._selectedPen)
             painter.setBrush(self._selectedBrush)
@@ -329,6 +501,9 @@ class layoutRect(layoutShape):
             painter.setBrush(self._brush)
         painter.drawRect(self._rect)
 
+    def detailRect(self) -> QRectF:
+        return self._rect
+
     def boundingRect(self):
         return self._rect.normalized().adjusted(-2, -2, 2, 2)
 
@@ -491,11 +666,204 @@ class layoutRect(layoutShape):
             self.setCursor(Qt.ArrowCursor)
 
 
+class layoutMaster:
+    """
+    Shared representation of a layout cell placed as an instance. The shapes of
+    the cell are created once and are not added to any scene; every instance of
+    the cell paints them through its own transform. Child shapes of an instance
+    are only created when the instance is expanded.
+    """
+
+    def __init__(self, viewTuple: ddef.viewTuple, itemData: list, shapeFactory,
+                 layerFactory=None):
+        self.viewTuple = viewTuple
+        # item dictionaries of the cell without the header entries.
+        self.itemData = itemData
+        self._shapeFactory = shapeFactory
+        # returns the layers and the nested masters of item data, or None.
+        self._layerFactory = layerFactory
+        self._dataLayers = None
+        self._shapes = None
+        self._paintList = []
+        self._childrenRect = QRectF()
+        self._layerIds = set()
+        self._nestedMasters = []
+
+    def __repr__(self):
+        return f"layoutMaster({self.viewTuple})"
+
+    def createShapes(self) -> list[layoutShape]:
+        shapes = []
+        for item in self.itemData:
+            shape = self._shapeFactory(item)
+            if shape is not None:
+                shapes.append(shape)
+        return shapes
+
+    @classmethod
+    def fromShapes(cls, viewTuple: ddef.viewTuple, shapes: list[layoutShape]):
+        """
+        Master of shapes that are already created, e.g. evaluated pcell geometry.
+        """
+        master = cls(viewTuple, [], None)
+        master._build(shapes)
+        return master
+
+    def _build(self, shapes: list[layoutShape] = None):
+        self._shapes = self.createShapes() if shapes is None else shapes
+        paintList = []
+        stack = list(self._shapes)
+        while stack:
+            item = stack.pop()
+            transform = item.sceneTransform()
+            paintList.append((item, transform, getattr(item, "layer", None)))
+            stack.extend(item.childItems())
+        # items are painted in the order the scene would stack them.
+        paintList.sort(key=lambda paintTuple: paintTuple[0].zValue())
+        self._paintList = paintList
+        self._layers = []
+        layerIndexDict = {}
+        layerIndices = []
+        rects = []
+        sizes = []
+        for item, transform, layer in paintList:
+            layerIndex = layerIndexDict.get(id(layer))
+            if layerIndex is None:
+                layerIndex = layerIndexDict[id(layer)] = len(self._layers)
+                self._layers.append((layer, item._lodPen))
+            layerIndices.append(layerIndex)
+            rects.append(transform.mapRect(item.boundingRect()).getCoords())
+            detailRect = transform.mapRect(item.detailRect())
+            sizes.append(max(detailRect.width(), detailRect.height()))
+        self._layerIds = {id(layer) for layer, _ in self._layers if layer is not None}
+        self._nestedMasters = list(
+            {
+                id(item.master): item.master
+                for item, _, _ in paintList
+                if isinstance(item, layoutInstance) and item.master is not None
+            }.values()
+        )
+        self._layerIndices = np.array(layerIndices, dtype=np.int32)
+        self._rects = np.array(rects, dtype=np.float64).reshape(-1, 4)
+        self._sizes = np.array(sizes, dtype=np.float64)
+        if len(paintList):
+            left, top = self._rects[:, 0].min(), self._rects[:, 1].min()
+            right, bottom = self._rects[:, 2].max(), self._rects[:, 3].max()
+            self._childrenRect = QRectF(
+                QPointF(left, top), QPointF(right, bottom)
+            )
+        else:
+            self._childrenRect = QRectF()
+        # centres of the shapes of each layer ordered by size, the shapes below
+        # the detail level are drawn as the first dots of the polygon.
+        self._dotsList = []
+        for layerIndex in range(len(self._layers)):
+            indices = np.flatnonzero(self._layerIndices == layerIndex)
+            indices = indices[np.argsort(self._sizes[indices], kind="stable")]
+            centres = (self._rects[indices, 0:2] + self._rects[indices, 2:4]) / 2
+            dots = QPolygonF([QPointF(x, y) for x, y in centres.tolist()])
+            self._dotsList.append((self._sizes[indices], dots))
+
+    @property
+    def shapes(self) -> list[layoutShape]:
+        if self._shapes is None:
+            self._build()
+        return self._shapes
+
+    @property
+    def childrenRect(self) -> QRectF:
+        if self._shapes is None:
+            self._build()
+        return self._childrenRect
+
+    def usesLayer(self, layer) -> bool:
+        """
+        True if the master, or a master nested in it, paints shapes on the layer.
+        A master that was never painted does not need to be repainted.
+        """
+        if self._shapes is None:
+            return False
+        return id(layer) in self._layerIds or any(
+            master.usesLayer(layer) for master in self._nestedMasters
+        )
+
+    def hasLayer(self, layer) -> bool:
+        """
+        True if the master, or a master nested in it, has shapes on the layer.
+        The layers of a master that is not built are found from its item data,
+        without creating its shapes.
+        """
+        if self._shapes is None and self._dataLayers is None and self._layerFactory:
+            dataLayers = self._layerFactory(self.itemData)
+            if dataLayers is not None:
+                layers, nestedMasters = dataLayers
+                self._dataLayers = ({id(layer) for layer in layers}, nestedMasters)
+        if self._shapes is None and self._dataLayers is not None:
+            layerIds, nestedMasters = self._dataLayers
+        else:
+            if self._shapes is None:
+                self._build()
+            layerIds, nestedMasters = self._layerIds, self._nestedMasters
+        return id(layer) in layerIds or any(
+            master.hasLayer(layer) for master in nestedMasters
+        )
+
+    def paint(self, painter: QPainter, option, widget):
+        if self._shapes is None:
+            self._build()
+        if not self._paintList:
+            return
+        baseTransform = painter.transform()
+        layerVisible = np.array(
+            [layer is None or layer.visible for layer, _ in self._layers], dtype=bool
+        )
+        paintMask = layerVisible[self._layerIndices]
+        exposedRect = option.exposedRect
+        cullItems = not exposedRect.isEmpty()
+        if cullItems:
+            left, top, right, bottom = exposedRect.getCoords()
+            paintMask &= (
+                (self._rects[:, 2] >= left)
+                & (self._rects[:, 0] <= right)
+                & (self._rects[:, 3] >= top)
+                & (self._rects[:, 1] <= bottom)
+            )
+        if detailLevel.enabled:
+            scale = QStyleOptionGraphicsItem.levelOfDetailFromTransform(baseTransform)
+            minItemSize = detailLevel.minShapeSize / scale if scale else math.inf
+            paintMask &= self._sizes >= minItemSize
+            if not detailLevel.cullSmallShapes:
+                # shapes below the detail level are drawn as dots per layer.
+                for (layer, lodPen), (sizes, dots), visible in zip(
+                    self._layers, self._dotsList, layerVisible
+                ):
+                    dotCount = int(np.searchsorted(sizes, minItemSize))
+                    if visible and dotCount:
+                        painter.setPen(lodPen)
+                        painter.drawPoints(dots.first(dotCount))
+        for index in np.flatnonzero(paintMask).tolist():
+            item, transform, _ = self._paintList[index]
+            if not item.isVisible():
+                continue
+            painter.setTransform(transform * baseTransform)
+            if isinstance(item, layoutInstance) and cullItems:
+                # nested instances cull their own shapes in their coordinates.
+                itemOption = QStyleOptionGraphicsItem(option)
+                itemOption.exposedRect = transform.inverted()[0].mapRect(exposedRect)
+                item.paint(painter, itemOption, widget)
+            else:
+                item.paint(painter, option, widget)
+        painter.setTransform(baseTransform)
+
+
 class layoutInstance(layoutShape):
-    def __init__(self, shapes: list[layoutShape]):
+    def __init__(self, shapes: list[layoutShape], master: layoutMaster = None):
         super().__init__()
         # List of shapes in the symbol
         self._shapes = shapes
+        # Shared cell representation painted until the instance is expanded.
+        self._master = master
+        self._expanded = master is None
         # Flag to indicate if the symbol is in draft mode
         self._draft = False
         # Name of the library
@@ -507,8 +875,9 @@ class layoutInstance(layoutShape):
         # Name of the instance
         self._instanceName = ""
         # Pen used for selection
-        self._selectedPen = QPen(QColor("yellow"), 1, Qt.DashLine)
-        self._selectedPen.setCosmetic(True)
+        self._selectedPen = instanceSelectedPen
+        # Pen for instances drawn as boxes at low zoom
+        self._boxPen = instanceBoxPen
         # Set the shapes for the symbol
         self.setShapes()
         # Enable child event filtering for filters and handles
@@ -517,7 +886,7 @@ class layoutInstance(layoutShape):
         # Enable flag to indicate that the item contains children in shape
         self.setFlag(QGraphicsItem.ItemContainsChildrenInShape, True)
         # Set the top left position of the symbol
-        self._start = self.childrenBoundingRect().topLeft()
+        self._start = self.shapesRect().topLeft()
 
     def setShapes(self):
         for item in self._shapes:
@@ -535,14 +904,63 @@ class layoutInstance(layoutShape):
     def __repr__(self):
         return f"layoutInstance({self._shapes})"
 
+    def expand(self):
+        """
+        Create the child shapes of the instance from its master, e.g. before the
+        shapes are edited or traversed.
+        """
+        if self._expanded:
+            return
+        self.prepareGeometryChange()
+        self._shapes = self._master.createShapes()
+        self._expanded = True
+        self.setShapes()
+        self.notifyGeometryChange(contentsChanged=True)
+
+    @property
+    def isExpanded(self) -> bool:
+        return self._expanded
+
+    @property
+    def master(self):
+        return self._master
+
+    def drawnAsBox(self, painter: QPainter) -> bool:
+        """
+        Instances smaller than detailLevel.minInstanceSize pixels are drawn as
+        their bounding box instead of the master shapes.
+        """
+        if not detailLevel.enabled:
+            return False
+        scale = QStyleOptionGraphicsItem.levelOfDetailFromTransform(
+            painter.worldTransform()
+        )
+        shapesRect = self.shapesRect()
+        instanceSize = max(shapesRect.width(), shapesRect.height()) * scale
+        return instanceSize < detailLevel.minInstanceSize
+
+    def shapesRect(self) -> QRectF:
+        if self._expanded:
+            return self.childrenBoundingRect()
+        return self._master.childrenRect
+
     def boundingRect(self):
-        return self.childrenBoundingRect().normalized().adjusted(-2, -2, 2, 2)
+        return self.shapesRect().normalized().adjusted(-2, -2, 2, 2)
 
     def paint(self, painter, option, widget):
         painter.setRenderHint(QPainter.NonCosmeticBrushPatterns)
+        if not self._expanded:
+            self.notifyCachePolicy(painter)
+            if self.drawnAsBox(painter):
+                painter.setPen(self._boxPen)
+                painter.setBrush(Qt.NoBrush)
+                painter.drawRect(self.shapesRect())
+            else:
+                self._master.paint(painter, option, widget)
         if self.isSelected():
             painter.setPen(self._selectedPen)
-            painter.drawRect(self.childrenBoundingRect())
+            painter.setBrush(Qt.NoBrush)
+            painter.drawRect(self.shapesRect())
 
     def sceneEvent(self, event):
         """
@@ -592,12 +1010,14 @@ class layoutInstance(layoutShape):
 
     @property
     def shapes(self):
+        self.expand()
         return self._shapes
 
     @shapes.setter
     def shapes(self, value: list[layoutShape]):
         self.removeShapes()
         self._shapes = value
+        self._expanded = True
         self.setShapes()
 
     @property
@@ -605,17 +1025,64 @@ class layoutInstance(layoutShape):
         return self._start.toPoint()
 
     def addShape(self, shape: layoutShape):
+        self.expand()
         self._shapes.append(shape)
         shape.setParentItem(self)
 
 
 class layoutPcell(layoutInstance):
+    # cache of masters shared by the pcells with the same class and parameters,
+    # set by fileio.loadJSON.
+    masterCache = None
+
     def __init__(self, shapes: list):
         super().__init__(shapes)
 
     def __repr__(self):
         return f"layoutPcell({self._shapes}"
 
+    @classmethod
+    @functools.lru_cache(maxsize=None)
+    def parameterNames(cls) -> Tuple[str, ...]:
+        initArgs = inspect.signature(cls.__init__).parameters
+        return tuple(param for param in initArgs if param not in ("self", "snapTuple"))
+
+    @property
+    def parameters(self) -> Tuple[Tuple[str, str], ...]:
+        """
+        Parameter names and values of the pcell. Values are compared as strings
+        as they are entered as text.
+        """
+        return tuple((name, str(getattr(self, name))) for name in self.parameterNames())
+
+    def evaluate(self):
+        """
+        Paint the pcell from the master shared by the pcells with the same
+        parameters. The geometry is only created when no such master is cached.
+        Pcells call this after their parameters are set.
+        """
+        if layoutPcell.masterCache is None:
+            self.shapes = self.createGeometry()
+            return
+        master = layoutPcell.masterCache.getPcellMaster(self)
+        self.removeShapes()
+        self._master = master
+        self._expanded = False
+        self._start = self.shapesRect().topLeft()
+        self.notifyGeometryChange(contentsChanged=True)
+
+    def expand(self):
+        """
+        Create own child shapes from the parameters of the pcell.
+        """
+        if self._expanded:
+            return
+        self.shapes = self.createGeometry()
+        self.notifyGeometryChange(contentsChanged=True)
+
+    def createGeometry(self) -> list[layoutShape]:
+        return []
+
 
 class layoutLine(layoutShape):
     def __init__(
@@ -628,8 +1095,7 @@ class layoutLine(layoutShape):
         self._draftLine = draftLine
         self._layer = layer
         self._width = width
-        self._pen = QPen(self._layer.pcolor, self._layer.pwidth, self._layer.pstyle)
-        self._selectedPen = QPen(QColor("yellow"), self._layer.pwidth, Qt.DashLine)
+        self._definePensBrushes(self._layer)
         self._rect = (
             QRectF(self._draftLine.p1(), self._draftLine.p2())
             .normalized()
@@ -800,6 +1266,12 @@ class layoutPath(layoutShape):
         return rect
 
     def paint(self, painter, option, widget):
+        detail = self.levelOfDetail(painter, option, self._rect)
+        if detail == LOD_HIDDEN:
+            return
+        elif detail == LOD_OUTLINE:
+            painter.drawRect(self._rect)
+            return
         if self.isSelected():
             if self._stretch:
                 painter.setPen(self._stretchPen)
@@ -813,6 +1285,9 @@ class layoutPath(layoutShape):
         painter.drawLine(self._draftLine)
         painter.drawRect(self._rect)
 
+    def detailRect(self) -> QRectF:
+        return self._rect
+
     def boundingRect(self) -> QRectF:
         return self._rect.adjusted(-2, 2, 2, 2)
 
@@ -1214,6 +1689,12 @@ class layoutLabel(layoutShape):
         return path
 
     def paint(self, painter, option, widget):
+        detail = self.levelOfDetail(painter, option, self._rect)
+        if detail == LOD_HIDDEN:
+            return
+        elif detail == LOD_OUTLINE:
+            painter.drawPoint(self._start)
+            return
         self._labelFont.setPointSize(int(self._fontHeight))
         painter.setFont(self._labelFont)
         if self.isSelected():
@@ -1350,7 +1831,6 @@ class layoutPin(layoutShape):
         self._definePensBrushes(self._layer)
         self._label = None
         self._stretchSide = None
-        self._stretchPen = QPen(QColor("red"), self._layer.pwidth, Qt.SolidLine)
         self.setZValue(self._layer.z)
 
     # def _definePensBrushes(self):
@@ -1369,6 +1849,12 @@ class layoutPin(layoutShape):
         )
 
     def paint(self, painter, option, widget):
+        detail = self.levelOfDetail(painter, option, self._rect)
+        if detail == LOD_HIDDEN:
+            return
+        elif detail == LOD_OUTLINE:
+            painter.drawRect(self._rect)
+            return
         if self.isSelected():
             painter.setPen(self._selectedPen)
             painter.setBrush(self._selectedBrush)
@@ -1377,6 +1863,9 @@ class layoutPin(layoutShape):
             painter.setBrush(self._brush)
         painter.drawRect(self._rect)
 
+    def detailRect(self) -> QRectF:
+        return self._rect
+
     def boundingRect(self):
         return self._rect.adjusted(-2, 2, 2, 2)
 
@@ -1545,6 +2034,12 @@ class layoutVia(layoutShape):
         return f"layoutVia({self._start}, {self._end}, {self._layer})"
 
     def paint(self, painter, option, widget):
+        detail = self.levelOfDetail(painter, option, self._rect)
+        if detail == LOD_HIDDEN:
+            return
+        elif detail == LOD_OUTLINE:
+            painter.drawRect(self._rect)
+            return
         if self.isSelected():
             painter.setPen(self._selectedPen)
         else:
@@ -1563,6 +2058,9 @@ class layoutVia(layoutShape):
             self.setFlag(QGraphicsItem.ItemIsMovable, False)
             self.setFlag(QGraphicsItem.ItemIsSelectable, False)
 
+    def detailRect(self) -> QRectF:
+        return self._rect
+
     def boundingRect(self):
         return self._rect.normalized().adjusted(-2, -2, 2, 2)
 
@@ -1810,6 +2308,13 @@ class layoutPolygon(layoutShape):
         return f"layoutPolygon({self._points}, {self._layer})"
 
     def paint(self, painter, option, widget):
+        self.notifyCachePolicy(painter)
+        detail = self.levelOfDetail(painter, option, self._polygon.boundingRect())
+        if detail == LOD_HIDDEN:
+            return
+        elif detail == LOD_OUTLINE:
+            painter.drawPolygon(self._polygon)
+            return
         if self.isSelected():
             painter.setPen(self._selectedPen)
             painter.setBrush(self._selectedBrush)
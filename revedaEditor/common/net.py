@@ -135,6 +135,7 @@ class schematicNet(QGraphicsItem):
         self.prepareGeometryChange()
         self._draftLine = line
         self._setupDraftline()
+        self._updateNetGraph()
     
     def _setupDraftline(self):
         self._transformOriginPoint = self._draftLine.p1()
@@ -212,8 +213,25 @@ class schematicNet(QGraphicsItem):
                     else:
                         self.setZValue(self.zValue() - 10)
                         self.scene().selectedNet = None
+                case QGraphicsItem.ItemSceneChange:
+                    # net is leaving the scene, remove it from connectivity graph.
+                    if hasattr(self.scene(), "netGraph"):
+                        self.scene().netGraph.removeNet(self)
+                case QGraphicsItem.ItemSceneHasChanged:
+                    if hasattr(self.scene(), "netGraph"):
+                        self.scene().netGraph.addNet(self)
+                case (
+                    QGraphicsItem.ItemPositionHasChanged
+                    | QGraphicsItem.ItemRotationHasChanged
+                    | QGraphicsItem.ItemTransformHasChanged
+                ):
+                    self._updateNetGraph()
         return super().itemChange(change, value)
 
+    def _updateNetGraph(self):
+        if self.scene() and hasattr(self.scene(), "netGraph"):
+            self.scene().netGraph.updateNet(self)
+
     def mousePressEvent(self, event: QGraphicsSceneMouseEvent):
         super().mousePressEvent(event)
         if self.scene():
@@ -50,6 +50,24 @@ import revedaEditor.common.net as net
 from revedaEditor.common.labels import symbolLabel
 
 
+# changes of symbols and schematic pins which may change net connections.
+connectionChanges = (
+    QGraphicsItem.GraphicsItemChange.ItemSceneChange,
+    QGraphicsItem.GraphicsItemChange.ItemSceneHasChanged,
+    QGraphicsItem.GraphicsItemChange.ItemPositionHasChanged,
+    QGraphicsItem.GraphicsItemChange.ItemRotationHasChanged,
+    QGraphicsItem.GraphicsItemChange.ItemTransformHasChanged,
+)
+
+
+def markConnectionChange(item: QGraphicsItem):
+    """
+    Tell the schematic connectivity graph that the connections of item may change.
+    """
+    if hasattr(item.scene(), "netGraph"):
+        item.scene().netGraph.markItemDirty(item)
+
+
 class symbolShape(QGraphicsItem):
     def __init__(self) -> None:
         super().__init__()
@@ -1364,6 +1382,8 @@ class schematicSymbol(symbolShape):
 
     def itemChange(self, change: QGraphicsItem.GraphicsItemChange, value):
         if self.scene():
+            if change in connectionChanges:
+                markConnectionChange(self)
             if change == QGraphicsItem.GraphicsItemChange.ItemPositionChange:
                 return self._handlePositionChange(value)
             elif change == QGraphicsItem.GraphicsItemChange.ItemPositionHasChanged:
@@ -1653,6 +1673,11 @@ class schematicPin(symbolShape):
         self._updateTextMetrics()
         self.prepareGeometryChange()
 
+    def itemChange(self, change: QGraphicsItem.GraphicsItemChange, value):
+        if self.scene() and change in connectionChanges:
+            markConnectionChange(self)
+        return super().itemChange(change, value)
+
     def __repr__(self):
         return (f"schematicPin({self._start}, {self._pinName}, {self._pinDir}, "
                 f"{self._pinType})")
@@ -0,0 +1,373 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+
+# Compact cellview files. A compact cellview keeps the same items in the same order
+# as the JSON cellview but stores them in chunks: runs of rectangles as columns of
+# integers and runs of other items as compressed JSON. Rectangles are read back
+# with their angle and flip. Chunks are read one at a time, so large layouts
+# can be loaded without decoding the whole file first. JSON cellviews remain the
+# exchange format and can be converted in both directions.
+#
+# File layout (little endian):
+#   magic (5 bytes), format version (uint16), header length (uint32), header JSON
+#   chunks: tag (1 byte), flags (uint8), item count (uint32), payload length (uint32)
+#   end chunk with tag b"E".
+
+import json
+import os
+import pathlib
+import struct
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Type
+
+import numpy as np
+
+JSON_SUFFIX = ".json"
+COMPACT_SUFFIX = ".revb"
+CELLVIEW_SUFFIXES = frozenset((JSON_SUFFIX, COMPACT_SUFFIX))
+
+COMPACT_MAGIC = b"REVB\x00"
+COMPACT_VERSION = 1
+RECT_CHUNK_SIZE = 65536
+JSON_CHUNK_SIZE = 4096
+
+_RECT_TAG = b"R"
+_JSON_TAG = b"J"
+_END_TAG = b"E"
+_COMPRESSED = 0x01
+_FILE_HEADER = struct.Struct("<5sHI")
+_CHUNK_HEADER = struct.Struct("<cBII")
+_RECT_KEYS = frozenset(("type", "tl", "br", "ang", "ln", "fl"))
+_INT32_MIN = -(2**31)
+_INT32_MAX = 2**31 - 1
+
+
+def isCellviewPath(pathObj: pathlib.Path) -> bool:
+    return pathObj.suffix in CELLVIEW_SUFFIXES
+
+
+def isCompactPath(pathObj: pathlib.Path) -> bool:
+    return pathObj.suffix == COMPACT_SUFFIX
+
+
+def cellviewPath(cellPathObj: pathlib.Path, viewName: str) -> pathlib.Path:
+    """
+    Return the file of a cellview. A compact file is preferred if it exists,
+    otherwise the JSON file path is returned whether it exists or not.
+    """
+    compactPathObj = cellPathObj.joinpath(f"{viewName}{COMPACT_SUFFIX}")
+    if compactPathObj.is_file():
+        return compactPathObj
+    return cellPathObj.joinpath(f"{viewName}{JSON_SUFFIX}")
+
+
+def _splitHeader(items: List[dict]) -> int:
+    """
+    Header entries, e.g. view type and snap grid, are the leading items without
+    a type key.
+    """
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or "type" in item:
+            return index
+    return len(items)
+
+
+def _intValue(value: Any) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return None
+
+
+def _rectRow(itemDict: dict) -> Optional[tuple]:
+    """
+    Return a rectangle as a row of integers if it can be stored in a rectangle
+    chunk without losing information.
+    """
+    if itemDict.get("type") != "Rect" or not _RECT_KEYS.issuperset(itemDict):
+        return None
+    try:
+        (x1, y1), (x2, y2) = itemDict["tl"], itemDict["br"]
+        flx, fly = itemDict.get("fl", (1, 1))
+        values = [
+            _intValue(value)
+            for value in (x1, y1, x2, y2, itemDict["ln"], itemDict.get("ang", 0))
+        ]
+    except (KeyError, TypeError, ValueError):
+        return None
+    if any(value is None for value in values):
+        return None
+    if not all(_INT32_MIN <= value <= _INT32_MAX for value in values[:4]):
+        return None
+    if not 0 <= values[4] <= 0xFFFF or not -32768 <= values[5] <= 32767:
+        return None
+    if flx not in (1, -1) or fly not in (1, -1):
+        return None
+    return (*values, flx, fly)
+
+
+class cellviewWriter:
+    """
+    Write a compact cellview. Items are encoded with the JSON encoder of the
+    view, rectangles are collected into columns. A chunk is written when the
+    next item is of the other kind, so the items keep their order.
+    """
+
+    def __init__(
+        self,
+        filePathObj: pathlib.Path,
+        header: List[dict],
+        encoder: Type[json.JSONEncoder] = json.JSONEncoder,
+        compressLevel: int = 1,
+    ):
+        self.filePathObj = filePathObj
+        self.header = header
+        self.encoder = encoder(separators=(",", ":"))
+        self.compressLevel = compressLevel
+        self._file = None
+        self._rectRows = []
+        self._jsonItems = []
+
+    def __enter__(self):
+        self._tempPathObj = self.filePathObj.with_name(f".{self.filePathObj.name}.tmp")
+        self._file = self._tempPathObj.open("wb")
+        headerBytes = json.dumps(self.header, cls=type(self.encoder)).encode("utf-8")
+        self._file.write(
+            _FILE_HEADER.pack(COMPACT_MAGIC, COMPACT_VERSION, len(headerBytes))
+        )
+        self._file.write(headerBytes)
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        try:
+            if excType is None:
+                self.flush()
+                self._file.write(_CHUNK_HEADER.pack(_END_TAG, 0, 0, 0))
+        finally:
+            self._file.close()
+        if excType is None:
+            os.replace(self._tempPathObj, self.filePathObj)
+        else:
+            self._tempPathObj.unlink(missing_ok=True)
+        return False
+
+    def write(self, item: Any) -> None:
+        itemDict = item if isinstance(item, dict) else self.encoder.default(item)
+        rectRow = _rectRow(itemDict)
+        if rectRow is not None:
+            self._flushJson()
+            self._rectRows.append(rectRow)
+            if len(self._rectRows) >= RECT_CHUNK_SIZE:
+                self._flushRects()
+        else:
+            self._flushRects()
+            self._jsonItems.append(self.encoder.encode(itemDict))
+            if len(self._jsonItems) >= JSON_CHUNK_SIZE:
+                self._flushJson()
+
+    def writeItems(self, items: Iterable[Any]) -> None:
+        for item in items:
+            self.write(item)
+
+    def flush(self) -> None:
+        self._flushRects()
+        self._flushJson()
+
+    def _writeChunk(self, tag: bytes, count: int, payload: bytes) -> None:
+        flags = 0
+        if self.compressLevel:
+            payload = zlib.compress(payload, self.compressLevel)
+            flags |= _COMPRESSED
+        self._file.write(_CHUNK_HEADER.pack(tag, flags, count, len(payload)))
+        self._file.write(payload)
+
+    def _flushRects(self) -> None:
+        if not self._rectRows:
+            return
+        rows = np.array(self._rectRows, dtype=np.int64)
+        payload = b"".join(
+            (
+                rows[:, 0:4].astype("<i4").tobytes(),
+                rows[:, 4].astype("<u2").tobytes(),
+                rows[:, 5].astype("<i2").tobytes(),
+                rows[:, 6:8].astype("<i1").tobytes(),
+            )
+        )
+        self._writeChunk(_RECT_TAG, len(rows), payload)
+        self._rectRows = []
+
+    def _flushJson(self) -> None:
+        if not self._jsonItems:
+            return
+        payload = f"[{','.join(self._jsonItems)}]".encode("utf-8")
+        self._writeChunk(_JSON_TAG, len(self._jsonItems), payload)
+        self._jsonItems = []
+
+
+class cellviewReader:
+    """
+    Read a cellview file in either format. The header is read when the reader is
+    opened, items are returned chunk by chunk from chunks().
+    """
+
+    def __init__(self, filePathObj: pathlib.Path):
+        self.filePathObj = filePathObj
+        self.header: List[dict] = []
+        self._file = None
+        self._jsonItems: Optional[List[dict]] = None
+
+    def __enter__(self):
+        if isCompactPath(self.filePathObj):
+            self._file = self.filePathObj.open("rb")
+            magic, version, headerLength = _FILE_HEADER.unpack(
+                self._read(_FILE_HEADER.size)
+            )
+            if magic != COMPACT_MAGIC:
+                raise ValueError(f"{self.filePathObj} is not a compact cellview")
+            if version > COMPACT_VERSION:
+                raise ValueError(
+                    f"{self.filePathObj} has unsupported format version {version}"
+                )
+            self.header = json.loads(self._read(headerLength))
+        else:
+            with self.filePathObj.open("r") as file:
+                items = json.load(file)
+            headerLength = _splitHeader(items)
+            self.header = items[:headerLength]
+            self._jsonItems = items[headerLength:]
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if self._file is not None:
+            self._file.close()
+        return False
+
+    @property
+    def headerDict(self) -> Dict[str, Any]:
+        headerDict = {}
+        for entry in self.header:
+            headerDict.update(entry)
+        return headerDict
+
+    def _read(self, size: int) -> bytes:
+        data = self._file.read(size)
+        if len(data) != size:
+            raise ValueError(f"{self.filePathObj} is truncated")
+        return data
+
+    def chunks(self, rects: bool = True) -> Iterator[List[dict]]:
+        """
+        Return the items chunk by chunk. Rectangle chunks of compact files are
+        skipped without being read if rects is False.
+        """
+        if self._jsonItems is not None:
+            if self._jsonItems:
+                yield self._jsonItems
+            return
+        while True:
+            tag, flags, count, length = _CHUNK_HEADER.unpack(
+                self._read(_CHUNK_HEADER.size)
+            )
+            if tag == _END_TAG:
+                return
+            if tag == _RECT_TAG and not rects:
+                self._file.seek(length, os.SEEK_CUR)
+                continue
+            payload = self._read(length)
+            if flags & _COMPRESSED:
+                payload = zlib.decompress(payload)
+            match tag:
+                case b"R":
+                    yield self._rectItems(payload, count)
+                case b"J":
+                    yield json.loads(payload)
+                case _:
+                    # unknown chunks from a later minor version are skipped.
+                    continue
+
+    def items(self, rects: bool = True) -> Iterator[dict]:
+        for chunk in self.chunks(rects):
+            yield from chunk
+
+    @staticmethod
+    def _rectItems(payload: bytes, count: int) -> List[dict]:
+        offset = 0
+        coords = np.frombuffer(payload, "<i4", 4 * count, offset).reshape(count, 4)
+        offset += 16 * count
+        layers = np.frombuffer(payload, "<u2", count, offset)
+        offset += 2 * count
+        angles = np.frombuffer(payload, "<i2", count, offset)
+        offset += 2 * count
+        flips = np.frombuffer(payload, "<i1", 2 * count, offset).reshape(count, 2)
+        return [
+            {
+                "type": "Rect",
+                "tl": [x1, y1],
+                "br": [x2, y2],
+                "ang": angle,
+                "ln": layer,
+                "fl": flip,
+            }
+            for (x1, y1, x2, y2), layer, angle, flip in zip(
+                coords.tolist(), layers.tolist(), angles.tolist(), flips.tolist()
+            )
+        ]
+
+
+def readCellview(filePathObj: pathlib.Path) -> list:
+    """
+    Read a cellview in either format as a list of header entries followed by
+    item dictionaries, i.e. the contents of the JSON cellview.
+    """
+    with cellviewReader(filePathObj) as reader:
+        return [*reader.header, *reader.items()]
+
+
+def writeCellview(
+    filePathObj: pathlib.Path,
+    header: List[dict],
+    items: Iterable[Any],
+    encoder: Type[json.JSONEncoder] = json.JSONEncoder,
+    indent: Optional[int] = None,
+) -> None:
+    """
+    Write a cellview in the format given by the file suffix.
+    """
+    if isCompactPath(filePathObj):
+        with cellviewWriter(filePathObj, header, encoder) as writer:
+            writer.writeItems(items)
+    else:
+        with filePathObj.open(mode="w") as file:
+            json.dump([*header, *items], file, cls=encoder, indent=indent)
+
+
+def convertCellview(
+    sourcePathObj: pathlib.Path, targetPathObj: pathlib.Path, indent: Optional[int] = 4
+) -> None:
+    """
+    Convert between the JSON and the compact cellview formats.
+    """
+    with cellviewReader(sourcePathObj) as reader:
+        writeCellview(targetPathObj, reader.header, reader.items(), indent=indent)
@@ -23,19 +23,190 @@
 #    Licensor: Revolution Semiconductor (Registered in the Netherlands)
 #
 
+# Layout items are first gathered into per cell and per layer geometry. Rectangles
+# are kept in numpy arrays and transformed together, the gdstk objects of a cell
+# are created in one pass once its geometry is known. Cells with the same content
+# are written once and instances are written as references with their rotation
+# and mirroring. Equal shapes and references are written as repetitions, which
+# the OASIS writer keeps and the GDS writer expands or writes as arrays.
+
+import hashlib
+import math
+import pathlib
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
 import gdstk
+import numpy as np
+from PySide6.QtCore import QPointF
+from PySide6.QtGui import QTransform
+
 import revedaEditor.common.layoutShapes as lshp
-import pathlib
-import inspect
-import os
-from dotenv import load_dotenv
+from revedaEditor.backend.jobControl import jobControl, reportProgress
+
+# rotations closer than this to a whole degree are rounded.
+ANGLE_TOLERANCE = 1e-9
+# progress is reported once per this many top level items.
+PROGRESS_STEP = 256
+GDS_FORMAT = "GDS"
+OASIS_FORMAT = "OASIS"
+EXPORT_FORMATS = (GDS_FORMAT, OASIS_FORMAT)
+FORMAT_SUFFIXES = {GDS_FORMAT: ".gds", OASIS_FORMAT: ".oas"}
+
+
+def transformTuple(transform: QTransform) -> Tuple[float, ...]:
+    return (
+        transform.m11(),
+        transform.m12(),
+        transform.m21(),
+        transform.m22(),
+        transform.dx(),
+        transform.dy(),
+    )
+
+
+def referenceTransform(transform: QTransform) -> Tuple[tuple, float, float, bool]:
+    """
+    Split an item transform into the origin, rotation (radians), magnification
+    and x reflection of a GDS reference. The reflection is applied first, then
+    the rotation, as in GDS.
+    """
+    m11, m12, m21, m22, dx, dy = transformTuple(transform)
+    determinant = m11 * m22 - m12 * m21
+    magnification = math.sqrt(abs(determinant))
+    degrees = math.degrees(math.atan2(m12, m11))
+    if abs(degrees - round(degrees)) < ANGLE_TOLERANCE:
+        degrees = float(round(degrees))
+    return (dx, dy), math.radians(degrees), magnification, determinant < 0
+
+
+def repetition(origins: np.ndarray) -> gdstk.Repetition:
+    """
+    Repetition placing copies of an element at the origins, relative to the
+    first origin. Origins on a full regular grid give a rectangular array.
+    """
+    offsets = origins[1:] - origins[0]
+    xs = np.unique(origins[:, 0])
+    ys = np.unique(origins[:, 1])
+    if len(xs) * len(ys) == len(origins) and xs[0] == origins[0, 0] and (
+            ys[0] == origins[0, 1]):
+        xSteps, ySteps = np.diff(xs), np.diff(ys)
+        if (xSteps == xSteps[:1]).all() and (ySteps == ySteps[:1]).all() and len(
+                np.unique(origins, axis=0)) == len(origins):
+            spacing = (
+                xSteps[0].item() if len(xSteps) else 0.0,
+                ySteps[0].item() if len(ySteps) else 0.0,
+            )
+            return gdstk.Repetition(columns=len(xs), rows=len(ys), spacing=spacing)
+    return gdstk.Repetition(offsets=offsets)
+
 
-load_dotenv()
+def localTransform(item) -> QTransform:
+    """
+    Transform of an item to the coordinates of its parent, or of the cell if it
+    has no parent.
+    """
+    parent = item.parentItem()
+    if parent is None:
+        return item.sceneTransform()
+    return item.itemTransform(parent)[0]
+
+
+class gdsCellGeometry:
+    """
+    Geometry of one GDS cell collected before any gdstk object is created.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        # layer key -> rows of (left, top, right, bottom, transform index)
+        self._rects: Dict[Tuple[int, int], List[tuple]] = defaultdict(list)
+        # the identity transform is always the first one.
+        self._transforms: List[tuple] = [(1.0, 0.0, 0.0, 1.0, 0.0, 0.0)]
+        self._transformIndices: Dict[tuple, int] = {self._transforms[0]: 0}
+        self.polygons: Dict[Tuple[int, int], List[np.ndarray]] = defaultdict(list)
+        self.paths: List[tuple] = []
+        self.labels: List[tuple] = []
+        # (child geometry, origin, rotation, magnification, x reflection, columns,
+        # rows, spacing)
+        self.references: List[tuple] = []
+        self.rects: Dict[Tuple[int, int], np.ndarray] = dict()
+
+    def addRect(self, layerKey: Tuple[int, int], rectTuple: tuple,
+                transform: QTransform) -> None:
+        if transform.isIdentity():
+            self._rects[layerKey].append((*rectTuple, 0))
+            return
+        transformKey = transformTuple(transform)
+        transformIndex = self._transformIndices.get(transformKey)
+        if transformIndex is None:
+            transformIndex = self._transformIndices[transformKey] = len(
+                self._transforms)
+            self._transforms.append(transformKey)
+        self._rects[layerKey].append((*rectTuple, transformIndex))
+
+    def addPolygon(self, layerKey: Tuple[int, int], points: list,
+                   transform: QTransform) -> None:
+        self.polygons[layerKey].append(
+            np.array([transform.map(QPointF(point)).toTuple() for point in points])
+        )
+
+    def addReference(self, child: "gdsCellGeometry", transform: QTransform,
+                     columns: int = 1, rows: int = 1, spacing: tuple = None) -> None:
+        origin, rotation, magnification, xReflection = referenceTransform(transform)
+        self.references.append(
+            (child, origin, rotation, magnification, xReflection, columns, rows,
+             spacing)
+        )
+
+    def finalise(self) -> None:
+        """
+        Transform the collected rectangles to cell coordinates. Rectangles under
+        a rotation that is not a multiple of 90 degrees become polygons.
+        """
+        transforms = np.array(self._transforms, dtype=np.float64).reshape(-1, 6)
+        for layerKey, rows in self._rects.items():
+            rowArray = np.array(rows, dtype=np.float64)
+            left, top, right, bottom = rowArray[:, :4].T
+            m11, m12, m21, m22, dx, dy = transforms[rowArray[:, 4].astype(np.intp)].T
+            # corners in the order top left, top right, bottom right, bottom left.
+            xs = np.stack([left, right, right, left], axis=1)
+            ys = np.stack([top, top, bottom, bottom], axis=1)
+            mappedXs = m11[:, None] * xs + m21[:, None] * ys + dx[:, None]
+            mappedYs = m12[:, None] * xs + m22[:, None] * ys + dy[:, None]
+            aligned = ((m12 == 0) & (m21 == 0)) | ((m11 == 0) & (m22 == 0))
+            self.rects[layerKey] = np.stack(
+                [
+                    mappedXs[aligned].min(axis=1),
+                    mappedYs[aligned].min(axis=1),
+                    mappedXs[aligned].max(axis=1),
+                    mappedYs[aligned].max(axis=1),
+                ],
+                axis=1,
+            )
+            corners = np.stack([mappedXs[~aligned], mappedYs[~aligned]], axis=2)
+            self.polygons[layerKey].extend(corners)
+        self._rects.clear()
+
+    def contentKey(self, cellNames: Dict[int, str]) -> bytes:
+        """
+        Digest of the geometry of the cell. The children are identified by the
+        names of the cells written for them.
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        for layerKey in sorted(self.rects):
+            digest.update(repr(("r", layerKey)).encode())
+            digest.update(self.rects[layerKey].tobytes())
+        for layerKey in sorted(self.polygons):
+            for points in self.polygons[layerKey]:
+                digest.update(repr(("p", layerKey, len(points))).encode())
+                digest.update(np.ascontiguousarray(points, dtype=np.float64).tobytes())
+        digest.update(repr((self.paths, self.labels)).encode())
+        for child, *referenceData in self.references:
+            digest.update(repr((cellNames[id(child)], referenceData)).encode())
+        return digest.digest()
 
-if os.environ.get("REVEDA_PDK_PATH"):
-    import pdk.pcells as pcells
-else:
-    import defaultPDK.pcells as pcells
 
 class gdsExporter:
     def __init__(self, cellname: str, items: list, outputFileObj: pathlib.Path):
@@ -45,148 +216,359 @@ class gdsExporter:
         self._libraryName = None
         self._unit = 1e-6
         self._precision = 1e-9
+        self._topGeometry = None
         self._topCell = None
-        self._cellCache = {}  # Cache to store already processed cells
-        self._itemCounter = 0
+        self._cellCache = {}  # geometries of instance masters, pcells and vias
+        self._gdsCells = {}  # geometry id -> written gdstk cell
+        self._contentCells = {}  # content key -> written gdstk cell
+        self._cellNames = {}  # geometry id -> written cell name
+        self._usedNames = set()
+        self._gatherMethods = {}  # item type -> gather method
+        self._layerKeys = {}  # layer id -> (gds layer, datatype)
+        self._outputFormat = GDS_FORMAT
+        self.compressionLevel = 6  # zlib level of OASIS cell blocks
+        self.timings: Dict[str, float] = dict()
+        self.cellCount = 0
 
-    def gds_export(self):
+    def gds_export(self, control: Optional[jobControl] = None) -> pathlib.Path:
+        """
+        Export the items to the GDS or OASIS file. The optional control object
+        receives progress reports and can cancel the export before the file is
+        written. If gatherItems was called before, the layout items are not read.
+        """
         self._outputFileObj.parent.mkdir(parents=True, exist_ok=True)
         lib = gdstk.Library(unit=self._unit, precision=self._precision)
-        self._topCell = lib.new_cell(self._cellname)  # top Cell
-        for item in self._items:
-            self.createCells(lib, item, self._topCell)
-
-        lib.write_gds(self._outputFileObj)
-
-    def createCells(self, library: gdstk.Library, item: lshp.layoutShape, parentCell: gdstk.Cell):
-        match type(item):
-            case lshp.layoutInstance:
-                cell_key = (item.libraryName, item.cellName, item.viewName)
-                if cell_key not in self._cellCache:
-                    cellGDSName = f"{item.libraryName}_{item.cellName}_{item.viewName}_{self._itemCounter}"
-                    self._itemCounter += 1
-                    new_cell = library.new_cell(cellGDSName)
-                    self._cellCache[cell_key] = new_cell
-                    for shape in item.shapes:
-                        self.createCells(library, shape, new_cell)
-                else:
-                    new_cell = self._cellCache[cell_key]
-                
-                ref = gdstk.Reference(
-                    new_cell,
-                    item.pos().toPoint().toTuple(),
-                    rotation=item.angle,
-                )
-                parentCell.add(ref)
-            
-            case lshp.layoutRect:
-                rect = gdstk.rectangle(
-                    corner1=item.start.toTuple(),
-                    corner2=item.end.toTuple(),
-                    layer=item.layer.gdsLayer,
-                    datatype=item.layer.datatype,
-                )
-                parentCell.add(rect)
-            
-            case lshp.layoutPath:
-                path = gdstk.FlexPath(
-                    points=[
-                        item.draftLine.p1().toTuple(),
-                        item.draftLine.p2().toTuple(),
-                    ],
-                    width=item.width,
-                    ends=(item.startExtend, item.endExtend),
-                    simple_path=True,
-                    layer=item.layer.gdsLayer,
-                    datatype=item.layer.datatype,
-                )
-                parentCell.add(path)
-            
-            case lshp.layoutLabel:
-                label = gdstk.Label(
-                    text=item.labelText,
-                    origin=item.start.toTuple(),
-                    rotation=item.angle,
-                    layer=item.layer.gdsLayer,
-                )
-                parentCell.add(label)
-            
-            case lshp.layoutPin:
-                pin = gdstk.rectangle(
-                    corner1=item.start.toTuple(),
-                    corner2=item.end.toTuple(),
-                    layer=item.layer.gdsLayer,
-                    datatype=item.layer.datatype,
-                )
-                parentCell.add(pin)
-            
-            case lshp.layoutPolygon:
-                points = [point.toTuple() for point in item.points]
-                polygon = gdstk.Polygon(
-                    points=points,
-                    layer=item.layer.gdsLayer,
-                    datatype=item.layer.datatype,
-                )
-                parentCell.add(polygon)
-            
-            case lshp.layoutViaArray:
-                via_key = (item.via.width, item.via.height, item.via.layer.name, item.via.layer.purpose)
-                if via_key not in self._cellCache:
-                    viaName = f"via_{item.via.width}_{item.via.height}_{item.via.layer.name}_{item.via.layer.purpose}"
-                    viaCell = library.new_cell(viaName)
-                    via = gdstk.rectangle(
-                        item.mapToScene(item.via.rect.topLeft()).toTuple(),
-                        item.mapToScene(item.via.rect.bottomRight()).toTuple(),
-                        layer=item.via.layer.gdsLayer,
-                        datatype=item.via.layer.datatype,
-                    )
-                    viaCell.add(via)
-                    self._cellCache[via_key] = viaCell
-                else:
-                    viaCell = self._cellCache[via_key]
-                
-                viaArray = gdstk.Reference(
-                    cell=viaCell,
-                    origin=item.start.toTuple(),
-                    columns=item.xnum,
-                    rows=item.ynum,
-                    spacing=(item.xs + item.width, item.ys + item.height),
+        itemCount = len(self._items)
+        self.createLayoutCell(lib, control)
+        buildEnd = time.perf_counter()
+        reportProgress(
+            control, itemCount + 1, itemCount + 2,
+            f"Writing {self._outputFormat} file..."
+        )
+        if self._outputFormat == OASIS_FORMAT:
+            lib.write_oas(
+                self._outputFileObj,
+                compression_level=self.compressionLevel,
+                detect_rectangles=True,
+                detect_trapezoids=True,
+                validation="crc32",
+            )
+        else:
+            lib.write_gds(self._outputFileObj)
+        self.timings["write"] = time.perf_counter() - buildEnd
+        return self._outputFileObj
+
+    def gatherItems(self, control: Optional[jobControl] = None) -> gdsCellGeometry:
+        """
+        Gather the geometry of the items. This reads the layout items and builds
+        the shared masters of unexpanded instances and pcells, so an export job
+        calls it in the GUI thread before the job is started.
+        """
+        itemCount = len(self._items)
+        start = time.perf_counter()
+        topGeometry = gdsCellGeometry(self._cellname)
+        for index, item in enumerate(self._items):
+            self.gatherItem(item, topGeometry, item.sceneTransform())
+            if index % PROGRESS_STEP == 0:
+                reportProgress(control, index, itemCount + 2, "Collecting shapes...")
+        topGeometry.finalise()
+        self._topGeometry = topGeometry
+        self.timings["collect"] = time.perf_counter() - start
+        return topGeometry
+
+    def createLayoutCell(self, library: gdstk.Library,
+                         control: Optional[jobControl] = None) -> gdstk.Cell:
+        """
+        Create the top cell and the cells it references in the library. The items
+        are gathered first if gatherItems was not called.
+        """
+        if self._topGeometry is None:
+            self.gatherItems(control)
+        itemCount = len(self._items)
+        start = time.perf_counter()
+        reportProgress(control, itemCount, itemCount + 2, "Creating cells...")
+        self._topCell = self.createCell(library, self._topGeometry)
+        self.timings["cells"] = time.perf_counter() - start
+        return self._topCell
+
+    def timingReport(self) -> str:
+        return (
+            f"{self._outputFormat} export of {self.cellCount} cells: "
+            + ", ".join(f"{key} {value:.3f} s" for key, value in self.timings.items())
+        )
+
+    def gatherItem(self, item: lshp.layoutShape, geometry: gdsCellGeometry,
+                   transform: QTransform):
+        """
+        Add an item to the geometry of a cell. The transform maps the item
+        coordinates to the cell coordinates.
+        """
+        gatherMethod = self._gatherMethods.get(type(item))
+        if gatherMethod is None:
+            gatherMethod = self._gatherMethods[type(item)] = self.gatherMethod(item)
+        gatherMethod(item, geometry, transform)
+
+    def gatherMethod(self, item: lshp.layoutShape):
+        """
+        Find the gather method of an item type, pcells before instances.
+        """
+        for itemType, method in (
+            (lshp.layoutPcell, self.gatherPcell),
+            (lshp.layoutInstance, self.gatherInstance),
+            (lshp.layoutViaArray, self.gatherViaArray),
+            ((lshp.layoutRect, lshp.layoutPin, lshp.layoutVia), self.gatherRect),
+            (lshp.layoutPolygon, self.gatherPolygon),
+            (lshp.layoutPath, self.gatherPath),
+            (lshp.layoutLabel, self.gatherLabel),
+        ):
+            if isinstance(item, itemType):
+                return method
+        return lambda *args: None
+
+    def gatherPcell(self, item: lshp.layoutPcell, geometry: gdsCellGeometry,
+                    transform: QTransform):
+        geometry.addReference(self.pcellGeometry(item), transform)
+
+    def gatherInstance(self, item: lshp.layoutInstance, geometry: gdsCellGeometry,
+                       transform: QTransform):
+        geometry.addReference(self.instanceGeometry(item), transform)
+
+    def gatherRect(self, item: lshp.layoutShape, geometry: gdsCellGeometry,
+                   transform: QTransform):
+        geometry.addRect(self.layerKey(item.layer), item.rect.getCoords(), transform)
+
+    def gatherPolygon(self, item: lshp.layoutPolygon, geometry: gdsCellGeometry,
+                      transform: QTransform):
+        geometry.addPolygon(self.layerKey(item.layer), item.points, transform)
+
+    def gatherPath(self, item: lshp.layoutPath, geometry: gdsCellGeometry,
+                   transform: QTransform):
+        _, _, magnification, _ = referenceTransform(transform)
+        geometry.paths.append(
+            (
+                (
+                    transform.map(item.draftLine.p1()).toTuple(),
+                    transform.map(item.draftLine.p2()).toTuple(),
+                ),
+                item.width * magnification,
+                (item.startExtend, item.endExtend),
+                self.layerKey(item.layer),
+            )
+        )
+
+    def gatherLabel(self, item: lshp.layoutLabel, geometry: gdsCellGeometry,
+                    transform: QTransform):
+        origin = transform.map(QPointF(item.start)).toTuple()
+        _, rotation, magnification, xReflection = referenceTransform(transform)
+        geometry.labels.append(
+            (item.labelText, origin, rotation, magnification, xReflection,
+             self.layerKey(item.layer))
+        )
+
+    def gatherShapes(self, shapes: list, geometry: gdsCellGeometry):
+        for shape in shapes:
+            self.gatherItem(shape, geometry, localTransform(shape))
+
+    def instanceGeometry(self, item: lshp.layoutInstance) -> gdsCellGeometry:
+        name = f"{item.libraryName}_{item.cellName}_{item.viewName}"
+        if item.isExpanded:
+            # shapes of expanded instances may be edited, cells with the same
+            # content are merged when the cells are written.
+            geometry = gdsCellGeometry(name)
+            self.gatherShapes(item.shapes, geometry)
+            geometry.finalise()
+            return geometry
+        # unexpanded instances share the shapes of their master.
+        cellKey = ("master", id(item.master))
+        geometry = self._cellCache.get(cellKey)
+        if geometry is None:
+            geometry = self._cellCache[cellKey] = gdsCellGeometry(name)
+            self.gatherShapes(item.master.shapes, geometry)
+            geometry.finalise()
+        return geometry
+
+    def pcellGeometry(self, item: lshp.layoutPcell) -> gdsCellGeometry:
+        pcellParamDict = self.extractPcellInstanceParameters(item)
+        cellKey = (
+            "pcell",
+            item.libraryName,
+            type(item).__name__,
+            tuple((key, repr(value)) for key, value in pcellParamDict.items()),
+        )
+        geometry = self._cellCache.get(cellKey)
+        if geometry is None:
+            pcellNameSuffix = "_".join(
+                [f"{key}_{value}" for key, value in pcellParamDict.items()]
+            ).replace(".", "p")
+            geometry = self._cellCache[cellKey] = gdsCellGeometry(
+                f"{item.libraryName}_{type(item).__name__}_{pcellNameSuffix}"
+            )
+            # unexpanded pcells paint the shapes of their shared master.
+            shapes = item.shapes if item.isExpanded else item.master.shapes
+            self.gatherShapes(shapes, geometry)
+            geometry.finalise()
+        return geometry
+
+    def gatherViaArray(self, item: lshp.layoutViaArray, geometry: gdsCellGeometry,
+                       transform: QTransform):
+        via = item.via
+        m11, m12, m21, m22, dx, dy = transformTuple(transform)
+        if (m11, m12, m21, m22) != (1, 0, 0, 1):
+            # rotated or mirrored arrays are written as separate vias.
+            for childVia in item.childItems():
+                self.gatherItem(childVia, geometry,
+                                localTransform(childVia) * transform)
+            return
+        layerKey = self.layerKey(via.layer)
+        cellKey = ("via", via.width, via.height, layerKey)
+        viaGeometry = self._cellCache.get(cellKey)
+        if viaGeometry is None:
+            viaGeometry = self._cellCache[cellKey] = gdsCellGeometry(
+                f"via_{via.width}_{via.height}_{via.layer.name}_{via.layer.purpose}"
+            )
+            viaGeometry.addRect(layerKey, (0, 0, via.width, via.height), QTransform())
+            viaGeometry.finalise()
+        geometry.addReference(
+            viaGeometry,
+            QTransform.fromTranslate(*transform.map(QPointF(item.start)).toTuple()),
+            columns=item.xnum,
+            rows=item.ynum,
+            spacing=(item.xs + via.width, item.ys + via.height),
+        )
+
+    def layerKey(self, layer) -> Tuple[int, int]:
+        layerKey = self._layerKeys.get(id(layer))
+        if layerKey is None:
+            layerKey = self._layerKeys[id(layer)] = (layer.gdsLayer, layer.datatype)
+        return layerKey
+
+    def createCell(self, library: gdstk.Library,
+                   geometry: gdsCellGeometry) -> gdstk.Cell:
+        """
+        Create the gdstk cell of a geometry after the cells it references. A cell
+        with the same content as a written cell is not written again.
+        """
+        gdsCell = self._gdsCells.get(id(geometry))
+        if gdsCell is not None:
+            return gdsCell
+        for child, *_ in geometry.references:
+            self.createCell(library, child)
+        contentKey = geometry.contentKey(self._cellNames)
+        gdsCell = self._contentCells.get(contentKey)
+        if gdsCell is None:
+            gdsCell = library.new_cell(self.uniqueName(geometry.name))
+            self.addGeometry(gdsCell, geometry)
+            self._contentCells[contentKey] = gdsCell
+            self.cellCount += 1
+        self._gdsCells[id(geometry)] = gdsCell
+        self._cellNames[id(geometry)] = gdsCell.name
+        return gdsCell
+
+    def uniqueName(self, name: str) -> str:
+        uniqueName = name
+        counter = 0
+        while uniqueName in self._usedNames:
+            counter += 1
+            uniqueName = f"{name}_{counter}"
+        self._usedNames.add(uniqueName)
+        return uniqueName
+
+    def addGeometry(self, gdsCell: gdstk.Cell, geometry: gdsCellGeometry):
+        elements = []
+        for (layer, datatype), rects in geometry.rects.items():
+            elements.extend(self.rectangles(rects, layer, datatype))
+        for (layer, datatype), polygons in geometry.polygons.items():
+            elements.extend(
+                gdstk.Polygon(points, layer=layer, datatype=datatype)
+                for points in polygons
+            )
+        for points, width, ends, (layer, datatype) in geometry.paths:
+            elements.append(
+                gdstk.FlexPath(points, width, ends=ends, simple_path=True, layer=layer,
+                               datatype=datatype)
+            )
+        for text, origin, rotation, magnification, xReflection, (
+                layer, texttype) in geometry.labels:
+            elements.append(
+                gdstk.Label(text, origin, rotation=rotation,
+                            magnification=magnification, x_reflection=xReflection,
+                            layer=layer, texttype=texttype)
+            )
+        elements.extend(self.references(geometry.references))
+        gdsCell.add(*elements)
+
+    def references(self, references: List[tuple]) -> list:
+        """
+        Create the references of a cell. Single references to the same cell with
+        the same orientation become one reference with a repetition.
+        """
+        elements = []
+        groups = defaultdict(list)
+        gdsCells = dict()
+        for (child, origin, rotation, magnification, xReflection, columns, rows,
+             spacing) in references:
+            gdsCell = self._gdsCells[id(child)]
+            if columns == 1 and rows == 1:
+                gdsCells[gdsCell.name] = gdsCell
+                groups[(gdsCell.name, rotation, magnification, xReflection)].append(
+                    origin)
+            else:
+                elements.append(
+                    gdstk.Reference(gdsCell, origin, rotation, magnification,
+                                    xReflection, columns, rows, spacing)
                 )
-                parentCell.add(viaArray)
-            
-            case _:
-                match item.__class__.__bases__[0]:
-                    case pcells.baseCell:
-                        pcellParamDict = self.extractPcellInstanceParameters(item)
-                        pcell_key = (item.libraryName, type(item).__name__, frozenset(pcellParamDict.items()))
-                        
-                        if pcell_key not in self._cellCache:
-                            pcellNameSuffix = "_".join(
-                                [f"{key}_{value}" for key, value in pcellParamDict.items()]
-                            ).replace(".", "p")
-                            pcellName = f"{item.libraryName}_{type(item).__name__}_{pcellNameSuffix}"
-                            new_cell = library.new_cell(pcellName)
-                            self._cellCache[pcell_key] = new_cell
-                            for shape in item.shapes:
-                                self.createCells(library, shape, new_cell)
-                        else:
-                            new_cell = self._cellCache[pcell_key]
-                        
-                        ref = gdstk.Reference(
-                            new_cell,
-                            item.pos().toPoint().toTuple(),
-                            rotation=item.angle,
-                        )
-                        parentCell.add(ref)
+        for (cellName, rotation, magnification, xReflection), origins in groups.items():
+            reference = gdstk.Reference(
+                gdsCells[cellName], origins[0], rotation,
+                magnification, xReflection
+            )
+            if len(origins) > 1:
+                reference.repetition = repetition(np.array(origins, dtype=np.float64))
+            elements.append(reference)
+        return elements
+
+    @staticmethod
+    def rectangles(rects: np.ndarray, layer: int, datatype: int) -> list:
+        """
+        Create the rectangles of a layer, one polygon per rectangle size. The
+        other rectangles of the same size are repetitions of that polygon.
+        """
+        if not len(rects):
+            return []
+        # sizes as complex numbers are sorted by width, then height.
+        sizes = (rects[:, 2] - rects[:, 0]) + 1j * (rects[:, 3] - rects[:, 1])
+        uniqueSizes, inverse = np.unique(sizes, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        order = np.argsort(inverse, kind="stable")
+        groupStarts = np.searchsorted(inverse[order], np.arange(len(uniqueSizes)))
+        polygons = []
+        for size, indices in zip(uniqueSizes.tolist(), np.split(order, groupStarts[1:])):
+            width, height = size.real, size.imag
+            origins = rects[indices, 0:2]
+            left, top = origins[0].tolist()
+            polygon = gdstk.rectangle(
+                (left, top), (left + width, top + height), layer=layer,
+                datatype=datatype
+            )
+            if len(origins) > 1:
+                polygon.repetition = repetition(origins)
+            polygons.append(polygon)
+        return polygons
 
     @staticmethod
     def extractPcellInstanceParameters(instance: lshp.layoutPcell) -> dict:
-        initArgs = inspect.signature(instance.__class__.__init__).parameters
-        argsUsed = [
-            param for param in initArgs if (param != "self" and param != "snapTuple")
-        ]
-        argDict = {arg: getattr(instance, arg) for arg in argsUsed}
-        return argDict
+        return {
+            arg: getattr(instance, arg)
+            for arg in instance.parameterNames()
+        }
+
+    @property
+    def outputFormat(self) -> str:
+        return self._outputFormat
+
+    @outputFormat.setter
+    def outputFormat(self, value: str):
+        self._outputFormat = value
 
     @property
     def unit(self):
@@ -202,4 +584,4 @@ class gdsExporter:
 
     @precision.setter
     def precision(self, value):
-        self._precision = value
\ No newline at end of file
+        self._precision = value
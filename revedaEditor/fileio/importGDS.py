@@ -1,19 +1,508 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+# GDSII import. The stream is read with gdstk and every GDS cell is written as a
+# layout cellview of the chosen library. GDS layer/datatype pairs are mapped back
+# to the PDK layers through lookup tables built once per import. References keep
+# the hierarchy: they become layout instances, and references to single-cut via
+# cells become via arrays. Cellview files are written directly, without opening
+# an editor per cell.
+
+import math
+import pathlib
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
 import gdstk
+import numpy as np
+
 import revedaEditor.common.layoutShapes as lshp
-import revedaEditor.backend.libBackEnd as scb
-import pathlib
-import inspect
+import revedaEditor.fileio.compactCellview as cv
+from revedaEditor.backend.jobControl import jobControl, reportProgress
+from revedaEditor.backend.pdkPaths import importPDKModule
+
+laylyr = importPDKModule("layoutLayers")
+fabproc = importPDKModule("process")
+
+ANGLE_TOLERANCE = 1e-9
+PROGRESS_STEP = 16
+
+
+def layerLookup(layers: list) -> Dict[Tuple[int, int], int]:
+    """
+    Return a (gds layer, datatype) -> layer index table. The first layer with a
+    given pair wins, as the same pair can be listed more than once.
+    """
+    lookup = {}
+    for index, layer in enumerate(layers):
+        lookup.setdefault((layer.gdsLayer, layer.datatype), index)
+    return lookup
+
+
+def rectangleBounds(points: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Return (left, top, right, bottom) if the polygon is an axis-aligned
+    rectangle, otherwise None.
+    """
+    if len(points) != 4:
+        return None
+    xs = np.unique(points[:, 0])
+    ys = np.unique(points[:, 1])
+    if len(xs) != 2 or len(ys) != 2:
+        return None
+    # every corner must be used once, a bow tie has the same coordinates.
+    corners = {(x, y) for x, y in points.tolist()}
+    if len(corners) != 4:
+        return None
+    return int(xs[0]), int(ys[0]), int(xs[1]), int(ys[1])
+
+
+def labelOrient(rotation: float, xReflection: bool) -> str:
+    quarter = round(math.degrees(rotation) / 90) % 4
+    if xReflection:
+        return ("MX", "MX90", "MY", "MY90")[quarter]
+    return lshp.layoutLabel.labelOrients[quarter]
+
+
+def cleanAngle(rotation: float):
+    angle = math.degrees(rotation) % 360
+    if abs(angle - round(angle)) < ANGLE_TOLERANCE:
+        return int(round(angle)) % 360
+    return angle
 
 
 class gdsImporter:
-    def __init__(self, inputFile: pathlib.Path, cellview: scb.viewItem):
-        self.inputFile = inputFile
-        self.cellview = cellview
-        self._library = gdstk.library(inputFile)
-        self._topCells = self._library.topCells()
+    """
+    Import the cells of a GDS file into a design library. The import can run as
+    a background job, it only writes files. The library model is updated by the
+    caller from importedCells.
+    """
+
+    cellNamePattern = re.compile(r"[^\w\-$]")
+
+    def __init__(
+        self,
+        inputFileObj: pathlib.Path,
+        libraryPathObj: pathlib.Path,
+        libraryName: str,
+        viewName: str = "layout",
+    ):
+        self.inputFileObj = inputFileObj
+        self.libraryPathObj = libraryPathObj
+        self.libraryName = libraryName
+        self.viewName = viewName
+        self._unit = 1e-6
+        self._suffix = cv.JSON_SUFFIX
+        self.header = [{"viewType": "layout"}, {"snapGrid": (10, 5)}]
+        self.fontFamily = "Courier"
+        self.fontStyle = "Regular"
+        self.fontHeight = fabproc.dbu
+        self._drawingLayers = layerLookup(laylyr.pdkDrawingLayers)
+        self._pinLayers = layerLookup(laylyr.pdkPinLayers)
+        self._textLayers = layerLookup(laylyr.pdkTextLayers)
+        self._viaLayers = {}
+        for viaDefTuple in fabproc.processVias:
+            layer = viaDefTuple.layer
+            self._viaLayers.setdefault((layer.gdsLayer, layer.datatype), viaDefTuple)
+        self._cellNames = {}  # gds cell name -> cellview name
+        self._viaCells = {}  # gds cell name -> (via definition, rectangle)
+        self._cellCentres = {}  # gds cell name -> bounding box centre
+        self.importedCells: List[str] = []
+        self.skippedShapes = Counter()  # layer key -> count of unmapped shapes
+        self.missingCells = set()
+        self.timings: Dict[str, float] = dict()
+
+    @property
+    def unit(self):
+        return self._unit
+
+    @unit.setter
+    def unit(self, value):
+        self._unit = value
+
+    @property
+    def compact(self) -> bool:
+        return self._suffix == cv.COMPACT_SUFFIX
+
+    @compact.setter
+    def compact(self, value: bool):
+        self._suffix = cv.COMPACT_SUFFIX if value else cv.JSON_SUFFIX
+
+    def gds_import(self, control: Optional[jobControl] = None) -> List[str]:
+        """
+        Read the GDS file and write one layout cellview per GDS cell. Returns the
+        names of the written cells.
+        """
+        start = time.perf_counter()
+        self.importedCells = []
+        self.skippedShapes.clear()
+        self.missingCells.clear()
+        # the cells of a previous import by this importer are forgotten.
+        self._cellNames = {}
+        self._viaCells = {}
+        self._cellCentres = {}
+        reportProgress(control, 0, 1, "Reading GDS file...")
+        # shapes on unmapped layers are read to be counted in the import report.
+        library = gdstk.read_gds(self.inputFileObj, unit=self._unit)
+        readEnd = time.perf_counter()
+        cells = library.cells
+        topCellNames = {cell.name for cell in library.top_level()}
+        usedNames = set()
+        for cell in cells:
+            viaCell = self.viaCell(cell)
+            if viaCell is not None:
+                self._viaCells[cell.name] = viaCell
+            cellName = self.cellNamePattern.sub("_", cell.name)
+            while cellName in usedNames:
+                cellName = f"{cellName}_"
+            usedNames.add(cellName)
+            self._cellNames[cell.name] = cellName
+        # via cells are written as via arrays where they are referenced.
+        writtenCells = [
+            cell
+            for cell in cells
+            if cell.name not in self._viaCells or cell.name in topCellNames
+        ]
+        cellCount = len(writtenCells)
+        for index, cell in enumerate(writtenCells):
+            if index % PROGRESS_STEP == 0:
+                reportProgress(
+                    control, index, cellCount, f"Importing cell {cell.name}..."
+                )
+            self.writeCell(cell, self.cellItems(cell))
+        writeEnd = time.perf_counter()
+        self.timings = {"read": readEnd - start, "cells": writeEnd - readEnd}
+        return self.importedCells
+
+    def importReport(self) -> str:
+        report = (
+            f"GDS import of {len(self.importedCells)} cells: "
+            f"read {self.timings.get('read', 0):.3f} s, "
+            f"cells {self.timings.get('cells', 0):.3f} s"
+        )
+        if self.missingCells:
+            report += f", missing cells: {', '.join(sorted(self.missingCells))}"
+        if self.skippedShapes:
+            skipped = ", ".join(
+                f"{layer}/{datatype}: {count}"
+                for (layer, datatype), count in sorted(self.skippedShapes.items())
+            )
+            report += f", shapes on unmapped layers: {skipped}"
+        return report
+
+    def writeCell(self, cell: gdstk.Cell, items: List[dict]) -> None:
+        cellPathObj = self.libraryPathObj.joinpath(self._cellNames[cell.name])
+        cellPathObj.mkdir(parents=True, exist_ok=True)
+        viewPathObj = cellPathObj.joinpath(f"{self.viewName}{self._suffix}")
+        # a cellview in the other format would be read instead of this one.
+        for suffix in cv.CELLVIEW_SUFFIXES - {self._suffix}:
+            cellPathObj.joinpath(f"{self.viewName}{suffix}").unlink(missing_ok=True)
+        cv.writeCellview(viewPathObj, self.header, items)
+        self.importedCells.append(cellPathObj.name)
+
+    def viaCell(self, cell: gdstk.Cell):
+        """
+        Return the via definition and the cut rectangle if the cell is a single
+        via cut, otherwise None.
+        """
+        if cell.references or cell.paths or cell.labels or len(cell.polygons) != 1:
+            return None
+        polygon = cell.polygons[0]
+        viaDefTuple = self._viaLayers.get((polygon.layer, polygon.datatype))
+        if viaDefTuple is None or polygon.repetition.size:
+            return None
+        bounds = rectangleBounds(np.rint(polygon.points))
+        if bounds is None:
+            return None
+        return viaDefTuple, bounds
+
+    def cellItems(self, cell: gdstk.Cell) -> List[dict]:
+        items = []
+        pins = []
+        labels = []
+        for polygon in self.repeated(cell.polygons):
+            self.polygonItem(polygon, items, pins)
+        for path in self.repeated(cell.paths):
+            self.pathItems(path, items, pins)
+        for label in self.repeated(cell.labels):
+            labelItem = self.labelItem(label)
+            if labelItem is not None:
+                labels.append(labelItem)
+        counter = 0
+        for reference in cell.references:
+            counter = self.referenceItems(reference, items, pins, counter)
+        self.namePins(pins, labels)
+        items.extend(pins)
+        items.extend(labels)
+        return items
+
+    @staticmethod
+    def repeated(elements: list) -> list:
+        """
+        Expand the repetitions of polygons, paths and labels. GDS streams do not
+        have them, OASIS-derived libraries can.
+        """
+        expanded = []
+        for element in elements:
+            expanded.append(element)
+            if element.repetition.size:
+                expanded.extend(element.apply_repetition())
+        return expanded
+
+    def polygonItem(self, polygon: gdstk.Polygon, items: list, pins: list):
+        layerKey = (polygon.layer, polygon.datatype)
+        points = np.rint(polygon.points)
+        layerIndex = self._drawingLayers.get(layerKey)
+        if layerIndex is not None:
+            bounds = rectangleBounds(points)
+            if bounds is None:
+                items.append(
+                    {
+                        "type": "Polygon",
+                        "ps": points.astype(np.int64).tolist(),
+                        "ln": layerIndex,
+                    }
+                )
+            else:
+                items.append(
+                    {
+                        "type": "Rect",
+                        "tl": bounds[0:2],
+                        "br": bounds[2:4],
+                        "ln": layerIndex,
+                    }
+                )
+            return
+        layerIndex = self._pinLayers.get(layerKey)
+        bounds = rectangleBounds(points) if layerIndex is not None else None
+        if bounds is None:
+            self.skippedShapes[layerKey] += 1
+            return
+        pins.append(
+            {
+                "type": "Pin",
+                "tl": bounds[0:2],
+                "br": bounds[2:4],
+                "pn": "",
+                "pd": lshp.layoutPin.pinDirs[0],
+                "pt": lshp.layoutPin.pinTypes[0],
+                "ln": layerIndex,
+            }
+        )
+
+    def pathItems(self, path, items: list, pins: list):
+        spine = np.rint(path.spine())
+        widths = path.widths()
+        layerKey = (path.layers[0], path.datatypes[0])
+        layerIndex = self._drawingLayers.get(layerKey)
+        if (
+            layerIndex is None
+            or path.num_paths != 1
+            or len(spine) != 2
+            or widths[0, 0] != widths[1, 0]
+            or (spine[0] == spine[1]).all()
+        ):
+            # anything a layout path cannot describe is imported as polygons.
+            for polygon in path.to_polygons():
+                self.polygonItem(polygon, items, pins)
+            return
+        width = float(widths[0, 0])
+        ends = path.ends[0]
+        if ends == "flush":
+            startExtend = endExtend = 0
+        elif isinstance(ends, tuple):
+            startExtend, endExtend = ends
+        else:  # extended or round ends
+            startExtend = endExtend = width / 2
+        (x1, y1), (x2, y2) = spine.astype(np.int64).tolist()
+        items.append(
+            {
+                "type": "Path",
+                "dfl1": (x1, y1),
+                "dfl2": (x2, y2),
+                "ln": layerIndex,
+                "w": width,
+                "se": startExtend,
+                "ee": endExtend,
+                "md": 0 if x1 == x2 or y1 == y2 else 2,
+                "nam": "",
+            }
+        )
+
+    def labelItem(self, label: gdstk.Label) -> Optional[dict]:
+        layerKey = (label.layer, label.texttype)
+        layerIndex = self._textLayers.get(layerKey)
+        if layerIndex is None:
+            self.skippedShapes[layerKey] += 1
+            return None
+        x, y = np.rint(label.origin).astype(np.int64).tolist()
+        return {
+            "type": "Label",
+            "st": (x, y),
+            "lt": label.text,
+            "ff": self.fontFamily,
+            "fs": self.fontStyle,
+            "fh": int(self.fontHeight * label.magnification),
+            "la": lshp.layoutLabel.labelAlignments[0],
+            "lo": labelOrient(label.rotation, label.x_reflection),
+            "ln": layerIndex,
+        }
+
+    @staticmethod
+    def namePins(pins: list, labels: list) -> None:
+        """
+        Name each pin after the first label of the same layer name placed on it.
+        """
+        labelLayerNames = [
+            laylyr.pdkTextLayers[label["ln"]].name for label in labels
+        ]
+        for index, pin in enumerate(pins):
+            (left, top), (right, bottom) = pin["tl"], pin["br"]
+            layerName = laylyr.pdkPinLayers[pin["ln"]].name
+            pin["pn"] = next(
+                (
+                    label["lt"]
+                    for label, labelLayerName in zip(labels, labelLayerNames)
+                    if labelLayerName == layerName
+                    and left <= label["st"][0] <= right
+                    and top <= label["st"][1] <= bottom
+                ),
+                f"pin{index}",
+            )
 
-    def gdsImporter(self, inputFile: pathlib.Path):
-        for cell in self._topCells:
-            paths
+    def referenceItems(
+        self, reference: gdstk.Reference, items: list, pins: list, counter: int
+    ) -> int:
+        child = reference.cell
+        childName = child if isinstance(child, str) else child.name
+        if isinstance(child, str):
+            self.missingCells.add(child)
+        if reference.magnification != 1:
+            # layout instances cannot be scaled.
+            for polygon in reference.get_polygons(include_paths=True):
+                self.polygonItem(polygon, items, pins)
+            return counter
+        repetition = reference.repetition
+        viaCell = self._viaCells.get(childName)
+        if viaCell is not None:
+            if self.viaArrayItems(reference, viaCell, items):
+                return counter
+            # vias that are not on a grid are imported as their cut shapes.
+            for polygon in reference.get_polygons():
+                self.polygonItem(polygon, items, pins)
+            return counter
+        offsets = repetition.get_offsets() if repetition.size else [(0, 0)]
+        originX, originY = reference.origin
+        if reference.x_reflection:
+            # the flip of a layout instance follows its rotation and is made
+            # around the centre of its bounding box.
+            angle = cleanAngle(-reference.rotation)
+            flip = (1, -1)
+            originY -= 2 * self.cellCentre(child)[1]
+        else:
+            angle = cleanAngle(reference.rotation)
+            flip = (1, 1)
+        cellName = self._cellNames.get(childName, childName)
+        for offsetX, offsetY in offsets:
+            counter += 1
+            items.append(
+                {
+                    "type": "Inst",
+                    "lib": self.libraryName,
+                    "cell": cellName,
+                    "view": self.viewName,
+                    "nam": f"I{counter}",
+                    "ic": counter,
+                    "loc": (
+                        round(originX + offsetX),
+                        round(originY + offsetY),
+                    ),
+                    "ang": angle,
+                    "fl": flip,
+                }
+            )
+        return counter
 
+    def viaArrayItems(self, reference: gdstk.Reference, viaCell, items: list) -> bool:
+        """
+        Add a via array for a reference to a via cell. Returns False if the
+        reference cannot be described by a via array.
+        """
+        viaDefTuple, (left, top, right, bottom) = viaCell
+        quarter = math.degrees(reference.rotation) / 90
+        if abs(quarter - round(quarter)) > ANGLE_TOLERANCE:
+            return False
+        # the cut rectangle placed by the reference, without its repetition.
+        corners = np.array(((left, top), (right, bottom)), dtype=float)
+        if reference.x_reflection:
+            corners[:, 1] *= -1
+        cos, sin = round(math.cos(reference.rotation)), round(math.sin(reference.rotation))
+        corners = corners @ np.array(((cos, sin), (-sin, cos))) + reference.origin
+        corners = np.rint(corners).astype(np.int64)
+        bounds = (*corners.min(axis=0).tolist(), *corners.max(axis=0).tolist())
+        width, height = bounds[2] - bounds[0], bounds[3] - bounds[1]
+        repetition = reference.repetition
+        if repetition.size:
+            if repetition.columns is None:
+                return False
+            if repetition.spacing is not None:
+                xs, ys = repetition.spacing
+            else:
+                # arrays read from GDS are regular repetitions along two vectors.
+                (xs, skewX), (skewY, ys) = repetition.v1, repetition.v2
+                if skewX or skewY:
+                    return False
+            columns, rows = repetition.columns, repetition.rows
+        else:
+            xs, ys = width, height
+            columns = rows = 1
+        if xs < width or ys < height:
+            return False
+        start = (bounds[0], bounds[1])
+        items.append(
+            {
+                "type": "Via",
+                "st": start,
+                "via": {
+                    "st": start,
+                    "vdt": viaDefTuple.name,
+                    "w": width,
+                    "h": height,
+                },
+                "xs": round(xs) - width,
+                "ys": round(ys) - height,
+                "xn": columns,
+                "yn": rows,
+            }
+        )
+        return True
 
+    def cellCentre(self, cell) -> Tuple[float, float]:
+        if isinstance(cell, str):
+            return 0.0, 0.0
+        centre = self._cellCentres.get(cell.name)
+        if centre is None:
+            box = cell.bounding_box()
+            centre = (0.0, 0.0) if box is None else tuple(np.mean(box, axis=0))
+            self._cellCentres[cell.name] = centre
+        return centre
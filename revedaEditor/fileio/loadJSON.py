@@ -27,9 +27,11 @@
 # import pathlib
 
 import json
+import logging
 import os
 import pathlib
-from typing import Dict, Any, List
+from collections import OrderedDict
+from typing import Dict, Any
 
 from PySide6.QtCore import QPoint, QLineF, QRect
 from PySide6.QtGui import (
@@ -55,10 +57,13 @@ else:
 
 
 
+import revedaEditor.backend.dataDefinitions as ddef
+import revedaEditor.backend.symbolCache as symc
 import revedaEditor.common.labels as lbl
 import revedaEditor.common.layoutShapes as lshp
 import revedaEditor.common.net as net
 import revedaEditor.common.shapes as shp
+import revedaEditor.fileio.compactCellview as cv
 import revedaEditor.fileio.symbolEncoder as se
 
 load_dotenv()
@@ -333,53 +338,37 @@ class schematicItems:
                 self.scene.logger.warning(f"{item['lib']} cannot be found.")
                 return symbolInstance
             else:
-                # load json file and create shapes
-                with file.open(mode="r", encoding="utf-8") as temp:
-                    try:
-                        jsonItems = json.load(temp)
-                        assert jsonItems[0]["cellView"] == "symbol"
-                        symbolSnapTuple = jsonItems[1]["snapGrid"]
-                        # we snap to scene grid values. Need to test further.
-                        symbolShape = symbolItems(self.scene)
-                        symbolShape.snapTuple = symbolSnapTuple
-                        for jsonItem in jsonItems[2:]:  # skip first two entries.
-                            if jsonItem["type"] == "attr":
-                                symbolAttributes[jsonItem["nam"]] = (
-                                    jsonItem["def"]
-                                )
-                            else:
-                                itemShapes.append(
-                                    symbolShape.create(jsonItem)
-                                )
-                        symbolInstance.shapes = itemShapes
-                        for labelItem in symbolInstance.labels.values():
-                            if (
-                                    labelItem.labelName
-                                    in symbolInstance.labelDict.keys()
-                            ):
-                                labelItem.labelValue = (
-                                    symbolInstance.labelDict[
-                                        labelItem.labelName
-                                    ][0]
-                                )
-                                labelItem.labelVisible = (
-                                    symbolInstance.labelDict[
-                                        labelItem.labelName
-                                    ][1]
-                                )
-                        symbolInstance.symattrs = symbolAttributes
-                        [
-                            labelItem.labelDefs()
-                            for labelItem in symbolInstance.labels.values()
-                        ]
-                        symbolInstance.angle = item.get("ang", 0)
-                        symbolInstance.flipTuple = item.get('fl', (1,1))
-                        return symbolInstance
-                    except json.decoder.JSONDecodeError:
-                        self.scene.logger.error(
-                            "Error: Invalid Symbol file"
-                        )
-                        return None
+                # stamp the instance from the cached symbol template.
+                try:
+                    template = symc.symbolDefinitions.get(
+                        item["lib"], item["cell"], item["view"], file
+                    )
+                except (OSError, ValueError) as e:
+                    self.scene.logger.error(f"Error: Invalid Symbol file: {e}")
+                    return None
+                # we snap to scene grid values. Need to test further.
+                symbolShape = symbolItems(self.scene)
+                symbolShape.snapTuple = template.snapGrid
+                for jsonItem in template.shapeItems:
+                    itemShapes.append(symbolShape.create(jsonItem))
+                symbolAttributes.update(template.attributes)
+                symbolInstance.shapes = itemShapes
+                for labelItem in symbolInstance.labels.values():
+                    if labelItem.labelName in symbolInstance.labelDict.keys():
+                        labelItem.labelValue = symbolInstance.labelDict[
+                            labelItem.labelName
+                        ][0]
+                        labelItem.labelVisible = symbolInstance.labelDict[
+                            labelItem.labelName
+                        ][1]
+                symbolInstance.symattrs = symbolAttributes
+                [
+                    labelItem.labelDefs()
+                    for labelItem in symbolInstance.labels.values()
+                ]
+                symbolInstance.angle = item.get("ang", 0)
+                symbolInstance.flipTuple = item.get('fl', (1,1))
+                return symbolInstance
 
     def createDraftSymbol(self, item: dict, symbolInstance: shp.schematicSymbol):
         rectItem = shp.symbolRectangle(
@@ -412,11 +401,15 @@ class schematicItems:
 
 class PCellCache:
     _instance = None
+    # evaluated pcell masters kept, the least recently used ones are dropped.
+    maxPcellMasters = 512
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(PCellCache, cls).__new__(cls)
-            cls._instance.layout_file_cache = {}
+            cls._instance.layout_master_cache = {}
+            cls._instance.pcell_master_cache = OrderedDict()
+            cls._instance.pcell_classes = {}
         return cls._instance
 
     @classmethod
@@ -429,23 +422,85 @@ class PCellCache:
             return {}
 
     @classmethod
-    @lru_cache(maxsize=100)
     def getPCellClass(cls, pcell_class_name: str) -> Any:
-        return pdk.pcells.pcells.get(pcell_class_name)
+        # not cached, the pcells module can be reloaded.
+        pcellClass = getattr(pcells, pcell_class_name, None)
+        if isinstance(pcellClass, type) and issubclass(pcellClass, lshp.layoutPcell):
+            return pcellClass
+        return None
 
     @classmethod
-    def getLayoutFileContents(cls, file_path: str) -> List:
-        return cls._instance.layout_file_cache.get(file_path)
+    def getPcellMaster(cls, pcell: "lshp.layoutPcell") -> "lshp.layoutMaster":
+        """
+        Return the master of the pcells with the class and parameters of the given
+        pcell, evaluating its geometry if the master is not cached. Masters are
+        keyed by the pcell class and the parameter values. Reloading the pcells
+        module replaces its classes, which drops the masters of the old ones.
+        """
+        cache = cls()
+        pcellClass = type(pcell)
+        className = f"{pcellClass.__module__}.{pcellClass.__qualname__}"
+        if cache.pcell_classes.setdefault(className, pcellClass) is not pcellClass:
+            # the pcells module was reloaded, masters of its old classes are stale.
+            cls.clearPcellMasters(pcellClass.__module__)
+            cache.pcell_classes[className] = pcellClass
+        key = (pcellClass, pcell.parameters)
+        master = cache.pcell_master_cache.get(key)
+        if master is None:
+            viewTuple = ddef.viewTuple(
+                pcell.libraryName, pcell.cellName or pcellClass.__name__, pcell.viewName
+            )
+            master = lshp.layoutMaster.fromShapes(viewTuple, pcell.createGeometry())
+            cache.pcell_master_cache[key] = master
+            if len(cache.pcell_master_cache) > cls.maxPcellMasters:
+                cache.pcell_master_cache.popitem(last=False)
+        else:
+            cache.pcell_master_cache.move_to_end(key)
+        return master
 
     @classmethod
-    def setLayoutFileContents(cls, file_path: str, contents: List):
-        cls._instance.layout_file_cache[file_path] = contents
+    def clearPcellMasters(cls, moduleName: str = None):
+        """
+        Drop the cached pcell masters, only those of one module if it is given.
+        """
+        cache = cls()
+        if moduleName is None:
+            cache.pcell_master_cache.clear()
+            cache.pcell_classes.clear()
+            return
+        for key in [
+            key for key in cache.pcell_master_cache if key[0].__module__ == moduleName
+        ]:
+            del cache.pcell_master_cache[key]
+        for className in [
+            className
+            for className, pcellClass in cache.pcell_classes.items()
+            if pcellClass.__module__ == moduleName
+        ]:
+            del cache.pcell_classes[className]
+
+    @classmethod
+    def getLayoutMaster(cls, file_path: str, stamp: tuple) -> "lshp.layoutMaster":
+        """
+        Return the cached master of a layout cell if its file has not changed.
+        """
+        cached = cls._instance.layout_master_cache.get(file_path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        return None
+
+    @classmethod
+    def setLayoutMaster(cls, file_path: str, stamp: tuple, master: "lshp.layoutMaster"):
+        cls._instance.layout_master_cache[file_path] = (stamp, master)
 
     @classmethod
     def clear_caches(cls):
         cls.getPCellDef.cache_clear()
-        cls.getPCellClass.cache_clear()
-        cls._instance.layout_file_cache.clear()
+        cls._instance.layout_master_cache.clear()
+        cls.clearPcellMasters()
+
+
+lshp.layoutPcell.masterCache = PCellCache
 
 
 class layoutItems:
@@ -454,6 +509,8 @@ class layoutItems:
         Create layout items from json file.
         """
         self.scene = scene
+        self.logger = scene.logger
+        self.layoutShapes = scene.layoutShapes
         self.libraryDict = scene.libraryDict
         self.rulerFont = scene.rulerFont
         self.rulerTickLength = scene.rulerTickLength
@@ -491,7 +548,7 @@ class layoutItems:
     def createPcellInstance(self, item):
         libraryPath = pathlib.Path(self.libraryDict.get(item["lib"], None))
         if not libraryPath:
-            self.scene.logger.error(f'{item["lib"]} cannot be found.')
+            self.logger.error(f'{item["lib"]} cannot be found.')
             return None
 
         cell = item["cell"]
@@ -499,24 +556,18 @@ class layoutItems:
         filePath = libraryPath / cell / f"{viewName}.json"
 
         if not filePath.is_file():
-            self.scene.logger.error(f"File {filePath} does not exist.")
-            return None
-
-        try:
-            with filePath.open("r") as temp:
-                pcellDef = json.load(temp)
-        except (json.JSONDecodeError, FileNotFoundError) as e:
-            self.scene.logger.error(f"Error reading PCell file: {e}")
+            self.logger.error(f"File {filePath} does not exist.")
             return None
 
+        pcellDef = self.cache.getPCellDef(str(filePath))
         if not pcellDef or pcellDef[0].get("cellView") != "pcell":
-            self.scene.logger.error("Not a PCell cell")
+            self.logger.error("Not a PCell cell")
             return None
 
         pcellClassName = pcellDef[1].get("reference")
-        pcellClass = pdk.pcells.pcells.get(pcellClassName)
+        pcellClass = self.cache.getPCellClass(pcellClassName)
         if not pcellClass:
-            self.scene.logger.error(f"Unknown PCell class: {pcellClassName}")
+            self.logger.error(f"Unknown PCell class: {pcellClassName}")
             return None
 
         try:
@@ -532,45 +583,20 @@ class layoutItems:
             pcellInstance.flipTuple = item.get('fl', (1,1))
             return pcellInstance
         except Exception as e:
-            self.scene.logger.error(f"Error creating PCell instance: {e}")
+            self.logger.error(f"Error creating PCell instance: {e}")
             return None
 
     def createLayoutInstance(self, item):
         libraryName = item.get("lib")
-        libraryPath = pathlib.Path(self.libraryDict.get(libraryName))
-
-        if not libraryPath.exists():
-            self.scene.logger.error(f"{libraryName} cannot be found.")
-            return None
-
         cell = item.get("cell")
         viewName = item.get("view")
-        filePath = libraryPath / cell / f"{viewName}.json"
-
-        if not filePath.is_file():
-            self.scene.logger.error(f"File {filePath} does not exist.")
+        master = self.layoutMaster(libraryName, cell, viewName)
+        if master is None:
             return None
 
-        # Try to get the cached file contents
-        file_contents = self.cache.getLayoutFileContents(str(filePath))
-        if file_contents is None:
-            try:
-                with filePath.open("r") as file:
-                    file_contents = json.load(file)
-                # Cache the file contents
-                self.cache.setLayoutFileContents(str(filePath), file_contents)
-            except (json.JSONDecodeError, FileNotFoundError) as e:
-                self.scene.logger.error(f"Error reading Layout file: {e}")
-                return None
-
-        itemShapes = []
-        for shape in file_contents[2:]:
-            try:
-                itemShapes.append(layoutItems(self.scene).create(shape))
-            except Exception as e:
-                self.scene.logger.error(f"Error creating shape: {e}")
-
-        layoutInstance = lshp.layoutInstance(itemShapes)
+        # child shapes are painted from the shared master until the instance is
+        # expanded.
+        layoutInstance = lshp.layoutInstance([], master)
         layoutInstance.libraryName = libraryName
         layoutInstance.cellName = cell
         layoutInstance.counter = item.get("ic")
@@ -582,6 +608,55 @@ class layoutItems:
 
         return layoutInstance
 
+    def layoutMaster(self, libraryName: str, cell: str, viewName: str):
+        """
+        Return the shared master of a layout cellview. Masters are read again
+        when the cellview file changes.
+        """
+        libraryPath = self.libraryDict.get(libraryName)
+        if libraryPath is None or not pathlib.Path(libraryPath).exists():
+            self.logger.error(f"{libraryName} cannot be found.")
+            return None
+
+        filePath = cv.cellviewPath(pathlib.Path(libraryPath) / cell, viewName)
+        try:
+            fileStat = filePath.stat()
+        except OSError:
+            self.logger.error(f"File {filePath} does not exist.")
+            return None
+
+        stamp = (fileStat.st_mtime_ns, fileStat.st_size)
+        master = self.cache.getLayoutMaster(str(filePath), stamp)
+        if master is None:
+            try:
+                fileContents = cv.readCellview(filePath)
+            except (ValueError, OSError) as e:
+                self.logger.error(f"Error reading Layout file: {e}")
+                return None
+            itemData = [
+                shape
+                for shape in fileContents[2:]
+                if shape.get("type") in self.layoutShapes
+            ]
+            # masters are shared by all the layout editors, so their shapes are
+            # not created with this scene.
+            masterItems = layoutMasterItems(self)
+            master = lshp.layoutMaster(
+                ddef.viewTuple(libraryName, cell, viewName),
+                itemData,
+                masterItems.createShape,
+                masterItems.itemLayers,
+            )
+            self.cache.setLayoutMaster(str(filePath), stamp, master)
+        return master
+
+    def createShape(self, item: dict):
+        try:
+            return self.create(item)
+        except Exception as e:
+            self.logger.error(f"Error creating shape: {e}")
+            return None
+
     def createRectShape(self, item):
         start = QPoint(item["tl"][0], item["tl"][1])
         end = QPoint(item["br"][0], item["br"][1])
@@ -693,3 +768,60 @@ class layoutItems:
         textItem.setParentItem(rectItem)
         textItem.setFlag(QGraphicsItem.ItemContainsChildrenInShape, True)
         return rectItem
+
+
+class layoutMasterItems(layoutItems):
+    """
+    Create the shapes of shared layout masters. The settings of the layout items
+    it is made from are copied, but not the scene, as masters outlive the editor
+    windows.
+    """
+
+    def __init__(self, items: layoutItems):
+        self.scene = None
+        self.logger = logging.getLogger("reveda")
+        self.layoutShapes = list(items.layoutShapes)
+        self.libraryDict = items.libraryDict
+        self.rulerFont = items.rulerFont
+        self.rulerTickLength = items.rulerTickLength
+        self.snapTuple = items.snapTuple
+        self.rulerWidth = items.rulerWidth
+        self.rulerTickGap = items.rulerTickGap
+        self.cache = PCellCache()
+
+    def itemLayers(self, itemData: list):
+        """
+        Layers of the shapes and the nested masters of layout item data, found
+        without creating the shapes. None if the data cannot be read.
+        """
+        layers = []
+        nestedMasters = []
+        try:
+            for item in itemData:
+                match item.get("type"):
+                    case "Rect" | "Path" | "Polygon":
+                        layers.append(laylyr.pdkDrawingLayers[item["ln"]])
+                    case "Pin":
+                        layers.append(laylyr.pdkPinLayers[item["ln"]])
+                    case "Label":
+                        layers.append(laylyr.pdkTextLayers[item["ln"]])
+                    case "Via":
+                        layers.append(
+                            fabproc.processVias[
+                                fabproc.processViaNames.index(item["via"]["vdt"])
+                            ].layer
+                        )
+                    case "Inst":
+                        master = self.layoutMaster(
+                            item["lib"], item["cell"], item["view"]
+                        )
+                        if master is not None:
+                            nestedMasters.append(master)
+                    case "Pcell":
+                        pcell = self.createPcellInstance(item)
+                        if pcell is not None and pcell.master is not None:
+                            nestedMasters.append(pcell.master)
+        except (KeyError, IndexError, ValueError, TypeError) as e:
+            self.logger.warning(f"Layers of layout items cannot be read: {e}")
+            return None
+        return layers, nestedMasters
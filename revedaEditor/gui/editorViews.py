@@ -23,11 +23,14 @@
 #    Licensor: Revolution Semiconductor (Registered in the Netherlands)
 #
 
+import math
 from collections import Counter
 
-# import numpy as np
+import numpy as np
 from PySide6.QtCore import (
+    QLineF,
     QPoint,
+    QPointF,
     QRect,
     Qt,
     Signal,
@@ -38,6 +41,8 @@ from PySide6.QtGui import (
     QMouseEvent,
     QKeyEvent,
     QPainter,
+    QPainterPath,
+    QPolygonF,
     QWheelEvent,
     QInputDevice
 )
@@ -55,6 +60,7 @@ if os.environ.get("REVEDA_PDK_PATH"):
 else:
     import defaultPDK.schLayers as schlyr
 
+import revedaEditor.common.layoutShapes as lshp
 import revedaEditor.common.net as net
 import revedaEditor.backend.undoStack as us
 
@@ -90,6 +96,9 @@ class editorView(QGraphicsView):
         self.zoomFactor = 1.0
         self._middleClickScroll = False
         self._middleClickScrollDelta = QPoint(0,0)
+        # background grid points or lines and the grid they were made for
+        self._gridCache = None
+        self._gridCacheKey = None
         self.init_UI()
 
     def init_UI(self):
@@ -201,33 +210,64 @@ class editorView(QGraphicsView):
         if self.gridbackg:
             # Set the pen color to gray
             painter.setPen(QColor("white"))
-
-            # Create a range of x and y coordinates for drawing the grids
-            x_coords, y_coords = self.findCoords()
-
-            for x_coord in x_coords:
-                for y_coord in y_coords:
-                    painter.drawPoint(x_coord, y_coord)
+            # all grid points are drawn in a single call
+            painter.save()
+            painter.translate(self._left, self._top)
+            painter.drawPoints(self.gridPoints())
+            painter.restore()
 
         elif self.linebackg:
             # Set the pen color to gray
             painter.setPen(QColor("gray"))
-
-            # Create a range of x and y coordinates for drawing the lines
-            x_coords, y_coords = self.findCoords()
-
-            # Draw vertical lines
-            for x in x_coords:
-                painter.drawLine(x, self._top, x, self._bottom)
-
-            # Draw horizontal lines
-            for y in y_coords:
-                painter.drawLine(self._left, y, self._right, y)
+            # all vertical and horizontal lines are drawn in a single call
+            painter.save()
+            painter.translate(self._left, self._top)
+            painter.drawLines(self.gridLines())
+            painter.restore()
 
         else:
             # Call the base class method to draw the background
             super().drawBackground(painter, rect)
 
+    def gridShape(self) -> tuple:
+        """
+        Return the grid spacing and the number of grid columns and rows for the
+        last drawn background rectangle.
+        """
+        x_coords, y_coords = self.findCoords()
+        return x_coords.step, len(x_coords), len(y_coords)
+
+    def gridPoints(self) -> QPolygonF:
+        """
+        Grid points relative to the top left grid point. The points are only
+        generated again if the zoom level or the grid spacing changes.
+        """
+        gridKey = ("points", *self.gridShape())
+        if self._gridCacheKey != gridKey:
+            _, step, columns, rows = gridKey
+            xs = np.arange(columns, dtype=np.float64) * step
+            ys = np.arange(rows, dtype=np.float64) * step
+            points = np.stack(np.meshgrid(xs, ys), axis=-1).reshape(-1, 2)
+            self._gridCache = QPolygonF([QPointF(x, y) for x, y in points.tolist()])
+            self._gridCacheKey = gridKey
+        return self._gridCache
+
+    def gridLines(self) -> list[QLineF]:
+        """
+        Grid lines relative to the top left grid point, cached like the grid
+        points.
+        """
+        gridKey = ("lines", *self.gridShape())
+        if self._gridCacheKey != gridKey:
+            _, step, columns, rows = gridKey
+            width = columns * step
+            height = rows * step
+            self._gridCache = [
+                QLineF(x, 0, x, height) for x in range(0, width, step)
+            ] + [QLineF(0, y, width, y) for y in range(0, height, step)]
+            self._gridCacheKey = gridKey
+        return self._gridCache
+
     def findCoords(self):
         """
         Calculate the coordinates for drawing lines or points on a grid.
@@ -393,13 +433,15 @@ class schematicView(editorView):
             for netItem in netsInView:
                 netEndPoints.extend(netItem.sceneEndPoints)
             pointCountsDict = Counter(netEndPoints)
-            dotPoints = [
-                point for point, count in pointCountsDict.items() if count >= 3
-            ]
-            painter.setPen(schlyr.wirePen)
-            painter.setBrush(schlyr.wireBrush)
-            for dotPoint in dotPoints:
-                painter.drawEllipse(dotPoint, self._dotRadius, self._dotRadius)
+            # junction dots are collected in one path and drawn together
+            dotsPath = QPainterPath()
+            for point, count in pointCountsDict.items():
+                if count >= 3:
+                    dotsPath.addEllipse(point, self._dotRadius, self._dotRadius)
+            if not dotsPath.isEmpty():
+                painter.setPen(schlyr.wirePen)
+                painter.setBrush(schlyr.wireBrush)
+                painter.drawPath(dotsPath)
 
     def keyPressEvent(self, event: QKeyEvent):
         """
@@ -432,6 +474,30 @@ class layoutView(editorView):
         self.scene = scene
         self.parent = parent
         super().__init__(self.scene, self.parent)
+        # shapes are repainted in full, no need to grow their exposed areas.
+        self.setOptimizationFlag(QGraphicsView.DontAdjustForAntialiasing, True)
+
+    def paintEvent(self, event):
+        # antialiasing is switched off together with the fill patterns when
+        # the shapes are only a few pixels large.
+        viewTransform = self.transform()
+        scale = math.hypot(viewTransform.m11(), viewTransform.m12())
+        detailed = (
+            not lshp.detailLevel.enabled or scale >= lshp.detailLevel.fillScale
+        )
+        if self.renderHints() & QPainter.Antialiasing and not detailed:
+            self.setRenderHint(QPainter.Antialiasing, False)
+        elif detailed and not self.renderHints() & QPainter.Antialiasing:
+            self.setRenderHint(QPainter.Antialiasing, True)
+        super().paintEvent(event)
+
+    def updateLevelOfDetail(self):
+        """
+        Repaint all shapes after the level of detail settings are changed.
+        """
+        for item in self.scene.items():
+            item.update()
+        self.viewport().update()
 
     def keyPressEvent(self, event: QKeyEvent):
         if event.key() == Qt.Key_Escape:
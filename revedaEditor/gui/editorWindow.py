@@ -39,7 +39,6 @@ import revedaEditor.backend.libBackEnd as libb
 import revedaEditor.gui.helpBrowser as hlp
 import revedaEditor.gui.propertyDialogues as pdlg
 import revedaEditor.resources.resources
-from revedaEditor.gui.startThread import startThread
 
 
 class editorWindow(QMainWindow):
@@ -565,6 +564,25 @@ class editorWindow(QMainWindow):
             self.centralW.scene.partialSelection = scd.partialSelection.isChecked()
             self.centralW.scene._snapDistance = int(float(scd.snapDistanceEntry.text()))
 
+    def updateHierarchyIndex(self):
+        """
+        Read the saved cellview into the hierarchy index and list the open views
+        using the cell, which may need to be updated.
+        """
+        impactedViews = self.appMainW.hierarchyIndex.updateCellview(
+            self.libName, self.cellName, self.viewName
+        )
+        openViews = sorted(
+            viewTuple
+            for viewTuple in impactedViews
+            if viewTuple in self.appMainW.openViews
+        )
+        if openViews:
+            self.logger.info(
+                f"{self.libName}/{self.cellName} is used by the open views: "
+                + ", ".join("/".join(viewTuple) for viewTuple in openViews)
+            )
+
     # def checkSaveCell(self):
     #     pass
     #
@@ -582,9 +600,9 @@ class editorWindow(QMainWindow):
         dlg = QPrintDialog(self)
         if dlg.exec() == QDialog.Accepted:
             printer = dlg.printer()
-            printRunner = startThread(self.centralW.view.printView(printer))
-            self.appMainW.threadPool.start(printRunner)
-            self.logger.info("Printing started")  # self.centralW.view.printView(printer)
+            # views can only be painted in the GUI thread.
+            self.logger.info("Printing started")
+            self.centralW.view.printView(printer)
 
     def printPreviewClick(self):
         printer = QPrinter(QPrinter.ScreenResolution)
@@ -28,7 +28,7 @@ import revedaEditor.backend.libraryMethods as libm
 import revedaEditor.gui.editFunctions as edf
 
 from PySide6.QtCore import Qt, QDir
-from PySide6.QtGui import QStandardItemModel, QStandardItem
+from PySide6.QtGui import QStandardItemModel, QStandardItem, QIntValidator
 from PySide6.QtWidgets import (
     QComboBox,
     QDialog,
@@ -399,6 +399,15 @@ class gdsExportDialogue(QDialog):
         settingsBoxLayout.addRow(edf.boldLabel("Unit:"), self.unitEdit)
         self.precisionEdit = edf.shortLineEdit()
         settingsBoxLayout.addRow(edf.boldLabel("Precision:"), self.precisionEdit)
+        self.formatCB = QComboBox()
+        self.formatCB.currentTextChanged.connect(self.formatChanged)
+        settingsBoxLayout.addRow(edf.boldLabel("Format:"), self.formatCB)
+        self.compressionEdit = edf.shortLineEdit()
+        self.compressionEdit.setValidator(QIntValidator(0, 9))
+        self.compressionEdit.setText("6")
+        self.compressionEdit.setEnabled(False)
+        settingsBoxLayout.addRow(edf.boldLabel("Compression (0-9):"),
+                                 self.compressionEdit)
         self.mainLayout.addWidget(settingsBox)
         fileBox = QGroupBox("GDS Export Directory")
         fileDialogLayout = QHBoxLayout()
@@ -421,6 +430,12 @@ class gdsExportDialogue(QDialog):
                 f"{self.dirName}/{self.parent.cellName}-{self.parent.viewName}.gds"
             )
 
+    def formatChanged(self, formatName: str):
+        # OASIS files are compressed and use the precision of the process.
+        oasisFormat = formatName == "OASIS"
+        self.compressionEdit.setEnabled(oasisFormat)
+        self.precisionEdit.setEnabled(not oasisFormat)
+
 
 class goDownHierDialogue(QDialog):
     def __init__(
@@ -923,3 +938,55 @@ class xschemSymIimportDialogue(QDialog):
             symFileNames = fileDialog.selectedFiles()
             if symFileNames:
                 self.symFileEdit.setText(', '.join(symFileNames))
+
+
+class gdsImportDialogue(QDialog):
+    def __init__(self, parent, model):
+        super().__init__(parent)
+        self.parent = parent
+        self.logger = self.parent.logger
+        self.model = model
+        self.setWindowTitle("GDS File Importer")
+        self.setMinimumSize(500, 300)
+        mainLayout = QVBoxLayout()
+        fileBox = QGroupBox("Import GDS File")
+        fileDialogLayout = QHBoxLayout()
+        fileDialogLayout.addWidget(edf.boldLabel("GDS File:"))
+        self.gdsFileEdit = edf.longLineEdit()
+        fileDialogLayout.addWidget(self.gdsFileEdit)
+        self.gdsFileButton = QPushButton("...")
+        self.gdsFileButton.clicked.connect(self.onFileButtonClicked)
+        fileDialogLayout.addWidget(self.gdsFileButton)
+        fileBox.setLayout(fileDialogLayout)
+        mainLayout.addWidget(fileBox)
+        libraryBox = QGroupBox("Select Library")
+        libraryBoxLayout = QFormLayout()
+        self.libNamesCB = QComboBox()
+        self.libNamesCB.setModel(self.model)
+        self.libNamesCB.setModelColumn(0)
+        self.libNamesCB.setCurrentIndex(0)
+        libraryBoxLayout.addRow(edf.boldLabel("Library:"), self.libNamesCB)
+        libraryBox.setLayout(libraryBoxLayout)
+        mainLayout.addWidget(libraryBox)
+        parameterBox = QGroupBox("Import Parameters")
+        parameterBoxLayout = QFormLayout()
+        self.unitEdit = edf.shortLineEdit()
+        self.unitEdit.setText("1 um")
+        parameterBoxLayout.addRow(edf.boldLabel("Unit:"), self.unitEdit)
+        self.compactCheck = QCheckBox("Write compact cellviews")
+        parameterBoxLayout.addRow(self.compactCheck)
+        parameterBox.setLayout(parameterBoxLayout)
+        mainLayout.addWidget(parameterBox)
+        QBtn = QDialogButtonBox.Ok | QDialogButtonBox.Cancel
+        self.buttonBox = QDialogButtonBox(QBtn)
+        self.buttonBox.accepted.connect(self.accept)
+        self.buttonBox.rejected.connect(self.reject)
+        mainLayout.addWidget(self.buttonBox)
+        self.setLayout(mainLayout)
+
+    def onFileButtonClicked(self):
+        gdsFileName = QFileDialog.getOpenFileName(
+            self, caption="Select GDS file.", dir=str(pathlib.Path.cwd()),
+            filter="GDS files (*.gds *.gds2 *.gdsii)")[0]
+        if gdsFileName:
+            self.gdsFileEdit.setText(gdsFileName)
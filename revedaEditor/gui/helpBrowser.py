@@ -92,13 +92,12 @@ class helpBrowser(QMainWindow):
             # Get printer
             printer = dlg.printer()
 
-            # Start print view in a separate thread
-            printRunner = startThread(self.printView(printer))
-            self.appMainW.threadPool.start(printRunner)
-
             # Log printing started
             self.logger.info("Printing started")
 
+            # pages can only be painted in the GUI thread.
+            self.printView(printer)
+
     def printPreviewClick(self):
         """
         Handles the 'Print Preview' action.
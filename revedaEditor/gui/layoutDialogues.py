@@ -592,6 +592,87 @@ class layoutRectProperties(QDialog):
         self.show()
 
 
+class levelOfDetailDialogue(QDialog):
+    def __init__(self, parent: QWidget):
+        super().__init__(parent)
+        self.setWindowTitle("Level of Detail Options")
+        self.setMinimumWidth(300)
+        QBtn = QDialogButtonBox.Ok | QDialogButtonBox.Cancel
+        self.buttonBox = QDialogButtonBox(QBtn)
+        self.buttonBox.accepted.connect(self.accept)
+        self.buttonBox.rejected.connect(self.reject)
+        mainLayout = QVBoxLayout()
+        self.detailGroup = QGroupBox("Level of Detail")
+        self.detailGroupLayout = QFormLayout()
+        self.detailGroup.setLayout(self.detailGroupLayout)
+        self.enabledCheck = QCheckBox()
+        self.detailGroupLayout.addRow(edf.boldLabel("Enabled:"), self.enabledCheck)
+        self.minShapeSizeEdit = edf.shortLineEdit()
+        self.minShapeSizeEdit.setToolTip("Shapes smaller than this are drawn as dots.")
+        self.detailGroupLayout.addRow(
+            edf.boldLabel("Min. Shape Size (px):"), self.minShapeSizeEdit
+        )
+        self.cullSmallShapesCheck = QCheckBox()
+        self.cullSmallShapesCheck.setToolTip("Do not draw dots for small shapes.")
+        self.detailGroupLayout.addRow(
+            edf.boldLabel("Hide Small Shapes:"), self.cullSmallShapesCheck
+        )
+        self.minInstanceSizeEdit = edf.shortLineEdit()
+        self.minInstanceSizeEdit.setToolTip(
+            "Instances smaller than this are drawn as boxes."
+        )
+        self.detailGroupLayout.addRow(
+            edf.boldLabel("Min. Instance Size (px):"), self.minInstanceSizeEdit
+        )
+        self.fillScaleEdit = edf.shortLineEdit()
+        self.fillScaleEdit.setToolTip(
+            "Fill patterns are not drawn below this zoom scale (pixels per unit)."
+        )
+        self.detailGroupLayout.addRow(edf.boldLabel("Fill Scale:"), self.fillScaleEdit)
+        mainLayout.addWidget(self.detailGroup)
+        mainLayout.addWidget(self.buttonBox)
+        self.setLayout(mainLayout)
+        self.show()
+
+
+class itemCacheDialogue(QDialog):
+    def __init__(self, parent: QWidget):
+        super().__init__(parent)
+        self.setWindowTitle("Item Cache Options")
+        self.setMinimumWidth(300)
+        QBtn = QDialogButtonBox.Ok | QDialogButtonBox.Cancel
+        self.buttonBox = QDialogButtonBox(QBtn)
+        self.buttonBox.accepted.connect(self.accept)
+        self.buttonBox.rejected.connect(self.reject)
+        mainLayout = QVBoxLayout()
+        self.cacheGroup = QGroupBox("Item Cache")
+        self.cacheGroupLayout = QFormLayout()
+        self.cacheGroup.setLayout(self.cacheGroupLayout)
+        self.enabledCheck = QCheckBox()
+        self.cacheGroupLayout.addRow(edf.boldLabel("Enabled:"), self.enabledCheck)
+        self.budgetEdit = edf.shortLineEdit()
+        self.budgetEdit.setToolTip("Memory used for the pixmaps of cached items.")
+        self.cacheGroupLayout.addRow(edf.boldLabel("Budget (MB):"), self.budgetEdit)
+        self.cacheInstancesCheck = QCheckBox()
+        self.cacheInstancesCheck.setToolTip("Cache instances drawn from their master.")
+        self.cacheGroupLayout.addRow(
+            edf.boldLabel("Cache Instances:"), self.cacheInstancesCheck
+        )
+        self.minPolygonPointsEdit = edf.shortLineEdit()
+        self.minPolygonPointsEdit.setToolTip(
+            "Polygons with at least this many points are cached."
+        )
+        self.cacheGroupLayout.addRow(
+            edf.boldLabel("Min. Polygon Points:"), self.minPolygonPointsEdit
+        )
+        self.usageLabel = QLabel()
+        self.cacheGroupLayout.addRow(edf.boldLabel("In Use:"), self.usageLabel)
+        mainLayout.addWidget(self.cacheGroup)
+        mainLayout.addWidget(self.buttonBox)
+        self.setLayout(mainLayout)
+        self.show()
+
+
 class pointsTableWidget(QTableWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
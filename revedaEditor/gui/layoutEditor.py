@@ -62,6 +62,7 @@ import revedaEditor.backend.dataDefinitions as ddef
 import revedaEditor.backend.libraryMethods as libm
 import revedaEditor.backend.libraryModelView as lmview
 import revedaEditor.backend.libBackEnd as libb
+import revedaEditor.common.layoutShapes as lshp
 import revedaEditor.fileio.gdsExport as gdse
 import revedaEditor.fileio.layoutEncoder as layenc
 import revedaEditor.fileio.loadJSON as lj
@@ -71,7 +72,7 @@ import revedaEditor.gui.fileDialogues as fd
 import revedaEditor.gui.layoutDialogues as ldlg
 import revedaEditor.gui.lsw as lsw
 from revedaEditor.gui.layoutScene import layoutScene
-from revedaEditor.gui.startThread import startThread
+from revedaEditor.gui.startThread import startBackgroundJob
 
 
 class layoutEditor(edw.editorWindow):
@@ -102,6 +103,22 @@ class layoutEditor(edw.editorWindow):
         super()._createActions()
         self.exportGDSAction = QAction("Export GDS", self)
         self.exportGDSAction.setToolTip("Export GDS from Layout")
+        self.detailLevelAction = QAction("Level of Detail...", self)
+        self.detailLevelAction.setToolTip("Level of detail options for drawing")
+        self.itemCacheAction = QAction("Item Cache...", self)
+        self.itemCacheAction.setToolTip("Pixmap cache options and memory in use")
+        self.checkDrcAction = QAction("Check DRC", self)
+        self.checkDrcAction.setToolTip("Check the design rules of the cell")
+        self.liveDrcAction = QAction("Live DRC", self)
+        self.liveDrcAction.setToolTip("Check the design rules around each edit")
+        self.liveDrcAction.setCheckable(True)
+        self.clearDrcAction = QAction("Clear DRC Markers", self)
+        self.clearDrcAction.setToolTip("Remove the design rule markers")
+        self.highlightNetAction = QAction("Highlight Net", self)
+        self.highlightNetAction.setToolTip(
+            "Highlight the nets of the selected shapes or of the clicked shape")
+        self.clearNetsAction = QAction("Clear Net Highlights", self)
+        self.clearNetsAction.setToolTip("Remove the net highlights")
 
     def _addActions(self):
         super()._addActions()
@@ -125,6 +142,15 @@ class layoutEditor(edw.editorWindow):
         self.menuCreate.addAction(self.rulerAction)
         self.menuCreate.addAction(self.delRulerAction)
         self.menuTools.addAction(self.exportGDSAction)
+        self.menuTools.addSeparator()
+        self.menuTools.addAction(self.checkDrcAction)
+        self.menuTools.addAction(self.liveDrcAction)
+        self.menuTools.addAction(self.clearDrcAction)
+        self.menuTools.addSeparator()
+        self.menuTools.addAction(self.highlightNetAction)
+        self.menuTools.addAction(self.clearNetsAction)
+        self.menuOptions.addAction(self.detailLevelAction)
+        self.menuOptions.addAction(self.itemCacheAction)
         # hierarchy submenu
         self.hierMenu = self.menuEdit.addMenu("Hierarchy")
         self.hierMenu.addAction(self.goUpAction)
@@ -161,6 +187,13 @@ class layoutEditor(edw.editorWindow):
         self.createInstAction.triggered.connect(self.createInstClick)
         self.createRectAction.triggered.connect(self.createRectClick)
         self.exportGDSAction.triggered.connect(self.exportGDSClick)
+        self.detailLevelAction.triggered.connect(self.detailLevelClick)
+        self.itemCacheAction.triggered.connect(self.itemCacheClick)
+        self.checkDrcAction.triggered.connect(self.checkDrcClick)
+        self.liveDrcAction.toggled.connect(self.liveDrcToggled)
+        self.clearDrcAction.triggered.connect(self.clearDrcClick)
+        self.highlightNetAction.triggered.connect(self.highlightNetClick)
+        self.clearNetsAction.triggered.connect(self.clearNetsClick)
         self.createPathAction.triggered.connect(self.createPathClick)
         self.createPinAction.triggered.connect(self.createPinClick)
         self.createLabelAction.triggered.connect(self.createLabelClick)
@@ -381,9 +414,11 @@ class layoutEditor(edw.editorWindow):
 
     def checkSaveCell(self):
         self.centralW.scene.saveLayoutCell(self.file)
+        self.updateHierarchyIndex()
 
     def saveCell(self):
         self.centralW.scene.saveLayoutCell(self.file)
+        self.updateHierarchyIndex()
 
     def loadLayout(self):
         self.centralW.scene.loadLayoutCell(self.file)
@@ -408,19 +443,101 @@ class layoutEditor(edw.editorWindow):
                 libItem, cellItem, viewItem
             )
 
+    def detailLevelClick(self):
+        detailLevel = lshp.detailLevel
+        dlg = ldlg.levelOfDetailDialogue(self)
+        dlg.enabledCheck.setChecked(detailLevel.enabled)
+        dlg.minShapeSizeEdit.setText(str(detailLevel.minShapeSize))
+        dlg.cullSmallShapesCheck.setChecked(detailLevel.cullSmallShapes)
+        dlg.minInstanceSizeEdit.setText(str(detailLevel.minInstanceSize))
+        dlg.fillScaleEdit.setText(str(detailLevel.fillScale))
+        if dlg.exec() == QDialog.Accepted:
+            try:
+                minShapeSize = float(dlg.minShapeSizeEdit.text())
+                minInstanceSize = float(dlg.minInstanceSizeEdit.text())
+                fillScale = float(dlg.fillScaleEdit.text())
+            except ValueError:
+                self.logger.error("Level of detail values should be numbers.")
+                return
+            detailLevel.minShapeSize = minShapeSize
+            detailLevel.minInstanceSize = minInstanceSize
+            detailLevel.fillScale = fillScale
+            detailLevel.enabled = dlg.enabledCheck.isChecked()
+            detailLevel.cullSmallShapes = dlg.cullSmallShapesCheck.isChecked()
+            self.centralW.view.updateLevelOfDetail()
+
+    def itemCacheClick(self):
+        cachePolicy = self.centralW.scene.cachePolicy
+        cacheSettings = cachePolicy.settings
+        dlg = ldlg.itemCacheDialogue(self)
+        dlg.enabledCheck.setChecked(cacheSettings.enabled)
+        dlg.budgetEdit.setText(str(cacheSettings.budget))
+        dlg.cacheInstancesCheck.setChecked(cacheSettings.cacheInstances)
+        dlg.minPolygonPointsEdit.setText(str(cacheSettings.minPolygonPoints))
+        dlg.usageLabel.setText(cachePolicy.report())
+        if dlg.exec() == QDialog.Accepted:
+            try:
+                budget = int(dlg.budgetEdit.text())
+                minPolygonPoints = int(dlg.minPolygonPointsEdit.text())
+            except ValueError:
+                self.logger.error("Item cache values should be integers.")
+                return
+            cacheSettings.budget = budget
+            cacheSettings.minPolygonPoints = minPolygonPoints
+            cacheSettings.enabled = dlg.enabledCheck.isChecked()
+            cacheSettings.cacheInstances = dlg.cacheInstancesCheck.isChecked()
+            # rulers, markers and highlights keep their own cache modes.
+            cachePolicy.applySettings(
+                [
+                    item
+                    for item in self.centralW.scene.items()
+                    if isinstance(item, lshp.layoutShape)
+                    and not isinstance(item, lshp.layoutRuler)
+                ]
+            )
+            self.logger.info(cachePolicy.report())
+
+    def checkDrcClick(self):
+        drcEngine = self.centralW.scene.drcEngine
+        drcEngine.checkAll()
+        self.logger.info(drcEngine.report())
+        self.logger.info(drcEngine.timingReport())
+
+    def liveDrcToggled(self, checked: bool):
+        drcEngine = self.centralW.scene.drcEngine
+        drcEngine.live = checked
+        if checked:
+            self.logger.info(drcEngine.report())
+
+    def clearDrcClick(self):
+        self.centralW.scene.drcEngine.clearMarkers()
+
+    def highlightNetClick(self):
+        scene = self.centralW.scene
+        if scene.selectedItems():
+            scene.highlightSelectedNets()
+        else:
+            scene.editModes.setMode("highlightNet")
+            self.messageLine.setText("Click on a shape to highlight its net")
+
+    def clearNetsClick(self):
+        self.centralW.scene.netExtractor.clearHighlights()
+
     def exportGDSClick(self):
         dlg = fd.gdsExportDialogue(self)
         dlg.unitEdit.setText("1 um")
         dlg.precisionEdit.setText("1 nm")
+        dlg.formatCB.addItems(gdse.EXPORT_FORMATS)
         dlg.exportPathEdit.setText(str(self.gdsExportDir))
 
         if dlg.exec() == QDialog.Accepted:
             self.gdsExportDir = pathlib.Path(dlg.exportPathEdit.text().strip())
-            gdsExportPath = self.gdsExportDir / f"{self.cellName}.gds"
+            exportFormat = dlg.formatCB.currentText()
+            gdsExportPath = self.gdsExportDir.joinpath(
+                f"{self.cellName}{gdse.FORMAT_SUFFIXES[exportFormat]}"
+            )
             # reprocess the layout to get the layout positions right.
-            topLevelItems = [
-                item for item in self.centralW.scene.items() if item.parentItem() is None
-            ]
+            topLevelItems = self.centralW.scene.layoutTopLevelItems()
             decodedData = json.loads(json.dumps(topLevelItems, cls=layenc.layoutEncoder))
             layoutItems = [
                 lj.layoutItems(self.centralW.scene).create(item)
@@ -430,12 +547,48 @@ class layoutEditor(edw.editorWindow):
 
             gdsExportObj = gdse.gdsExporter(self.cellName, layoutItems, gdsExportPath)
             gdsExportObj.unit = Quantity(dlg.unitEdit.text().strip()).real
-            gdsExportObj.precision = Quantity(dlg.precisionEdit.text().strip()).real
+            gdsExportObj.outputFormat = exportFormat
+            if exportFormat == gdse.OASIS_FORMAT:
+                # the database grid of the process, dbu points per micron.
+                gdsExportObj.precision = 1e-6 / fabproc.dbu
+                try:
+                    compressionLevel = int(dlg.compressionEdit.text().strip())
+                except ValueError:
+                    compressionLevel = -1
+                if not 0 <= compressionLevel <= 9:
+                    self.logger.error("Compression level should be a number from 0 to 9.")
+                    return
+                gdsExportObj.compressionLevel = compressionLevel
+            else:
+                gdsExportObj.precision = Quantity(dlg.precisionEdit.text().strip()).real
             if gdsExportObj:
-                gdsExportRunner = startThread(gdsExportObj.gds_export())
-                self.appMainW.threadPool.start(gdsExportRunner)
-                # netlistObj.writeNetlist()
-                self.logger.info("GDS Export is finished.")
+                self.logger.info(f"{exportFormat} Export started.")
+                # masters are shared with the open editors, they are read and
+                # built here, only the gathered geometry is passed to the job.
+                gdsExportObj.gatherItems()
+                self.gdsExportObj = gdsExportObj
+                self.gdsExportRunner = startBackgroundJob(
+                    self,
+                    f"Exporting {self.cellName} to {exportFormat}",
+                    self.appMainW.threadPool,
+                    gdsExportObj.gds_export,
+                    onFinished=self.gdsExportFinished,
+                    onError=self.gdsExportFailed,
+                    onCancelled=self.gdsExportCancelled,
+                )
+
+    def gdsExportFinished(self, gdsPathObj: pathlib.Path):
+        self.logger.info(f"Export is finished: {gdsPathObj}")
+        self.logger.info(self.gdsExportObj.timingReport())
+        self.gdsExportRunner = None
+
+    def gdsExportFailed(self, message: str):
+        self.logger.error(f"GDS Export error: {message}")
+        self.gdsExportRunner = None
+
+    def gdsExportCancelled(self):
+        self.logger.warning("GDS Export is cancelled.")
+        self.gdsExportRunner = None
 
 
 class layoutContainer(QWidget):
@@ -473,7 +626,7 @@ class layoutContainer(QWidget):
 
     def findSelectedLayer(self, layerName: str, layerPurpose: str):
         for layer in laylyr.pdkAllLayers:
-            if layer.netName == layerName and layer.purpose == layerPurpose:
+            if layer.name == layerName and layer.purpose == layerPurpose:
                 return layer
         return laylyr.pdkAllLayers[0]
 
@@ -482,26 +635,12 @@ class layoutContainer(QWidget):
     ):
         selectedLayer = self.findSelectedLayer(layerName, layerPurpose)
         if selectedLayer:
-            selectedLayer.selectable = layerSelectable
-
-        for item in self.scene.items():
-            if (
-                    hasattr(item, "layer")
-                    and item.layer == selectedLayer
-                    and item.parentItem() is None
-            ):
-                item.setEnabled(layerSelectable)
-                item.update()
+            self.scene.setLayerSelectable(selectedLayer, layerSelectable)
 
     def layerVisibleChange(self, layerName: str, layerPurpose: str, layerVisible: bool):
         selectedLayer = self.findSelectedLayer(layerName, layerPurpose)
         if selectedLayer:
-            selectedLayer.visible = layerVisible
-
-            for item in self.scene.items():
-                if hasattr(item, "layer") and item.layer == selectedLayer:
-                    item.setVisible(layerVisible)
-                    item.update()
+            self.scene.setLayerVisible(selectedLayer, layerVisible)
 
 
 class lswWindow(QWidget):
@@ -40,10 +40,16 @@ from PySide6.QtWidgets import (QDialog, QFormLayout, QGraphicsSceneMouseEvent,
 from dotenv import load_dotenv
 
 import revedaEditor.backend.dataDefinitions as ddef
+import revedaEditor.backend.itemCache as icache
+import revedaEditor.backend.layerRegistry as lreg
+import revedaEditor.backend.layoutDrc as ldrc
+import revedaEditor.backend.layoutNets as lnet
 import revedaEditor.backend.libraryMethods as libm
 import revedaEditor.backend.libraryModelView as lmview
+import revedaEditor.backend.spatialIndex as sidx
 import revedaEditor.backend.undoStack as us
 import revedaEditor.common.layoutShapes as lshp  # import layout shapes
+import revedaEditor.fileio.compactCellview as cv
 import revedaEditor.fileio.layoutEncoder as layenc
 import revedaEditor.fileio.loadJSON as lj
 import revedaEditor.gui.editFunctions as edf
@@ -72,6 +78,17 @@ class layoutScene(editorScene):
     def __init__(self, parent):
         super().__init__(parent)
         self.selectEdLayer = laylyr.pdkAllLayers[0]
+        # shapes of the scene grouped by layer, kept up to date by the shapes.
+        self.layerRegistry = lreg.layerShapeRegistry()
+        # cache modes of the items and the pixmap memory budget.
+        self.cachePolicy = icache.itemCachePolicy()
+        # region queries over the top level shapes, also for console scripts.
+        self.spatialIndex = sidx.layoutSpatialIndex()
+        # design rule checks and their markers.
+        self.drcEngine = ldrc.layoutDrcEngine(self)
+        # nets of the layout and their highlights.
+        self.netExtractor = lnet.layoutNetExtractor(self)
+        lshp.layerStyle.notifier.styleChanged.connect(self.layerStyleChanged)
         self.layoutShapes = ["Inst", "Rect", "Path", "Label", "Via", "Pin", "Polygon",
                              "Pcell", "Ruler", ]
         # draw modes
@@ -84,7 +101,7 @@ class layoutScene(editorScene):
                                           addVia=False, drawRect=False, drawLine=False,
                                           drawCircle=False, drawRuler=False,
                                           stretchItem=False,
-                                          addInstance=False, )
+                                          addInstance=False, highlightNet=False, )
         self.editorType = "lay"
         self.editModes.setMode("selectItem")
         self.selectModes = ddef.layoutSelectModes(selectAll=True, selectPath=False,
@@ -126,6 +143,95 @@ class layoutScene(editorScene):
                     self.editModes.drawPolygon, self.editModes.drawRect,
                     self.editModes.drawCircle, self.editModes.drawRuler,))
 
+    @property
+    def shapesInProgress(self) -> set:
+        """
+        Shapes that are being drawn and still change with the mouse.
+        """
+        return {shape for shape in (self._newRect, self._newPath, self._newPin,
+                                    self._newPolygon, self._stretchPath) if
+                shape is not None}
+
+    def shapeAdded(self, shape: lshp.layoutShape) -> None:
+        """
+        Called by a layout shape when it is added to the scene.
+        """
+        self.layerRegistry.addShape(shape)
+        self.cachePolicy.addItem(shape)
+        self.spatialIndex.addShape(shape)
+        self.drcEngine.shapeChanged(shape)
+        self.netExtractor.shapeChanged(shape)
+
+    def shapeRemoved(self, shape: lshp.layoutShape) -> None:
+        """
+        Called by a layout shape when it is leaving the scene.
+        """
+        self.layerRegistry.removeShape(shape)
+        self.cachePolicy.removeItem(shape)
+        self.spatialIndex.removeShape(shape)
+        self.drcEngine.shapeChanged(shape)
+        self.netExtractor.shapeChanged(shape)
+
+    def shapeChanged(self, shape: lshp.layoutShape,
+                     contentsChanged: bool = False) -> None:
+        """
+        Called by a layout shape before and after its geometry or layer changes.
+        If its contents changed, e.g. an instance was expanded, the cache mode of
+        the shape is decided again.
+        """
+        self.layerRegistry.addShape(shape)
+        self.spatialIndex.shapeChanged(shape)
+        self.drcEngine.shapeChanged(shape)
+        self.netExtractor.shapeChanged(shape)
+        if contentsChanged:
+            self.cachePolicy.updateItem(shape)
+
+    def shapesInRegion(self, rect, layer: ddef.layLayer = None) -> list:
+        """
+        Top level layout shapes whose bounding boxes intersect a rectangle, a
+        point or a (left, top, right, bottom) tuple in scene coordinates. With a
+        layer only the shapes on the layer and the instances using it are
+        returned.
+        """
+        return self.spatialIndex.query(rect, layer)
+
+    def shapesAtPoint(self, point, layer: ddef.layLayer = None) -> list:
+        return self.spatialIndex.shapesAt(point, layer)
+
+    def highlightNetAt(self, point: QPoint):
+        """
+        Highlight the net under a point. The net on the selected layer is
+        preferred, otherwise the net of the highest shape is highlighted.
+        """
+        nets = self.netExtractor.netsAt(point, self.selectEdLayer.name)
+        nets = nets or self.netExtractor.netsAt(point)
+        if not nets:
+            self.editorWindow.messageLine.setText("No net at this point.")
+            return
+        self.highlightNets(nets[:1])
+
+    def highlightSelectedNets(self):
+        nets = []
+        for item in self.selectedItems():
+            nets.extend(self.netExtractor.netsOfItem(item))
+        self.highlightNets(list(dict.fromkeys(nets)))
+
+    def highlightNets(self, nets: List[lnet.layoutNet]):
+        for net in nets:
+            self.netExtractor.highlight(net)
+            self.logger.info(f"Net {net.name}: {len(net)} polygons, "
+                             f"pins: {', '.join(net.names) or 'none'}")
+        if nets:
+            self.logger.info(self.netExtractor.timingReport())
+
+    def layoutTopLevelItems(self) -> list:
+        """
+        Top level items of the layout, without the design rule markers and the
+        net highlights.
+        """
+        return [item for item in self.items() if item.parentItem() is None and
+                not isinstance(item, (ldrc.drcMarker, lnet.netHighlight))]
+
     # Order of drawing
     # 1. Rect
     # 2. Path
@@ -179,6 +285,8 @@ class layoutScene(editorScene):
                     self.addLayoutViaArray()
                 elif self.editModes.changeOrigin:
                     self.origin = self.mouseReleaseLoc
+                elif self.editModes.highlightNet:
+                    self.highlightNetAt(self.mouseReleaseLoc)
                 elif self.editModes.rotateItem:
                     self.editorWindow.messageLine.setText("Rotate item")
                     if self.selectedItems():
@@ -363,7 +471,7 @@ class layoutScene(editorScene):
     def addNewInstance(self) -> Union[lshp.layoutInstance, lshp.layoutPcell]:
         newInstance = self.instLayout(self.layoutInstanceTuple)
         dlg = ldlg.layoutInstanceDialogue(self.editorWindow)
-        if isinstance(newInstance, pcells.baseCell):
+        if isinstance(newInstance, lshp.layoutPcell):
             dlg.instanceLibName.setText(newInstance.libraryName)
             dlg.instanceCellName.setText(newInstance.cellName)
             dlg.instanceViewName.setText(newInstance.viewName)
@@ -388,29 +496,24 @@ class layoutScene(editorScene):
         """
         match layoutInstanceTuple.viewItem.viewType:
             case "layout":
-                with layoutInstanceTuple.viewItem.viewPath.open("r") as temp:
-                    try:
-                        decodedData = json.load(temp)
-                        if decodedData[0]["cellView"] != "layout":
-                            self.logger.error("Not a layout cell")
-                        else:
-                            instanceShapes = [lj.layoutItems(self).create(item) for item in
-                                              decodedData[2:] if
-                                              item.get("type") in self.layoutShapes]
-                            layoutInstance = lshp.layoutInstance(instanceShapes)
-                            layoutInstance.libraryName = (
-                                layoutInstanceTuple.libraryItem.libraryName)
-                            layoutInstance.cellName = (
-                                layoutInstanceTuple.cellItem.cellName)
-                            layoutInstance.viewName = (
-                                layoutInstanceTuple.viewItem.viewName)
-                            self.itemCounter += 1
-                            layoutInstance.counter = self.itemCounter
-                            layoutInstance.instanceName = f"I{layoutInstance.counter}"
-                            # For each instance assign a counter number from the scene
-                            return layoutInstance
-                    except json.JSONDecodeError:
-                        self.logger.warning("Invalid JSON File")
+                master = lj.layoutItems(self).layoutMaster(
+                    layoutInstanceTuple.libraryItem.libraryName,
+                    layoutInstanceTuple.cellItem.cellName,
+                    layoutInstanceTuple.viewItem.viewName,
+                )
+                if master is not None:
+                    layoutInstance = lshp.layoutInstance([], master)
+                    layoutInstance.libraryName = (
+                        layoutInstanceTuple.libraryItem.libraryName)
+                    layoutInstance.cellName = (
+                        layoutInstanceTuple.cellItem.cellName)
+                    layoutInstance.viewName = (
+                        layoutInstanceTuple.viewItem.viewName)
+                    self.itemCounter += 1
+                    layoutInstance.counter = self.itemCounter
+                    layoutInstance.instanceName = f"I{layoutInstance.counter}"
+                    # For each instance assign a counter number from the scene
+                    return layoutInstance
             case "pcell":
                 with open(layoutInstanceTuple.viewItem.viewPath, "r") as temp:
                     try:
@@ -443,6 +546,34 @@ class layoutScene(editorScene):
         """
         return {item for item in self.items() if isinstance(item, lshp.layoutInstance)}
 
+    def setLayerVisible(self, layer: ddef.layLayer, visible: bool) -> None:
+        """
+        Show or hide the shapes on a layer. Only the shapes of the layer and the
+        instances whose master uses the layer are touched.
+        """
+        layer.visible = visible
+        for item in self.layerRegistry.layerShapes(layer):
+            item.setVisible(visible)
+        for instance in self.layerRegistry.layerInstances(layer):
+            # instance masters check the layer visibility when painted.
+            instance.update()
+
+    def layerStyleChanged(self, layer: ddef.layLayer) -> None:
+        """
+        Repaint the shapes on a layer after its shared pens and brushes changed.
+        """
+        for item in self.layerRegistry.layerShapes(layer):
+            item.update()
+        for instance in self.layerRegistry.layerInstances(layer):
+            instance.update()
+
+    def setLayerSelectable(self, layer: ddef.layLayer, selectable: bool) -> None:
+        layer.selectable = selectable
+        for item in self.layerRegistry.layerShapes(layer):
+            if item.parentItem() is None:
+                item.setEnabled(selectable)
+                item.update()
+
     def saveLayoutCell(self, filePathObj: pathlib.Path) -> None:
         """
         Save the layout cell items to a file.
@@ -454,21 +585,17 @@ class layoutScene(editorScene):
             None
         """
         try:
-            topLevelItems = []
-            topLevelItems.insert(0, {"viewType": "layout"})
-            topLevelItems.insert(1, {"snapGrid": self.snapTuple})
+            header = [{"viewType": "layout"}, {"snapGrid": self.snapTuple}]
             # Only save the top-level items
-            topLevelItems.extend(
-                [item for item in self.items() if item.parentItem() is None]
-            )
+            topLevelItems = self.layoutTopLevelItems()
             # refresh view to avoid to delete if has no parent 
-            [ item.scene() for item in self.items() if item.parentItem() is None]
+            [ item.scene() for item in topLevelItems]
             # TODO: This is a strange behaviour, if item has no parentItem it is removed/hidden from the scene
             # calling the getter .scene() seem to refresh the item or whatever. There must be a better way to
             # fix this. Schematic items don't seem to have a similar bug
-            with filePathObj.open("w") as file:
-                # Serialize items to JSON using layoutEncoder class
-                json.dump(topLevelItems, file, cls=layenc.layoutEncoder)
+            # Serialize items using layoutEncoder class, the file suffix selects
+            # JSON or the compact format.
+            cv.writeCellview(filePathObj, header, topLevelItems, layenc.layoutEncoder)
         except Exception as e:
             self.logger.error(f"Cannot save layout: {e}")
 
@@ -483,18 +610,16 @@ class layoutScene(editorScene):
             None
         """
         try:
-            with filePathObj.open("r") as file:
-                decodedData = json.load(file)
-
-            # Unpack grid settings
-            viewType, gridSettings, *itemData = decodedData
-            snapGrid = gridSettings.get("snapGrid", [1, 1])
-            self.majorGrid, self.snapGrid = snapGrid
-            self.snapTuple = (self.snapGrid, self.snapGrid)
-            self.snapDistance = 2 * self.snapGrid
-
             startTime = time.perf_counter()
-            self.createLayoutItems(itemData)
+            with cv.cellviewReader(filePathObj) as reader:
+                # Unpack grid settings
+                snapGrid = reader.headerDict.get("snapGrid", [1, 1])
+                self.majorGrid, self.snapGrid = snapGrid
+                self.snapTuple = (self.snapGrid, self.snapGrid)
+                self.snapDistance = 2 * self.snapGrid
+                # compact cellviews are read and added chunk by chunk.
+                for itemData in reader.chunks():
+                    self.createLayoutItems(itemData)
             endTime = time.perf_counter()
 
             self.logger.info(f"Load time: {endTime - startTime:.4f} seconds")
@@ -524,12 +649,17 @@ class layoutScene(editorScene):
 
     def reloadScene(self):
         # Get the top level items from the scene
-        topLevelItems = [item for item in self.items() if item.parentItem() is None]
+        topLevelItems = self.layoutTopLevelItems()
         # Convert the top level items to JSON string
         # Decode the JSON string back to Python objects
         decodedData = json.loads(json.dumps(topLevelItems, cls=layenc.layoutEncoder))
         # Clear the current scene
+        self.cachePolicy.clear()
+        self.drcEngine.clearMarkers()
+        self.netExtractor.clear()
         self.clear()
+        self.layerRegistry.clear()
+        self.spatialIndex.clear()
         # Create layout items based on the decoded data
         self.createLayoutItems(decodedData)
 
@@ -577,7 +707,7 @@ class layoutScene(editorScene):
                             self.layoutInstanceProperties(item, False)
                         case _:
 
-                            if item.__class__.__bases__[0] == pcells.baseCell:
+                            if isinstance(item, lshp.layoutPcell):
                                 self.layoutInstanceProperties(item, True)
 
         except Exception as e:
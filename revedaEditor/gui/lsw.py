@@ -38,6 +38,7 @@ from PySide6.QtWidgets import (QTableView, QMenu, QGraphicsItem, )
 
 import os
 from dotenv import load_dotenv
+import revedaEditor.common.layoutShapes as lshp
 from revedaEditor.backend.pdkPaths import importPDKModule
 fabproc = importPDKModule('process')
 laylyr = importPDKModule('layoutLayers')
@@ -70,15 +71,9 @@ class layerDataModel(QStandardItemModel):
                     "defaultPDK")
             else:
                 reveda_pdk_pathobj = pathlib.Path(reveda_pdk_path)
-            texturePath = reveda_pdk_pathobj.joinpath(layer.btexture)
-            _bitmap = QBitmap.fromImage(self.createImage(texturePath, layer.bcolor))
-            # bitmap = QBitmap.fromImage(QPixmap(layer.btexture).scaled(QSize(4, 4),
-            #                         Qt.KeepAspectRatio, Qt.SmoothTransformation).toImage())
-            brush = QBrush(_bitmap)
-            brush.setColor(QColor(layer.bcolor))
             item = QStandardItem()
             item.setForeground(QBrush(QColor(255, 255, 255)))
-            item.setBackground(brush)
+            item.setBackground(self.layerBrush(reveda_pdk_pathobj, layer))
             self.setItem(row, 0, item)
             self.setItem(row, 1, QStandardItem(layer.name))
             self.setItem(row, 2, QStandardItem(layer.purpose))
@@ -90,6 +85,26 @@ class layerDataModel(QStandardItemModel):
             item.setCheckable(True)
             item.setCheckState(Qt.Checked if layer.visible else Qt.Unchecked)
             self.setItem(row, 4, item)
+        lshp.layerStyle.notifier.styleChanged.connect(self.layerStyleChanged)
+
+    @classmethod
+    def layerBrush(cls, pdkPathObj: Path, layer) -> QBrush:
+        texturePath = pdkPathObj.joinpath(layer.btexture)
+        _bitmap = QBitmap.fromImage(cls.createImage(texturePath, layer.bcolor))
+        # bitmap = QBitmap.fromImage(QPixmap(layer.btexture).scaled(QSize(4, 4),
+        #                         Qt.KeepAspectRatio, Qt.SmoothTransformation).toImage())
+        brush = QBrush(_bitmap)
+        brush.setColor(QColor(layer.bcolor))
+        return brush
+
+    def layerStyleChanged(self, layer):
+        """
+        Redraw the swatch of a layer after its colour or stipple is changed.
+        """
+        for row, rowLayer in enumerate(self._data):
+            if rowLayer is layer:
+                pdkPathObj = lshp.layerStyle.texturePath(layer).parent
+                self.item(row, 0).setBackground(self.layerBrush(pdkPathObj, layer))
 
     def createData(self, layerlist: list) -> list:
         [
@@ -139,6 +154,7 @@ class layerViewTable(QTableView):
         self.layoutScene = self.parent.scene
         self.setModel(self._model)
         self.selectedRow: int = -1
+        self._bulkUpdate = False
         self.resizeColumnsToContents()
         self.setShowGrid(False)
         # self.setMaximumWidth(400)
@@ -164,7 +180,7 @@ class layerViewTable(QTableView):
             self, topLeft: QModelIndex, bottomRight: QModelIndex, roles: list
     ):
         # Check if the changed data involves the check state
-        if Qt.CheckStateRole in roles:
+        if Qt.CheckStateRole in roles and not self._bulkUpdate:
             row = topLeft.row()
             column = topLeft.column()
             item = self._model.item(row, column)
@@ -198,30 +214,32 @@ class layerViewTable(QTableView):
 
     def noLayersVisible(self):
         for layer in laylyr.pdkAllLayers:
-            layer.visible = False
-        for row in range(self._model.rowCount()):
-            self._model.item(row, 3).setCheckState(Qt.Unchecked)
+            self.layoutScene.setLayerVisible(layer, False)
+        self.setColumnCheckState(3, Qt.Unchecked)
 
     def allLayersVisible(self):
         for layer in laylyr.pdkAllLayers:
-            layer.visible = True
-        for row in range(self._model.rowCount()):
-            self._model.item(row, 3).setCheckState(Qt.Checked)
+            self.layoutScene.setLayerVisible(layer, True)
+        self.setColumnCheckState(3, Qt.Checked)
 
     def noLayersSelectable(self):
         for layer in laylyr.pdkAllLayers:
-            layer.selectable = False
-        for row in range(self._model.rowCount()):
-            self._model.item(row, 4).setCheckState(Qt.Unchecked)
-        for item in self.layoutScene.items():
-            if hasattr(item, 'layer') and item.parentItem() is None:
-                item.setEnabled(False)
+            self.layoutScene.setLayerSelectable(layer, False)
+        self.setColumnCheckState(4, Qt.Unchecked)
 
     def allLayersSelectable(self):
         for layer in laylyr.pdkAllLayers:
-            layer.selectable = True
-        for row in range(self._model.rowCount()):
-            self._model.item(row, 4).setCheckState(Qt.Checked)
-            for item in self.layoutScene.items():
-                if item.parentItem() is None and hasattr(item, 'layer'):
-                    item.setEnabled(True)
+            self.layoutScene.setLayerSelectable(layer, True)
+        self.setColumnCheckState(4, Qt.Checked)
+
+    def setColumnCheckState(self, column: int, checkState: Qt.CheckState):
+        """
+        Update the check boxes of a column without emitting a signal per row, the
+        layers are already updated.
+        """
+        self._bulkUpdate = True
+        try:
+            for row in range(self._model.rowCount()):
+                self._model.item(row, column).setCheckState(checkState)
+        finally:
+            self._bulkUpdate = False
@@ -33,6 +33,7 @@ from PySide6.QtGui import (
     QFont,
     QIcon,
 )
+from quantiphy import Quantity
 from PySide6.QtWidgets import (
     QGraphicsScene,
     QApplication,
@@ -45,7 +46,11 @@ from PySide6.QtWidgets import (
 
 import revedaEditor.backend.dataDefinitions as ddef
 import revedaEditor.backend.hdlBackEnd as hdl
+import revedaEditor.backend.hierarchyIndex as hidx
 import revedaEditor.backend.importViews as imv
+import revedaEditor.backend.libraryMethods as libm
+import revedaEditor.fileio.importGDS as impgds
+import revedaEditor.fileio.compactCellview as cv
 import revedaEditor.fileio.importLayp as imlyp
 import revedaEditor.fileio.importXschemSym as impxsym
 import revedaEditor.gui.fileDialogues as fd
@@ -54,6 +59,7 @@ import revedaEditor.gui.libraryBrowser as libw
 import revedaEditor.gui.pythonConsole as pcon
 import revedaEditor.gui.revinit as revinit
 import revedaEditor.gui.stippleEditor as stip
+from revedaEditor.gui.startThread import startBackgroundJob
 
 
 class EventLoopMonitor(QObject):
@@ -117,6 +123,11 @@ class MainWindow(QMainWindow):
         # look for library.json file where the script is invoked
         self.libraryPathObj = self.runPath.joinpath("library.json")
         self.libraryDict = self.readLibDefFile(self.libraryPathObj)
+        # index of the cellviews instantiated by each cellview, kept with the
+        # library definitions.
+        self.hierarchyIndex = hidx.hierarchyIndex(
+            self.libraryDict, self.runPath.joinpath(hidx.INDEX_FILE_NAME), self.logger
+        )
         self.libraryBrowser = libw.libraryBrowser(self)
         self.threadPool = QThreadPool.globalInstance()
         self.confFilePath = self.runPath.joinpath("reveda.conf")
@@ -140,6 +151,7 @@ class MainWindow(QMainWindow):
         self.importTools.addAction(self.importSpiceAction)
         self.importTools.addAction(self.importLaypFileAction)
         self.importTools.addAction((self.importXschSymAction))
+        self.importTools.addAction(self.importGDSAction)
         self.menuOptions.addAction(self.optionsAction)
         self.menuHelp.addAction(self.helpAction)
         self.menuHelp.addAction(self.aboutAction)
@@ -158,6 +170,7 @@ class MainWindow(QMainWindow):
         self.importXschSymAction = QAction(
             importVerilogaIcon, "Import Xschem Symbols...", self
         )
+        self.importGDSAction = QAction(importVerilogaIcon, "Import GDS file...", self)
         openLibIcon = QIcon(":/icons/database--pencil.png")
         self.libraryBrowserAction = QAction(openLibIcon, "Library Browser", self)
         optionsIcon = QIcon(":/icons/resource-monitor.png")
@@ -175,6 +188,7 @@ class MainWindow(QMainWindow):
         self.importSpiceAction.triggered.connect(self.importSpiceClick)
         self.importLaypFileAction.triggered.connect(self.importLaypClick)
         self.importXschSymAction.triggered.connect(self.importXschSymClick)
+        self.importGDSAction.triggered.connect(self.importGDSClick)
         self.optionsAction.triggered.connect(self.optionsClick)
         self.createStippleAction.triggered.connect(self.createStippleClick)
         self.helpAction.triggered.connect(self.helpClick)
@@ -194,6 +208,14 @@ class MainWindow(QMainWindow):
                     libraryDict.update(self.readLibDefFile(pathlib.Path(item)))
         return libraryDict
 
+    def designHierarchy(self) -> hidx.hierarchyIndex:
+        """
+        Return the hierarchy index brought up to date with the cellview files.
+        """
+        self.hierarchyIndex.libraryDict = self.libraryDict
+        self.hierarchyIndex.refresh()
+        return self.hierarchyIndex
+
     # open library browser window
     def libraryBrowserClick(self):
         self.libraryBrowser.show()
@@ -326,6 +348,61 @@ class MainWindow(QMainWindow):
                     importObj.scaleFactor = scaleFactor
                     importObj.importSymFile()
 
+    def importGDSClick(self):
+        importDlg = fd.gdsImportDialogue(self, self.libraryBrowser.libraryModel)
+        if importDlg.exec() == QDialog.Accepted:
+            gdsFileObj = pathlib.Path(importDlg.gdsFileEdit.text().strip())
+            if not gdsFileObj.is_file():
+                self.logger.error(f"{gdsFileObj} does not exist.")
+                return
+            importLibraryName = importDlg.libNamesCB.currentText()
+            libItem = libm.getLibItem(
+                self.libraryBrowser.libraryModel, importLibraryName
+            )
+            self.gdsImportObj = impgds.gdsImporter(
+                gdsFileObj, libItem.libraryPath, importLibraryName
+            )
+            self.gdsImportObj.unit = Quantity(importDlg.unitEdit.text().strip()).real
+            self.gdsImportObj.compact = importDlg.compactCheck.isChecked()
+            self.logger.info(f"GDS import of {gdsFileObj} started.")
+            self.gdsImportRunner = startBackgroundJob(
+                self,
+                f"Importing {gdsFileObj.name}",
+                self.threadPool,
+                self.gdsImportObj.gds_import,
+                onFinished=self.gdsImportFinished,
+                onError=self.gdsImportFailed,
+                onCancelled=self.gdsImportCancelled,
+            )
+
+    def gdsImportFinished(self, cellNames: list):
+        # the files are written by the job, the model is updated here in one go.
+        libraryModel = self.libraryBrowser.libraryModel
+        libItem = libm.getLibItem(libraryModel, self.gdsImportObj.libraryName)
+        viewName = self.gdsImportObj.viewName
+        for cellName in cellNames:
+            cellItem = libm.getCellItem(libItem, cellName)
+            cellPathObj = libItem.libraryPath.joinpath(cellName)
+            if cellItem is None:
+                cellItem = libraryModel.addCellToModel(cellPathObj, libItem)
+            viewItem = libm.getViewItem(cellItem, viewName)
+            viewPathObj = cv.cellviewPath(cellPathObj, viewName)
+            if viewItem is not None and viewItem.viewPath != viewPathObj:
+                cellItem.removeRow(viewItem.row())
+                viewItem = None
+            if viewItem is None:
+                libraryModel.addViewToModel(viewPathObj, cellItem)
+        self.logger.info(self.gdsImportObj.importReport())
+        self.gdsImportRunner = None
+
+    def gdsImportFailed(self, message: str):
+        self.logger.error(f"GDS import failed: {message}")
+        self.gdsImportRunner = None
+
+    def gdsImportCancelled(self):
+        self.logger.warning("GDS import is cancelled.")
+        self.gdsImportRunner = None
+
     def importSpiceSubckt(self, viewT: ddef.viewTuple, filePath: str):
         # Get the library model
         library_model = self.libraryBrowser.libraryModel
@@ -23,14 +23,11 @@
 #    Licensor: Revolution Semiconductor (Registered in the Netherlands)
 #
 
-import datetime
 import json
 
 # from hashlib import new
 import pathlib
 import time
-from copy import deepcopy
-from functools import lru_cache
 
 # import numpy as np
 from PySide6.QtCore import (
@@ -53,16 +50,19 @@ import revedaEditor.backend.dataDefinitions as ddef
 import revedaEditor.backend.libraryMethods as libm
 import revedaEditor.backend.libraryModelView as lmview
 import revedaEditor.backend.libBackEnd as libb
+import revedaEditor.backend.netlistEngine as nle
 import revedaEditor.common.net as net
 import revedaEditor.common.shapes as shp  # import the shapes
+import revedaEditor.fileio.schematicEncoder as schenc
 import revedaEditor.fileio.symbolEncoder as symenc
 import revedaEditor.gui.editorViews as edv
 import revedaEditor.gui.editorWindow as edw
 import revedaEditor.gui.fileDialogues as fd
 import revedaEditor.gui.propertyDialogues as pdlg
 import revedaEditor.gui.schematicScene as schscn
-from revedaEditor.gui.startThread import startThread
-from typing import List
+from revedaEditor.backend.jobControl import jobControl
+from revedaEditor.gui.startThread import startBackgroundJob
+from typing import Dict, List, Tuple
 import importlib
 
 
@@ -321,12 +321,13 @@ class schematicEditor(edw.editorWindow):
         self.centralW.scene.renumberInstances()
 
     def checkSaveCell(self):
-        schematicNets = self.centralW.scene.findSceneNetsSet()
-        self.centralW.scene.groupAllNets(schematicNets)
+        self.centralW.scene.updateNetNames()
         self.centralW.scene.saveSchematic(self.file)
+        self.updateHierarchyIndex()
 
     def saveCell(self):
         self.centralW.scene.saveSchematic(self.file)
+        self.updateHierarchyIndex()
 
     def loadSchematic(self):
         self.centralW.scene.loadSchematic(self.file)
@@ -338,52 +339,29 @@ class schematicEditor(edw.editorWindow):
         newConfigDict: dict,
         processedCells: set,
     ):
-        sceneSymbolSet = self.centralW.scene.findSceneSymbolSet()
-        for item in sceneSymbolSet:
-            libItem = libm.getLibItem(self.libraryView.libraryModel, item.libraryName)
-            cellItem = libm.getCellItem(libItem, item.cellName)
-            viewItems = [cellItem.child(row) for row in range(cellItem.rowCount())]
-            viewNames = [viewItem.viewName for viewItem in viewItems]
-            netlistableViews = [
-                viewItemName
-                for viewItemName in self.switchViewList
-                if viewItemName in viewNames
-            ]
-            itemSwitchViewList = deepcopy(netlistableViews)
-            viewDict = dict(zip(viewNames, viewItems))
-            itemCellTuple = ddef.cellTuple(libItem.libraryName, cellItem.cellName)
-            if itemCellTuple not in processedCells:
-                if cellLine := configDict.get(cellItem.cellName):
-                    netlistableViews = [cellLine[1]]
-                for viewName in netlistableViews:
-                    match viewDict[viewName].viewType:
-                        case "schematic":
-                            newConfigDict[cellItem.cellName] = [
-                                libItem.libraryName,
-                                viewName,
-                                itemSwitchViewList,
-                            ]
-                            schematicObj = schematicEditor(
-                                viewDict[viewName],
-                                self.libraryDict,
-                                self.libraryView,
-                            )
-                            schematicObj.loadSchematic()
-                            schematicObj.createConfigView(
-                                configItem,
-                                configDict,
-                                newConfigDict,
-                                processedCells,
-                            )
-                            break
-                        case _:
-                            newConfigDict[cellItem.cellName] = [
-                                libItem.libraryName,
-                                viewName,
-                                itemSwitchViewList,
-                            ]
-                            break
-                processedCells.add(itemCellTuple)
+        """
+        Fill newConfigDict with the views chosen for the cells below this
+        schematic. The hierarchy is taken from the hierarchy index instead of
+        opening the schematics below, except for this schematic, whose symbols
+        are taken from the scene as it may not be saved.
+        """
+        viewTuple = ddef.viewTuple(self.libName, self.cellName, self.viewName)
+        symbolViews = dict()
+        for item in self.centralW.scene.items():
+            if isinstance(item, shp.schematicSymbol) and item.parentItem() is None:
+                symbolViews[
+                    ddef.viewTuple(item.libraryName, item.cellName, item.viewName)
+                ] = None
+        hierarchy = self.appMainW.designHierarchy()
+        newConfigDict.update(
+            hierarchy.configDict(
+                viewTuple,
+                self.switchViewList,
+                configDict,
+                processedCells,
+                {viewTuple: tuple(symbolViews)},
+            )
+        )
 
     def closeEvent(self, event):
         self.centralW.scene.saveSchematic(self.file)
@@ -455,12 +433,36 @@ class schematicEditor(edw.editorWindow):
         return None
 
     def runNetlisting(self, netlist_obj):
-        start_time = time.perf_counter()
-        xyceNetlRunner = startThread(netlist_obj.writeNetlist())
-        self.appMainW.threadPool.start(xyceNetlRunner)
-        end_time = time.perf_counter()
-        self.logger.info(f"Netlisting time: {end_time - start_time}")
-        self.logger.info("Netlisting finished.")
+        self._netlistStartTime = time.perf_counter()
+        self.logger.info("Netlisting started.")
+        # scene is read here, the rest of the netlisting is done in the background.
+        topItems, topPinNets = netlist_obj.sceneItems()
+        self.netlistRunner = startBackgroundJob(
+            self,
+            f"Netlisting {self.cellName}",
+            self.appMainW.threadPool,
+            netlist_obj.writeNetlist,
+            topItems=topItems,
+            topPinNets=topPinNets,
+            onFinished=self.netlistFinished,
+            onError=self.netlistFailed,
+            onCancelled=self.netlistCancelled,
+        )
+
+    def netlistFinished(self, netlistPathObj: pathlib.Path):
+        self.logger.info(
+            f"Netlisting time: {time.perf_counter() - self._netlistStartTime:.4f} s"
+        )
+        self.logger.info(f"Netlisting finished: {netlistPathObj}")
+        self.netlistRunner = None
+
+    def netlistFailed(self, message: str):
+        self.logger.error(f"Netlisting error: {message}")
+        self.netlistRunner = None
+
+    def netlistCancelled(self):
+        self.logger.warning("Netlisting is cancelled.")
+        self.netlistRunner = None
 
     def goDownClick(self, s):
         self.centralW.scene.goDownHier()
@@ -709,6 +711,12 @@ class schematicContainer(QWidget):
 
 
 class xyceNetlist:
+    """
+    Schematic editor front-end of the headless netlisting engine. The top level
+    schematic is taken from the editor scene so that unsaved changes are netlisted,
+    the rest of the hierarchy is read from the library files.
+    """
+
     def __init__(
         self,
         schematic: schematicEditor,
@@ -720,20 +728,9 @@ class xyceNetlist:
         self._use_config = useConfig
         self._scene = self.schematic.centralW.scene
         self.libraryDict = self.schematic.libraryDict
-        self.libraryView = self.schematic.libraryView
         self._configDict = None
-        self.libItem = libm.getLibItem(
-            self.schematic.libraryView.libraryModel,
-            self.schematic.libName,
-        )
-        self.cellItem = libm.getCellItem(self.libItem, self.schematic.cellName)
-
         self._switchViewList = schematic.switchViewList
         self._stopViewList = schematic.stopViewList
-        self.netlistedViewsSet = set()  # keeps track of netlisted views.
-        self.includeLines = set()  # keeps track of include lines.
-        self.vamodelLines = set()  # keeps track of vamodel lines.
-        self.vahdlLines = set()  # keeps track of *.HDL lines.
 
     def __repr__(self):
         return f"xyceNetlist(filePathObj={self.filePathObj}, schematic={self.schematic}, useConfig={self._use_config})"
@@ -754,37 +751,6 @@ class xyceNetlist:
     def stopViewList(self, value: List[str]):
         self._stopViewList = value
 
-    def writeNetlist(self):
-        with self.filePathObj.open(mode="w") as cirFile:
-            cirFile.write(
-                "*".join(
-                    [
-                        "\n",
-                        80 * "*",
-                        "\n",
-                        "* Revolution EDA CDL Netlist\n",
-                        f"* Library: {self.schematic.libName}\n",
-                        f"* Top Cell Name: {self.schematic.cellName}\n",
-                        f"* View Name: {self.schematic.viewName}\n",
-                        f"* Date: {datetime.datetime.now()}\n",
-                        80 * "*",
-                        "\n",
-                        ".GLOBAL gnd!\n\n",
-                    ]
-                )
-            )
-
-            # now go down the rabbit hole to track all circuit elements.
-            self.recursiveNetlisting(self.schematic, cirFile)
-
-            cirFile.write(".END\n")
-            for line in self.includeLines:
-                cirFile.write(f"{line}\n")
-            for line in self.vamodelLines:
-                cirFile.write(f"{line}\n")
-            for line in self.vahdlLines:
-                cirFile.write(f"{line}\n")
-
     @property
     def configDict(self):
         return self._configDict
@@ -794,236 +760,38 @@ class xyceNetlist:
         assert isinstance(value, dict)
         self._configDict = value
 
-    @lru_cache(maxsize=16)
-    def recursiveNetlisting(self, schematic: schematicEditor, cirFile):
+    def createEngine(self) -> nle.xyceNetlistEngine:
+        return nle.xyceNetlistEngine(
+            self.libraryDict,
+            self.schematic.libName,
+            self.schematic.cellName,
+            self.schematic.viewName,
+            self._switchViewList,
+            self._stopViewList,
+            self._configDict if self._use_config else None,
+            self._scene.logger,
+        )
+
+    def sceneItems(self) -> Tuple[list, List[Dict[str, str]]]:
         """
-        Recursively traverse all sub-circuits and netlist them.
+        Serialise the top level schematic scene to the schematic file format, with
+        the nets of the symbol pins from the live connectivity graph of the scene.
         """
-        try:
-            schematicScene = schematic.centralW.scene
-            schematicNets = schematicScene.findSceneNetsSet()
-            schematicScene.groupAllNets(schematicNets)  # name all nets in the schematic
+        return self._scene.netlistItems()
 
-            sceneSymbolSet = schematicScene.findSceneSymbolSet()
-            schematicScene.generatePinNetMap(tuple(sceneSymbolSet))
-
-            for elementSymbol in sceneSymbolSet:
-                self.processElementSymbol(elementSymbol, schematic, cirFile)
-        except Exception as e:
-            self.schematic.logger.error(f"Netlisting error: {e}")
-
-    @lru_cache(maxsize=16)
-    def processElementSymbol(self, elementSymbol, schematic, cirFile):
-        if elementSymbol.symattrs.get("XyceNetlistPass") != "1" and (
-            not elementSymbol.netlistIgnore
-        ):
-            libItem = libm.getLibItem(
-                schematic.libraryView.libraryModel, elementSymbol.libraryName
-            )
-            cellItem = libm.getCellItem(libItem, elementSymbol.cellName)
-            netlistView = self.determineNetlistView(elementSymbol, cellItem)
-
-            # Create the netlist line for the item.
-            self.createItemLine(cirFile, elementSymbol, cellItem, netlistView)
-        elif elementSymbol.netlistIgnore:
-            cirFile.write(f"*{elementSymbol.instanceName} is marked to be ignored\n")
-        elif not elementSymbol.symattrs.get("XyceNetlistPass", False):
-            cirFile.write(
-                f"*{elementSymbol.instanceName} has no XyceNetlistLine attribute\n"
-            )
-
-    def determineNetlistView(self, elementSymbol, cellItem):
-        viewItems = [cellItem.child(row) for row in range(cellItem.rowCount())]
-        viewNames = [view.viewName for view in viewItems]
-
-        if self._use_config:
-            return self.configDict.get(elementSymbol.cellName)[1]
-        else:
-            for viewName in self._switchViewList:
-                if viewName in viewNames:
-                    return viewName
-            return "symbol"
-
-    def createItemLine(
+    def writeNetlist(
         self,
-        cirFile,
-        elementSymbol: shp.schematicSymbol,
-        cellItem: libb.cellItem,
-        netlistView: str,
+        topItems: list = None,
+        topPinNets: List[Dict[str, str]] = None,
+        control: jobControl = None,
     ):
-        if "schematic" in netlistView:
-            # First write subckt call in the netlist.
-            cirFile.write(self.createXyceSymbolLine(elementSymbol))
-            schematicItem = libm.getViewItem(cellItem, netlistView)
-            if netlistView not in self._stopViewList:
-                # now load the schematic
-                schematicObj = schematicEditor(
-                    schematicItem, self.libraryDict, self.libraryView
-                )
-                schematicObj.loadSchematic()
-
-                viewTuple = ddef.viewTuple(
-                    schematicObj.libName, schematicObj.cellName, schematicObj.viewName
-                )
-
-                if viewTuple not in self.netlistedViewsSet:
-                    self.netlistedViewsSet.add(viewTuple)
-                    pinList = elementSymbol.symattrs.get("pinOrder", ", ").replace(",", " ")
-                    cirFile.write(f".SUBCKT {schematicObj.cellName} {pinList}\n")
-                    self.recursiveNetlisting(schematicObj, cirFile)
-                    cirFile.write(".ENDS\n")
-        elif "symbol" in netlistView:
-            cirFile.write(self.createXyceSymbolLine(elementSymbol))
-        elif "spice" in netlistView:
-            cirFile.write(self.createSpiceLine(elementSymbol))
-        elif "veriloga" in netlistView:
-            cirFile.write(self.createVerilogaLine(elementSymbol))
-
-    def createXyceSymbolLine(self, elementSymbol: shp.schematicSymbol):
         """
-        Create a netlist line from a nlp device format line.
+        Write the netlist. topItems and topPinNets should be taken from the scene in
+        the GUI thread if the netlist is written in another thread.
         """
-        try:
-            xyceNetlistFormatLine = elementSymbol.symattrs["XyceSymbolNetlistLine"].strip()
-
-            # Process labels
-            for labelItem in elementSymbol.labels.values():
-                xyceNetlistFormatLine = xyceNetlistFormatLine.replace(
-                    labelItem.labelName, labelItem.labelValue
-                )
-
-            # Process attributes
-            for attrb, value in elementSymbol.symattrs.items():
-                xyceNetlistFormatLine = xyceNetlistFormatLine.replace(f"%{attrb}", value)
-
-            # Add pin list
-            pinList = " ".join(elementSymbol.pinNetMap.values())
-            xyceNetlistFormatLine = (
-                xyceNetlistFormatLine.replace("@pinList", pinList) + "\n"
-            )
-
-            return xyceNetlistFormatLine
-
-        except Exception as e:
-            self._scene.logger.error(
-                f"Error creating netlist line for {elementSymbol.instanceName}: {e}"
-            )
-            return (
-                f"*Netlist line is not defined for symbol of {elementSymbol.instanceName}\n"
-            )
-
-    # def createXyceSymbolLine(self, elementSymbol: shp.schematicSymbol):
-    #     """
-    #     Create a netlist line from a nlp device format line.
-    #     """
-    #     try:
-    #         xyceNetlistFormatLine = elementSymbol.symattrs["XyceSymbolNetlistLine"].strip()
-    #         for labelItem in elementSymbol.labels.values():
-    #             if labelItem.labelType == 'NLPLabel' and labelItem.labelDefinition not in lbl.symbolLabel.predefinedLabels and labelItem.labelValue.strip()[0].isalpha():
-    #                 labelItem.labelValue = f'{{{labelItem.labelValue}}}'
-    #             if labelItem.labelName in xyceNetlistFormatLine:
-    #                 xyceNetlistFormatLine = xyceNetlistFormatLine.replace(
-    #                     labelItem.labelName, labelItem.labelValue
-    #                 )
-
-    #         for attrb, value in elementSymbol.symattrs.items():
-    #             if f"%{attrb}" in xyceNetlistFormatLine:
-    #                 xyceNetlistFormatLine = xyceNetlistFormatLine.replace(
-    #                     f"%{attrb}", value
-    #                 )
-
-    #         pinList = " ".join(elementSymbol.pinNetMap.values())
-    #         xyceNetlistFormatLine = (
-    #                 xyceNetlistFormatLine.replace("@pinList", pinList) + "\n"
-    #         )
-    #         return xyceNetlistFormatLine
-    #     except Exception as e:
-    #         self._scene.logger.error(e)
-    #         self._scene.logger.error(
-    #             f"Netlist line is not defined for {elementSymbol.instanceName}"
-    #         )
-    #         # if there is no NLPDeviceFormat line, create a warning line
-    #         return (
-    #             f"*Netlist line is not defined for symbol of {elementSymbol.instanceName}\n"
-    #         )
-
-    def createSpiceLine(self, elementSymbol: shp.schematicSymbol):
-        """
-        Create a netlist line from a nlp device format line.
-        """
-        try:
-            spiceNetlistFormatLine = elementSymbol.symattrs["XyceSpiceNetlistLine"].strip()
-            for labelItem in elementSymbol.labels.values():
-                if labelItem.labelName in spiceNetlistFormatLine:
-                    spiceNetlistFormatLine = spiceNetlistFormatLine.replace(
-                        labelItem.labelName, labelItem.labelValue
-                    )
-
-            for attrb, value in elementSymbol.symattrs.items():
-                if f"%{attrb}" in spiceNetlistFormatLine:
-                    spiceNetlistFormatLine = spiceNetlistFormatLine.replace(
-                        f"%{attrb}", value
-                    )
-            pinList = elementSymbol.symattrs.get("pinOrder", ", ").replace(",", " ")
-            spiceNetlistFormatLine = (
-                spiceNetlistFormatLine.replace("@pinList", pinList) + "\n"
-            )
-            self.includeLines.add(
-                elementSymbol.symattrs.get(
-                    "incLine", "* no include line is found for {item.cellName}"
-                ).strip()
-            )
-            return spiceNetlistFormatLine
-        except Exception as e:
-            self._scene.logger.error(f"Spice subckt netlist error: {e}")
-            self._scene.logger.error(
-                f"Netlist line is not defined for {elementSymbol.instanceName}"
-            )
-            # if there is no NLPDeviceFormat line, create a warning line
-            return (
-                f"*Netlist line is not defined for symbol of {elementSymbol.instanceName}\n"
-            )
-
-    def createVerilogaLine(self, elementSymbol):
-        """
-        Create a netlist line from a nlp device format line.
-        """
-        try:
-            verilogaNetlistFormatLine = elementSymbol.symattrs[
-                "XyceVerilogaNetlistLine"
-            ].strip()
-            for labelItem in elementSymbol.labels.values():
-                if labelItem.labelName in verilogaNetlistFormatLine:
-                    verilogaNetlistFormatLine = verilogaNetlistFormatLine.replace(
-                        labelItem.labelName, labelItem.labelValue
-                    )
-
-            for attrb, value in elementSymbol.symattrs.items():
-                if f"%{attrb}" in verilogaNetlistFormatLine:
-                    verilogaNetlistFormatLine = verilogaNetlistFormatLine.replace(
-                        f"%{attrb}", value
-                    )
-            pinList = " ".join(elementSymbol.pinNetMap.values())
-            verilogaNetlistFormatLine = (
-                verilogaNetlistFormatLine.replace("@pinList", pinList) + "\n"
-            )
-            self.vamodelLines.add(
-                elementSymbol.symattrs.get(
-                    "vaModelLine", "* no model line is found for {item.cellName}"
-                ).strip()
-            )
-            self.vahdlLines.add(
-                elementSymbol.symattrs.get(
-                    "vaHDLLine", "* no hdl line is found for {item.cellName}"
-                ).strip()
-            )
-            return verilogaNetlistFormatLine
-        except Exception as e:
-            self._scene.logger.error(e)
-            self._scene.logger.error(
-                f"Netlist line is not defined for {elementSymbol.instanceName}"
-            )
-            # if there is no NLPDeviceFormat line, create a warning line
-            return (
-                f"*Netlist line is not defined for symbol of {elementSymbol.instanceName}\n"
-            )
+        if topItems is None:
+            topItems, topPinNets = self.sceneItems()
+        self.createEngine().writeNetlist(
+            self.filePathObj, topItems, control, topPinNets
+        )
+        return self.filePathObj
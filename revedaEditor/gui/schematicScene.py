@@ -56,12 +56,14 @@ from PySide6.QtWidgets import (
     QGraphicsItem,
 )
 
+import revedaEditor.backend.connectivity as con
 import revedaEditor.backend.dataDefinitions as ddef
 import revedaEditor.backend.libraryMethods as libm
 import revedaEditor.backend.undoStack as us
 import revedaEditor.common.labels as lbl
 import revedaEditor.common.net as net
 import revedaEditor.common.shapes as shp  # import the shapes
+import revedaEditor.fileio.compactCellview as cv
 import revedaEditor.fileio.loadJSON as lj
 import revedaEditor.fileio.schematicEncoder as schenc
 import revedaEditor.gui.editFunctions as edf
@@ -120,6 +122,10 @@ class schematicScene(editorScene):
         self.schematicNets: Dict[str, Set[net.schematicNet]] = (
             dict()
         )  # netName: list of nets with the same name
+        # live connectivity graph, updated as nets, symbols and pins change.
+        self.netGraph = con.netGraph(self.netEndPoints, self.itemPinPoints)
+        self._itemNetsDict: Dict[QGraphicsItem, Set[net.schematicNet]] = dict()
+        self._netItemsDict: Dict[net.schematicNet, Set[QGraphicsItem]] = dict()
         self.instanceSymbolTuple = None
         # pin attribute defaults
         self.pinName = ""
@@ -447,65 +453,55 @@ class schematicScene(editorScene):
             2 * self.snapTuple[0],
             2 * self.snapTuple[1],
         )
-        snapPoints = self.findConnectPoints(snapRect, ignoredSet)
-        if snapPoints:
-            lengths = [
-                (snapPoint - eventLoc).manhattanLength() for snapPoint in snapPoints
-            ]
-            closestPoint = list(snapPoints)[lengths.index(min(lengths))]
-        else:
-            closestPoint = eventLoc
+        closestPoint = eventLoc
+        closestLength = None
+        for snapPoint in self.findConnectPoints(snapRect, ignoredSet):
+            length = (snapPoint - eventLoc).manhattanLength()
+            if closestLength is None or length < closestLength:
+                closestPoint, closestLength = snapPoint, length
         return closestPoint
 
     def findConnectPoints(
             self, sceneRect: QRect, ignoredSet: set[QGraphicsItem]
     ) -> set[QPoint]:
+        """
+        Net end points in sceneRect and the locations of the pins reaching into it.
+        Only the first end point of a net is taken.
+        """
         snapPoints = set()
-        rectItems = set(self.items(sceneRect)) - ignoredSet
-        for item in rectItems:
-            if isinstance(item, net.schematicNet) and any(
-                    list(map(sceneRect.contains, item.sceneEndPoints))
-            ):
-                snapPoints.add(
-                    item.sceneEndPoints[
-                        list(map(sceneRect.contains, item.sceneEndPoints)).index(True)
-                    ]
-                )
-            elif isinstance(item, shp.symbolPin):
-                snapPoints.add(item.mapToScene(item.start).toPoint())
-            elif isinstance(item, shp.schematicPin):
-                snapPoints.add(item.mapToScene(item.start).toPoint())
+        foundNets = set()
+        for item, (x, y) in self.netGraph.connectPointsIn(
+                sceneRect.left(), sceneRect.top(), sceneRect.right(),
+                sceneRect.bottom()):
+            if item in ignoredSet or item in foundNets:
+                continue
+            if isinstance(item, net.schematicNet):
+                foundNets.add(item)
+            snapPoints.add(QPoint(x, y))
         return snapPoints
 
     def findNetStretchPoints(
         self, netItem: net.schematicNet, snapDistance: int
     ) -> dict[int, QPoint]:
         netEndPointsDict: dict[int, QPoint] = {}
-        sceneEndPoints = netItem.sceneEndPoints
-        for netEnd in sceneEndPoints:
+        for index, netEnd in enumerate(netItem.sceneEndPoints):
             snapRect: QRect = QRect(
                 netEnd.x() - snapDistance,
                 netEnd.y() - snapDistance,
                 2 * snapDistance,
                 2 * snapDistance,
             )
-            snapRectItems = set(self.items(snapRect)) - {netItem}
-
-            for item in snapRectItems:
-                if isinstance(item, net.schematicNet) and any(
-                        list(map(snapRect.contains, item.sceneEndPoints))
-                ):
-                    netEndPointsDict[sceneEndPoints.index(netEnd)] = netEnd
-                elif (
-                        isinstance(item, shp.symbolPin)
-                        or isinstance(item, shp.schematicPin)
-                ) and snapRect.contains(item.mapToScene(item.start).toPoint()):
-                    netEndPointsDict[sceneEndPoints.index(netEnd)] = item.mapToScene(
-                        item.start
-                    ).toPoint()
-                if netEndPointsDict.get(
-                        sceneEndPoints.index(netEnd)
-                ):  # after finding one point, no need to iterate.
+            for item, (x, y) in self.netGraph.connectPointsIn(
+                    snapRect.left(), snapRect.top(), snapRect.right(),
+                    snapRect.bottom()):
+                if item is netItem:
+                    continue
+                if isinstance(item, net.schematicNet):
+                    netEndPointsDict[index] = netEnd
+                    break
+                # pins are only taken if their centre is in the rectangle.
+                if snapRect.contains(x, y):
+                    netEndPointsDict[index] = QPoint(x, y)
                     break
         return netEndPointsDict
 
@@ -589,12 +585,8 @@ class schematicScene(editorScene):
                     if pinName[-1] == "!":
                         globalPinsSet.add(pinItem)
             for pinItem in globalPinsSet:
-                pinNetSet = {
-                    netItem
-                    for netItem in self.items(pinItem.sceneBoundingRect())
-                    if isinstance(netItem, net.schematicNet)
-                }
-                for netItem in pinNetSet:
+                for netItem in self.netGraph.netsTouching(
+                        self.pinLocation(pinItem), con.SYMBOL_PIN_HALF):
                     if netItem.nameStrength.value == 3:
                         if netItem.name != pinItem.pinName:
                             netItem.nameConflict = True
@@ -612,16 +604,16 @@ class schematicScene(editorScene):
         except Exception as e:
             self.logger.error(f"Error in global nets:{e}")
 
-    def findSchPinNets(self) -> set[net.schematicNet]:
+    def findSchPinNets(
+            self, sceneSchemPinsSet: set[shp.schematicPin] = None
+    ) -> set[net.schematicNet]:
         # nets connected to schematic pins.
         schemPinConNetsSet = set()
-        sceneSchemPinsSet = self.findSceneSchemPinsSet()
+        if sceneSchemPinsSet is None:
+            sceneSchemPinsSet = self.findSceneSchemPinsSet()
         for sceneSchemPin in sceneSchemPinsSet:
-            pinNetSet = {
-                netItem
-                for netItem in self.items(sceneSchemPin.sceneBoundingRect())
-                if isinstance(netItem, net.schematicNet)
-            }
+            pinNetSet = set(self.netGraph.netsTouching(
+                self.pinLocation(sceneSchemPin), con.SCHEMATIC_PIN_HALF))
             for netItem in pinNetSet:
                 if netItem.nameStrength.value == 3:
                     if netItem.name == sceneSchemPin.pinName:
@@ -644,22 +636,38 @@ class schematicScene(editorScene):
         """
         find all the nets connected to a net including nets connected by name.
         """
-        sceneNetSet = self.findSceneNetsSet()
-        connectedSet, otherNetsSet = self.traverseNets({startNet}, sceneNetSet)
+        connectedSet = self.netGraph.component(startNet)
         # now check if any other name is connected due to a common name:
-        for netItem in otherNetsSet:
-            if netItem.name == startNet.name and (netItem.nameStrength.value > 1):
-                connectedSet.add(netItem)
+        if startNet.name:
+            connectedSet |= {
+                netItem
+                for netItem in self.netGraph.nets - connectedSet
+                if netItem.name == startNet.name and netItem.nameStrength.value > 1
+            }
         return connectedSet - {startNet}
 
+    @staticmethod
+    def netEndPoints(netItem: net.schematicNet) -> Tuple[Tuple[int, int], ...]:
+        """
+        Scene end points of a net as integer tuples to be used as hash keys.
+        """
+        return tuple((point.x(), point.y()) for point in netItem.sceneEndPoints)
+
     # Net grouping methods
     def groupNamedNets(
-            self, namedNetsSet: set[net.schematicNet], unnamedNetsSet: set[net.schematicNet]
+            self,
+            namedNetsSet: set[net.schematicNet],
+            unnamedNetsSet: set[net.schematicNet],
+            neighbours: Dict[net.schematicNet, List[net.schematicNet]] = None,
     ) -> set[net.schematicNet]:
         """
         Groups nets with the same name using namedNetsSet members as seeds and going
         through connections. Returns the set of still unnamed nets.
         """
+        if neighbours is None:
+            neighbours = con.netNeighbours(
+                namedNetsSet | unnamedNetsSet, self.netEndPoints
+            )
         for netItem in namedNetsSet:
             self.schematicNets.setdefault(netItem.name, set())
             connectedNets, unnamedNetsSet = self.traverseNets(
@@ -667,139 +675,252 @@ class schematicScene(editorScene):
                     netItem,
                 },
                 unnamedNetsSet,
+                neighbours,
             )
             self.schematicNets[netItem.name] |= connectedNets
         return unnamedNetsSet
 
-    def groupUnnamedNets(self, unnamedNetsSet: set[net.schematicNet], nameCounter: int):
+    def groupUnnamedNets(
+            self,
+            unnamedNetsSet: set[net.schematicNet],
+            nameCounter: int,
+            neighbours: Dict[net.schematicNet, List[net.schematicNet]] = None,
+    ):
         """
         Groups nets together if they are connected and assign them default names
-        if they don't have a name assigned.
+        if they don't have a name assigned. Groups are named in the order of their
+        end points, so the names do not depend on the order of editing.
         """
-        try:
-            initialNet = unnamedNetsSet.pop()
-        except KeyError:  # initialNet set is empty
-            pass
-        else:
+        if neighbours is None:
+            neighbours = con.netNeighbours(unnamedNetsSet, self.netEndPoints)
+        for initialNet in sorted(unnamedNetsSet, key=self.netEndPoints):
+            if initialNet not in unnamedNetsSet:
+                continue
+            unnamedNetsSet.discard(initialNet)
+            # skip default names still used by nets which are not renamed.
+            while f"net{nameCounter}" in self.schematicNets:
+                nameCounter += 1
             initialNet.name = "net" + str(nameCounter)
             self.schematicNets[initialNet.name], unnamedNetsSet = self.traverseNets(
                 {
                     initialNet,
                 },
                 unnamedNetsSet,
+                neighbours,
             )
             nameCounter += 1
-            if len(unnamedNetsSet) > 1:
-                self.groupUnnamedNets(unnamedNetsSet, nameCounter)
-            elif len(unnamedNetsSet) == 1:
-                lastNet = unnamedNetsSet.pop()
-                lastNet.name = "net" + str(nameCounter)
-                self.schematicNets[lastNet.name] = {lastNet}
 
     def traverseNets(
-            self, connectedSet: Set[net.schematicNet], otherNetsSet: Set[net.schematicNet]
+            self,
+            connectedSet: Set[net.schematicNet],
+            otherNetsSet: Set[net.schematicNet],
+            neighbours: Dict[net.schematicNet, List[net.schematicNet]] = None,
     ) -> Tuple[Set[net.schematicNet], Set[net.schematicNet]]:
         """
         Traverse the schematic to find all connected nets starting from a given set.
 
-        This function uses an iterative approach to avoid potential stack overflow
-        issues with large schematics. It continues to search for connected nets
-        until no new connections are found.
+        Nets touching each other are looked up from a neighbour dictionary built
+        from a hash of net end points, so each net is only visited once.
 
         Args:
             connectedSet: Set of initially connected nets.
             otherNetsSet: Set of other nets to check for connections.
+            neighbours: Nets touching each net. It is created if not given.
 
         Returns:
             A tuple containing:
             - The final set of all connected nets.
             - The remaining set of unconnected nets.
         """
-        while True:
-            newFoundConnectedSet = set()
-            for netItem in connectedSet:
-                connected = {
-                    netItem2
-                    for netItem2 in otherNetsSet
-                    if self.checkNetConnect(netItem, netItem2)
-                }
-                for netItem2 in connected:
+        if neighbours is None:
+            neighbours = con.netNeighbours(
+                connectedSet | otherNetsSet, self.netEndPoints
+            )
+        frontier = list(connectedSet)
+        while frontier:
+            netItem = frontier.pop()
+            for netItem2 in neighbours.get(netItem, ()):
+                if netItem2 in otherNetsSet:
                     netItem2.inherit(netItem)
                     if not netItem2.nameConflict:
-                        newFoundConnectedSet.add(netItem2)
-
-            if not newFoundConnectedSet:
-                break
-
-            connectedSet.update(newFoundConnectedSet)
-            otherNetsSet -= newFoundConnectedSet
-
+                        connectedSet.add(netItem2)
+                        otherNetsSet.discard(netItem2)
+                        frontier.append(netItem2)
         return connectedSet, otherNetsSet
 
-    # Main method
-    def groupAllNets(self, sceneNetsSet: set[net.schematicNet]) -> None:
+    def updateNetNames(self) -> set[net.schematicNet]:
         """
-        This method starting from nets connected to pins, then named nets and unnamed
-        nets, groups all the nets in the schematic.
+        Name the nets in the connected groups which changed since the last call.
+        Nets of the other groups keep their names. Returns the renamed nets.
         """
         try:
-            self.clearNetStatus(sceneNetsSet)
-            schematicSymbolSet = self.findSceneSymbolSet()
-            globalNetsSet = self.findGlobalNets(schematicSymbolSet)
-            sceneNetsSet -= globalNetsSet
-            sceneNetsSet = self.groupNamedNets(globalNetsSet, sceneNetsSet)
-            schemPinConNetsSet = self.findSchPinNets()
-            sceneNetsSet -= schemPinConNetsSet
-            sceneNetsSet = self.groupNamedNets(schemPinConNetsSet, sceneNetsSet)
-            namedNetsSet = set(
-                [netItem for netItem in sceneNetsSet if netItem.nameStrength.value > 1]
-            )
-            sceneNetsSet -= namedNetsSet
-            unnamedNets = self.groupNamedNets(namedNetsSet, sceneNetsSet)
-            self.groupUnnamedNets(unnamedNets, self.netCounter)
+            dirtyNets, removedNets, dirtyItems = self.netGraph.takeDirty()
+            # symbols and pins attached to changed nets before the change.
+            for netItem in dirtyNets | removedNets:
+                dirtyItems |= self._netItemsDict.get(netItem, set())
+            for item in dirtyItems:
+                dirtyNets |= self._itemNetsDict.get(item, set())
+                if item.scene() is self:
+                    dirtyNets |= self._setItemNets(item)
+                else:
+                    self._setItemNets(item, set())
+            changedNets = set()
+            for netItem in dirtyNets:
+                if netItem not in changedNets:
+                    changedNets |= self.netGraph.component(netItem)
+            # symbols and pins attached to changed nets after the change.
+            for item in self.findNetsPinItems(changedNets, dirtyItems):
+                self._setItemNets(item)
+                dirtyItems.add(item)
+            for netItem in removedNets:
+                self._netItemsDict.pop(netItem, None)
+            staleNets = changedNets | removedNets
+            for netName in list(self.schematicNets.keys()):
+                self.schematicNets[netName] -= staleNets
+                if not self.schematicNets[netName]:
+                    del self.schematicNets[netName]
+            if changedNets:
+                self._nameNets(
+                    changedNets,
+                    {
+                        item
+                        for item in dirtyItems
+                        if isinstance(item, shp.schematicSymbol) and item.scene() is self
+                    },
+                    {
+                        item
+                        for item in dirtyItems
+                        if isinstance(item, shp.schematicPin) and item.scene() is self
+                    },
+                )
+            # pin nets of the symbols attached to changed nets, used for netlisting.
+            for item in dirtyItems:
+                if isinstance(item, shp.schematicSymbol) and item.scene() is self:
+                    item.pinNetMap = self.symbolPinNets(item)
+            return changedNets
         except Exception as e:
             self.logger.error(e)
+            return set()
 
-    def generatePinNetMap(self, sceneSymbolSet: set[shp.schematicSymbol]):
+    def _nameNets(
+            self,
+            netsSet: set[net.schematicNet],
+            symbolSet: set[shp.schematicSymbol],
+            schemPinSet: set[shp.schematicPin],
+    ) -> None:
+        self.clearNetStatus(netsSet)
+        neighbours = self.netGraph.neighbours
+        globalNetsSet = (self.findGlobalNets(symbolSet) or set()) & netsSet
+        netsSet = self.groupNamedNets(globalNetsSet, netsSet - globalNetsSet, neighbours)
+        schemPinConNetsSet = self.findSchPinNets(schemPinSet) & netsSet
+        netsSet -= schemPinConNetsSet
+        netsSet = self.groupNamedNets(schemPinConNetsSet, netsSet, neighbours)
+        namedNetsSet = set(
+            [netItem for netItem in netsSet if netItem.nameStrength.value > 1]
+        )
+        netsSet -= namedNetsSet
+        unnamedNets = self.groupNamedNets(namedNetsSet, netsSet, neighbours)
+        self.groupUnnamedNets(unnamedNets, self.netCounter, neighbours)
+
+    def findItemNets(self, item: QGraphicsItem) -> set[net.schematicNet]:
         """
-        For symbols in sceneSymbolSet, find which pin is connected to which net. If a
-        pin is not connected, assign to it a default net starting with d prefix.
+        Nets touching the pins of a symbol or a schematic pin.
         """
-        netCounter = 0
-        for symbolItem in sceneSymbolSet:
-            for pinName, pinItem in symbolItem.pins.items():
-                pinItem.connected = False  # clear connections
-                pinConnectedNets = [
-                    netItem
-                    for netItem in pinItem.collidingItems(
-                        mode=Qt.IntersectsItemBoundingRect
-                    )
-                    if isinstance(netItem, net.schematicNet)
-                ]
-                # this will name the pin by first net it finds in the bounding rectangle of
-                # the pin. If there are multiple nets in the bounding rectangle, the first
-                # net in the list will be the one used.
-                if pinConnectedNets:
-                    symbolItem.pinNetMap[pinName] = pinConnectedNets[0].name
-                    pinItem.connected = True
-
-                if not pinItem.connected:
-                    # assign a default net name prefixed with d(efault).
-                    symbolItem.pinNetMap[pinName] = f"dnet{netCounter}"
-                    self.logger.warning(
-                        f"left unconnected:{symbolItem.pinNetMap[pinName]}"
-                    )
-                    netCounter += 1
-            # now reorder pinNetMap according pinOrder attribute
-            if symbolItem.symattrs.get("pinOrder"):
-                pinOrderList = list()
-                [
-                    pinOrderList.append(item.strip())
-                    for item in symbolItem.symattrs.get("pinOrder").split(",")
-                ]
-                symbolItem.pinNetMap = {
-                    pinName: symbolItem.pinNetMap[pinName] for pinName in pinOrderList
-                }
+        if isinstance(item, shp.schematicSymbol):
+            return {
+                netItem
+                for pinItem in item.pins.values()
+                for netItem in self.netGraph.netsTouching(
+                    self.pinLocation(pinItem), con.SYMBOL_PIN_HALF)
+            }
+        return set(self.netGraph.netsTouching(self.pinLocation(item),
+                                              con.SCHEMATIC_PIN_HALF))
+
+    def symbolPinNets(self, symbolItem: shp.schematicSymbol) -> Dict[str, str]:
+        """
+        Names of the nets connected to the pins of a symbol, the first net for a
+        pin as in the netlisting engine. Unconnected pins are left out.
+        """
+        pinNets = dict()
+        for pinName, pinItem in symbolItem.pins.items():
+            netItems = self.netGraph.netsTouching(
+                self.pinLocation(pinItem), con.SYMBOL_PIN_HALF)
+            if netItems:
+                pinNets[pinName] = netItems[0].name
+        return pinNets
+
+    @staticmethod
+    def pinLocation(pinItem: Union[shp.symbolPin, shp.schematicPin]) -> Tuple[int, int]:
+        """
+        Scene location of the centre of a symbol pin or a schematic pin.
+        """
+        location = pinItem.mapToScene(pinItem.start).toPoint()
+        return location.x(), location.y()
+
+    def itemPinPoints(
+            self, item: Union[shp.schematicSymbol, shp.schematicPin]
+    ) -> List[Tuple[QGraphicsItem, Tuple[int, int], Tuple[float, float]]]:
+        """
+        Pins of a symbol or a schematic pin with their scene locations and the half
+        sizes of their shapes, for the connection point index.
+        """
+        if item.scene() is not self:
+            return []
+        if isinstance(item, shp.schematicSymbol):
+            pinItems = list(item.pins.values())
+        elif isinstance(item, shp.schematicPin):
+            pinItems = [item]
+        else:
+            return []
+        pinPoints = []
+        for pinItem in pinItems:
+            shapeRect = pinItem.mapToScene(pinItem.shape()).boundingRect()
+            pinPoints.append((pinItem, self.pinLocation(pinItem),
+                              (shapeRect.width() / 2, shapeRect.height() / 2)))
+        return pinPoints
+
+    def findNetsPinItems(
+            self,
+            netsSet: set[net.schematicNet],
+            skipItemsSet: set[QGraphicsItem] = frozenset(),
+    ) -> set[QGraphicsItem]:
+        """
+        Symbols and schematic pins touching any of the nets, leaving out the items
+        in skipItemsSet. Either the nets or the pins are looked up in the scene
+        index, whichever is fewer.
+        """
+        pinItemsSet = (
+            self.findSceneSymbolSet() | self.findSceneSchemPinsSet()
+        ) - skipItemsSet
+        if len(netsSet) > len(pinItemsSet):
+            return {
+                item
+                for item in pinItemsSet
+                if not self.findItemNets(item).isdisjoint(netsSet)
+            }
+        netPinItemsSet = set()
+        for netItem in netsSet:
+            for item in self.items(netItem.sceneBoundingRect()):
+                if isinstance(item, shp.symbolPin) and isinstance(
+                    item.parentItem(), shp.schematicSymbol
+                ):
+                    netPinItemsSet.add(item.parentItem())
+                elif isinstance(item, shp.schematicPin):
+                    netPinItemsSet.add(item)
+        return netPinItemsSet & pinItemsSet
+
+    def _setItemNets(
+            self, item: QGraphicsItem, itemNets: set[net.schematicNet] = None
+    ) -> set[net.schematicNet]:
+        if itemNets is None:
+            itemNets = self.findItemNets(item)
+        for netItem in self._itemNetsDict.pop(item, set()):
+            self._netItemsDict.get(netItem, set()).discard(item)
+        if itemNets:
+            self._itemNetsDict[item] = itemNets
+            for netItem in itemNets:
+                self._netItemsDict.setdefault(netItem, set()).add(item)
+        return itemNets
 
     def findSceneSymbolSet(self) -> set[shp.schematicSymbol]:
         """
@@ -954,6 +1075,26 @@ class schematicScene(editorScene):
             [label.labelDefs() for label in shape.labels.values()]
         return shape
 
+    def netlistItems(self) -> Tuple[list, List[Dict[str, str]]]:
+        """
+        The top level items in the schematic file format and the nets of the pins
+        of each symbol among them, in order, from the live connectivity graph. Only
+        the connected groups changed since the last update are named again.
+        """
+        self.updateNetNames()
+        sceneItems = [item for item in self.items() if item.parentItem() is None]
+        symbolPinNets = [
+            dict(item.pinNetMap)
+            for item in sceneItems
+            if isinstance(item, shp.schematicSymbol)
+        ]
+        topLevelItems = [{"viewType": "schematic"}, {"snapGrid": self.snapTuple}]
+        topLevelItems.extend(sceneItems)
+        return (
+            json.loads(json.dumps(topLevelItems, cls=schenc.schematicEncoder)),
+            symbolPinNets,
+        )
+
     def saveSchematic(self, file: pathlib.Path):
         """
         Save the schematic to a file.
@@ -965,15 +1106,12 @@ class schematicScene(editorScene):
             Exception: If there was an error saving the schematic.
         """
         try:
-            topLevelItems = []
-            # Insert a cellview item at the beginning of the list
-            topLevelItems.insert(0, {"viewType": "schematic"})
-            topLevelItems.insert(1, {"snapGrid": self.snapTuple})
-            topLevelItems.extend(
-                [item for item in self.items() if item.parentItem() is None]
+            header = [{"viewType": "schematic"}, {"snapGrid": self.snapTuple}]
+            topLevelItems = [item for item in self.items() if item.parentItem() is None]
+            # the file suffix selects JSON or the compact format.
+            cv.writeCellview(
+                file, header, topLevelItems, schenc.schematicEncoder, indent=4
             )
-            with file.open(mode="w") as f:
-                json.dump(topLevelItems, f, cls=schenc.schematicEncoder, indent=4)
             # if there is a parent editor, to reload the changes.
             if self.editorWindow.parentEditor is not None:
                 editorType = self.findEditorTypeString(self.editorWindow.parentEditor)
@@ -1002,11 +1140,11 @@ class schematicScene(editorScene):
         load schematic from item list
         """
         try:
-            with filePathObj.open("r") as file:
-                decodedData = json.load(file)
+            with cv.cellviewReader(filePathObj) as reader:
+                gridSettings = reader.headerDict
+                itemData = list(reader.items())
 
             # Unpack grid settings
-            viewType, gridSettings, *itemData = decodedData
             snapGrid = gridSettings.get("snapGrid", [1, 1])
             self.majorGrid, self.snapGrid = snapGrid
             self.snapTuple = (self.snapGrid, self.snapGrid)
@@ -1043,8 +1181,15 @@ class schematicScene(editorScene):
         topLevelItems.insert(0, {"viewType": "schematic"})
         topLevelItems.insert(1, {"snapGrid": self.snapTuple})
         items = json.loads(json.dumps(topLevelItems, cls=schenc.schematicEncoder))
+        # cleared items do not report leaving the scene.
+        self.netGraph.clear()
+        self.schematicNets = dict()
+        self._itemNetsDict = dict()
+        self._netItemsDict = dict()
         self.clear()
-        self.loadSchematicItems(items)
+        # symbol definitions come from the symbol cache, only the changed symbol
+        # files are read again.
+        self.createSchematicItems(items[2:])
 
     def viewObjProperties(self):
         """
@@ -24,21 +24,110 @@
 #
 
 from PySide6.QtCore import (
+    QObject,
     QRunnable,
+    Qt,
+    Signal,
     Slot,
 )
+from PySide6.QtWidgets import QProgressDialog, QWidget
+
+from revedaEditor.backend.jobControl import jobCancelled, jobControl
+
+
+class workerSignals(QObject):
+    """
+    Signals of a background job. They are emitted from the worker thread and
+    delivered in the thread of the connected objects.
+    """
+
+    progress = Signal(int, int, str)  # done, total, message
+    finished = Signal(object)  # job result
+    error = Signal(str)
+    cancelled = Signal()
 
 
 class startThread(QRunnable):
-    __slots__ = ("fn",)
+    """
+    Run fn(*args, **kwargs) in a thread pool thread. If passControl is True, a
+    jobControl object is passed to fn as the control keyword argument for
+    progress reporting and cancellation.
+    """
 
-    def __init__(self, fn):
+    __slots__ = ("fn", "args", "kwargs", "signals", "control")
+
+    def __init__(self, fn, *args, passControl: bool = False, **kwargs):
         super().__init__()
         self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = workerSignals()
+        self.control = jobControl(self.signals.progress.emit)
+        if passControl:
+            self.kwargs["control"] = self.control
+
+    def cancel(self):
+        self.control.cancel()
 
     @Slot()
     def run(self) -> None:
         try:
-            self.fn
+            result = self.fn(*self.args, **self.kwargs)
+        except jobCancelled:
+            self.signals.cancelled.emit()
         except Exception as e:
-            print(e)
+            self.signals.error.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+
+
+class jobProgressDialog(QProgressDialog):
+    """
+    Non-modal progress dialog of a background job with a cancel button.
+    """
+
+    def __init__(self, title: str, runner: startThread, parent: QWidget):
+        super().__init__(title, "Cancel", 0, 0, parent)
+        self.setWindowTitle(title)
+        self.setWindowModality(Qt.NonModal)
+        self.setMinimumDuration(500)
+        self.setAutoClose(False)
+        self.setAutoReset(False)
+        self._runner = runner
+        self.canceled.connect(runner.cancel)
+        runner.signals.progress.connect(self.updateProgress)
+        runner.signals.finished.connect(self.jobDone)
+        runner.signals.error.connect(self.jobDone)
+        runner.signals.cancelled.connect(self.jobDone)
+
+    @Slot(int, int, str)
+    def updateProgress(self, done: int, total: int, message: str):
+        self.setMaximum(total)
+        self.setValue(done)
+        if message:
+            self.setLabelText(message)
+
+    @Slot()
+    def jobDone(self, *args):
+        self.close()
+        self.deleteLater()
+
+
+def startBackgroundJob(parent: QWidget, title: str, threadPool, fn, *args,
+                       onFinished=None, onError=None, onCancelled=None,
+                       **kwargs) -> startThread:
+    """
+    Start fn in threadPool with a progress dialog. The completion callbacks are
+    connected before the job starts, so a job that ends at once is not missed.
+    """
+    runner = startThread(fn, *args, passControl=True, **kwargs)
+    runner.setAutoDelete(False)  # keep signals alive until the job is done.
+    if onFinished is not None:
+        runner.signals.finished.connect(onFinished)
+    if onError is not None:
+        runner.signals.error.connect(onError)
+    if onCancelled is not None:
+        runner.signals.cancelled.connect(onCancelled)
+    jobProgressDialog(title, runner, parent)
+    threadPool.start(runner)
+    return runner
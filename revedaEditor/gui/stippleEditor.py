@@ -35,6 +35,8 @@ from PySide6.QtWidgets import (
     QMessageBox,
 )
 
+import revedaEditor.common.layoutShapes as lshp
+
 
 class stippleView(QGraphicsView):
     def __init__(self, scene: QGraphicsScene, parent=None, size: int = 32):
@@ -228,6 +230,8 @@ class stippleEditor(QMainWindow):
 
             with open(file_path, "w") as file:
                 file.write("\n".join(pattern))
+            # layers using the stipple file are repainted with the new pattern.
+            lshp.layerStyle.textureChanged(file_path)
 
     def loadPatternFromText(self):
         file_dialog = QFileDialog(self)
@@ -121,9 +121,11 @@ class symbolEditor(edw.editorWindow):
 
     def checkSaveCell(self):
         self.centralW.scene.saveSymbolCell(self.file)
+        self.updateHierarchyIndex()
 
     def saveCell(self):
         self.centralW.scene.saveSymbolCell(self.file)
+        self.updateHierarchyIndex()
 
     def createRectClick(self, s):
         self.centralW.scene.editModes.setMode("drawRect")
@@ -0,0 +1,203 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+# Shared fixtures of the tests: a small design library written to a temporary
+# directory, with a resistor, a ground and a subcircuit used twice at the top,
+# a layout scene with the engines of the layout editor but no editor and a
+# schematic scene with the few editor window settings it reads.
+
+import json
+import logging
+import os
+import pathlib
+import types
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+LIBRARY_NAME = "testLib"
+
+
+def pinItem(name, x, y):
+    return {"type": "pin", "st": [x, y], "nam": name, "pd": "Input", "pt": "Signal",
+            "loc": [0, 0], "ang": 0, "fl": [1, 1]}
+
+
+def labelItem(definition, name, value=""):
+    return {"type": "label", "st": [0, 0], "nam": name, "def": definition,
+            "txt": definition, "val": value, "vis": True, "lt": "NLPLabel",
+            "ht": "12", "al": "Left", "or": "R0", "use": "Normal", "loc": [0, 0],
+            "fl": [1, 1]}
+
+
+def attributeItem(name, definition):
+    return {"type": "attr", "nam": name, "def": definition}
+
+
+def instanceItem(cellName, instanceName, location, labels=None, angle=0,
+                 flip=(1, 1)):
+    return {"type": "sys", "lib": LIBRARY_NAME, "cell": cellName, "view": "symbol",
+            "nam": instanceName, "ic": int(instanceName[1:]),
+            "ld": labels or {"@instName": [instanceName, True]},
+            "loc": list(location), "ang": angle, "ign": 0, "br": [0, 0, 10, 10],
+            "fl": list(flip)}
+
+
+def netItem(start, end, name="", nameStrength=0):
+    return {"type": "scn", "st": list(start), "end": list(end), "nam": name,
+            "ns": nameStrength}
+
+
+def schematicPinItem(name, x, y):
+    return {"type": "scp", "st": [x, y], "pn": name, "pd": "Input", "pt": "Signal",
+            "ang": 0, "fl": [1, 1]}
+
+
+def writeCellview(libraryPath, cellName, viewName, items):
+    cellPath = libraryPath.joinpath(cellName)
+    cellPath.mkdir(exist_ok=True)
+    cellPath.joinpath(f"{viewName}.json").write_text(json.dumps(items, indent=1))
+
+
+SYMBOL_HEADER = [{"cellView": "symbol"}, {"snapGrid": [10, 10]}]
+SCHEMATIC_HEADER = [{"viewType": "schematic"}, {"snapGrid": [10, 10]}]
+
+CELLVIEWS = {
+    ("res", "symbol"): SYMBOL_HEADER + [
+        pinItem("PLUS", 0, -20),
+        pinItem("MINUS", 0, 20),
+        labelItem("[@instName]", "@instName"),
+        labelItem("[@R:r=%:r=1k]", "@R", "r=2k"),
+        attributeItem("XyceSymbolNetlistLine", "R@instName @pinList @R"),
+        attributeItem("pinOrder", "PLUS, MINUS"),
+    ],
+    ("gnd", "symbol"): SYMBOL_HEADER + [
+        pinItem("gnd!", 0, 0),
+        attributeItem("XyceNetlistPass", "1"),
+    ],
+    ("sub", "symbol"): SYMBOL_HEADER + [
+        pinItem("A", -20, 0),
+        pinItem("B", 20, 0),
+        labelItem("[@instName]", "@instName"),
+        attributeItem("XyceSymbolNetlistLine", "X@instName @pinList sub"),
+        attributeItem("pinOrder", "A,B"),
+    ],
+    ("sub", "schematic"): SCHEMATIC_HEADER + [
+        instanceItem("res", "I0", (100, 100),
+                     {"@instName": ["I0", True], "@R": ["5k", True]}, angle=90),
+        schematicPinItem("A", 0, 100),
+        schematicPinItem("B", 200, 100),
+        netItem((0, 100), (80, 100)),
+        netItem((120, 100), (200, 100)),
+    ],
+    ("top", "schematic"): SCHEMATIC_HEADER + [
+        instanceItem("sub", "X1", (0, 0)),
+        instanceItem("sub", "X2", (100, 0)),
+        instanceItem("res", "I3", (200, 20), flip=(1, -1)),
+        instanceItem("gnd", "G0", (200, 100)),
+        netItem((20, 0), (80, 0)),
+        netItem((120, 0), (200, 0)),
+        netItem((200, 40), (200, 100)),
+        netItem((-100, 0), (-20, 0), "vin", 3),
+    ],
+}
+
+
+@pytest.fixture
+def libraryPath(tmp_path) -> pathlib.Path:
+    libraryPath = tmp_path.joinpath(LIBRARY_NAME)
+    libraryPath.mkdir()
+    libraryPath.joinpath("reveda.lib").write_text("")
+    for (cellName, viewName), items in CELLVIEWS.items():
+        writeCellview(libraryPath, cellName, viewName, items)
+    return libraryPath
+
+
+@pytest.fixture
+def libraryDict(libraryPath) -> dict:
+    return {LIBRARY_NAME: libraryPath}
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    from PySide6.QtWidgets import QApplication
+
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def layoutScene(qapp):
+    from PySide6.QtWidgets import QGraphicsScene
+
+    import revedaEditor.backend.itemCache as icache
+    import revedaEditor.backend.layerRegistry as lreg
+    import revedaEditor.backend.layoutDrc as ldrc
+    import revedaEditor.backend.layoutNets as lnet
+    import revedaEditor.backend.spatialIndex as sidx
+    from revedaEditor.gui.layoutScene import layoutScene
+
+    class layoutTestScene(QGraphicsScene):
+        # the layout scene needs an editor window, the test scene has its engines
+        # and passes the shape changes to them in the same way.
+        shapeAdded = layoutScene.shapeAdded
+        shapeRemoved = layoutScene.shapeRemoved
+        shapeChanged = layoutScene.shapeChanged
+
+        def __init__(self):
+            super().__init__()
+            self.layerRegistry = lreg.layerShapeRegistry()
+            self.cachePolicy = icache.itemCachePolicy()
+            self.spatialIndex = sidx.layoutSpatialIndex()
+            self.drcEngine = ldrc.layoutDrcEngine(self)
+            self.netExtractor = lnet.layoutNetExtractor(self)
+            self.shapesInProgress = set()
+
+    scene = layoutTestScene()
+    yield scene
+    scene.clear()
+
+
+@pytest.fixture
+def schematicScene(qapp, libraryPath):
+    from PySide6.QtWidgets import QLabel, QStatusBar, QWidget
+
+    import revedaEditor.gui.schematicScene as schscn
+
+    editorWindow = types.SimpleNamespace(
+        majorGrid=10,
+        snapTuple=(10, 10),
+        file=libraryPath.joinpath("top", "schematic.json"),
+        libraryDict={LIBRARY_NAME: libraryPath},
+        appMainW=types.SimpleNamespace(logger=logging.getLogger("reveda")),
+        messageLine=QLabel(),
+        statusLine=QStatusBar(),
+    )
+
+    class schematicTestContainer(QWidget):
+        # the scene finds its editor window through its container.
+        def __init__(self):
+            super().__init__()
+            self.parent = editorWindow
+
+    scene = schscn.schematicScene(schematicTestContainer())
+    yield scene
+    scene.clear()
@@ -0,0 +1,114 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+# Compact cellviews keep the items of the JSON cellview in their order, whether
+# they are stored in rectangle columns or in JSON chunks.
+
+import json
+
+import pytest
+
+import revedaEditor.fileio.compactCellview as cv
+
+HEADER = [{"viewType": "layout"}, {"snapGrid": [10, 5]}]
+
+
+def rectItem(index):
+    return {"type": "Rect", "tl": [index, 0], "br": [index + 10, 20],
+            "ang": 90 * (index % 4), "ln": index % 7, "fl": [1, -1]}
+
+
+def pathItem(index):
+    return {"type": "Path", "dfl1": [index, 0], "dfl2": [index, 100], "w": 10,
+            "se": 5, "ee": 5, "nam": "", "wdt": 0, "ln": 5}
+
+
+def mixedItems(count):
+    # runs of different lengths of both kinds, starting with a non-rectangle.
+    items = []
+    for index in range(count):
+        items.append(pathItem(index) if index % 5 in (0, 3) else rectItem(index))
+    return items
+
+
+@pytest.fixture
+def smallChunks(monkeypatch):
+    monkeypatch.setattr(cv, "RECT_CHUNK_SIZE", 4)
+    monkeypatch.setattr(cv, "JSON_CHUNK_SIZE", 3)
+
+
+def test_itemOrderKept(tmp_path, smallChunks):
+    items = mixedItems(200)
+    filePath = tmp_path.joinpath(f"layout{cv.COMPACT_SUFFIX}")
+    cv.writeCellview(filePath, HEADER, items)
+    assert cv.readCellview(filePath) == [*HEADER, *items]
+    with cv.cellviewReader(filePath) as reader:
+        assert reader.headerDict == {"viewType": "layout", "snapGrid": [10, 5]}
+        # rectangle chunks can be skipped without changing the other items.
+        assert list(reader.items(rects=False)) == [
+            item for item in items if item["type"] != "Rect"]
+
+
+def test_rectanglesOutsideColumnsStayJson(tmp_path):
+    items = [
+        {"type": "Rect", "tl": [0.5, 0], "br": [10, 10], "ang": 0, "ln": 1,
+         "fl": [1, 1]},
+        {"type": "Rect", "tl": [0, 0], "br": [2**31, 10], "ang": 0, "ln": 1,
+         "fl": [1, 1]},
+        {"type": "Rect", "tl": [0, 0], "br": [10, 10], "ang": 0, "ln": 1,
+         "fl": [1, 1], "nam": "extra"},
+        rectItem(3),
+    ]
+    filePath = tmp_path.joinpath(f"layout{cv.COMPACT_SUFFIX}")
+    cv.writeCellview(filePath, HEADER, items)
+    assert cv.readCellview(filePath) == [*HEADER, *items]
+
+
+def test_jsonConversionRoundTrip(tmp_path, smallChunks):
+    jsonPath = tmp_path.joinpath("layout.json")
+    compactPath = tmp_path.joinpath(f"layout{cv.COMPACT_SUFFIX}")
+    backPath = tmp_path.joinpath("back", "layout.json")
+    backPath.parent.mkdir()
+    contents = [*HEADER, *mixedItems(50)]
+    jsonPath.write_text(json.dumps(contents))
+    cv.convertCellview(jsonPath, compactPath)
+    cv.convertCellview(compactPath, backPath)
+    assert json.loads(backPath.read_text()) == contents
+
+
+def test_emptyCellview(tmp_path):
+    filePath = tmp_path.joinpath(f"layout{cv.COMPACT_SUFFIX}")
+    cv.writeCellview(filePath, HEADER, [])
+    assert cv.readCellview(filePath) == HEADER
+    assert [path.name for path in tmp_path.iterdir()] == [filePath.name]
+
+
+def test_cellviewPathPrefersCompactFile(tmp_path):
+    assert cv.cellviewPath(tmp_path, "layout") == tmp_path.joinpath("layout.json")
+    cv.writeCellview(tmp_path.joinpath(f"layout{cv.COMPACT_SUFFIX}"), HEADER, [])
+    assert cv.cellviewPath(tmp_path, "layout").suffix == cv.COMPACT_SUFFIX
+
+
+def test_notCompactFile(tmp_path):
+    filePath = tmp_path.joinpath(f"layout{cv.COMPACT_SUFFIX}")
+    filePath.write_bytes(b"not a cellview file")
+    with pytest.raises(ValueError):
+        cv.readCellview(filePath)
@@ -0,0 +1,130 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+# Net connectivity of the schematic scene: union-find grouping of nets through
+# their end points and the live net graph kept up to date while editing.
+
+import revedaEditor.backend.connectivity as con
+
+NET_ENDS = {
+    "a": ((0, 0), (100, 0)),
+    "b": ((100, 0), (100, 100)),
+    "c": ((100, 100), (0, 100)),
+    "d": ((500, 500), (600, 500)),
+}
+
+
+def netEnds(netName):
+    return NET_ENDS[netName]
+
+
+def createGraph(netNames=NET_ENDS):
+    graph = con.netGraph(netEnds)
+    for netName in netNames:
+        graph.addNet(netName)
+    return graph
+
+
+def test_disjointSetGroups():
+    groups = con.disjointSet("abcde")
+    groups.union("a", "b")
+    groups.union("c", "d")
+    groups.union("b", "d")
+    assert groups.connected("a", "c")
+    assert not groups.connected("a", "e")
+    assert sorted(sorted(group) for group in groups.groups().values()) == [
+        ["a", "b", "c", "d"],
+        ["e"],
+    ]
+
+
+def test_connectedGroupsThroughEndPoints():
+    groups = con.connectedGroups(NET_ENDS, netEnds)
+    assert groups.connected("a", "c")
+    assert not groups.connected("a", "d")
+
+
+def test_endPointsOnePointApartConnect():
+    ends = {"a": ((0, 0), (10, 0)), "b": ((11, 0), (20, 0)), "c": ((22, 0), (30, 0))}
+    groups = con.connectedGroups(ends, ends.get)
+    assert groups.connected("a", "b")
+    assert not groups.connected("b", "c")
+
+
+def test_connectedGroupsOfNoNets():
+    assert con.connectedGroups([], netEnds).groups() == dict()
+
+
+def test_graphComponent():
+    graph = createGraph()
+    assert graph.component("a") == {"a", "b", "c"}
+    assert graph.component("d") == {"d"}
+    assert graph.component("x") == set()
+
+
+def test_removingNetSplitsComponent():
+    graph = createGraph()
+    graph.takeDirty()
+    graph.removeNet("b")
+    assert graph.component("a") == {"a"}
+    assert graph.component("c") == {"c"}
+    dirtyNets, removedNets, _ = graph.takeDirty()
+    assert dirtyNets == {"a", "c"}
+    assert removedNets == {"b"}
+
+
+def test_updateNetRehashesMovedEnds():
+    ends = dict(NET_ENDS)
+    graph = con.netGraph(ends.get)
+    for netName in ends:
+        graph.addNet(netName)
+    ends["d"] = ((0, 100), (0, 0))
+    graph.updateNet("d")
+    assert graph.component("a") == {"a", "b", "c", "d"}
+
+
+def test_netsTouchingIndependentOfAddingOrder():
+    forward = createGraph(["a", "b", "c", "d"])
+    backward = createGraph(["d", "c", "b", "a"])
+    assert forward.netsTouching((100, 50), 5) == ["b"]
+    assert forward.netsTouching((100, 0), 5) == backward.netsTouching((100, 0), 5)
+
+
+def test_clearedGraphCanBeRebuilt():
+    # the scene clears the graph when it is reloaded and adds the nets again.
+    graph = createGraph()
+    graph.clear()
+    assert len(graph) == 0
+    assert not graph.isDirty
+    assert graph.netsTouching((100, 0), 5) == []
+    assert graph.component("a") == set()
+    graph.addNet("a")
+    graph.addNet("b")
+    assert graph.component("a") == {"a", "b"}
+    assert graph.neighbours["a"] == ["b"]
+
+
+def test_emptyGraph():
+    graph = con.netGraph(netEnds)
+    assert graph.nets == set()
+    assert graph.netsNear((0, 0)) == []
+    assert graph.connectPointsIn(-10, -10, 10, 10) == []
+    assert graph.takeDirty() == (set(), set(), set())
@@ -0,0 +1,151 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+# GDS and OASIS export of layout items: shapes batched per cell and layer,
+# instances of the same master written as one cell and pcells with the same
+# parameters sharing a cell.
+
+import gdstk
+import pytest
+from PySide6.QtCore import QPoint
+
+import revedaEditor.backend.dataDefinitions as ddef
+import revedaEditor.common.layoutShapes as lshp
+import revedaEditor.fileio.gdsExport as gdse
+from revedaEditor.backend.pdkPaths import importPDKModule
+
+laylyr = importPDKModule("layoutLayers")
+pcells = importPDKModule("pcells")
+
+
+def createRect(left, top, right, bottom, layer=laylyr.m1Layer_drw):
+    return lshp.layoutRect(QPoint(left, top), QPoint(right, bottom), layer)
+
+
+def createInstance(master, x, y, flipTuple=(1, 1)):
+    instance = lshp.layoutInstance([], master)
+    instance.libraryName, instance.cellName, instance.viewName = master.viewTuple
+    instance.setPos(QPoint(x, y))
+    instance.flipTuple = flipTuple
+    return instance
+
+
+def exportItems(items, filePath, outputFormat=gdse.GDS_FORMAT):
+    exporter = gdse.gdsExporter("top", items, filePath)
+    exporter.outputFormat = outputFormat
+    exporter.gds_export()
+    if outputFormat == gdse.OASIS_FORMAT:
+        return exporter, gdstk.read_oas(filePath)
+    return exporter, gdstk.read_gds(filePath)
+
+
+def createNmos(width, x):
+    # pcells are evaluated when they are called with their parameters.
+    pcell = pcells.nmos()
+    pcell(width, 0.13, 1)
+    pcell.setPos(QPoint(x, 0))
+    return pcell
+
+
+def cellsByName(library):
+    return {cell.name: cell for cell in library.cells}
+
+
+def polygonTuples(cell):
+    return sorted((polygon.layer, polygon.datatype,
+                   tuple(map(tuple, polygon.points.tolist())))
+                  for polygon in cell.get_polygons())
+
+
+def polygonBoxes(cell):
+    return sorted((polygon.layer, *map(tuple, polygon.bounding_box()))
+                  for polygon in cell.get_polygons())
+
+
+@pytest.fixture
+def leafMaster(qapp):
+    return lshp.layoutMaster.fromShapes(
+        ddef.viewTuple("testLib", "leaf", "layout"),
+        [createRect(0, 0, 10, 20, laylyr.m2Layer_drw)])
+
+
+@pytest.mark.parametrize("outputFormat", gdse.EXPORT_FORMATS)
+def test_shapesOnTheirLayers(qapp, tmp_path, outputFormat):
+    items = [createRect(0, 0, 100, 50),
+             createRect(0, 100, 100, 150, laylyr.m2Layer_drw)]
+    _, library = exportItems(items, tmp_path.joinpath("top.gds"), outputFormat)
+    assert polygonTuples(cellsByName(library)["top"]) == [
+        (laylyr.m1Layer_drw.gdsLayer, 0,
+         ((0.0, 0.0), (100.0, 0.0), (100.0, 50.0), (0.0, 50.0))),
+        (laylyr.m2Layer_drw.gdsLayer, 0,
+         ((0.0, 100.0), (100.0, 100.0), (100.0, 150.0), (0.0, 150.0))),
+    ]
+
+
+def test_instancesOfMasterShareCell(tmp_path, leafMaster):
+    items = [createInstance(leafMaster, 200, 0),
+             createInstance(leafMaster, 400, 0, (1, -1))]
+    exporter, library = exportItems(items, tmp_path.joinpath("top.gds"))
+    assert exporter.cellCount == 2
+    top = cellsByName(library)["top"]
+    references = sorted(top.references, key=lambda reference: reference.origin)
+    assert {reference.cell.name for reference in references} == {
+        "testLib_leaf_layout"}
+    assert [reference.x_reflection for reference in references] == [False, True]
+    assert polygonBoxes(top) == [
+        (laylyr.m2Layer_drw.gdsLayer, (200.0, 0.0), (210.0, 20.0)),
+        (laylyr.m2Layer_drw.gdsLayer, (400.0, 0.0), (410.0, 20.0)),
+    ]
+
+
+def test_pcellsWithSameParametersShareCell(qapp, tmp_path):
+    items = [createNmos(4.0, 0), createNmos(4.0, 1000), createNmos(2.0, 2000)]
+    assert gdse.gdsExporter.extractPcellInstanceParameters(items[0]) == {
+        "width": 4.0, "length": 0.13, "nf": 1}
+    _, library = exportItems(items, tmp_path.joinpath("top.gds"))
+    top = cellsByName(library)["top"]
+    # references of a cell in a row are written as one repeated reference.
+    assert sum(max(reference.repetition.size, 1) for reference in
+               top.references) == 3
+    assert len({reference.cell.name for reference in top.references}) == 2
+
+
+def test_emptyLayout(qapp, tmp_path):
+    exporter, library = exportItems([], tmp_path.joinpath("empty", "top.gds"))
+    assert [cell.name for cell in library.cells] == ["top"]
+    assert library.cells[0].get_polygons() == []
+    assert exporter.cellCount == 1
+
+
+def test_gatheredItemsNotReadByExport(tmp_path, leafMaster, monkeypatch):
+    items = [createRect(0, 0, 100, 50), createInstance(leafMaster, 200, 0)]
+    exporter = gdse.gdsExporter("top", items, tmp_path.joinpath("top.gds"))
+    # the editor gathers the items before it starts the export job.
+    exporter.gatherItems()
+    monkeypatch.setattr(exporter, "gatherItem",
+                        lambda *args: pytest.fail("items read by the export"))
+    exporter.gds_export()
+    top = cellsByName(gdstk.read_gds(tmp_path.joinpath("top.gds")))["top"]
+    assert polygonBoxes(top) == [
+        (laylyr.m1Layer_drw.gdsLayer, (0.0, 0.0), (100.0, 50.0)),
+        (laylyr.m2Layer_drw.gdsLayer, (200.0, 0.0), (210.0, 20.0)),
+    ]
+    assert list(exporter.timings) == ["collect", "cells", "write"]
@@ -0,0 +1,144 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+# The design hierarchy index: references read from cellview files, where-used
+# queries, persistence of the index file and config views from live references.
+
+import os
+
+import revedaEditor.backend.dataDefinitions as ddef
+import revedaEditor.backend.hierarchyIndex as hidx
+
+from conftest import (LIBRARY_NAME, SCHEMATIC_HEADER, instanceItem,
+                      writeCellview)
+
+
+def view(cellName, viewName):
+    return ddef.viewTuple(LIBRARY_NAME, cellName, viewName)
+
+
+def createIndex(libraryDict, tmp_path):
+    return hidx.hierarchyIndex(libraryDict, tmp_path.joinpath(hidx.INDEX_FILE_NAME),
+                               maxWorkers=1)
+
+
+def test_refreshReadsReferences(libraryDict, tmp_path):
+    index = createIndex(libraryDict, tmp_path)
+    assert index.refresh() == {view("res", "symbol"), view("gnd", "symbol"),
+                               view("sub", "symbol"), view("sub", "schematic"),
+                               view("top", "schematic")}
+    assert index.references(view("top", "schematic")) == (
+        view("sub", "symbol"), view("res", "symbol"), view("gnd", "symbol"))
+    assert index.whereUsed(LIBRARY_NAME, "res") == [view("sub", "schematic"),
+                                                   view("top", "schematic")]
+    assert index.whereUsed(LIBRARY_NAME, "res", "layout") == []
+    assert index.impactedViews(LIBRARY_NAME, "res") == {view("sub", "schematic"),
+                                                        view("top", "schematic")}
+    assert index.impactedViews(LIBRARY_NAME, "top") == set()
+
+
+def test_savedIndexIsReused(libraryDict, tmp_path):
+    createIndex(libraryDict, tmp_path).refresh()
+    index = createIndex(libraryDict, tmp_path)
+    assert index.refresh() == set()
+    assert index.whereUsed(LIBRARY_NAME, "sub") == [view("top", "schematic")]
+
+
+def test_indexSavedOnlyOnChanges(libraryDict, libraryPath, tmp_path):
+    index = createIndex(libraryDict, tmp_path)
+    index.refresh()
+    indexPath = tmp_path.joinpath(hidx.INDEX_FILE_NAME)
+    indexPath.unlink()
+    index.refresh()
+    assert not indexPath.exists()
+    # a new file stamp alone is not written at once.
+    schematicPath = libraryPath.joinpath("top", "schematic.json")
+    stat = schematicPath.stat()
+    os.utime(schematicPath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert index.updateCellview(LIBRARY_NAME, "top", "schematic") == set()
+    assert not indexPath.exists()
+    writeCellview(libraryPath, "top", "schematic",
+                  SCHEMATIC_HEADER + [instanceItem("res", "I0", (0, 0))])
+    index.updateCellview(LIBRARY_NAME, "top", "schematic")
+    assert indexPath.exists()
+    assert index.whereUsed(LIBRARY_NAME, "sub") == []
+
+
+def test_removedCellviewIsForgotten(libraryDict, libraryPath, tmp_path):
+    index = createIndex(libraryDict, tmp_path)
+    index.refresh()
+    libraryPath.joinpath("sub", "schematic.json").unlink()
+    assert index.refresh() == {view("sub", "schematic")}
+    assert view("sub", "schematic") not in index
+    assert index.whereUsed(LIBRARY_NAME, "res") == [view("top", "schematic")]
+    assert index.viewNames(LIBRARY_NAME, "sub") == ["symbol"]
+
+
+def test_emptyLibrary(tmp_path):
+    libraryPath = tmp_path.joinpath("emptyLib")
+    libraryPath.mkdir()
+    libraryPath.joinpath("reveda.lib").write_text("")
+    # directories without a reveda.lib file are not libraries.
+    notLibraryPath = tmp_path.joinpath("notLib", "cell")
+    notLibraryPath.mkdir(parents=True)
+    notLibraryPath.joinpath("schematic.json").write_text("[]")
+    index = hidx.hierarchyIndex({"emptyLib": libraryPath,
+                                 "notLib": notLibraryPath.parent})
+    assert index.refresh() == set()
+    assert len(index) == 0
+    assert index.impactedViews("emptyLib", "cell") == set()
+    assert index.configDict(ddef.viewTuple("emptyLib", "top", "schematic"),
+                            ["schematic", "symbol"]) == dict()
+
+
+def test_configDictFollowsSchematics(libraryDict, tmp_path):
+    index = createIndex(libraryDict, tmp_path)
+    index.refresh()
+    assert index.configDict(view("top", "schematic"), ["schematic", "symbol"]) == {
+        "sub": [LIBRARY_NAME, "schematic", ["schematic", "symbol"]],
+        "res": [LIBRARY_NAME, "symbol", ["symbol"]],
+        "gnd": [LIBRARY_NAME, "symbol", ["symbol"]],
+    }
+
+
+def test_configDictUsesLiveReferences(libraryDict, tmp_path):
+    # instances of the edited schematic which are not saved yet.
+    index = createIndex(libraryDict, tmp_path)
+    index.refresh()
+    liveReferences = {view("top", "schematic"): (view("res", "symbol"),)}
+    assert index.configDict(view("top", "schematic"), ["schematic", "symbol"],
+                            liveReferences=liveReferences) == {
+        "res": [LIBRARY_NAME, "symbol", ["symbol"]],
+    }
+
+
+def test_netlistDependencies(libraryDict, tmp_path):
+    index = createIndex(libraryDict, tmp_path)
+    index.refresh()
+    dependencies = index.netlistDependencies(view("top", "schematic"),
+                                             ["schematic", "symbol"], ["symbol"])
+    assert dependencies == {view("top", "schematic"), view("sub", "symbol"),
+                            view("sub", "schematic"), view("res", "symbol"),
+                            view("gnd", "symbol")}
+    newestStamp = max(index.viewStamp(viewTuple)[0] for viewTuple in dependencies)
+    assert not index.changedSince(dependencies, newestStamp)
+    assert index.changedSince(dependencies, newestStamp - 1)
+    assert index.changedSince([view("missing", "schematic")], newestStamp)
@@ -0,0 +1,161 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+# GDS import into layout cellviews: shapes on the process layers, references
+# as instances, via cells as via arrays and the state of repeated imports.
+
+import gdstk
+import pytest
+from PySide6.QtCore import QPoint
+
+import revedaEditor.common.layoutShapes as lshp
+import revedaEditor.fileio.compactCellview as cv
+import revedaEditor.fileio.gdsExport as gdse
+import revedaEditor.fileio.importGDS as impgds
+from revedaEditor.backend.pdkPaths import importPDKModule
+
+laylyr = importPDKModule("layoutLayers")
+
+M2_KEY = (laylyr.m2Layer_drw.gdsLayer, laylyr.m2Layer_drw.datatype)
+VIA1_KEY = (laylyr.via1Layer_drw.gdsLayer, laylyr.via1Layer_drw.datatype)
+UNMAPPED_KEY = (99, 0)
+
+
+@pytest.fixture
+def importLibraryPath(tmp_path):
+    libraryPath = tmp_path.joinpath("importLib")
+    libraryPath.mkdir()
+    libraryPath.joinpath("reveda.lib").write_text("")
+    return libraryPath
+
+
+def writeGds(filePath, cells):
+    library = gdstk.Library(unit=1e-6, precision=1e-9)
+    for cell in cells:
+        library.add(cell)
+    library.write_gds(filePath)
+    return filePath
+
+
+def rectangle(left, top, right, bottom, layerKey=M2_KEY):
+    return gdstk.rectangle((left, top), (right, bottom), *layerKey)
+
+
+def cellviewItems(libraryPath, cellName, viewName="layout"):
+    viewPath = cv.cellviewPath(libraryPath.joinpath(cellName), viewName)
+    return [item for item in cv.readCellview(viewPath) if "type" in item]
+
+
+def importGds(filePath, libraryPath):
+    importer = impgds.gdsImporter(filePath, libraryPath, "importLib")
+    return importer, sorted(importer.gds_import())
+
+
+def test_cellsShapesAndReferences(tmp_path, importLibraryPath):
+    leaf = gdstk.Cell("LEAF")
+    leaf.add(rectangle(0, 0, 10, 20))
+    top = gdstk.Cell("TOP")
+    top.add(rectangle(0, 0, 100, 50), rectangle(0, 0, 5, 5, UNMAPPED_KEY))
+    top.add(gdstk.Label("out", (50, 25), layer=M2_KEY[0], texttype=M2_KEY[1]))
+    top.add(gdstk.Reference(leaf, (200, 0)))
+    filePath = writeGds(tmp_path.joinpath("top.gds"), [leaf, top])
+    importer, cellNames = importGds(filePath, importLibraryPath)
+    assert cellNames == ["LEAF", "TOP"]
+    m2Index = laylyr.pdkDrawingLayers.index(laylyr.m2Layer_drw)
+    assert cellviewItems(importLibraryPath, "LEAF") == [
+        {"type": "Rect", "tl": [0, 0], "br": [10, 20], "ln": m2Index}]
+    items = {item["type"]: item for item in cellviewItems(importLibraryPath, "TOP")}
+    assert sorted(items) == ["Inst", "Label", "Rect"]
+    assert items["Rect"]["br"] == [100, 50]
+    assert items["Label"]["lt"] == "out"
+    assert laylyr.pdkTextLayers[items["Label"]["ln"]] is laylyr.m2Layer_txt
+    assert (items["Inst"]["lib"], items["Inst"]["cell"], items["Inst"]["loc"]) == (
+        "importLib", "LEAF", [200, 0])
+    assert importer.skippedShapes == {UNMAPPED_KEY: 1}
+    assert "shapes on unmapped layers: 99/0: 1" in importer.importReport()
+
+
+def test_viaCellReferencesBecomeViaArrays(tmp_path, importLibraryPath):
+    viaCell = gdstk.Cell("VIA")
+    viaCell.add(rectangle(0, 0, 20, 20, VIA1_KEY))
+    top = gdstk.Cell("TOP")
+    top.add(gdstk.Reference(viaCell, (500, 0), columns=3, rows=2, spacing=(40, 50)))
+    filePath = writeGds(tmp_path.joinpath("via.gds"), [viaCell, top])
+    _, cellNames = importGds(filePath, importLibraryPath)
+    # via cells are not written as cellviews of their own.
+    assert cellNames == ["TOP"]
+    (viaItem,) = cellviewItems(importLibraryPath, "TOP")
+    assert viaItem["type"] == "Via"
+    assert viaItem["via"]["vdt"] == "v1"
+    assert (viaItem["st"], viaItem["xn"], viaItem["yn"]) == ([500, 0], 3, 2)
+    assert (viaItem["xs"], viaItem["ys"]) == (20, 30)
+
+
+def test_emptyCell(tmp_path, importLibraryPath):
+    filePath = writeGds(tmp_path.joinpath("empty.gds"), [gdstk.Cell("EMPTY")])
+    importer, cellNames = importGds(filePath, importLibraryPath)
+    assert cellNames == ["EMPTY"]
+    assert cellviewItems(importLibraryPath, "EMPTY") == []
+    assert importer.importReport().startswith("GDS import of 1 cells")
+
+
+@pytest.mark.filterwarnings("ignore:Missing reference")
+def test_reusedImporterForgetsEarlierFile(tmp_path, importLibraryPath):
+    first = gdstk.Cell("A")
+    first.add(rectangle(0, 0, 10, 10))
+    firstTop = gdstk.Cell("TOP")
+    firstTop.add(gdstk.Reference(first, (50, 50)))
+    second = gdstk.Cell("ONLY")
+    second.add(gdstk.Reference("A", (0, 0)))
+    importer = impgds.gdsImporter(writeGds(tmp_path.joinpath("first.gds"),
+                                           [first, firstTop]),
+                                  importLibraryPath, "importLib")
+    assert sorted(importer.gds_import()) == ["A", "TOP"]
+    importer.inputFileObj = writeGds(tmp_path.joinpath("second.gds"), [second])
+    assert importer.gds_import() == ["ONLY"]
+    assert importer.missingCells == {"A"}
+    assert "missing cells: A" in importer.importReport()
+
+
+def test_compactCellviewsReplaceJsonFiles(tmp_path, importLibraryPath):
+    cell = gdstk.Cell("TOP")
+    cell.add(rectangle(0, 0, 10, 10))
+    filePath = writeGds(tmp_path.joinpath("top.gds"), [cell])
+    importGds(filePath, importLibraryPath)
+    importer = impgds.gdsImporter(filePath, importLibraryPath, "importLib")
+    importer.compact = True
+    importer.gds_import()
+    assert sorted(path.name for path in importLibraryPath.joinpath("TOP").iterdir()) == [
+        f"layout{cv.COMPACT_SUFFIX}"]
+    assert len(cellviewItems(importLibraryPath, "TOP")) == 1
+
+
+def test_exportImportRoundTrip(qapp, tmp_path, importLibraryPath):
+    items = [lshp.layoutRect(QPoint(0, 0), QPoint(100, 50), laylyr.m2Layer_drw),
+             lshp.layoutRect(QPoint(200, 0), QPoint(260, 40), laylyr.odLayer_drw)]
+    filePath = tmp_path.joinpath("roundTrip.gds")
+    gdse.gdsExporter("roundTrip", items, filePath).gds_export()
+    _, cellNames = importGds(filePath, importLibraryPath)
+    assert cellNames == ["roundTrip"]
+    rects = sorted((laylyr.pdkDrawingLayers[item["ln"]].name, *item["tl"],
+                    *item["br"]) for item in cellviewItems(importLibraryPath,
+                                                            "roundTrip"))
+    assert rects == [("m2", 0, 0, 100, 50), ("od", 200, 0, 260, 40)]
@@ -0,0 +1,155 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+# Design rule checks of a layout scene: width, spacing, enclosure and density
+# rules, live checks of edited regions and the markers of the violations.
+
+import pytest
+from PySide6.QtCore import QPoint, QRectF
+
+import revedaEditor.backend.dataDefinitions as ddef
+import revedaEditor.backend.layoutDrc as ldrc
+import revedaEditor.common.layoutShapes as lshp
+from revedaEditor.backend.pdkPaths import importPDKModule
+
+laylyr = importPDKModule("layoutLayers")
+
+M1_WIDTH = ddef.drcRuleTuple("M1.W", "width", laylyr.m1Layer_drw, 0.14)
+M1_SPACING = ddef.drcRuleTuple("M1.S", "spacing", laylyr.m1Layer_drw, 0.14)
+OD_ENCLOSURE = ddef.drcRuleTuple("OD.EN", "enclosure", laylyr.odLayer_drw, 0.06,
+                                 laylyr.contactLayer_drw)
+M1_DENSITY = ddef.drcRuleTuple("M1.DN", "maxDensity", laylyr.m1Layer_drw, 0.85,
+                               window=50)
+
+
+def createRect(left, top, right, bottom, layer=laylyr.m1Layer_drw):
+    return lshp.layoutRect(QPoint(left, top), QPoint(right, bottom), layer)
+
+
+def addShapes(scene, *shapes):
+    for shape in shapes:
+        scene.addItem(shape)
+    return shapes
+
+
+def markerRects(markers):
+    return sorted(marker.polygon().boundingRect().getCoords() for marker in markers)
+
+
+@pytest.fixture
+def drcEngine(layoutScene):
+    engine = layoutScene.drcEngine
+    engine.rules = [M1_WIDTH, M1_SPACING, OD_ENCLOSURE]
+    return engine
+
+
+def test_widthViolation(layoutScene, drcEngine):
+    # the grid has 100 points per micron.
+    addShapes(layoutScene, createRect(0, 0, 14, 100), createRect(100, 0, 113, 100))
+    markers = drcEngine.checkAll()
+    assert [marker.rule for marker in markers] == [M1_WIDTH]
+    assert markerRects(markers) == [(100.0, 0.0, 113.0, 100.0)]
+    assert all(marker.scene() is layoutScene for marker in markers)
+
+
+def test_spacingViolation(layoutScene, drcEngine):
+    addShapes(layoutScene, createRect(0, 0, 14, 100), createRect(28, 0, 42, 100),
+              createRect(55, 0, 69, 100))
+    markers = drcEngine.checkAll()
+    assert [marker.rule for marker in markers] == [M1_SPACING]
+    # the gap between the shapes, short of their corners by the rule tolerance.
+    assert markerRects(markers) == [(42.0, 0.25, 55.0, 99.75)]
+
+
+def test_enclosureViolation(layoutScene, drcEngine):
+    addShapes(layoutScene, createRect(300, 0, 400, 100, laylyr.odLayer_drw),
+              createRect(306, 10, 316, 20, laylyr.contactLayer_drw),
+              createRect(302, 40, 312, 50, laylyr.contactLayer_drw))
+    markers = drcEngine.checkAll()
+    assert [marker.rule for marker in markers] == [OD_ENCLOSURE]
+    assert drcEngine.report() == "DRC: 1 violations, OD.EN: 1"
+
+
+def test_densityViolation(layoutScene, drcEngine):
+    drcEngine.rules = [M1_DENSITY]
+    addShapes(layoutScene, createRect(0, 0, 5000, 5000))
+    assert [marker.rule for marker in drcEngine.checkAll()] == [M1_DENSITY]
+
+
+def test_instanceShapesAreChecked(layoutScene, drcEngine):
+    master = lshp.layoutMaster.fromShapes(
+        ddef.viewTuple("testLib", "leaf", "layout"), [createRect(0, 0, 10, 100)])
+    instance = lshp.layoutInstance([], master)
+    layoutScene.addItem(instance)
+    instance.setPos(QPoint(500, 0))
+    assert markerRects(drcEngine.checkAll()) == [(500.0, 0.0, 510.0, 100.0)]
+
+
+def test_emptyLayout(layoutScene, drcEngine):
+    assert drcEngine.checkAll() == []
+    assert drcEngine.checkRegion(QRectF(0, 0, 100, 100)) == []
+    assert drcEngine.report() == "DRC: no violations."
+
+
+def test_pdkRulesOnCleanLayout(layoutScene):
+    engine = layoutScene.drcEngine
+    assert engine.rules == ldrc.pdkRules()
+    addShapes(layoutScene, createRect(0, 0, 100, 100), createRect(200, 0, 300, 100))
+    assert engine.checkAll() == []
+
+
+def test_liveCheckOfEditedRegion(layoutScene, drcEngine):
+    addShapes(layoutScene, createRect(0, 0, 14, 100))
+    drcEngine.live = True
+    assert drcEngine.markers == []
+    newRect = createRect(20, 0, 34, 100)
+    layoutScene.addItem(newRect)
+    drcEngine.checkPending()
+    assert [marker.rule for marker in drcEngine.markers] == [M1_SPACING]
+    newRect.setPos(QPoint(100, 0))
+    drcEngine.checkPending()
+    assert drcEngine.markers == []
+    narrowRect = createRect(500, 0, 510, 100)
+    layoutScene.addItem(narrowRect)
+    drcEngine.checkPending()
+    assert [marker.rule for marker in drcEngine.markers] == [M1_WIDTH]
+    layoutScene.removeItem(narrowRect)
+    drcEngine.checkPending()
+    assert drcEngine.markers == []
+
+
+def test_regionCheckKeepsMarkersElsewhere(layoutScene, drcEngine):
+    addShapes(layoutScene, createRect(0, 0, 10, 100), createRect(5000, 0, 5010, 100))
+    drcEngine.checkAll()
+    drcEngine.checkRegion(QRectF(0, 0, 10, 100))
+    assert markerRects(drcEngine.markers) == [(0.0, 0.0, 10.0, 100.0),
+                                              (5000.0, 0.0, 5010.0, 100.0)]
+
+
+def test_clearMarkers(layoutScene, drcEngine):
+    # the scene clears the markers before it is reloaded.
+    addShapes(layoutScene, createRect(0, 0, 10, 100))
+    drcEngine.checkAll()
+    drcEngine.clearMarkers()
+    assert drcEngine.markers == []
+    assert not [item for item in layoutScene.items() if
+                isinstance(item, ldrc.drcMarker)]
+    assert drcEngine.checkAll() != []
@@ -0,0 +1,146 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+# Net extraction of a layout scene: shapes connected by touching and through
+# the cut layers of vias, nets named by their pins and labels, and extraction
+# again after edits.
+
+import pytest
+from PySide6.QtCore import QPoint
+
+import revedaEditor.backend.dataDefinitions as ddef
+import revedaEditor.common.layoutShapes as lshp
+from revedaEditor.backend.pdkPaths import importPDKModule
+
+laylyr = importPDKModule("layoutLayers")
+
+
+def createRect(left, top, right, bottom, layer=laylyr.m1Layer_drw):
+    return lshp.layoutRect(QPoint(left, top), QPoint(right, bottom), layer)
+
+
+def createPin(left, top, right, bottom, pinName, layer=laylyr.m1layer_pin):
+    return lshp.layoutPin(QPoint(left, top), QPoint(right, bottom), pinName, "Input",
+                          "Signal", layer)
+
+
+def createLabel(x, y, labelText, layer=laylyr.m1layer_txt):
+    return lshp.layoutLabel(QPoint(x, y), labelText, "Arial", "Regular", "10", "Left",
+                            "R0", layer)
+
+
+def addShapes(scene, *shapes):
+    for shape in shapes:
+        scene.addItem(shape)
+    return shapes
+
+
+@pytest.fixture
+def netExtractor(layoutScene):
+    return layoutScene.netExtractor
+
+
+def test_emptyLayout(netExtractor):
+    assert netExtractor.extract() == dict()
+    assert netExtractor.netsAt((0, 0)) == []
+    assert netExtractor.report() == "Net extraction: 0 nets, 0 polygons."
+
+
+def test_layoutWithoutConductingShapes(layoutScene, netExtractor):
+    addShapes(layoutScene, createLabel(0, 0, "vdd"))
+    assert netExtractor.extract() == dict()
+
+
+def test_touchingShapesFormOneNet(layoutScene, netExtractor):
+    first, second, third = addShapes(layoutScene, createRect(0, 0, 100, 20),
+                                     createRect(100, 0, 120, 200),
+                                     createRect(500, 0, 600, 20))
+    nets = netExtractor.extract()
+    # unnamed nets are numbered from the top left.
+    assert sorted(nets) == ["net0", "net1"]
+    assert set(nets["net0"].items) == {first, second}
+    assert nets["net1"].items == [third]
+
+
+def test_viaCutsConnectLayers(layoutScene, netExtractor):
+    m1Rect, m2Rect, _ = addShapes(
+        layoutScene, createRect(0, 0, 100, 40), createRect(60, 0, 300, 40,
+                                                            laylyr.m2Layer_drw),
+        createRect(70, 10, 90, 30, laylyr.via1Layer_drw))
+    nets = netExtractor.extract()
+    assert len(nets) == 1
+    assert netExtractor.netsOfItem(m1Rect) == netExtractor.netsOfItem(m2Rect)
+    assert netExtractor.netsAt((200, 20)) == list(nets.values())
+    assert netExtractor.netsAt((200, 20), "m1") == []
+
+
+def test_layersWithoutCutsStayApart(layoutScene, netExtractor):
+    addShapes(layoutScene, createRect(0, 0, 100, 40),
+              createRect(0, 0, 100, 40, laylyr.m2Layer_drw))
+    assert len(netExtractor.extract()) == 2
+
+
+def test_netsNamedByPinsAndLabels(layoutScene, netExtractor):
+    addShapes(layoutScene, createRect(0, 0, 100, 20), createPin(0, 0, 20, 20, "vdd"),
+              createRect(0, 100, 100, 120), createLabel(50, 110, "out"))
+    assert sorted(netExtractor.extract()) == ["out", "vdd"]
+
+
+def test_shortedPinsAreReported(layoutScene, netExtractor):
+    addShapes(layoutScene, createRect(0, 0, 200, 20), createPin(0, 0, 20, 20, "vdd"),
+              createPin(180, 0, 200, 20, "gnd"))
+    nets = netExtractor.extract()
+    assert len(nets) == 1
+    assert next(iter(nets.values())).names == ["gnd", "vdd"]
+    assert "shorts on" in netExtractor.report()
+
+
+def test_instancePinConnections(layoutScene, netExtractor):
+    master = lshp.layoutMaster.fromShapes(
+        ddef.viewTuple("testLib", "leaf", "layout"),
+        [createRect(0, 0, 20, 20), createPin(0, 0, 20, 20, "A")])
+    instance = lshp.layoutInstance([], master)
+    instance.instanceName = "I0"
+    addShapes(layoutScene, instance, createRect(20, 0, 200, 20))
+    nets = netExtractor.extract()
+    assert len(nets) == 1
+    assert next(iter(nets.values())).connections == [("I0", "A")]
+
+
+def test_extractedAgainAfterEdits(layoutScene, netExtractor):
+    first, second = addShapes(layoutScene, createRect(0, 0, 100, 20),
+                              createRect(100, 0, 200, 20))
+    assert len(netExtractor.extract()) == 1
+    second.setPos(QPoint(0, 100))
+    assert len(netExtractor.extract()) == 2
+    layoutScene.removeItem(second)
+    assert list(netExtractor.extract()) == ["net0"]
+    layoutScene.removeItem(first)
+    assert netExtractor.extract() == dict()
+
+
+def test_highlightsAreCleared(layoutScene, netExtractor):
+    addShapes(layoutScene, createRect(0, 0, 100, 20))
+    highlight = netExtractor.highlight(netExtractor.extract()["net0"])
+    assert highlight.scene() is layoutScene
+    netExtractor.clear()
+    assert netExtractor.highlights == []
+    assert highlight.scene() is None
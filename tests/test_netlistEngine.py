@@ -0,0 +1,120 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+# Headless netlisting of a schematic hierarchy and the netlist line templates
+# compiled once per symbol.
+
+import logging
+
+import pytest
+
+import revedaEditor.backend.netlistEngine as ne
+import revedaEditor.backend.schematicModel as scm
+
+from conftest import LIBRARY_NAME, SCHEMATIC_HEADER, writeCellview
+
+TOP_NETLIST = [
+    ".SUBCKT sub A B",
+    "RI0 B A 5k",
+    ".ENDS",
+    "XX1 vin net0 sub",
+    "XX2 net0 net1 sub",
+    "RI3 gnd! net1 1k",
+    ".END",
+]
+
+
+@pytest.fixture(autouse=True)
+def emptySubcircuitCache():
+    ne.subcircuitCache.clear()
+    yield
+    ne.subcircuitCache.clear()
+
+
+def createLabels(**values):
+    labels = dict()
+    for name, value in values.items():
+        labels[name] = scm.netlistLabel("", "NLPLabel", name)
+        labels[name].labelValue = value
+    return labels
+
+
+def netlistLines(libraryDict, tmp_path, cellName="top"):
+    engine = ne.xyceNetlistEngine(libraryDict, LIBRARY_NAME, cellName, "schematic",
+                                  ["schematic", "symbol"], ["symbol"], maxWorkers=1)
+    netlistPath = tmp_path.joinpath(f"{cellName}.cir")
+    engine.writeNetlist(netlistPath)
+    # the header ends with the global nets.
+    lines = netlistPath.read_text().split(".GLOBAL gnd!\n", 1)[1].splitlines()
+    return [line for line in lines if line]
+
+
+def test_templateFillsLabelsAndPinList():
+    template = ne.netlistLineTemplate("R@instName @pinList @R", ["@instName", "@R"],
+                                      dict())
+    labels = createLabels(**{"@instName": "I0", "@R": "r=2k"})
+    assert template.format(labels, "a b") == "RI0 a b r=2k\n"
+
+
+def test_templateMatchesLongerLabelNamesFirst():
+    template = ne.netlistLineTemplate("M@instName @w @width", ["@instName", "@w",
+                                                              "@width"], dict())
+    labels = createLabels(**{"@instName": "M1", "@w": "w=1u", "@width": "l=2u"})
+    assert template.format(labels, "") == "MM1 w=1u l=2u\n"
+
+
+def test_templateFillsAttributesWhenCompiled():
+    template = ne.netlistLineTemplate("X@instName @pinList %model {x}",
+                                      ["@instName"], {"model": "nch"})
+    assert template.fields == ["@instName", None]
+    assert template.format(createLabels(**{"@instName": "X1"}), "d g s b") == (
+        "XX1 d g s b nch {x}\n"
+    )
+
+
+def test_hierarchyNetlist(libraryDict, tmp_path):
+    assert netlistLines(libraryDict, tmp_path) == TOP_NETLIST
+
+
+def test_templatesCompiledOncePerSymbol(libraryDict, tmp_path, monkeypatch):
+    compiledLines = []
+
+    class countingTemplate(ne.netlistLineTemplate):
+        def __init__(self, formatLine, labelNames, attributes):
+            compiledLines.append(formatLine)
+            super().__init__(formatLine, labelNames, attributes)
+
+    monkeypatch.setattr(ne, "netlistLineTemplate", countingTemplate)
+    netlistLines(libraryDict, tmp_path)
+    assert sorted(compiledLines) == ["R@instName @pinList @R",
+                                     "X@instName @pinList sub"]
+
+
+def test_cachedSubcircuitsGiveSameNetlist(libraryDict, tmp_path, caplog):
+    netlistLines(libraryDict, tmp_path)
+    with caplog.at_level(logging.INFO, logger="reveda"):
+        assert netlistLines(libraryDict, tmp_path) == TOP_NETLIST
+    assert "Netlisting 0 of 2 cellviews, 2 from cache." in caplog.messages
+
+
+def test_emptySchematic(libraryDict, libraryPath, tmp_path):
+    writeCellview(libraryPath, "empty", "schematic", SCHEMATIC_HEADER)
+    assert netlistLines(libraryDict, tmp_path, "empty") == [".END"]
@@ -0,0 +1,73 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+# Pin net lookups of the headless schematic model and of the live connectivity
+# graph of the schematic scene must pick the same first net for a pin.
+
+import itertools
+
+import revedaEditor.backend.connectivity as con
+import revedaEditor.backend.schematicModel as scm
+
+PIN_LOCATION = (0, 50)
+NET_ITEMS = [
+    {"type": "scn", "st": [0, 0], "end": [0, 100], "nam": "a"},
+    {"type": "scn", "st": [100, 50], "end": [-100, 50], "nam": "b"},
+    {"type": "scn", "st": [0, 200], "end": [0, 50], "nam": "c"},
+    {"type": "scn", "st": [500, 500], "end": [600, 500], "nam": "d"},
+]
+
+
+def pinNetNames(netItems):
+    return [netItem.name for netItem in netItems]
+
+
+def test_pinNetsIndependentOfFileOrder():
+    orders = {
+        tuple(
+            pinNetNames(
+                scm.schematicModel.fromItems(list(items), None).pinNets(
+                    PIN_LOCATION, con.SYMBOL_PIN_HALF
+                )
+            )
+        )
+        for items in itertools.permutations(NET_ITEMS)
+    }
+    assert len(orders) == 1
+    assert sorted(orders.pop()) == ["a", "b", "c"]
+
+
+def test_pinNetsMatchSceneGraph():
+    model = scm.schematicModel.fromItems(NET_ITEMS, None)
+    graph = con.netGraph(lambda netItem: netItem.endPoints)
+    # the scene adds nets in editing order and may keep their ends swapped.
+    for netItem in reversed(model.nets):
+        graph.addNet(
+            scm.netSegment(netItem.end, netItem.start, netItem.name, 0)
+        )
+    assert pinNetNames(
+        graph.netsTouching(PIN_LOCATION, con.SYMBOL_PIN_HALF)
+    ) == pinNetNames(model.pinNets(PIN_LOCATION, con.SYMBOL_PIN_HALF))
+
+
+def test_unconnectedPinHasNoNets():
+    model = scm.schematicModel.fromItems(NET_ITEMS, None)
+    assert model.pinNets((1000, 1000), con.SYMBOL_PIN_HALF) == []
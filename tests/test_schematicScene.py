@@ -0,0 +1,159 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+# Net names of the schematic scene are kept up to date from its live connectivity
+# graph: only the connected groups changed by an edit are named again, and the
+# nets of the symbol pins are handed to the netlisting engine as they are.
+
+import pytest
+from PySide6.QtCore import QPoint
+
+import revedaEditor.backend.netlistEngine as ne
+import revedaEditor.backend.schematicModel as scm
+import revedaEditor.common.net as net
+
+from conftest import CELLVIEWS, LIBRARY_NAME
+
+
+@pytest.fixture(autouse=True)
+def emptySubcircuitCache():
+    ne.subcircuitCache.clear()
+    yield
+    ne.subcircuitCache.clear()
+
+
+@pytest.fixture
+def topScene(schematicScene):
+    schematicScene.createSchematicItems(CELLVIEWS[("top", "schematic")][2:])
+    schematicScene.updateNetNames()
+    return schematicScene
+
+
+def sceneSymbols(scene):
+    return {item.instanceName: item for item in scene.findSceneSymbolSet()}
+
+
+def pinNets(scene):
+    return {name: item.pinNetMap for name, item in sceneSymbols(scene).items()}
+
+
+def netAt(scene, point):
+    (netItem,) = scene.netGraph.netsNear(point)
+    return netItem
+
+
+def sceneNetlist(scene, libraryDict, tmp_path):
+    # the schematic editor netlists the items and pin nets of its scene.
+    topItems, topPinNets = scene.netlistItems()
+    engine = ne.xyceNetlistEngine(libraryDict, LIBRARY_NAME, "top", "schematic",
+                                  ["schematic", "symbol"], ["symbol"], maxWorkers=1)
+    netlistPath = tmp_path.joinpath("top.cir")
+    engine.writeNetlist(netlistPath, topItems, topPinNets=topPinNets)
+    lines = netlistPath.read_text().split(".GLOBAL gnd!\n", 1)[1].splitlines()
+    return [line for line in lines if line]
+
+
+def test_loadedSchematicNets(topScene):
+    assert pinNets(topScene) == {
+        "X1": {"A": "vin", "B": "net0"},
+        "X2": {"A": "net0", "B": "net1"},
+        "I3": {"PLUS": "gnd!", "MINUS": "net1"},
+        "G0": {"gnd!": "gnd!"},
+    }
+    assert sorted(topScene.schematicNets) == ["gnd!", "net0", "net1", "vin"]
+    # nothing changed since the last update.
+    assert topScene.updateNetNames() == set()
+
+
+def test_drawnWireKeepsOtherNames(topScene):
+    unchangedNets = {netAt(topScene, (-100, 0)), netAt(topScene, (200, 100))}
+    newNet = net.schematicNet(QPoint(80, 0), QPoint(120, 0))
+    topScene.addItem(newNet)
+    topScene.mergeSplitNets(newNet)
+    changedNets = topScene.updateNetNames()
+    (drawnNet,) = topScene.netGraph.netsTouching((100, 0), 1)
+    assert drawnNet in changedNets
+    # nets of the other groups are named again only through the changed symbols
+    # and keep their names.
+    assert {netItem.name for netItem in unchangedNets} == {"vin", "gnd!"}
+    assert {netItem.name for netItem in changedNets - unchangedNets} == {"net0"}
+    assert pinNets(topScene)["X2"] == {"A": "net0", "B": "net0"}
+    assert pinNets(topScene)["I3"] == {"PLUS": "gnd!", "MINUS": "net0"}
+    assert "net1" not in topScene.schematicNets
+
+
+def test_movedSymbolLeavesItsNets(topScene):
+    symbols = sceneSymbols(topScene)
+    symbols["I3"].setPos(symbols["I3"].pos() + QPoint(500, 0))
+    changedNets = topScene.updateNetNames()
+    assert netAt(topScene, (-100, 0)) not in changedNets
+    assert pinNets(topScene)["I3"] == {}
+    assert pinNets(topScene)["X2"] == {"A": "net0", "B": "net1"}
+    symbols["I3"].setPos(symbols["I3"].pos() - QPoint(500, 0))
+    topScene.updateNetNames()
+    assert pinNets(topScene)["I3"] == {"PLUS": "gnd!", "MINUS": "net1"}
+
+
+def test_deletedSymbolAndNet(topScene):
+    topScene.removeItem(sceneSymbols(topScene)["X2"])
+    topScene.updateNetNames()
+    assert pinNets(topScene)["X1"] == {"A": "vin", "B": "net0"}
+    topScene.removeItem(netAt(topScene, (120, 0)))
+    changedNets = topScene.updateNetNames()
+    assert netAt(topScene, (-100, 0)) not in changedNets
+    assert pinNets(topScene)["I3"] == {"PLUS": "gnd!"}
+    assert sorted(topScene.schematicNets) == ["gnd!", "net0", "vin"]
+
+
+def test_reloadedSceneKeepsNames(topScene):
+    names = pinNets(topScene)
+    topScene.reloadScene()
+    topScene.updateNetNames()
+    assert pinNets(topScene) == names
+
+
+def test_netlistUsesScenePinNets(topScene, libraryDict, tmp_path, monkeypatch):
+    groupedCells = []
+    groupAllNets = scm.schematicModel.groupAllNets
+
+    def countedGroupAllNets(model):
+        groupedCells.append(sorted(symbol.instanceName for symbol in model.symbols))
+        groupAllNets(model)
+
+    monkeypatch.setattr(scm.schematicModel, "groupAllNets", countedGroupAllNets)
+    lines = sceneNetlist(topScene, libraryDict, tmp_path)
+    assert lines[:3] == [".SUBCKT sub A B", "RI0 B A 5k", ".ENDS"]
+    # instance lines follow the order of the scene items.
+    assert sorted(lines[3:-1]) == [
+        "RI3 gnd! net1 1k",
+        "XX1 vin net0 sub",
+        "XX2 net0 net1 sub",
+    ]
+    assert lines[-1] == ".END"
+    # only the subcircuit read from its file has its nets grouped.
+    assert groupedCells == [["I0"]]
+
+
+def test_netlistAfterEdit(topScene, libraryDict, tmp_path):
+    sceneSymbols(topScene)["I3"].setPos(QPoint(700, 20))
+    lines = sceneNetlist(topScene, libraryDict, tmp_path)
+    assert "RI3 dnet0 dnet1 1k" in lines
+    assert "XX2 net0 net1 sub" in lines
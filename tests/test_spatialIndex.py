@@ -0,0 +1,165 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+# Region queries of the layout spatial index, kept up to date by the shapes of
+# the scene, and the packed R-trees it is built from.
+
+import numpy as np
+import pytest
+from PySide6.QtCore import QPoint
+
+import revedaEditor.backend.dataDefinitions as ddef
+import revedaEditor.backend.spatialIndex as sidx
+import revedaEditor.common.layoutShapes as lshp
+from revedaEditor.backend.pdkPaths import importPDKModule
+
+laylyr = importPDKModule("layoutLayers")
+
+
+def createRect(left, top, right, bottom, layer=laylyr.m1Layer_drw):
+    return lshp.layoutRect(QPoint(left, top), QPoint(right, bottom), layer)
+
+
+def masterView(cellName):
+    return ddef.viewTuple("testLib", cellName, "layout")
+
+
+def test_packedRTreeMatchesBruteForce():
+    generator = np.random.default_rng(1)
+    corners = generator.uniform(0, 1000, (500, 2))
+    bounds = np.column_stack((corners, corners + generator.uniform(1, 50, (500, 2))))
+    tree = sidx.packedRTree(bounds)
+    for left, top in generator.uniform(0, 1000, (50, 2)):
+        right, bottom = left + 100, top + 60
+        expected = np.flatnonzero(
+            (bounds[:, 0] <= right) & (bounds[:, 2] >= left)
+            & (bounds[:, 1] <= bottom) & (bounds[:, 3] >= top)
+        )
+        assert sorted(tree.query(left, top, right, bottom)) == expected.tolist()
+
+
+def test_emptyPackedRTree():
+    tree = sidx.packedRTree(np.empty((0, 4)))
+    assert len(tree) == 0
+    assert len(tree.query(0, 0, 10, 10)) == 0
+
+
+def test_queryByRegionAndLayer(layoutScene):
+    m1Rect = createRect(0, 0, 100, 100)
+    m2Rect = createRect(50, 50, 150, 150, laylyr.m2Layer_drw)
+    farRect = createRect(1000, 1000, 1100, 1100)
+    for shape in (m1Rect, m2Rect, farRect):
+        layoutScene.addItem(shape)
+    spatialIndex = layoutScene.spatialIndex
+    assert len(spatialIndex) == 3
+    assert set(spatialIndex.query((0, 0, 200, 200))) == {m1Rect, m2Rect}
+    assert spatialIndex.query((0, 0, 200, 200), laylyr.m1Layer_drw) == [m1Rect]
+    assert spatialIndex.shapesAt(QPoint(1050, 1050)) == [farRect]
+    assert spatialIndex.overlapping(m1Rect) == [m2Rect]
+    assert {layer.name for layer in spatialIndex.layers()} == {"m1", "m2"}
+
+
+def test_movedAndRemovedShapes(layoutScene):
+    shapes = [createRect(200 * index, 0, 200 * index + 100, 100) for index in
+              range(200)]
+    for shape in shapes:
+        layoutScene.addItem(shape)
+    spatialIndex = layoutScene.spatialIndex
+    # the first query builds the tree, later changes are tested separately.
+    assert spatialIndex.shapesAt((50, 50)) == [shapes[0]]
+    shapes[0].setPos(QPoint(0, 5000))
+    layoutScene.removeItem(shapes[1])
+    assert spatialIndex.shapesAt((50, 50)) == []
+    assert spatialIndex.shapesAt((250, 50)) == []
+    assert spatialIndex.shapesAt((50, 5050)) == [shapes[0]]
+    # enough changes to build the tree again.
+    for shape in shapes[2:]:
+        shape.setPos(QPoint(0, 5000))
+    assert len(spatialIndex.query((0, 4000, 100000, 6000))) == 199
+    assert spatialIndex.query((0, 0, 100000, 100)) == []
+
+
+def test_shapeMovedToAnotherLayer(layoutScene):
+    rect = createRect(0, 0, 100, 100)
+    layoutScene.addItem(rect)
+    assert layoutScene.spatialIndex.query(layer=laylyr.m1Layer_drw) == [rect]
+    rect.layer = laylyr.m2Layer_drw
+    assert layoutScene.spatialIndex.query(layer=laylyr.m1Layer_drw) == []
+    assert layoutScene.spatialIndex.query(layer=laylyr.m2Layer_drw) == [rect]
+
+
+def test_sceneHooksKeepLayerRegistryInStep(layoutScene):
+    layerRegistry = layoutScene.layerRegistry
+    rect = createRect(0, 0, 100, 100)
+    layoutScene.addItem(rect)
+    assert layerRegistry.layerShapes(laylyr.m1Layer_drw) == {rect}
+    rect.layer = laylyr.m2Layer_drw
+    assert layerRegistry.layerShapes(laylyr.m1Layer_drw) == set()
+    assert layerRegistry.layerShapes(laylyr.m2Layer_drw) == {rect}
+    layoutScene.removeItem(rect)
+    assert len(layerRegistry) == 0
+    assert layoutScene.spatialIndex.query() == []
+
+
+def test_clearedAndEmptyIndex(layoutScene):
+    spatialIndex = layoutScene.spatialIndex
+    assert spatialIndex.query() == []
+    assert spatialIndex.shapesAt((0, 0), laylyr.m1Layer_drw) == []
+    layoutScene.addItem(createRect(0, 0, 100, 100))
+    spatialIndex.query()
+    spatialIndex.clear()
+    assert len(spatialIndex) == 0
+    assert spatialIndex.query() == []
+
+
+def test_instancesFoundByTheLayersOfTheirMasters(layoutScene):
+    leafMaster = lshp.layoutMaster.fromShapes(masterView("leaf"),
+                                              [createRect(0, 0, 100, 100)])
+    instance = lshp.layoutInstance([], leafMaster)
+    layoutScene.addItem(instance)
+    spatialIndex = layoutScene.spatialIndex
+    assert spatialIndex.query((0, 0, 10, 10)) == [instance]
+    assert spatialIndex.query((0, 0, 10, 10), laylyr.m1Layer_drw) == [instance]
+    assert spatialIndex.query((0, 0, 10, 10), laylyr.m2Layer_drw) == []
+
+
+def test_masterLayersFromItemDataWithoutBuilding():
+    def shapeFactory(item):
+        pytest.fail("the master is built for a layer query")
+
+    leafMaster = lshp.layoutMaster.fromShapes(
+        masterView("leaf"), [createRect(0, 0, 100, 100, laylyr.m2Layer_drw)])
+    layerData = {
+        "top": ([laylyr.m1Layer_drw], [leafMaster]),
+        "bad": None,
+    }
+    topMaster = lshp.layoutMaster(masterView("top"), ["top"], shapeFactory,
+                                  lambda itemData: layerData[itemData[0]])
+    assert topMaster.hasLayer(laylyr.m1Layer_drw)
+    assert topMaster.hasLayer(laylyr.m2Layer_drw)
+    assert not topMaster.hasLayer(laylyr.odLayer_drw)
+    # masters whose layers cannot be read from their data are built instead.
+    badMaster = lshp.layoutMaster(masterView("bad"), ["bad"],
+                                  lambda item: createRect(0, 0, 10, 10),
+                                  lambda itemData: layerData[itemData[0]])
+    assert badMaster.hasLayer(laylyr.m1Layer_drw)
+    assert len(badMaster.shapes) == 1
+
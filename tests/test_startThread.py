@@ -0,0 +1,72 @@
+#    “Commons Clause” License Condition v1.0
+#   #
+#    The Software is provided to you by the Licensor under the License, as defined
+#    below, subject to the following condition.
+#   #
+#    Without limiting other conditions in the License, the grant of rights under the
+#    License will not include, and the License does not grant to you, the right to
+#    Sell the Software.
+#   #
+#    For purposes of the foregoing, “Sell” means practicing any or all of the rights
+#    granted to you under the License to provide to third parties, for a fee or other
+#    consideration (including without limitation fees for hosting or consulting/
+#    support services related to the Software), a product or service whose value
+#    derives, entirely or substantially, from the functionality of the Software. Any
+#    license notice or attribution required by the License must also include this
+#    Commons Clause License Condition notice.
+#   #
+#    Software: Revolution EDA
+#    License: Mozilla Public License 2.0
+#    Licensor: Revolution Semiconductor (Registered in the Netherlands)
+
+# Background jobs report their result, error or cancellation through the
+# callbacks given to startBackgroundJob, however quickly the job ends.
+
+from PySide6.QtCore import QThreadPool
+from PySide6.QtWidgets import QWidget
+
+from revedaEditor.gui.startThread import startBackgroundJob
+
+
+def runJob(qapp, fn, *args, **kwargs):
+    calls = []
+    parent = QWidget()
+    threadPool = QThreadPool()
+    startBackgroundJob(
+        parent,
+        "test job",
+        threadPool,
+        fn,
+        *args,
+        onFinished=lambda result: calls.append(("finished", result)),
+        onError=lambda message: calls.append(("error", message)),
+        onCancelled=lambda: calls.append(("cancelled",)),
+        **kwargs,
+    )
+    # the job may have ended before this line runs.
+    threadPool.waitForDone()
+    qapp.processEvents()
+    parent.deleteLater()
+    return calls
+
+
+def test_finishedJobResult(qapp):
+    def job(first, second, control=None):
+        return first + second
+
+    assert runJob(qapp, job, 1, second=2) == [("finished", 3)]
+
+
+def test_failedJobMessage(qapp):
+    def job(control=None):
+        raise ValueError("bad input")
+
+    assert runJob(qapp, job) == [("error", "bad input")]
+
+
+def test_cancelledJob(qapp):
+    def job(control=None):
+        control.cancel()
+        control.checkCancelled()
+
+    assert runJob(qapp, job) == [("cancelled",)]